@@ -4,6 +4,7 @@ Django admin配置
 
 from django.contrib import admin
 from .models import (
+    ServicePool,
     Room,
     Customer,
     AccommodationOrder,
@@ -12,13 +13,20 @@ from .models import (
     ACBill,
     AccommodationBill,
     StatisticsReport,
+    SchedulerSetting,
+    SchedulerConfigChange,
 )
 
 
+@admin.register(ServicePool)
+class ServicePoolAdmin(admin.ModelAdmin):
+    list_display = ["name", "capacity", "wait_time_slice", "power_budget", "description"]
+
+
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
-    list_display = ["room_id", "room_type", "status", "price_per_day"]
-    list_filter = ["room_type", "status"]
+    list_display = ["room_id", "room_type", "status", "price_per_day", "service_pool"]
+    list_filter = ["room_type", "status", "service_pool"]
 
 
 @admin.register(Customer)
@@ -63,3 +71,13 @@ class AccommodationBillAdmin(admin.ModelAdmin):
 @admin.register(StatisticsReport)
 class StatisticsReportAdmin(admin.ModelAdmin):
     list_display = ["report_id", "report_type", "start_date", "end_date"]
+
+
+@admin.register(SchedulerSetting)
+class SchedulerSettingAdmin(admin.ModelAdmin):
+    list_display = ["name", "value", "updated_at"]
+
+
+@admin.register(SchedulerConfigChange)
+class SchedulerConfigChangeAdmin(admin.ModelAdmin):
+    list_display = ["change_id", "operator", "reason", "created_at", "applied_at", "error"]
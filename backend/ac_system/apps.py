@@ -7,6 +7,10 @@ class AcSystemConfig(AppConfig):
     name = "ac_system"
 
     def ready(self):
+        from .versioning import connect_signals
+
+        connect_signals()
+
         if "runserver" in sys.argv:
             from .scheduler import scheduler
 
@@ -0,0 +1,201 @@
+"""
+异步只读接口（ASGI）
+
+轮询最频繁的空调状态、空调监控和账单接口的异步版本，在 ASGI 服务器（uvicorn 等，见 hotel_ac/app.py）中
+直接运行在事件循环上：调度器状态从已发布的快照读取，不切换线程；账单使用异步 ORM。
+- 普通请求：与同步版本返回相同的内容和 ETag（条件 GET）
+- 长轮询：?wait=秒数（不超过 LONG_POLL_MAX_SECONDS）且 If-None-Match 与当前 ETag 相同时挂起，
+  内容变化后立即返回 200，超时返回 304（带当前 ETag）。单个房间的状态只在该房间的内容变化时返回
+- 流式：text/event-stream，每次内容变化推送一条事件，空闲时每 STREAM_HEARTBEAT_SECONDS 秒发送心跳注释
+
+等待中的连接只是挂起的协程，版本号变化由每个事件循环一个的检查任务统一唤醒（VersionWatcher）。
+WSGI 下这些视图同样可用（Django 为每个请求创建事件循环），但每个连接仍占用一个线程
+"""
+
+import asyncio
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+
+from .models import ACDetailRecord, MealOrder
+from .renderers import dumps, json_response
+from .scheduler import ACScheduler, scheduler
+from .services import ACService, CheckOutService
+from .versioning import VersionWatcher, data_version, etag_matches, make_etag
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+state_watcher = VersionWatcher(lambda: scheduler.state_version.value, config.LONG_POLL_INTERVAL)
+data_watcher = VersionWatcher(lambda: data_version.value, config.LONG_POLL_INTERVAL)
+
+# 单进程调度器的读取只访问已发布的快照（内存，不阻塞），直接在事件循环中执行；
+# 分片路由可能经过管道读取调度进程，放到线程池中执行
+_IN_PROCESS = isinstance(scheduler, ACScheduler)
+
+
+async def _read_scheduler(func, *args):
+    if _IN_PROCESS:
+        return func(*args)
+    return await sync_to_async(func, thread_sensitive=False)(*args)
+
+
+def _parse_wait(request):
+    """长轮询等待时间（秒），不合法时返回 None"""
+    try:
+        wait = float(request.GET.get("wait", 0))
+    except ValueError:
+        return None
+    if not wait >= 0:
+        return None
+    return min(wait, config.LONG_POLL_MAX_SECONDS)
+
+
+def _not_modified(etag: str) -> HttpResponse:
+    response = HttpResponse(status=304)
+    response["ETag"] = etag
+    return response
+
+
+async def _conditional(request, watcher: VersionWatcher, read, compare: bool = False) -> HttpResponse:
+    """
+    条件 GET 与长轮询
+
+    read() 返回 (状态码, 响应数据)。If-None-Match 与当前 ETag 相同时：不等待则返回 304；
+    否则等待版本号变化后重新读取，compare 为 True 时内容与开始等待时相同则继续等待
+    """
+    wait = _parse_wait(request)
+    if wait is None:
+        return json_response(
+            request, {"code": 400, "data": None, "message": "wait 必须为非负数（秒）"}, status=400
+        )
+
+    version = watcher.version()
+    etag = make_etag(version)
+    if etag_matches(request, etag):
+        if wait <= 0:
+            return _not_modified(etag)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        baseline = await read() if compare else None
+        while True:
+            changed = await watcher.wait(version, deadline - loop.time())
+            if changed == version:
+                return _not_modified(etag)  # 超时
+            version, etag = changed, make_etag(changed)
+            result = await read()
+            if not compare or result != baseline:
+                break
+            if loop.time() >= deadline:
+                return _not_modified(etag)
+    else:
+        result = await read()
+
+    status_code, data = result
+    return json_response(request, data, status=status_code, etag=etag if status_code == 200 else None)
+
+
+async def _event_stream(watcher: VersionWatcher, read):
+    """内容变化时推送 data 事件（id 为版本号），空闲时发送心跳注释"""
+    version = watcher.version()
+    last = None
+    while True:
+        _, data = await read()
+        if data != last:
+            last = data
+            yield b"id: %d\nevent: state\ndata: %s\n\n" % (version, dumps(data))
+        changed = await watcher.wait(version, config.STREAM_HEARTBEAT_SECONDS)
+        if changed == version:
+            yield b": heartbeat\n\n"
+        version = changed
+
+
+def _stream_response(watcher: VersionWatcher, read) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(_event_stream(watcher, read), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # 反向代理不缓冲
+    return response
+
+
+def _room_state_reader(room_id: str):
+    async def read():
+        state = await _read_scheduler(ACService.get_state, room_id)
+        return 200, {"code": 200, "data": state, "message": "success"}
+
+    return read
+
+
+async def _read_monitor():
+    states = await _read_scheduler(ACService.get_all_states)
+    return 200, {"code": 200, "data": states, "message": "success"}
+
+
+class ACStateAsyncView(View):
+    """获取空调状态（异步，支持长轮询 ?wait=秒数）"""
+
+    async def get(self, request, room_id):
+        return await _conditional(request, state_watcher, _room_state_reader(room_id), compare=True)
+
+
+class ACStateStreamView(View):
+    """空调状态推送（text/event-stream）"""
+
+    async def get(self, request, room_id):
+        return _stream_response(state_watcher, _room_state_reader(room_id))
+
+
+class ACMonitorAsyncView(View):
+    """空调监控（异步，支持长轮询 ?wait=秒数）"""
+
+    async def get(self, request):
+        return await _conditional(request, state_watcher, _read_monitor)
+
+
+class ACMonitorStreamView(View):
+    """空调监控推送（text/event-stream）"""
+
+    async def get(self, request):
+        return _stream_response(state_watcher, _read_monitor)
+
+
+class BillDetailAsyncView(View):
+    """获取账单详情（异步 ORM，支持长轮询 ?wait=秒数）"""
+
+    async def get(self, request, room_id):
+        async def read():
+            success, msg, order = await CheckOutService.aget_active_order(room_id)
+            if not success:
+                return 400, {"code": 400, "data": None, "message": msg}
+
+            room_fee = CheckOutService.calculate_room_fee(order)
+            ac_fee = sum(
+                [
+                    Decimal(str(cost or 0))
+                    async for cost in ACDetailRecord.objects.filter(order=order).values_list("cost", flat=True)
+                ]
+            )
+            meal_fee = sum(
+                [fee async for fee in MealOrder.objects.filter(order=order).values_list("fee", flat=True)]
+            )
+            deposit_amount = order.deposit_amount or 0
+            return 200, {
+                "code": 200,
+                "data": {
+                    "room_id": room_id,
+                    "customer_name": order.customer.name,
+                    "check_in_time": order.check_in_time.strftime("%Y-%m-%d %H:%M"),
+                    "room_fee": round(float(room_fee), 2),
+                    "ac_fee": round(float(ac_fee), 2),
+                    "meal_fee": round(float(meal_fee), 2),
+                    "deposit_amount": round(float(deposit_amount), 2),
+                    "total_fee": round(float(room_fee + ac_fee + meal_fee - deposit_amount), 2),
+                },
+                "message": "success",
+            }
+
+        return await _conditional(request, data_watcher, read)
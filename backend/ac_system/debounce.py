@@ -0,0 +1,193 @@
+"""
+请求防抖 - 基于截止时间最小堆
+
+同一房间的请求：
+- 距上一次请求超过防抖间隔：立即处理（不进入防抖）
+- 间隔内的后续请求：与该房间待处理的请求按规则合并，
+  截止时间顺延为本次请求时间 + 防抖间隔，到期后恰好处理一次
+
+待处理请求保存在 room_id -> (序号, 截止时间, 请求) 中，堆里存放 (截止时间, 序号, room_id)。
+请求被合并时只压入新的堆元素，旧元素出堆时序号不匹配即丢弃（惰性删除），
+因此提交和取出的代价只与待处理请求数相关，与房间总数无关
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import REQUEST_DEBOUNCE_SECONDS
+
+from ac_system.metrics import counters
+
+
+def _merge_into_power_on(pending: dict, incoming: dict) -> dict:
+    """开机请求尚未处理时调风速 / 调温：并入开机请求，开机时直接使用新参数"""
+    merged = dict(pending)
+    for key in ("fan_speed", "target_temp", "mode"):
+        if key in incoming:
+            merged[key] = incoming[key]
+    return merged
+
+
+def _keep_power_off(pending: dict, incoming: dict) -> dict:
+    """关机请求尚未处理时调风速 / 调温：仍然关机（调节作用于关机的房间没有意义）"""
+    return pending
+
+
+def _power_on_after_off(pending: dict, incoming: dict) -> dict:
+    """关机请求尚未处理时开机：先关机再开机（结束当前服务和详单，开机次数照常计入）"""
+    merged = dict(incoming)
+    merged[POWER_OFF_FIRST] = True
+    return merged
+
+
+def _replace_power_on(pending: dict, incoming: dict) -> dict:
+    """开机请求尚未处理时再次开机：使用新请求的参数，保留待处理请求中先关机的要求"""
+    if not pending.get(POWER_OFF_FIRST):
+        return incoming
+    return _power_on_after_off(pending, incoming)
+
+
+def _replace(pending: dict, incoming: dict) -> dict:
+    """默认规则：后到的请求覆盖待处理的请求"""
+    return incoming
+
+
+# 合并后的开机请求带有此标记时，调度器先处理关机再处理开机
+POWER_OFF_FIRST = "power_off_first"
+
+# (待处理请求的 action, 新请求的 action) -> 合并函数；未列出的组合使用 _replace
+COALESCE_RULES: Dict[Tuple[str, str], Callable[[dict, dict], dict]] = {
+    ("power_on", "change_speed"): _merge_into_power_on,
+    ("power_on", "change_temp"): _merge_into_power_on,
+    ("power_on", "power_on"): _replace_power_on,
+    ("power_off", "change_speed"): _keep_power_off,
+    ("power_off", "change_temp"): _keep_power_off,
+    ("power_off", "power_on"): _power_on_after_off,
+}
+
+
+def coalesce(pending: dict, incoming: dict) -> dict:
+    """按 COALESCE_RULES 合并两个请求"""
+    rule = COALESCE_RULES.get((pending.get("action"), incoming.get("action")), _replace)
+    return rule(pending, incoming)
+
+
+class Debouncer:
+    """按房间防抖的请求队列（线程安全）"""
+
+    def __init__(self, interval: float = REQUEST_DEBOUNCE_SECONDS, name: str = "debounce"):
+        self.interval = interval
+        self.name = name  # 计数器名前缀
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._pending: Dict[str, Tuple[int, float, dict]] = {}
+        self._last_request: Dict[str, float] = {}  # room_id -> 最近一次请求时间
+
+    def submit(self, room_id: str, request: dict, now: Optional[float] = None) -> bool:
+        """
+        提交请求，返回 True 表示已进入防抖等待，False 表示调用方应立即处理
+
+        超过防抖间隔后到达的请求立即处理，该房间尚未处理的旧请求随之作废
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            last = self._last_request.get(room_id)
+            self._last_request[room_id] = now
+            if last is None or now - last >= self.interval:
+                if self._pending.pop(room_id, None) is not None:
+                    counters.incr(f"{self.name}.superseded")
+                counters.incr(f"{self.name}.immediate")
+                return False
+
+            entry = self._pending.get(room_id)
+            if entry is not None:
+                request = coalesce(entry[2], request)
+                counters.incr(f"{self.name}.coalesced")
+                counters.incr(f"{self.name}.coalesced.{request.get('action')}")
+            self._push(room_id, request, now + self.interval)
+            return True
+
+    def amend(self, room_id: str, request: dict) -> bool:
+        """
+        将立即处理的请求（调温）按规则并入该房间待处理的请求，不改变截止时间
+
+        返回是否存在待处理请求并已合并
+        """
+        with self._lock:
+            entry = self._pending.get(room_id)
+            if entry is None:
+                return False
+            seq, deadline, pending = entry
+            merged = coalesce(pending, request)
+            if merged is request:
+                # 覆盖规则不适用于立即处理的请求：待处理请求保持不变
+                return False
+            self._pending[room_id] = (seq, deadline, merged)
+            counters.incr(f"{self.name}.coalesced")
+            counters.incr(f"{self.name}.coalesced.{pending.get('action')}")
+            return True
+
+    def _push(self, room_id: str, request: dict, deadline: float):
+        seq = next(self._seq)
+        self._pending[room_id] = (seq, deadline, request)
+        heapq.heappush(self._heap, (deadline, seq, room_id))
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[str, dict]]:
+        """取出所有已到截止时间的请求（按截止时间先后）"""
+        return [(room_id, request) for _, room_id, request in self.pop_due_entries(now)]
+
+    def pop_due_entries(self, now: Optional[float] = None) -> List[Tuple[float, str, dict]]:
+        """取出所有已到截止时间的请求，返回 (截止时间, room_id, 请求)，用于与其他队列按截止时间合并"""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                deadline, seq, room_id = heapq.heappop(heap)
+                entry = self._pending.get(room_id)
+                if entry is None or entry[0] != seq:
+                    continue  # 已被合并或作废的旧元素
+                del self._pending[room_id]
+                due.append((deadline, room_id, entry[2]))
+                counters.incr(f"{self.name}.fired")
+                counters.incr(f"{self.name}.lag_ms", (now - deadline) * 1000)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """最早的截止时间（monotonic 秒），没有待处理请求时返回 None"""
+        with self._lock:
+            heap = self._heap
+            while heap:
+                deadline, seq, room_id = heap[0]
+                entry = self._pending.get(room_id)
+                if entry is not None and entry[0] == seq:
+                    return deadline
+                heapq.heappop(heap)
+            return None
+
+    def pending(self, room_id: str) -> Optional[dict]:
+        """该房间待处理的请求（没有时返回 None）"""
+        entry = self._pending.get(room_id)
+        return entry[2] if entry is not None else None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def clear(self, room_id: Optional[str] = None):
+        """丢弃待处理请求（room_id 为 None 时全部丢弃）"""
+        with self._lock:
+            if room_id is None:
+                self._pending.clear()
+                self._heap.clear()
+                self._last_request.clear()
+            else:
+                self._pending.pop(room_id, None)
+                self._last_request.pop(room_id, None)
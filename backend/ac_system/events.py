@@ -0,0 +1,104 @@
+"""
+调度事件日志 - 固定容量的环形缓冲区
+
+调度器在开关机、抢占、时间片轮转、待机、重启等时刻写入结构化事件，
+监控端按序号增量拉取（?since=<seq>），每次只读取新增事件
+
+写入不加锁：序号由 itertools.count 原子分配，每个槽位保存 (seq, event)；
+读取时按序号逐个校验槽位，遇到尚未写入或已被覆盖的槽位即停止
+"""
+
+import itertools
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import EVENT_LOG_CAPACITY
+
+EVENT_TYPES = (
+    "power_on",
+    "power_off",
+    "preempt",
+    "swap",
+    "wait",
+    "resume",
+    "standby",
+    "restart",
+)
+
+
+class EventLog:
+    """调度事件环形缓冲区"""
+
+    def __init__(self, capacity: int = EVENT_LOG_CAPACITY):
+        self.capacity = capacity
+        self._slots: List[Optional[tuple]] = [None] * capacity
+        self._counter = itertools.count(1)
+        self._last_seq = 0
+
+    def emit(self, event_type: str, room_id: str, **fields) -> int:
+        """写入一条事件，返回事件序号"""
+        seq = next(self._counter)
+        event = {
+            "seq": seq,
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ts": time.time(),
+            "type": event_type,
+            "room_id": room_id,
+        }
+        event.update(fields)
+        self._slots[seq % self.capacity] = (seq, event)
+        if seq > self._last_seq:
+            self._last_seq = seq
+        return seq
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def query(
+        self,
+        since: int = 0,
+        room_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+        limit: int = 500,
+    ) -> dict:
+        """
+        查询序号大于 since 的事件
+
+        返回 {"events": [...], "last_seq": n}，客户端下次以 last_seq 作为 since
+        """
+        if since > self._last_seq:
+            # 序号大于当前最大序号，说明服务已重启，从头读取
+            since = 0
+        start = max(since + 1, self._last_seq - self.capacity + 1, 1)
+        events = []
+        seq = start
+        while len(events) < limit:
+            slot = self._slots[seq % self.capacity]
+            if slot is None or slot[0] != seq:
+                break
+            event = slot[1]
+            if (room_id is None or event["room_id"] == room_id) and (
+                event_type is None or event["type"] == event_type
+            ):
+                events.append(event)
+            seq += 1
+        return {"events": events, "last_seq": max(seq - 1, since)}
+
+    def tail(self, count: int) -> List[dict]:
+        """最近 count 条事件"""
+        return self.query(since=max(0, self._last_seq - count))["events"]
+
+
+def format_event(event: dict) -> str:
+    """格式化为单行文本（用于测试日志页面）"""
+    parts = [f"[{event['time']}]", f"#{event['seq']}", event["type"], event["room_id"]]
+    for key in ("victim", "status", "fan_speed", "current_temp", "target_temp"):
+        if event.get(key) is not None:
+            parts.append(f"{key}={event[key]}")
+    return " ".join(str(p) for p in parts)
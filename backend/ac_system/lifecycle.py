@@ -0,0 +1,201 @@
+"""
+调度器生命周期（生产环境）
+
+WSGI / ASGI 服务器（gunicorn、uvicorn 等）不经过 runserver，AppConfig.ready() 不会启动调度器。
+hotel_ac/app.py 的应用工厂调用 lifecycle.start()：
+- 选主：数据目录下的文件锁（SCHEDULER_LOCK_FILE）保证同一时刻只有一个进程运行调度器；
+  没有拿到锁的进程作为备用，每隔 LEADER_RETRY_SECONDS 重试，原进程退出后接替（热启动恢复房间状态）
+- 优雅停止：进程退出时（atexit）停止主循环，结束服务中的详单并写入空调状态，然后释放文件锁
+- 健康检查：status() 供 /api/health/（存活）和 /api/ready/（就绪）使用
+"""
+
+import atexit
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# 进程角色
+UNMANAGED = "unmanaged"  # 未使用应用工厂（runserver、管理命令、测试）
+LEADER = "leader"  # 持有文件锁，运行调度器
+STANDBY = "standby"  # 未拿到文件锁，等待接替
+STOPPED = "stopped"
+
+
+def default_lock_path() -> Path:
+    """SCHEDULER_LOCK_FILE，为空时使用数据库文件所在目录下的 scheduler.lock"""
+    if config.SCHEDULER_LOCK_FILE:
+        return Path(config.SCHEDULER_LOCK_FILE)
+    return Path(settings.DATABASES["default"]["NAME"]).resolve().parent / "scheduler.lock"
+
+
+class FileLock:
+    """非阻塞的进程间排他文件锁（进程退出时由操作系统释放，不会因进程崩溃而残留）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """尝试获取锁，已被其他进程持有时立即返回 False"""
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            file.close()
+            return False
+        # 记录持有锁的进程号，便于排查
+        file.seek(0)
+        file.truncate()
+        file.write(f"{os.getpid()}\n")
+        file.flush()
+        self._file = file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class SchedulerLifecycle:
+    """管理本进程中调度器的选主、启动、接替和优雅停止"""
+
+    def __init__(self, lock_path: Optional[Path] = None):
+        self.lock_path = lock_path
+        self.lock: Optional[FileLock] = None
+        self.role = UNMANAGED
+        self.leader_since = None
+        self._stopping = threading.Event()
+        self._standby_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """参与选主：拿到文件锁则启动调度器，否则作为备用在后台重试（重复调用无效）"""
+        with self._lock:
+            if self.role != UNMANAGED:
+                return
+            self.lock = FileLock(self.lock_path or default_lock_path())
+            self._stopping.clear()
+            atexit.register(self.shutdown)
+            if self._try_lead():
+                return
+            self.role = STANDBY
+            logger.info(f"[Lifecycle] Scheduler lock {self.lock.path} is held, process {os.getpid()} on standby")
+            self._standby_thread = threading.Thread(target=self._standby_loop, daemon=True)
+            self._standby_thread.start()
+
+    def _try_lead(self) -> bool:
+        from ac_system.scheduler import scheduler
+
+        if not self.lock.acquire():
+            return False
+        try:
+            scheduler.start()
+        except Exception:
+            self.lock.release()
+            raise
+        self.role = LEADER
+        self.leader_since = timezone.now()
+        logger.info(f"[Lifecycle] Process {os.getpid()} elected scheduler leader")
+        return True
+
+    def _standby_loop(self):
+        while not self._stopping.wait(config.LEADER_RETRY_SECONDS):
+            with self._lock:
+                if self._stopping.is_set():
+                    return
+                try:
+                    if self._try_lead():
+                        return
+                except Exception as e:
+                    logger.error(f"[Lifecycle] Failed to take over scheduler: {e}")
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """优雅停止：调度器结束服务中的详单、写入空调状态后停止，再释放文件锁，备用进程随后接替"""
+        from ac_system.scheduler import scheduler
+
+        self._stopping.set()
+        with self._lock:
+            if self.role == LEADER:
+                try:
+                    scheduler.shutdown(config.SHUTDOWN_TIMEOUT if timeout is None else timeout)
+                except Exception as e:
+                    logger.error(f"[Lifecycle] Scheduler shutdown failed: {e}")
+                finally:
+                    self.lock.release()
+                    logger.info(f"[Lifecycle] Process {os.getpid()} released scheduler lock")
+            if self.role != UNMANAGED:
+                self.role = STOPPED
+        atexit.unregister(self.shutdown)
+
+    def status(self) -> dict:
+        """
+        存活与就绪状态
+
+        - 存活（live）：备用进程；或运行调度器且主循环延迟不超过 HEALTH_MAX_TICK_LAG
+        - 就绪（ready）：存活、本进程运行调度器（可以处理空调控制请求）且数据库可用
+        """
+        from ac_system.scheduler import scheduler
+
+        role = self.role
+        health = scheduler.health()
+        serving = role in (LEADER, UNMANAGED) and health["alive"]
+        lag = health["tick_lag"]
+        scheduler_ok = serving and lag is not None and lag <= config.HEALTH_MAX_TICK_LAG
+        database_ok = True
+        try:
+            connection.ensure_connection()
+        except Exception as e:
+            logger.error(f"[Lifecycle] Database unavailable: {e}")
+            database_ok = False
+        return {
+            "pid": os.getpid(),
+            "role": role,
+            "leader_since": self.leader_since,
+            "live": role == STANDBY or scheduler_ok,
+            "ready": scheduler_ok and database_ok,
+            "database": database_ok,
+            "scheduler": health,
+        }
+
+
+# 全局生命周期实例
+lifecycle = SchedulerLifecycle()
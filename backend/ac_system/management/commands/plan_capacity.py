@@ -0,0 +1,136 @@
+"""
+容量规划命令：蒙特卡洛模拟不同的同时服务上限和等待时间片，给出推荐配置
+
+示例：
+    python manage.py plan_capacity --capacity 2,3,4 --slice 60,120,180 --days 2000
+    python manage.py plan_capacity --from-history --target-p95 10
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ac_system.planner import Workload, plan, recommend
+from ac_system.policies import POLICIES
+from config import MAX_SERVICE_NUM, WAIT_TIME_SLICE
+
+
+def number_list(text: str, cast):
+    try:
+        return [cast(item) for item in text.split(",") if item.strip()]
+    except ValueError:
+        raise CommandError(f"无法解析列表: {text}") from None
+
+
+class Command(BaseCommand):
+    help = "容量规划：在虚拟时钟上模拟大量模拟日，比较 MAX_SERVICE_NUM × WAIT_TIME_SLICE 各配置的等待时长、换出频率和耗电量"
+
+    def add_arguments(self, parser):
+        defaults = Workload()
+        parser.add_argument("--capacity", default="1,2,3,4,5", help="同时服务上限列表（逗号分隔）")
+        parser.add_argument("--slice", default="60,120,180,240", help="等待时间片列表（模拟秒，逗号分隔）")
+        parser.add_argument("--days", type=int, default=1000, help="每种配置的模拟天数")
+        parser.add_argument("--seed", type=int, default=0, help="随机种子（第 i 天为 seed + i）")
+        parser.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数，1 为不使用进程池）")
+        parser.add_argument("--policy", choices=sorted(POLICIES), default=None, help="调度策略（默认与 SCHEDULING_POLICY 相同）")
+        parser.add_argument("--target-p95", type=float, default=5.0, help="推荐配置要求的 P95 等待时长（模拟分钟）")
+        parser.add_argument("--target-p99", type=float, default=10.0, help="推荐配置要求的 P99 等待时长（模拟分钟）")
+        parser.add_argument("--from-history", action="store_true", help="由数据库中的历史详单估计使用分布")
+        parser.add_argument("--rooms", type=int, default=None, help=f"房间数（默认 {defaults.rooms}，或数据库中的房间数）")
+        parser.add_argument("--occupancy", type=float, default=defaults.occupancy, help="入住率")
+        parser.add_argument("--sessions", type=float, default=defaults.sessions_per_day, help="入住房间每天平均开机次数")
+        parser.add_argument("--session-minutes", type=float, default=defaults.session_minutes, help="每次使用的平均时长（模拟分钟）")
+        parser.add_argument(
+            "--fan-mix",
+            default=",".join(f"{fan}:{share:g}" for fan, share in defaults.fan_mix),
+            help="风速比例，如 low:0.3,medium:0.5,high:0.2",
+        )
+        parser.add_argument("--mode", choices=("cooling", "heating"), default=defaults.mode, help="空调模式")
+
+    def handle(self, *args, **options):
+        capacities = number_list(options["capacity"], int)
+        slices = number_list(options["slice"], float)
+        if not capacities or not slices or min(capacities) < 1 or min(slices) <= 0:
+            raise CommandError("同时服务上限和等待时间片必须为正数")
+        if options["days"] < 1:
+            raise CommandError("--days 必须为正数")
+
+        workload = self.workload(options)
+        self.stdout.write(f"负载：{workload.describe()}")
+        self.stdout.write(
+            f"模拟 {len(capacities) * len(slices)} 种配置 × {options['days']} 天"
+            f"（当前配置：同时服务上限 {MAX_SERVICE_NUM}，时间片 {WAIT_TIME_SLICE}）"
+        )
+
+        started = time.perf_counter()
+        rows = plan(
+            workload,
+            capacities,
+            slices,
+            options["days"],
+            seed=options["seed"],
+            workers=options["workers"],
+            policy=options["policy"],
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write("-" * 112)
+        self.stdout.write(
+            f"{'上限':>6}{'时间片':>8}{'等待(次/天)':>12}{'等待/请求':>10}{'P50(分)':>10}{'P95(分)':>10}"
+            f"{'P99(分)':>10}{'最长(分)':>10}{'换出(次/时)':>12}{'耗电(度/天)':>12}{'ms/天':>10}"
+        )
+        for row in rows:
+            self.stdout.write(self.format_row(row))
+        self.stdout.write("-" * 112)
+        self.stdout.write(f"耗时 {elapsed:.1f} 秒（等待时长为模拟时间；ms/天 为单个模拟日的真实耗时）")
+
+        best, reason = recommend(rows, options["target_p95"], options["target_p99"])
+        if best is not None:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"推荐：MAX_SERVICE_NUM = {best['capacity']}，WAIT_TIME_SLICE = {best['wait_time_slice']:g}（{reason}）"
+                )
+            )
+
+    def workload(self, options) -> Workload:
+        if options["from_history"]:
+            from ac_system.models import ACDetailRecord, Room
+
+            records = ACDetailRecord.objects.order_by("room_id", "start_time").values(
+                "room_id", "start_time", "end_time", "start_temp", "target_temp", "fan_speed", "mode"
+            )
+            rooms = options["rooms"] or Room.objects.count()
+            try:
+                return Workload.from_history(records.iterator(), rooms)
+            except ValueError as e:
+                raise CommandError(str(e)) from None
+
+        fan_mix = []
+        for item in options["fan_mix"].split(","):
+            fan, _, share = item.partition(":")
+            try:
+                fan_mix.append((fan.strip(), float(share)))
+            except ValueError:
+                raise CommandError(f"无法解析风速比例: {item}") from None
+        fields = {
+            "occupancy": options["occupancy"],
+            "sessions_per_day": options["sessions"],
+            "session_minutes": options["session_minutes"],
+            "fan_mix": tuple(fan_mix),
+            "mode": options["mode"],
+        }
+        if options["rooms"]:
+            fields["rooms"] = options["rooms"]
+        if options["mode"] == "heating":
+            fields["targets"] = (22, 23, 24, 25)
+            fields["initial_temps"] = (10.0, 18.0)
+        return Workload(**fields)
+
+    @staticmethod
+    def format_row(row: dict) -> str:
+        return (
+            f"{row['capacity']:>6}{row['wait_time_slice']:>8g}{row['waits_per_day']:>12.1f}"
+            f"{row['wait_ratio']:>10.2f}{row['p50_wait']:>10.1f}{row['p95_wait']:>10.1f}"
+            f"{row['p99_wait']:>10.1f}{row['max_wait']:>10.1f}{row['swaps_per_hour']:>12.2f}"
+            f"{row['energy_per_day']:>12.1f}{row['ms_per_day']:>10.1f}"
+        )
@@ -0,0 +1,110 @@
+"""
+运行指标
+
+- LatencyStats：按路由统计接口耗时、响应大小，以及 304 节省的字节数和耗时
+- Counters：通用计数器，供调度器等模块记录事件次数
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class LatencyStats:
+    """接口延迟统计（由 LatencyMiddleware 写入）"""
+
+    # 记录完整响应大小的 URL 数上限，超过后清空重新记录
+    MAX_TRACKED_PATHS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, dict] = {}
+        # path -> (etag, 响应字节数, 耗时ms)：最近一次完整响应，用于估算 304 的节省量
+        self._full_responses: Dict[str, tuple] = {}
+
+    def record(
+        self,
+        route: str,
+        path: str,
+        status_code: int,
+        elapsed_ms: float,
+        size: int,
+        etag: Optional[str] = None,
+    ):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "bytes": 0,
+                    "not_modified": 0,
+                    "saved_bytes": 0,
+                    "saved_ms": 0.0,
+                }
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["bytes"] += size
+
+            if status_code == 304:
+                stats["not_modified"] += 1
+                full = self._full_responses.get(path)
+                if full and full[0] == etag:
+                    stats["saved_bytes"] += max(0, full[1] - size)
+                    stats["saved_ms"] += max(0.0, full[2] - elapsed_ms)
+            elif status_code == 200 and etag:
+                if len(self._full_responses) >= self.MAX_TRACKED_PATHS:
+                    self._full_responses.clear()
+                self._full_responses[path] = (etag, size, elapsed_ms)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            result = {}
+            for route, stats in self._routes.items():
+                row = dict(stats)
+                row["avg_ms"] = round(stats["total_ms"] / stats["count"], 3)
+                row["total_ms"] = round(stats["total_ms"], 3)
+                row["max_ms"] = round(stats["max_ms"], 3)
+                row["saved_ms"] = round(stats["saved_ms"], 3)
+                result[route] = row
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._full_responses.clear()
+
+
+class Counters:
+    """线程安全的命名计数器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+        self._started = time.monotonic()
+
+    def incr(self, name: str, amount: float = 1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name: str) -> float:
+        return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def elapsed(self) -> float:
+        """开始计数（创建或上次重置）以来的秒数，用于换算成频率"""
+        return time.monotonic() - self._started
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            self._started = time.monotonic()
+
+
+latency_stats = LatencyStats()
+counters = Counters()
@@ -0,0 +1,119 @@
+"""
+中间件
+"""
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import JsonResponse
+
+from .metrics import latency_stats
+from .profiling import PROFILE_KINDS, is_profiling_allowed, run_profiled
+
+
+class LatencyMiddleware:
+    """
+    接口延迟统计
+
+    按路由记录耗时和响应大小；对 304 响应，根据同一 URL 最近一次完整响应
+    估算节省的字节数和耗时。统计结果见 /api/admin/metrics/
+
+    同时支持同步和异步调用：ASGI 下异步视图不必切换到线程中执行（长轮询的耗时包含挂起时间）
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self.record(request, response, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.record(request, response, started)
+
+    @staticmethod
+    def record(request, response, started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else request.path
+        size = 0 if response.streaming else len(response.content)
+        etag = response.get("ETag")
+        if etag and etag.startswith("W/"):
+            etag = etag[2:]
+        latency_stats.record(
+            f"{request.method} {route}",
+            request.get_full_path(),
+            response.status_code,
+            elapsed_ms,
+            size,
+            etag,
+        )
+        response["X-Response-Time-Ms"] = f"{elapsed_ms:.2f}"
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    单请求性能分析
+
+    请求携带 ?__profile=cpu|mem 时，在分析器下执行该请求，
+    返回累计耗时最高的函数（cpu）或分配最多的位置（mem），原响应体不返回。
+    分析器需要在同一线程中同步执行请求，ASGI（异步调用）下不支持
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        kind = request.GET.get("__profile")
+        if not kind:
+            return self.get_response(request)
+
+        if kind not in PROFILE_KINDS:
+            return JsonResponse(
+                {"code": 400, "data": None, "message": "__profile 仅支持 cpu 或 mem"},
+                status=400,
+                json_dumps_params={"ensure_ascii": False},
+            )
+        if not is_profiling_allowed(request):
+            return JsonResponse(
+                {"code": 403, "data": None, "message": "无权进行性能分析"},
+                status=403,
+                json_dumps_params={"ensure_ascii": False},
+            )
+
+        label = f"{request.method}_{request.path}"
+        response, result = run_profiled(kind, label, self.get_response, request)
+        result["path"] = request.path
+        result["status_code"] = response.status_code
+        return JsonResponse(
+            {"code": 200, "data": result, "message": "success"},
+            json_dumps_params={"ensure_ascii": False},
+        )
+
+    async def __acall__(self, request):
+        if request.GET.get("__profile"):
+            return JsonResponse(
+                {"code": 400, "data": None, "message": "性能分析仅在 WSGI 模式（如 runserver）下可用"},
+                status=400,
+                json_dumps_params={"ensure_ascii": False},
+            )
+        return await self.get_response(request)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ac_system', '0008_add_power_on_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServicePool',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='名称')),
+                ('capacity', models.PositiveIntegerField(default=3, verbose_name='同时服务上限')),
+                ('wait_time_slice', models.PositiveIntegerField(default=120, verbose_name='等待时间片(秒)')),
+                ('description', models.CharField(blank=True, max_length=200, verbose_name='说明')),
+            ],
+            options={
+                'verbose_name': '服务池',
+                'verbose_name_plural': '服务池',
+                'db_table': 'service_pool',
+            },
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='service_pool',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rooms', to='ac_system.servicepool', verbose_name='服务池'),
+        ),
+    ]
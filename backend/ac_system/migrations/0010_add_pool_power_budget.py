@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ac_system', '0009_add_service_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicepool',
+            name='power_budget',
+            field=models.FloatField(default=0, verbose_name='功率预算(kW)'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ac_system', '0010_add_pool_power_budget'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerConfigChange',
+            fields=[
+                ('change_id', models.AutoField(primary_key=True, serialize=False, verbose_name='修改ID')),
+                ('changes', models.JSONField(verbose_name='修改内容')),
+                ('operator', models.CharField(blank=True, max_length=50, verbose_name='操作人')),
+                ('reason', models.CharField(blank=True, max_length=200, verbose_name='原因')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='提交时间')),
+                ('applied_at', models.DateTimeField(blank=True, null=True, verbose_name='生效时间')),
+            ],
+            options={
+                'verbose_name': '调度参数修改记录',
+                'verbose_name_plural': '调度参数修改记录',
+                'db_table': 'scheduler_config_change',
+                'ordering': ['-change_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SchedulerSetting',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='参数名')),
+                ('value', models.JSONField(verbose_name='取值')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='修改时间')),
+            ],
+            options={
+                'verbose_name': '调度参数',
+                'verbose_name_plural': '调度参数',
+                'db_table': 'scheduler_setting',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ac_system', '0011_add_scheduler_settings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulerconfigchange',
+            name='error',
+            field=models.CharField(blank=True, max_length=200, verbose_name='应用失败原因'),
+        ),
+    ]
@@ -6,6 +6,35 @@ from django.db import models
 from django.utils import timezone
 
 
+def room_floor(room_id: str) -> str:
+    """房间号对应的楼层（去掉末两位房间序号，如 301 -> 3, 1205 -> 12）"""
+    return room_id[:-2] if len(room_id) > 2 else room_id
+
+
+class ServicePool(models.Model):
+    """
+    服务池（一台中央空调主机或一个区域）：同时服务上限和等待时间片独立配置
+
+    power_budget 大于 0 时按压缩机功率预算调度，不再限制同时服务数
+    """
+
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="名称")
+    capacity = models.PositiveIntegerField(default=3, verbose_name="同时服务上限")
+    wait_time_slice = models.PositiveIntegerField(
+        default=120, verbose_name="等待时间片(秒)"
+    )
+    power_budget = models.FloatField(default=0, verbose_name="功率预算(kW)")
+    description = models.CharField(max_length=200, blank=True, verbose_name="说明")
+
+    class Meta:
+        db_table = "service_pool"
+        verbose_name = "服务池"
+        verbose_name_plural = "服务池"
+
+    def __str__(self):
+        return f"服务池 {self.name}"
+
+
 class Room(models.Model):
     """房间模型"""
 
@@ -38,6 +67,15 @@ class Room(models.Model):
     price_per_day = models.DecimalField(
         max_digits=10, decimal_places=2, default=400, verbose_name="每日房价"
     )
+    # 未指定时属于默认服务池（config.DEFAULT_SERVICE_POOL）
+    service_pool = models.ForeignKey(
+        ServicePool,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="rooms",
+        verbose_name="服务池",
+    )
 
     class Meta:
         db_table = "room"
@@ -336,3 +374,40 @@ class Reservation(models.Model):
 
     def __str__(self):
         return f"预定 {self.reservation_id} - 房间 {self.room.room_id} - {self.name}"
+
+
+class SchedulerSetting(models.Model):
+    """运行时修改的调度参数（覆盖 config.py 中的同名配置，见 ac_system/runtime_config.py）"""
+
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="参数名")
+    value = models.JSONField(verbose_name="取值")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="修改时间")
+
+    class Meta:
+        db_table = "scheduler_setting"
+        verbose_name = "调度参数"
+        verbose_name_plural = "调度参数"
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class SchedulerConfigChange(models.Model):
+    """调度参数修改的审计日志：每次修改一条，changes 为 {参数名: {"old": 原值, "new": 新值}}"""
+
+    change_id = models.AutoField(primary_key=True, verbose_name="修改ID")
+    changes = models.JSONField(verbose_name="修改内容")
+    operator = models.CharField(max_length=50, blank=True, verbose_name="操作人")
+    reason = models.CharField(max_length=200, blank=True, verbose_name="原因")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="提交时间")
+    applied_at = models.DateTimeField(null=True, blank=True, verbose_name="生效时间")
+    error = models.CharField(max_length=200, blank=True, verbose_name="应用失败原因")
+
+    class Meta:
+        db_table = "scheduler_config_change"
+        verbose_name = "调度参数修改记录"
+        verbose_name_plural = "调度参数修改记录"
+        ordering = ["-change_id"]
+
+    def __str__(self):
+        return f"参数修改 {self.change_id}: {', '.join(self.changes)}"
@@ -0,0 +1,88 @@
+"""
+游标分页（keyset 分页）
+
+按排序字段的最后一行取值生成游标，下一页用 WHERE 条件从该位置继续，
+不使用 OFFSET，翻页代价与页码无关
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q
+
+
+class PaginationError(ValueError):
+    """分页参数无效"""
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise PaginationError("cursor 无效")
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError("cursor 无效")
+    return values
+
+
+def parse_limit(value: Optional[str], default: Optional[int], maximum: int) -> Optional[int]:
+    """解析 limit 参数；未提供时返回 default（None 表示不分页）"""
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError("limit 必须为整数")
+    if limit < 1 or limit > maximum:
+        raise PaginationError(f"limit 取值范围为 1-{maximum}")
+    return limit
+
+
+def paginate_values(
+    queryset,
+    lookups: List[str],
+    ordering: List[str],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    按 ordering 做游标分页并返回 values() 行
+
+    ordering 最后一个字段必须唯一（通常为主键）；返回 (行列表, 下一页游标)，
+    没有下一页时游标为 None
+    """
+    keys = [(o.lstrip("-"), o.startswith("-")) for o in ordering]
+    queryset = queryset.order_by(*ordering)
+
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        condition = Q()
+        for i, (field, desc) in enumerate(keys):
+            term = Q(**{f"{field}__{'lt' if desc else 'gt'}": values[i]})
+            for j, (prev_field, _) in enumerate(keys[:i]):
+                term &= Q(**{prev_field: values[j]})
+            condition |= term
+        queryset = queryset.filter(condition)
+
+    fetch = list(dict.fromkeys(lookups + [field for field, _ in keys]))
+    queryset = queryset.values(*fetch)
+    if limit is None:
+        return list(queryset), None
+
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([last[field] for field, _ in keys])
@@ -0,0 +1,400 @@
+"""
+容量规划（蒙特卡洛模拟）
+
+按入住和空调使用的概率分布（Workload，可由历史详单估计）随机生成大量模拟日，
+对每种配置（同时服务上限 MAX_SERVICE_NUM × 等待时间片 WAIT_TIME_SLICE）在虚拟时钟上
+用真实的调度逻辑（ac_system.simulation.SimulatedScheduler）运行，统计等待时长分位数、换出频率和耗电量，
+并给出推荐配置。所有配置使用同一组模拟日（相同的随机种子），差异只来自配置本身。
+
+模拟日在进程池中运行；没有服务中 / 等待中的房间时直接跳到下一个请求或待机重启时刻，
+空闲时段不逐次执行主循环。入口：python manage.py plan_capacity
+"""
+
+import bisect
+import logging
+import math
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DEFAULT_SERVICE_POOL, TIME_SCALE, TOTAL_ROOMS
+
+DAY_MINUTES = 24 * 60
+DAY_TICKS = int(DAY_MINUTES * 60 / TIME_SCALE)  # 一天的主循环次数
+MIN_SESSION_MINUTES = 5
+SESSION_GAP_MINUTES = 30  # 由历史详单估计时，间隔不超过该时长的详单属于同一次使用（模拟分钟）
+
+# 默认的开机时刻分布（按小时的相对权重）：午后和晚间使用最多，凌晨最少
+DEFAULT_HOURLY = (
+    2, 1, 1, 1, 1, 1, 2, 3, 3, 3, 4, 5,
+    6, 7, 7, 6, 5, 5, 6, 8, 9, 9, 7, 4,
+)
+
+
+class Workload(NamedTuple):
+    """入住与空调使用的概率分布（时长均为模拟时间）"""
+
+    rooms: int = TOTAL_ROOMS
+    occupancy: float = 0.8  # 房间当天有客人入住的概率
+    sessions_per_day: float = 3.0  # 入住房间每天平均开机次数（泊松分布）
+    session_minutes: float = 90.0  # 每次使用的平均时长（指数分布）
+    hourly: Tuple[float, ...] = DEFAULT_HOURLY  # 开机时刻按小时的相对权重
+    fan_mix: Tuple[Tuple[str, float], ...] = (("low", 0.3), ("medium", 0.5), ("high", 0.2))
+    targets: Tuple[float, ...] = (22, 23, 24, 25, 26)  # 目标温度（均匀抽取）
+    initial_temps: Tuple[float, float] = (28.0, 33.0)  # 房间初始温度范围
+    mode: str = "cooling"
+    speed_change: float = 0.3  # 一次使用中调一次风速的概率
+
+    def describe(self) -> str:
+        fans = ", ".join(f"{fan} {share:.0%}" for fan, share in self.fan_mix)
+        return (
+            f"{self.rooms} 间房，入住率 {self.occupancy:.0%}，每天开机 {self.sessions_per_day:.2f} 次，"
+            f"每次 {self.session_minutes:.0f} 分钟，风速 {fans}，"
+            f"目标温度 {min(self.targets):g}-{max(self.targets):g}°C，{self.mode}"
+        )
+
+    @classmethod
+    def from_history(cls, records: Iterable[dict], rooms: int) -> "Workload":
+        """
+        由历史详单（按房间、开始时间排序的 ACDetailRecord.values()）估计使用分布
+
+        同一房间间隔不超过 SESSION_GAP_MINUTES 的详单（等待、调风速造成的拆分）合并为一次使用。
+        详单时间是真实时间，按 TIME_SCALE 换算成模拟时间；开机时刻分布只在 TIME_SCALE 为 1 时按记录估计。
+        入住率取 1，空房已计入每天平均开机次数。记录不足时抛出 ValueError
+        """
+        gap = SESSION_GAP_MINUTES * 60 / TIME_SCALE  # 真实秒
+        sessions = []  # [开始时间, 结束时间, 首条详单, 风速是否变化]
+        last_room = None
+        for record in records:
+            end = record["end_time"]
+            if end is None:
+                continue
+            current = sessions[-1] if sessions else None
+            if (
+                current is not None
+                and record["room_id"] == last_room
+                and (record["start_time"] - current[1]).total_seconds() <= gap
+            ):
+                current[1] = max(current[1], end)
+                current[3] = current[3] or record["fan_speed"] != current[2]["fan_speed"]
+            else:
+                sessions.append([record["start_time"], end, record, False])
+            last_room = record["room_id"]
+        if len(sessions) < 10:
+            raise ValueError(f"历史详单只有 {len(sessions)} 次使用，至少需要 10 次")
+
+        first = min(s[0] for s in sessions)
+        last = max(s[1] for s in sessions)
+        days = max((last - first).total_seconds() * TIME_SCALE / 86400, 1 / 24)
+        minutes = [(s[1] - s[0]).total_seconds() * TIME_SCALE / 60 for s in sessions]
+        fans = Counter(s[2]["fan_speed"] for s in sessions)
+        modes = Counter(s[2]["mode"] for s in sessions)
+        start_temps = sorted(s[2]["start_temp"] for s in sessions)
+        hourly = DEFAULT_HOURLY
+        if TIME_SCALE == 1:
+            hours = Counter(s[0].hour for s in sessions)
+            hourly = tuple(hours.get(h, 0) + 0.5 for h in range(24))  # 平滑，没有记录的小时也可能开机
+
+        return cls(
+            rooms=rooms,
+            occupancy=1.0,
+            sessions_per_day=len(sessions) / (rooms * days),
+            session_minutes=max(sum(minutes) / len(minutes), MIN_SESSION_MINUTES),
+            hourly=hourly,
+            fan_mix=tuple((fan, count / len(sessions)) for fan, count in fans.most_common()),
+            targets=tuple(sorted({float(s[2]["target_temp"]) for s in sessions})),
+            initial_temps=(
+                start_temps[int(0.05 * (len(start_temps) - 1))],
+                start_temps[int(0.95 * (len(start_temps) - 1))],
+            ),
+            mode=modes.most_common(1)[0][0],
+            speed_change=sum(1 for s in sessions if s[3]) / len(sessions),
+        )
+
+
+class DayResult(NamedTuple):
+    """一个或多个模拟日的结果（可累加）"""
+
+    days: int
+    waits: List[float]  # 每次等待的时长（模拟分钟）
+    events: Counter  # 调度事件次数
+    energy: float  # 耗电量（度）
+    records: int  # 详单数
+    ticks: int  # 实际执行的主循环次数
+    seconds: float  # 真实耗时
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """泊松分布抽样（均值较小，逐次相乘法）"""
+    limit = math.exp(-mean)
+    count, product = 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def generate_day(workload: Workload, rng: random.Random):
+    """
+    生成一天的请求：返回 (各房间初始温度, {主循环序号: [(房间号, 请求)]})
+
+    每间入住的房间按泊松分布决定开机次数，开机时刻按小时权重抽取，同一房间的使用不重叠
+    """
+    fans = [fan for fan, _ in workload.fan_mix]
+    weights = [share for _, share in workload.fan_mix]
+    hours = range(24)
+
+    def tick_of(minute: float) -> int:
+        return int(minute * 60 / TIME_SCALE)
+
+    temps = {}
+    events: Dict[int, List[Tuple[str, dict]]] = {}
+    for i in range(workload.rooms):
+        room_id = f"{i + 1:03d}"
+        temps[room_id] = round(rng.uniform(*workload.initial_temps), 1)
+        if rng.random() >= workload.occupancy:
+            continue
+        starts = sorted(
+            rng.choices(hours, workload.hourly)[0] * 60 + rng.uniform(0, 60)
+            for _ in range(_poisson(rng, workload.sessions_per_day))
+        )
+        free_at = 0.0
+        for start in starts:
+            start = max(start, free_at)
+            if start >= DAY_MINUTES - MIN_SESSION_MINUTES:
+                break
+            length = max(rng.expovariate(1 / workload.session_minutes), MIN_SESSION_MINUTES)
+            end = min(start + length, DAY_MINUTES - 1)
+            events.setdefault(tick_of(start), []).append(
+                (
+                    room_id,
+                    {
+                        "action": "power_on",
+                        "target_temp": rng.choice(workload.targets),
+                        "fan_speed": rng.choices(fans, weights)[0],
+                        "mode": workload.mode,
+                    },
+                )
+            )
+            if rng.random() < workload.speed_change:
+                events.setdefault(tick_of(rng.uniform(start, end)), []).append(
+                    (room_id, {"action": "change_speed", "fan_speed": rng.choices(fans, weights)[0]})
+                )
+            events.setdefault(tick_of(end), []).append((room_id, {"action": "power_off"}))
+            free_at = end + 1
+    return temps, events
+
+
+def simulate_day(
+    clock,
+    workload: Workload,
+    capacity: int,
+    wait_time_slice: float,
+    seed: int,
+    policy: Optional[str] = None,
+) -> DayResult:
+    """在虚拟时钟上模拟一天（clock 为已进入的 virtual_clock()）"""
+    from ac_system.simulation import SimulatedScheduler
+
+    started = time.perf_counter()
+    temps, events = generate_day(workload, random.Random(seed))
+    event_ticks = sorted(events)
+
+    clock.seconds = 0.0
+    scheduler = SimulatedScheduler(capacity, wait_time_slice, policy)
+    scheduler.init_rooms(list(temps))
+    for room_id, temp in temps.items():
+        scheduler.set_room_temperature(room_id, temp, workload.mode)
+
+    wait_queue = scheduler.pools[DEFAULT_SERVICE_POOL].wait_queue
+    waiting_since: Dict[str, int] = {}
+    waits: List[float] = []
+    minutes_per_tick = TIME_SCALE / 60
+    tick = ticks = 0
+    while tick < DAY_TICKS:
+        for room_id, request in events.get(tick, ()):
+            scheduler.submit_request(room_id, request)
+        scheduler._tick()
+        ticks += 1
+
+        for room_id in wait_queue:
+            waiting_since.setdefault(room_id, tick)
+        for room_id in [r for r in waiting_since if r not in wait_queue]:
+            waits.append((tick - waiting_since.pop(room_id)) * minutes_per_tick)
+
+        following = tick + 1
+        if scheduler.idle():
+            # 空闲：直接跳到下一个请求或待机重启时刻
+            index = bisect.bisect_right(event_ticks, tick)
+            following = event_ticks[index] if index < len(event_ticks) else DAY_TICKS
+            wakeup = scheduler.next_wakeup()
+            if wakeup is not None:
+                following = min(following, max(tick + 1, math.ceil(wakeup)))
+        clock.advance(following - tick)
+        tick = following
+    waits.extend((DAY_TICKS - since) * minutes_per_tick for since in waiting_since.values())
+
+    return DayResult(
+        days=1,
+        waits=waits,
+        events=scheduler.events,
+        energy=sum(r.energy_consumed for r in scheduler.service_manager.room_states.values()),
+        records=scheduler.service_manager.records,
+        ticks=ticks,
+        seconds=time.perf_counter() - started,
+    )
+
+
+# ---------- 进程池 ----------
+
+_clock = None  # 工作进程的虚拟时钟（_init_worker 中进入，进程退出前不恢复）
+_clock_context = None  # 保留引用：上下文管理器被回收时会恢复真实时钟
+
+
+def _init_worker():
+    """工作进程初始化：Django、关闭调度日志、调度器改用虚拟时钟"""
+    global _clock, _clock_context
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_ac.settings")
+    import django
+
+    django.setup()
+    logging.disable(logging.INFO)
+    from ac_system.simulation import virtual_clock
+
+    _clock_context = virtual_clock()
+    _clock = _clock_context.__enter__()
+
+
+def _run_days(workload: Workload, capacity: int, wait_time_slice: float, seeds: Sequence[int], policy):
+    """在工作进程中模拟多个模拟日并合并结果"""
+    return merge(
+        [simulate_day(_clock, workload, capacity, wait_time_slice, seed, policy) for seed in seeds]
+    )
+
+
+def merge(results: Sequence[DayResult]) -> DayResult:
+    waits: List[float] = []
+    events: Counter = Counter()
+    for result in results:
+        waits.extend(result.waits)
+        events.update(result.events)
+    return DayResult(
+        days=sum(r.days for r in results),
+        waits=waits,
+        events=events,
+        energy=sum(r.energy for r in results),
+        records=sum(r.records for r in results),
+        ticks=sum(r.ticks for r in results),
+        seconds=sum(r.seconds for r in results),
+    )
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(capacity: int, wait_time_slice: float, result: DayResult) -> dict:
+    """
+    一种配置的统计结果
+
+    等待时长的平均值和分位数按所有请求（开机 + 待机重启）计算：立即得到服务（直接分配或抢占）的请求
+    计为等待 0 分钟。只统计等待过的请求时，分位数接近时间片长度，几乎不随容量变化
+    """
+    hours = result.days * 24
+    requests = result.events["power_on"] + result.events["restart"]
+    immediate = max(0, requests - result.events["wait"])
+    waits = [0.0] * immediate + sorted(result.waits)
+    return {
+        "capacity": capacity,
+        "wait_time_slice": wait_time_slice,
+        "days": result.days,
+        "waits_per_day": len(result.waits) / result.days,
+        "wait_ratio": len(result.waits) / requests if requests else 0.0,
+        "mean_wait": sum(waits) / len(waits) if waits else 0.0,
+        "p50_wait": percentile(waits, 0.50),
+        "p95_wait": percentile(waits, 0.95),
+        "p99_wait": percentile(waits, 0.99),
+        "max_wait": waits[-1] if waits else 0.0,
+        "swaps_per_hour": (result.events["preempt"] + result.events["swap"]) / hours,
+        "energy_per_day": result.energy / result.days,
+        "records_per_day": result.records / result.days,
+        "ms_per_day": result.seconds * 1000 / result.days,
+        "ticks_per_day": result.ticks / result.days,
+    }
+
+
+def plan(
+    workload: Workload,
+    capacities: Sequence[int],
+    slices: Sequence[float],
+    days: int,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    policy: Optional[str] = None,
+    chunk_days: int = 50,
+) -> List[dict]:
+    """
+    对每种配置模拟 days 个模拟日（第 i 天的随机种子为 seed + i，各配置相同），返回各配置的统计结果
+
+    workers 为进程数（默认 CPU 核数），1 表示在当前进程中运行
+    """
+    configs = [(capacity, wait_slice) for capacity in capacities for wait_slice in slices]
+    seeds = [seed + i for i in range(days)]
+    chunks = [seeds[i : i + chunk_days] for i in range(0, days, chunk_days)]
+    tasks = [(c, chunk) for c in configs for chunk in chunks]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        from ac_system.simulation import virtual_clock
+
+        with virtual_clock() as clock:
+            outputs = [
+                merge([simulate_day(clock, workload, c[0], c[1], s, policy) for s in chunk])
+                for c, chunk in tasks
+            ]
+    else:
+        # 与调度器分片相同使用 spawn：工作进程重新初始化 Django，不继承父进程的线程和数据库连接
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(_run_days, workload, c[0], c[1], chunk, policy) for c, chunk in tasks
+            ]
+            outputs = [future.result() for future in futures]
+
+    by_config: Dict[Tuple[int, float], List[DayResult]] = {}
+    for (c, _), output in zip(tasks, outputs):
+        by_config.setdefault(c, []).append(output)
+    return [summarize(c[0], c[1], merge(by_config[c])) for c in configs]
+
+
+def recommend(
+    rows: Sequence[dict], target_p95: float, target_p99: Optional[float] = None
+) -> Tuple[Optional[dict], str]:
+    """
+    推荐配置：P95 等待不超过 target_p95 分钟（指定 target_p99 时 P99 也不超过）的配置中同时服务上限最小的，
+    同一上限下选换出频率最低的；都达不到时选 P95 等待最短的
+    """
+    if not rows:
+        return None, "没有配置"
+    target = f"P95 等待不超过 {target_p95:g} 分钟"
+    if target_p99 is not None:
+        target += f"、P99 不超过 {target_p99:g} 分钟"
+    feasible = [
+        r
+        for r in rows
+        if r["p95_wait"] <= target_p95 and (target_p99 is None or r["p99_wait"] <= target_p99)
+    ]
+    if feasible:
+        best = min(feasible, key=lambda r: (r["capacity"], r["swaps_per_hour"], r["p95_wait"]))
+        return best, f"{target}的配置中同时服务上限最小、换出最少"
+    best = min(rows, key=lambda r: (r["p95_wait"], r["capacity"], r["swaps_per_hour"]))
+    return best, f"没有配置满足{target}，选择 P95 等待最短的配置"
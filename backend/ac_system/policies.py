@@ -0,0 +1,281 @@
+"""
+调度策略
+
+调度器（ACScheduler）在以下决策点询问策略对象，队列操作、详单记录、状态更新仍由调度器完成：
+- admit：新请求（开机、等待中的房间调风速）能否立即得到服务、需要换出哪些服务对象
+- pick_victim：为等待中的房间腾出服务资源时换出哪些服务对象
+- pick_next：有空闲资源时等待队列中房间的分配顺序
+- on_slice_expired：时间片到期、需要换出服务对象的房间的处理顺序
+
+换出列表为 [(房间号, 房间记录)]：None 表示无法腾出足够资源（进入 / 留在等待队列），
+空列表表示不需要换出。资源按服务池计算（同时服务数或功率预算），见 cover()。
+
+策略只读取房间记录，不修改队列；同一策略对象可以被多个服务池共用。
+所有策略只从 preemptible() 的服务对象中选择换出对象：刚开始服务的房间在最小服务时长
+（MIN_SERVICE_QUANTUM）内不会被换出，时间片轮转还要求服务满 SWAP_HYSTERESIS 个时间片。
+protect=False 时不考虑这一保护（只用于 held_back() 判断保护期过后能否换出），
+保护开关作为参数传递，策略对象不保存调用状态，调度线程和请求线程可以同时调用
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Type
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from config import FAN_SPEED_PRIORITY, TEMP_THRESHOLD
+
+LOAD_EPSILON = 1e-9  # 功率之和的浮点误差
+
+Victims = Optional[List[Tuple[str, object]]]
+
+
+def cover(pool, fan_speed: str, candidates: List[Tuple[str, object]]) -> Victims:
+    """
+    按候选顺序选出需要换出的服务对象，使服务池能容纳 fan_speed 风速的房间
+
+    按同时服务数调度时只换出第一个候选；功率预算模式下依次换出直到腾出足够功率，
+    再把多换出的功率已经够用的房间放回。所有候选都换出仍不够时返回 None，不需要换出时返回空列表
+    """
+    need = pool.load() + pool.cost(fan_speed) - pool.limit()
+    victims = []
+    freed = 0.0
+    for candidate in candidates:
+        if freed >= need - LOAD_EPSILON:
+            break
+        victims.append(candidate)
+        freed += pool.cost(candidate[1].fan_speed)
+    if freed < need - LOAD_EPSILON:
+        return None
+    for candidate in list(victims):
+        cost = pool.cost(candidate[1].fan_speed)
+        if freed - cost >= need - LOAD_EPSILON:
+            victims.remove(candidate)
+            freed -= cost
+    return victims
+
+
+def remaining_delta(record) -> float:
+    """距目标温度还差多少度（已达到目标为 0）"""
+    if record.mode == "cooling":
+        return max(0.0, record.current_temp - record.target_temp)
+    return max(0.0, record.target_temp - record.current_temp)
+
+
+class SchedulingPolicy(ABC):
+    """调度策略基类：子类实现 pick_victim / pick_next / on_slice_expired（未全部实现的子类不能实例化）"""
+
+    name = ""
+    description = ""
+
+    def admit(self, pool, record) -> Victims:
+        """新请求：放得下就直接服务，否则按 pick_victim 抢占（preempt=True）"""
+        if pool.can_admit(record.fan_speed):
+            return []
+        return self.pick_victim(pool, record, preempt=True)
+
+    @abstractmethod
+    def pick_victim(self, pool, record, preempt: bool = False, protect: bool = True) -> Victims:
+        """
+        为 record 腾出服务资源需要换出的服务对象
+
+        preempt=True 为新请求抢占，False 为时间片到期的轮转；
+        protect=False 时不考虑最小服务时长保护（传给 _serving()）
+        """
+
+    @abstractmethod
+    def pick_next(self, pool) -> List[Tuple[str, object]]:
+        """等待队列中房间的分配顺序（调度器按此顺序分配，放不下的跳过）"""
+
+    @abstractmethod
+    def on_slice_expired(self, pool, expired: List[Tuple[str, object]]) -> List[Tuple[str, object]]:
+        """时间片到期的房间的处理顺序（调度器按此顺序逐个调用 pick_victim）"""
+
+    def preemptible(self, pool, record, preempt: bool = False, protect: bool = True) -> bool:
+        """
+        服务对象能否被换出
+
+        服务时长（与 WAIT_TIME_SLICE 单位相同）不足 MIN_SERVICE_QUANTUM 时不能被换出；
+        时间片轮转（preempt=False）还要求已服务 SWAP_HYSTERESIS 个时间片，被轮转进来的房间不会马上又被轮转出去。
+        protect=False 时总是可以换出
+        """
+        if not protect:
+            return True
+        served = record.get_service_elapsed()
+        if served < config.MIN_SERVICE_QUANTUM:
+            return False
+        return preempt or served >= pool.wait_time_slice * config.SWAP_HYSTERESIS
+
+    def held_back(self, pool, record, preempt: bool = False) -> bool:
+        """pick_victim 没有结果是否只是因为服务对象受保护（保护期过后可以换出）"""
+        if all(self.preemptible(pool, s, preempt) for s in pool.service_queue.values()):
+            return False
+        return self.pick_victim(pool, record, preempt, protect=False) is not None
+
+    def _serving(self, pool, record, preempt: bool = False, protect: bool = True):
+        """可以为 record 换出的服务对象"""
+        return [
+            (sid, sobj)
+            for sid, sobj in pool.service_queue.items()
+            if sid != record.room_id and self.preemptible(pool, sobj, preempt, protect)
+        ]
+
+
+class PriorityRoundRobin(SchedulingPolicy):
+    """
+    优先级抢占 + 时间片轮转（默认策略）
+
+    - 新请求抢占风速更低的服务对象（风速最低、服务时间最长的先换出）
+    - 时间片到期的房间换出同级或低优先级中服务时间最长的服务对象
+    - 空闲资源按优先级、是否已等满时间片、等待开始时间分配
+    """
+
+    name = "priority"
+    description = "优先级抢占 + 时间片轮转"
+
+    def pick_victim(self, pool, record, preempt: bool = False, protect: bool = True) -> Victims:
+        priority = record.get_priority()
+        if preempt:
+            candidates = [
+                c for c in self._serving(pool, record, True, protect) if c[1].get_priority() < priority
+            ]
+            # 选择风速最低的；如果风速相同，选择服务时长最长的
+            candidates.sort(key=lambda x: (x[1].get_priority(), -x[1].service_duration))
+        else:
+            candidates = [
+                c for c in self._serving(pool, record, False, protect) if c[1].get_priority() <= priority
+            ]
+            candidates.sort(key=lambda x: -x[1].service_duration)
+        return cover(pool, record.fan_speed, candidates)
+
+    def pick_next(self, pool) -> List[Tuple[str, object]]:
+        return sorted(
+            pool.wait_queue.items(),
+            key=lambda x: (
+                -x[1].get_priority(),
+                x[1].waited_full_slice,
+                x[1].wait_start_time,
+            ),
+        )
+
+    def on_slice_expired(self, pool, expired):
+        # 高优先级优先，同优先级按等待开始时间排序（先等待的优先）
+        return sorted(expired, key=lambda x: (-x[1].get_priority(), x[1].wait_start_time))
+
+
+class WeightedFairShare(SchedulingPolicy):
+    """
+    加权公平分享：各房间获得的耗电量与风速优先级成正比
+
+    份额 = 累计耗电量 / 风速优先级（高风的权重是低风的 3 倍，功率也是 3 倍，因此各房间服务时长大致相同）。
+    新请求不抢占；时间片到期时换出份额最大、且大于等待房间份额的服务对象，空闲资源优先分配给份额最小的房间
+    """
+
+    name = "fair_share"
+    description = "加权公平分享（按风速加权的累计耗电量）"
+
+    @staticmethod
+    def share(record) -> float:
+        return record.energy_consumed / max(FAN_SPEED_PRIORITY.get(record.fan_speed, 1), 1)
+
+    def pick_victim(self, pool, record, preempt: bool = False, protect: bool = True) -> Victims:
+        if preempt:
+            return None
+        share = self.share(record)
+        candidates = [c for c in self._serving(pool, record, False, protect) if self.share(c[1]) > share]
+        candidates.sort(key=lambda x: -self.share(x[1]))
+        return cover(pool, record.fan_speed, candidates)
+
+    def pick_next(self, pool):
+        return sorted(pool.wait_queue.items(), key=lambda x: (self.share(x[1]), x[1].wait_start_time))
+
+    def on_slice_expired(self, pool, expired):
+        return sorted(expired, key=lambda x: (self.share(x[1]), x[1].wait_start_time))
+
+
+class ShortestRemainingDelta(SchedulingPolicy):
+    """
+    剩余温差最小优先：离目标温度最近的房间先服务，尽快进入待机释放资源
+
+    新请求的剩余温差比服务对象小 TEMP_THRESHOLD 以上时抢占（剩余温差最大的先换出）；
+    时间片到期时换出剩余温差不小于等待房间的服务对象
+    """
+
+    name = "srdf"
+    description = "剩余温差最小优先"
+
+    def pick_victim(self, pool, record, preempt: bool = False, protect: bool = True) -> Victims:
+        delta = remaining_delta(record)
+        if preempt:
+            candidates = [
+                c
+                for c in self._serving(pool, record, True, protect)
+                if remaining_delta(c[1]) > delta + TEMP_THRESHOLD
+            ]
+        else:
+            candidates = [
+                c for c in self._serving(pool, record, False, protect) if remaining_delta(c[1]) >= delta
+            ]
+        candidates.sort(key=lambda x: -remaining_delta(x[1]))
+        return cover(pool, record.fan_speed, candidates)
+
+    def pick_next(self, pool):
+        return sorted(pool.wait_queue.items(), key=lambda x: (remaining_delta(x[1]), x[1].wait_start_time))
+
+    def on_slice_expired(self, pool, expired):
+        return sorted(expired, key=lambda x: (remaining_delta(x[1]), x[1].wait_start_time))
+
+
+class PriorityAging(PriorityRoundRobin):
+    """
+    带老化的优先级：等待中的房间每等满一个时间片优先级提高一级
+
+    新请求仍按风速优先级抢占；时间片轮转和空闲资源分配使用老化后的优先级，
+    低风速房间等待足够久后可以换出高风速的服务对象，不会被持续到来的高风请求饿死
+    """
+
+    name = "aging"
+    description = "带老化的优先级（每等满一个时间片提高一级）"
+
+    @staticmethod
+    def effective_priority(pool, record) -> float:
+        if record.wait_start_time is None or record.status != "waiting":
+            return record.get_priority()
+        return record.get_priority() + record.get_wait_elapsed() / max(pool.wait_time_slice, 1)
+
+    def pick_victim(self, pool, record, preempt: bool = False, protect: bool = True) -> Victims:
+        if preempt:
+            return super().pick_victim(pool, record, preempt=True, protect=protect)
+        priority = self.effective_priority(pool, record)
+        candidates = [
+            c for c in self._serving(pool, record, False, protect) if c[1].get_priority() <= priority
+        ]
+        candidates.sort(key=lambda x: (x[1].get_priority(), -x[1].service_duration))
+        return cover(pool, record.fan_speed, candidates)
+
+    def pick_next(self, pool):
+        return sorted(
+            pool.wait_queue.items(),
+            key=lambda x: (-self.effective_priority(pool, x[1]), x[1].wait_start_time),
+        )
+
+    def on_slice_expired(self, pool, expired):
+        return sorted(
+            expired, key=lambda x: (-self.effective_priority(pool, x[1]), x[1].wait_start_time)
+        )
+
+
+POLICIES: Dict[str, Type[SchedulingPolicy]] = {
+    policy.name: policy
+    for policy in (PriorityRoundRobin, WeightedFairShare, ShortestRemainingDelta, PriorityAging)
+}
+
+
+def get_policy(name: str) -> SchedulingPolicy:
+    """按名称创建调度策略（未知名称抛出 ValueError）"""
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"未知的调度策略: {name}（可选: {', '.join(POLICIES)}）") from None
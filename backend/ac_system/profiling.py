@@ -0,0 +1,232 @@
+"""
+按需性能分析工具
+- 单个请求：?__profile=cpu|mem（需 DEBUG 或管理员令牌）
+- 调度器：对接下来 N 次主循环进行分析
+
+分析结果保存为 pstats / tracemalloc 快照文件，便于离线对比
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+
+PROFILE_KINDS = ("cpu", "mem")
+TOP_N = 30
+
+
+def is_profiling_allowed(request) -> bool:
+    """检查请求是否允许开启性能分析"""
+    token = getattr(settings, "PROFILE_TOKEN", "")
+    if token:
+        provided = request.headers.get("X-Profile-Token") or request.GET.get(
+            "__token", ""
+        )
+        # 常量时间比较，响应时间不泄露令牌前缀
+        return hmac.compare_digest(provided.encode("utf-8"), token.encode("utf-8"))
+    # 未配置令牌时仅 DEBUG 模式可用
+    return settings.DEBUG
+
+
+def _profile_dir() -> str:
+    path = str(getattr(settings, "PROFILE_DIR", "profiles"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _profile_path(label: str, suffix: str) -> str:
+    safe = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return os.path.join(_profile_dir(), f"{safe}-{stamp}.{suffix}")
+
+
+def summarize_cpu(profiler: cProfile.Profile, limit: int = TOP_N) -> List[dict]:
+    """按累计耗时取前 N 个函数"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats("cumulative")
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        cc, nc, tt, ct, _ = stats.stats[func]
+        filename, lineno, name = func
+        rows.append(
+            {
+                "function": f"{filename}:{lineno}({name})",
+                "ncalls": nc,
+                "primitive_calls": cc,
+                "tottime": round(tt, 6),
+                "cumtime": round(ct, 6),
+            }
+        )
+    return rows
+
+
+def summarize_mem(snapshot: tracemalloc.Snapshot, limit: int = TOP_N) -> List[dict]:
+    """按分配大小取前 N 个分配位置"""
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+    rows = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        rows.append(
+            {
+                "location": f"{frame.filename}:{frame.lineno}",
+                "size_kb": round(stat.size / 1024, 2),
+                "count": stat.count,
+            }
+        )
+    return rows
+
+
+def run_profiled(kind: str, label: str, func: Callable, *args, **kwargs) -> Tuple:
+    """
+    在分析器下执行 func
+
+    返回 (func 返回值, 分析结果 dict)
+    """
+    started = time.perf_counter()
+    if kind == "mem":
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            result = func(*args, **kwargs)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        path = _profile_path(label, "snapshot")
+        snapshot.dump(path)
+        top = summarize_mem(snapshot)
+    else:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+        path = _profile_path(label, "pstats")
+        profiler.dump_stats(path)
+        top = summarize_cpu(profiler)
+
+    return result, {
+        "kind": kind,
+        "file": path,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "top": top,
+    }
+
+
+class TickProfiler:
+    """
+    调度器主循环分析器
+
+    arm(n, kind) 后，接下来 n 次主循环的开销累计到同一份分析结果中。
+    是否分析一次主循环在 begin_tick() 时决定：主循环进行中调用 arm() 只影响之后的主循环
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.kind: Optional[str] = None
+        self.remaining = 0
+        self.total = 0
+        self.last_result: Optional[dict] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started_tracing = False
+        self._elapsed = 0.0
+        self._session = 0  # 每次 arm() 加一
+        # 当前主循环的分析：(开始时的 session, 类型, 开始时刻)，未分析时为 None
+        self._tick: Optional[Tuple[int, str, float]] = None
+        self._tick_profiler: Optional[cProfile.Profile] = None
+
+    @property
+    def armed(self) -> bool:
+        return self.remaining > 0
+
+    def arm(self, ticks: int, kind: str = "cpu"):
+        """开启对接下来 ticks 次主循环的分析"""
+        with self._lock:
+            self._session += 1
+            self.kind = kind
+            self.remaining = ticks
+            self.total = ticks
+            self._elapsed = 0.0
+            self._profiler = cProfile.Profile() if kind == "cpu" else None
+
+    def status(self) -> dict:
+        return {
+            "armed": self.armed,
+            "kind": self.kind,
+            "remaining_ticks": self.remaining,
+            "last_result": self.last_result,
+        }
+
+    def begin_tick(self):
+        with self._lock:
+            if not self.armed:
+                self._tick = None
+                return
+            if self.kind == "mem":
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started_tracing = True
+            else:
+                self._tick_profiler = self._profiler
+                self._tick_profiler.enable()
+            self._tick = (self._session, self.kind, time.perf_counter())
+
+    def end_tick(self):
+        with self._lock:
+            if self._tick is None:
+                return
+            session, kind, started = self._tick
+            self._tick = None
+            if kind == "cpu":
+                self._tick_profiler.disable()
+                self._tick_profiler = None
+            if session != self._session:
+                # 主循环进行中重新 arm()：这次主循环不计入新的分析
+                return
+            self._elapsed += time.perf_counter() - started
+            self.remaining -= 1
+            if self.remaining > 0:
+                return
+
+            label = f"scheduler_{self.total}ticks"
+            if kind == "mem":
+                if not tracemalloc.is_tracing():
+                    # 分析期间 tracemalloc 被其他代码停止（如请求级内存分析），没有可用的快照
+                    self._started_tracing = False
+                    self.last_result = {
+                        "kind": kind,
+                        "ticks": self.total,
+                        "error": "tracemalloc 在分析期间被停止，没有生成快照",
+                    }
+                    return
+                snapshot = tracemalloc.take_snapshot()
+                if self._started_tracing:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+                path = _profile_path(label, "snapshot")
+                snapshot.dump(path)
+                top = summarize_mem(snapshot)
+            else:
+                path = _profile_path(label, "pstats")
+                self._profiler.dump_stats(path)
+                top = summarize_cpu(self._profiler)
+                self._profiler = None
+
+            self.last_result = {
+                "kind": kind,
+                "ticks": self.total,
+                "file": path,
+                "elapsed_ms": round(self._elapsed * 1000, 2),
+                "top": top,
+            }
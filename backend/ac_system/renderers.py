@@ -0,0 +1,136 @@
+"""
+快速 JSON 渲染器
+
+- 安装了 orjson 时使用 orjson 编码，否则回退到 DRF 的标准库编码器
+- Decimal / datetime 等类型的输出与 DRF JSONRenderer 保持一致；
+  orjson 不支持的数据（超过 64 位的整数等）回退到标准库编码
+- 与 DRF 的差异：orjson 把 NaN / Infinity 编码为 null（DRF 抛出 ValueError），
+  指数形式的浮点数写法不同（1e16 / 1e+16），解析后的值相同
+- 响应体超过阈值且客户端支持时进行 gzip 压缩（按 Accept-Encoding 的 q 值判断）
+"""
+
+import gzip
+import json
+from decimal import Decimal
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.utils import encoders
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+_ENCODER = encoders.JSONEncoder()
+
+
+def _default(obj):
+    # Decimal 最常见，直接转换；其余类型（datetime 等）交给 DRF 编码器，保证输出与原来一致
+    if type(obj) is Decimal:
+        return float(obj)
+    return _ENCODER.default(obj)
+
+
+def stdlib_dumps(data) -> bytes:
+    """标准库编码（与 DRF JSONRenderer 的紧凑输出相同）"""
+    return json.dumps(
+        data,
+        cls=encoders.JSONEncoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data) -> bytes:
+        try:
+            return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # 超过 64 位的整数等 orjson 不支持的数据：由标准库编码（或抛出与 DRF 相同的异常）
+            return stdlib_dumps(data)
+
+else:
+    dumps = stdlib_dumps
+
+
+class FastJSONRenderer(BaseRenderer):
+    """DRF JSONRenderer 的替代实现（输出格式相同）"""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        body = dumps(data)
+
+        renderer_context = renderer_context or {}
+        request = renderer_context.get("request")
+        response = renderer_context.get("response")
+        if request is None or response is None:
+            return body
+        return compress_body(body, request, response)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    客户端是否接受 gzip 编码
+
+    按 RFC 9110 解析 Accept-Encoding："gzip;q=0" 表示不接受；
+    未列出 gzip 时由 "*" 的 q 值决定
+    """
+    wildcard = False
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0  # 无法解析的 q 值：忽略这一项
+        if coding in ("gzip", "x-gzip"):
+            return q > 0
+        if coding == "*":
+            wildcard = q > 0
+    return wildcard
+
+
+def compress_body(body: bytes, request, response) -> bytes:
+    """响应体超过阈值且客户端支持时 gzip 压缩，并设置 Content-Encoding / Vary，ETag 改为弱校验"""
+    min_bytes = getattr(settings, "FAST_JSON_GZIP_MIN_BYTES", None)
+    if (
+        min_bytes is None
+        or len(body) < min_bytes
+        or not accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    ):
+        return body
+    body = gzip.compress(body, compresslevel=getattr(settings, "FAST_JSON_GZIP_LEVEL", 5))
+    response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    # 压缩后的字节与未压缩版本不同，ETag 改为弱校验
+    etag = response.get("ETag")
+    if etag and not etag.startswith("W/"):
+        response["ETag"] = "W/" + etag
+    return body
+
+
+def json_response(request, data, status: int = 200, etag: Optional[str] = None) -> HttpResponse:
+    """不经过 DRF 的 JSON 响应（异步视图用），输出与 FastJSONRenderer 相同"""
+    response = HttpResponse(status=status, content_type="application/json")
+    if etag:
+        response["ETag"] = etag
+    if data is not None:
+        response.content = compress_body(dumps(data), request, response)
+    return response
@@ -0,0 +1,205 @@
+"""
+运行时参数
+
+config.py 中可以在运行时修改的调度参数：修改保存在数据库（SchedulerSetting）中，启动时加载，
+由调度器在主循环边界整体生效（ACScheduler.reconfigure），每次修改记入审计日志（SchedulerConfigChange）：
+调度器应用后写入生效时间，应用失败时恢复修改前的设置并记录失败原因。
+调度器和服务在使用时读取 config 模块属性（config.X），修改 config 属性即可生效。
+
+TIME_SCALE 不能在运行时修改：已有详单的时长、服务 / 等待已经过的时间都按它换算，修改需要重启
+"""
+
+import copy
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+logger = logging.getLogger(__name__)
+
+FAN_SPEEDS = ("low", "medium", "high")
+
+class ApplyError(RuntimeError):
+    """调度器应用参数修改失败（已恢复修改前的取值）"""
+
+
+# 需要重启才能生效的参数：名称 -> 原因
+RESTART_ONLY = {
+    "TIME_SCALE": "已有详单的时长、服务 / 等待已经过的时间都按 TIME_SCALE 换算",
+}
+
+
+def _integer(minimum: int) -> Callable[[Any], int]:
+    def validate(value) -> int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError("必须为整数")
+        if value < minimum:
+            raise ValueError(f"不能小于 {minimum}")
+        return value
+
+    return validate
+
+
+def _number(minimum: float = 0.0, positive: bool = False) -> Callable[[Any], float]:
+    def validate(value) -> float:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("必须为数字")
+        if positive and value <= minimum:
+            raise ValueError(f"必须大于 {minimum:g}")
+        if value < minimum:
+            raise ValueError(f"不能小于 {minimum:g}")
+        return float(value)
+
+    return validate
+
+
+def _fan_table(value) -> Dict[str, float]:
+    """风速 -> 正数（low / medium / high 三项都要给出）"""
+    if not isinstance(value, dict) or set(value) != set(FAN_SPEEDS):
+        raise ValueError(f"必须包含且只包含 {' / '.join(FAN_SPEEDS)} 三种风速")
+    positive = _number(positive=True)
+    return {fan: positive(value[fan]) for fan in FAN_SPEEDS}
+
+
+def _policy(value) -> str:
+    from ac_system.policies import POLICIES
+
+    if value not in POLICIES:
+        raise ValueError(f"可选: {', '.join(POLICIES)}")
+    return value
+
+
+# 名称 -> (说明, 校验并规范化取值的函数；不合法时抛出 ValueError)
+PARAMETERS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    "MAX_SERVICE_NUM": ("默认服务池同时服务上限", _integer(1)),
+    "WAIT_TIME_SLICE": ("默认服务池等待时间片（秒）", _number(positive=True)),
+    "POWER_BUDGET_KW": ("默认服务池功率预算（kW，0 为按同时服务数调度）", _number()),
+    "SCHEDULING_POLICY": ("调度策略", _policy),
+    "MIN_SERVICE_QUANTUM": ("最小服务时长", _number()),
+    "SWAP_HYSTERESIS": ("轮转滞后（时间片数）", _number()),
+    "TEMP_CHANGE_RATE": ("各风速温度变化率（度/分钟）", _fan_table),
+    "FAN_SPEED_POWER": ("各风速耗电速率（度/分钟）", _fan_table),
+    "TEMP_RESTORE_RATE": ("回温速率（度/分钟）", _number(positive=True)),
+    "PRICE_PER_DEGREE": ("电价（元/度）", _number(positive=True)),
+}
+
+# 默认服务池的参数（默认服务池没有数据库配置时使用）
+POOL_PARAMETERS = ("MAX_SERVICE_NUM", "WAIT_TIME_SLICE", "POWER_BUDGET_KW")
+
+# config.py 中的原始取值（恢复默认时使用）
+DEFAULTS: Dict[str, Any] = {name: copy.deepcopy(getattr(config, name)) for name in PARAMETERS}
+
+
+def validate(changes: Dict[str, Any]) -> Dict[str, Any]:
+    """校验修改并返回规范化的取值；任一参数不合法时抛出 ValueError（说明所有错误）"""
+    values = {}
+    errors = []
+    for name, value in changes.items():
+        if name in RESTART_ONLY:
+            errors.append(f"{name} 不能在运行时修改（{RESTART_ONLY[name]}）")
+        elif name not in PARAMETERS:
+            errors.append(f"未知参数: {name}")
+        else:
+            try:
+                values[name] = PARAMETERS[name][1](value)
+            except ValueError as e:
+                errors.append(f"{name} {e}")
+    if not errors and ("POWER_BUDGET_KW" in values or "FAN_SPEED_POWER" in values):
+        # 与服务池相同：预算小于单台最高风速的功率时，高风房间永远无法得到服务
+        budget = values.get("POWER_BUDGET_KW", config.POWER_BUDGET_KW)
+        highest = max(values.get("FAN_SPEED_POWER", config.FAN_SPEED_POWER).values()) * 60
+        if 0 < budget < highest:
+            errors.append(f"POWER_BUDGET_KW 不能小于单台高风功率 {highest:g} kW")
+        if "FAN_SPEED_POWER" in values:
+            # 数据库中配置了功率预算的服务池同样受影响
+            pools = _pools_below(highest)
+            if pools:
+                errors.append(
+                    f"FAN_SPEED_POWER 使单台高风功率 {highest:g} kW 超过服务池 {', '.join(pools)} 的功率预算"
+                )
+    if errors:
+        raise ValueError("；".join(errors))
+    return values
+
+
+def _pools_below(power: float) -> List[str]:
+    """功率预算（大于 0）小于 power kW 的服务池"""
+    from ac_system.models import ServicePool
+
+    return list(
+        ServicePool.objects.filter(power_budget__gt=0, power_budget__lt=power)
+        .order_by("name")
+        .values_list("name", flat=True)
+    )
+
+
+def stored() -> Dict[str, Any]:
+    """数据库中保存的参数（校验后）；不合法的取值记录错误并跳过"""
+    from ac_system.models import SchedulerSetting
+
+    values = {}
+    for setting in SchedulerSetting.objects.all():
+        try:
+            values.update(validate({setting.name: setting.value}))
+        except ValueError as e:
+            logger.error(f"[RuntimeConfig] Ignored stored setting: {e}")
+    return values
+
+
+def current(names: Iterable[str] = PARAMETERS) -> Dict[str, Any]:
+    """参数的当前取值（本进程）"""
+    return {name: copy.deepcopy(getattr(config, name)) for name in names}
+
+
+def apply(values: Dict[str, Any]):
+    """修改本进程的 config 属性（调度器内请使用 ACScheduler.reconfigure，在主循环边界生效）"""
+    for name, value in values.items():
+        setattr(config, name, copy.deepcopy(value))
+
+
+def mark_applied(change_id: int):
+    """调度器应用修改后写入审计日志的生效时间（分片模式下各调度进程都会写入，以最后生效的为准）"""
+    from django.utils import timezone
+
+    from ac_system.models import SchedulerConfigChange
+
+    SchedulerConfigChange.objects.filter(change_id=change_id, error="").update(applied_at=timezone.now())
+
+
+def mark_failed(change_id: int, error: str):
+    """调度器应用修改失败：数据库中的设置恢复为修改前的取值，审计日志记录失败原因"""
+    from django.db import transaction
+
+    from ac_system.models import SchedulerConfigChange, SchedulerSetting
+
+    with transaction.atomic():
+        change = SchedulerConfigChange.objects.select_for_update().filter(change_id=change_id).first()
+        if change is None:
+            return
+        for name, diff in change.changes.items():
+            if diff["old"] == DEFAULTS.get(name):
+                SchedulerSetting.objects.filter(name=name).delete()
+            else:
+                SchedulerSetting.objects.update_or_create(name=name, defaults={"value": diff["old"]})
+        change.applied_at = None
+        change.error = error[:200]
+        change.save(update_fields=["applied_at", "error"])
+
+
+def describe() -> List[dict]:
+    """所有运行时参数：当前值、默认值、说明"""
+    values = current()
+    return [
+        {
+            "name": name,
+            "value": values[name],
+            "default": DEFAULTS[name],
+            "modified": values[name] != DEFAULTS[name],
+            "description": description,
+        }
+        for name, (description, _) in PARAMETERS.items()
+    ]
@@ -7,19 +7,34 @@
 - ACServiceManager（服务对象）：负责温控、计费、详单记录等实际操作
 """
 
+import heapq
 import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import wraps
+from django.db import connection, transaction
 from django.utils import timezone
-from typing import Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
 import logging
 
 import sys
 import os
 
 # 引入 Django 模型
-from ac_system.models import ACDetailRecord, AccommodationOrder, Room
+from ac_system.models import ACDetailRecord, ACState, AccommodationOrder, Room
+from ac_system.models import ServicePool as ServicePoolConfig
+from ac_system import runtime_config
+from ac_system.profiling import TickProfiler
+from ac_system.debounce import POWER_OFF_FIRST, Debouncer
+from ac_system.metrics import counters
+from ac_system.events import EventLog
+from ac_system.policies import LOAD_EPSILON, get_policy
+from ac_system.state_table import StateTable
+from ac_system.tracing import RequestTrace
+from ac_system.versioning import VersionCounter, bump_data_version
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
@@ -31,80 +46,524 @@ from config import (
     FAN_SPEED_POWER,
     TEMP_CHANGE_RATE,
     TEMP_RESTORE_RATE,
-    PRICE_PER_DEGREE,
     FAN_SPEED_PRIORITY,
     COOLING_MIN_TEMP,
     COOLING_MAX_TEMP,
     HEATING_MIN_TEMP,
     HEATING_MAX_TEMP,
     TEMP_THRESHOLD,
-    TIME_SCALE
+    TIME_SCALE,
+    DEFAULT_SERVICE_POOL,
+    POWER_BUDGET_KW,
+    DETAIL_RECORD_BATCH,
 )
 
 logger = logging.getLogger(__name__)
 
 
 # ============================================================
-# 数据类：ServiceObject 和 WaitingObject
+# 数据类：RoomRecord（房间空调记录）
 # ============================================================
 
 
-class ServiceObject:
-    """服务对象数据 - 正在接受服务的房间"""
+_ZERO_COST = Decimal("0.00")  # Decimal 不可变，所有新记录共用
+_NO_ORDER = 0  # 已查询过，房间没有入住中的订单
 
-    def __init__(self, room_id: str, target_temp: float, fan_speed: str, mode: str):
+# 关机和待机的房间按固定速率回温，温度在读取时计算
+RESTORING_STATUSES = ("off", "standby")
+
+
+def restore_rate() -> float:
+    """回温速率（度/秒）"""
+    return config.TEMP_RESTORE_RATE / 60 * TIME_SCALE
+
+
+def fan_power_kw(fan_speed: str) -> float:
+    """风速对应的压缩机功率（kW），由每分钟耗电度数折算"""
+    return config.FAN_SPEED_POWER.get(fan_speed, 0.5) * 60
+
+
+def restored_temp(start_temp: float, initial_temp: float, elapsed: float) -> float:
+    """从 start_temp 开始回温 elapsed 秒后的温度（到达初始温度后不再变化）"""
+    delta = restore_rate() * elapsed
+    if start_temp < initial_temp:
+        return min(start_temp + delta, initial_temp)
+    if start_temp > initial_temp:
+        return max(start_temp - delta, initial_temp)
+    return start_temp
+
+
+def clamp_target_temp(target_temp: float, mode: str) -> float:
+    """将目标温度限制在模式允许的范围内"""
+    if mode == "cooling":
+        return max(COOLING_MIN_TEMP, min(COOLING_MAX_TEMP, target_temp))
+    return max(HEATING_MIN_TEMP, min(HEATING_MAX_TEMP, target_temp))
+
+
+# ACState 字段 -> (房间状态字段, 缺省值)
+AC_STATE_COLUMNS = {
+    "is_on": ("is_on", False),
+    "status": ("status", "off"),
+    "mode": ("mode", "cooling"),
+    "current_temp": ("current_temp", 25),
+    "target_temp": ("target_temp", 25),
+    "fan_speed": ("fan_speed", "medium"),
+    "total_cost": ("cost", 0),
+    "total_energy": ("energy_consumed", 0),
+}
+
+# 各类请求可能改变的 ACState 字段；未列出的请求（开关机）写入全部字段
+REQUEST_AC_STATE_FIELDS = {
+    "change_temp": ("is_on", "status", "mode", "target_temp"),
+    "change_speed": ("is_on", "status", "fan_speed"),
+}
+
+
+class RoomRecord:
+    """
+    房间空调记录 - 每个房间一个，入住时创建、退房时删除
+
+    同一个对象既是 room_states 中的房间状态，也在服务队列 / 等待队列之间移动，
+    状态切换时只重置计时字段，不再重新创建对象。
+    支持字典式访问（record["current_temp"]），兼容原来的房间状态字典
+
+    关机 / 待机时只记录回温起点（_current_temp, restore_start），
+    current_temp 在读取时按经过的时间计算，主循环不再逐个房间更新
+    """
+
+    __slots__ = (
+        "room_id",
+        "status",
+        "is_on",
+        "_current_temp",  # 回温中为回温起点温度
+        "_initial_temp",
+        "restore_start",  # 回温起点（time.monotonic()），不在回温时为 None
+        "target_temp",
+        "fan_speed",
+        "mode",  # 'cooling' or 'heating'
+        "energy_consumed",  # 累计耗电量
+        "cost",  # 累计费用（Decimal）
+        # 服务中
+        "service_start_time",
+        "service_duration",  # 服务时长（秒）
+        "record_id",  # 关联的详单记录ID
+        "record_start_cost",  # 详单开始时的累计费用和能耗，用于计算增量
+        "record_start_energy",
+        "order_id",  # 入住订单号（入住时写入，None 为未知，_NO_ORDER 为没有入住订单）
+        # 等待中（停止送风和计费）
+        "wait_start_time",
+        "wait_duration",  # 分配的等待时长
+        "waited_full_slice",  # 是否已等待满一个时间片
+    )
+
+    def __init__(
+        self,
+        room_id: str,
+        target_temp: float = DEFAULT_TEMP,
+        fan_speed: str = "medium",
+        mode: str = "cooling",
+    ):
         self.room_id = room_id
+        self.status = "off"
+        self.is_on = False
+        self._current_temp = INITIAL_ROOM_TEMP
+        self._initial_temp = INITIAL_ROOM_TEMP
+        self.restore_start = time.monotonic()
         self.target_temp = target_temp
         self.fan_speed = fan_speed
-        self.mode = mode  # 'cooling' or 'heating'
+        self.mode = mode
+        self.energy_consumed = 0
+        self.cost = _ZERO_COST
+        self.service_start_time = None
+        self.service_duration = 0
+        self.record_id = None
+        self.record_start_cost = _ZERO_COST
+        self.record_start_energy = 0.0
+        self.order_id = None
+        self.wait_start_time = None
+        self.wait_duration = WAIT_TIME_SLICE
+        self.waited_full_slice = False
+
+    # ---------- 温度（关机 / 待机时按时间计算） ----------
+
+    @property
+    def current_temp(self) -> float:
+        if self.restore_start is None:
+            return self._current_temp
+        return restored_temp(
+            self._current_temp, self._initial_temp, time.monotonic() - self.restore_start
+        )
+
+    @current_temp.setter
+    def current_temp(self, value: float):
+        self._current_temp = value
+        if self.restore_start is not None:
+            self.restore_start = time.monotonic()
+
+    @property
+    def initial_temp(self) -> float:
+        return self._initial_temp
+
+    @initial_temp.setter
+    def initial_temp(self, value: float):
+        if self.restore_start is not None:
+            self.begin_restore()  # 先按原初始温度固定当前温度
+        self._initial_temp = value
+
+    def begin_restore(self):
+        """进入关机 / 待机：以当前温度为起点开始回温"""
+        if self.restore_start is not None:
+            self._current_temp = self.current_temp
+        self.restore_start = time.monotonic()
+
+    def restore_from(self, temp: float, elapsed: float):
+        """从 elapsed 秒前的温度 temp 开始回温（热启动：停机期间房间同样在回温）"""
+        self._current_temp = temp
+        self.restore_start = time.monotonic() - max(elapsed, 0.0)
+
+    def end_restore(self):
+        """离开关机 / 待机：固定当前温度，之后由主循环更新"""
+        if self.restore_start is not None:
+            self._current_temp = self.current_temp
+            self.restore_start = None
+
+    def settle_time(self) -> float:
+        """回温到初始温度的时刻（time.monotonic()）"""
+        if self.restore_start is None:
+            return 0.0
+        rate = restore_rate()
+        if rate <= 0:
+            return self.restore_start
+        return self.restore_start + abs(self._initial_temp - self._current_temp) / rate
+
+    def restart_time(self) -> Optional[float]:
+        """
+        待机房间温度偏离目标超过阈值的时刻（time.monotonic()）
+
+        已经超过时返回当前时刻，回温到初始温度也不会超过时返回 None
+        """
+        now = time.monotonic()
+        current = self.current_temp
+        if self.mode == "cooling":
+            threshold = self.target_temp + TEMP_THRESHOLD
+            if current > threshold:
+                return now
+            reachable = self._initial_temp > threshold
+        else:
+            threshold = self.target_temp - TEMP_THRESHOLD
+            if current < threshold:
+                return now
+            reachable = self._initial_temp < threshold
+        rate = restore_rate()
+        if not reachable or rate <= 0:
+            return None
+        return now + abs(threshold - current) / rate
+
+    # ---------- 字典式访问 ----------
+
+    def __getitem__(self, key: str):
+        if key not in _RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in _RECORD_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _RECORD_FIELDS
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in _RECORD_FIELDS else default
+
+    # ---------- 队列状态切换 ----------
+
+    def start_service(self):
+        """进入服务队列：重新开始计算服务时长"""
         self.service_start_time = datetime.now()
-        self.service_duration = 0  # 服务时长（秒）
-        self.current_temp = INITIAL_ROOM_TEMP
-        self.energy_consumed = 0.0  # 耗电量
-        self.cost = Decimal("0.00")  # 费用
-        self.record_id = None  # 关联的详单记录ID
+        self.service_duration = 0
+
+    def start_waiting(self, wait_duration: float = WAIT_TIME_SLICE):
+        """进入等待队列：分配一个新的等待时间片"""
+        self.wait_start_time = datetime.now()
+        self.wait_duration = wait_duration
+        self.waited_full_slice = False
+
+    # ---------- 服务中 ----------
 
     def get_priority(self) -> int:
         """获取优先级"""
         return FAN_SPEED_PRIORITY.get(self.fan_speed, 0)
 
+    def get_service_elapsed(self) -> float:
+        """本次服务已经过的时间（与 WAIT_TIME_SLICE 单位相同）"""
+        if self.service_start_time is None:
+            return 0.0
+        return (datetime.now() - self.service_start_time).total_seconds() * TIME_SCALE
+
     def update_service_duration(self):
         """更新服务时长"""
         self.service_duration = (
             datetime.now() - self.service_start_time
         ).total_seconds()
 
+    # ---------- 等待中 ----------
 
-class WaitingObject:
-    """等待对象数据 - 在等待队列中的房间（停止送风和计费）"""
-
-    def __init__(self, room_id: str, target_temp: float, fan_speed: str, mode: str):
-        self.room_id = room_id
-        self.target_temp = target_temp
-        self.fan_speed = fan_speed
-        self.mode = mode
-        self.wait_start_time = datetime.now()
-        self.wait_duration = WAIT_TIME_SLICE  # 分配的等待时长
-        self.current_temp = INITIAL_ROOM_TEMP
-        self.waited_full_slice = False  # 是否已等待满一个时间片
-        self.energy_consumed = 0.0  # 等待期间不计费
-        self.cost = Decimal("0.00")  # 等待期间不计费
-        self.record_id = None  # 关联的详单记录ID
-
-    def get_priority(self) -> int:
-        """获取优先级"""
-        return FAN_SPEED_PRIORITY.get(self.fan_speed, 0)
+    def get_wait_elapsed(self) -> float:
+        """本次等待已经过的时间（与 WAIT_TIME_SLICE 单位相同）"""
+        return (datetime.now() - self.wait_start_time).total_seconds() * TIME_SCALE
 
     def get_remaining_wait_time(self) -> float:
         """获取剩余等待时间"""
-        elapsed = (datetime.now() - self.wait_start_time).total_seconds() * TIME_SCALE
-        return max(0, self.wait_duration - elapsed)
+        return max(0, self.wait_duration - self.get_wait_elapsed())
 
     def is_wait_expired(self) -> bool:
         """等待时间是否已到"""
         return self.get_remaining_wait_time() <= 0
 
 
+# 字典式访问可用的字段名
+_RECORD_FIELDS = frozenset(
+    [name for name in RoomRecord.__slots__ if not name.startswith("_")]
+    + ["current_temp", "initial_temp"]
+)
+
+# 兼容旧名称：服务对象和等待对象现在是同一个房间记录
+ServiceObject = RoomRecord
+WaitingObject = RoomRecord
+
+
+# ============================================================
+# 服务池（每台中央空调主机 / 每个区域一个）
+# ============================================================
+
+
+class Pool:
+    """
+    服务池运行时状态 - 独立的服务队列、等待队列、容量和等待时间片
+
+    不同服务池之间互不抢占、互不轮转，各自按优先级 + 时间片调度。
+    power_budget 大于 0 时按功率预算调度：服务中房间的风速功率之和不超过预算（不再限制同时服务数），
+    否则每个服务中的房间占一个槽位，不超过 capacity
+    """
+
+    __slots__ = (
+        "name",
+        "capacity",
+        "wait_time_slice",
+        "power_budget",
+        "service_queue",
+        "wait_queue",
+        "deferred",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int = MAX_SERVICE_NUM,
+        wait_time_slice: float = WAIT_TIME_SLICE,
+        power_budget: float = POWER_BUDGET_KW,
+    ):
+        self.name = name
+        self.capacity = capacity  # 同时服务上限
+        self.wait_time_slice = wait_time_slice  # 与 WAIT_TIME_SLICE 单位相同
+        self.power_budget = power_budget  # 功率预算（kW），0 表示按同时服务上限调度
+        self.service_queue: Dict[str, RoomRecord] = {}
+        self.wait_queue: Dict[str, RoomRecord] = {}
+        # 因服务对象还在最小服务时长内而暂缓抢占的等待房间，每次主循环重试
+        self.deferred: Set[str] = set()
+
+    def cost(self, fan_speed: str) -> float:
+        """一个房间占用的服务资源：功率预算模式下为风速功率（kW），否则为一个槽位"""
+        return fan_power_kw(fan_speed) if self.power_budget > 0 else 1
+
+    def limit(self) -> float:
+        return self.power_budget if self.power_budget > 0 else self.capacity
+
+    def load(self) -> float:
+        """服务中房间占用的资源"""
+        if self.power_budget > 0:
+            return sum(fan_power_kw(r.fan_speed) for r in self.service_queue.values())
+        return len(self.service_queue)
+
+    def can_admit(self, fan_speed: str) -> bool:
+        """能否再容纳一个 fan_speed 风速的房间"""
+        return self.load() + self.cost(fan_speed) <= self.limit() + LOAD_EPSILON
+
+    def is_full(self) -> bool:
+        """连最低功率的风速也无法再容纳"""
+        if self.power_budget > 0:
+            return not self.can_admit(min(FAN_SPEED_PRIORITY, key=fan_power_kw))
+        return len(self.service_queue) >= self.capacity
+
+    def overloaded(self) -> bool:
+        """占用超过容量（容量或预算调小、服务中房间调高风速后）"""
+        return self.load() > self.limit() + LOAD_EPSILON
+
+    def stats(self) -> dict:
+        serving = len(self.service_queue)
+        limit = self.limit()
+        stats = {
+            "name": self.name,
+            "capacity": self.capacity,
+            "wait_time_slice": self.wait_time_slice,
+            "power_budget": self.power_budget,
+            "serving": serving,
+            "waiting": len(self.wait_queue),
+            "utilization": round(self.load() / limit, 3) if limit else 0.0,
+        }
+        if self.power_budget > 0:
+            stats["power_draw"] = round(self.load(), 3)
+        return stats
+
+
+class RoomSnapshot(NamedTuple):
+    """房间状态只读快照（发布后不再修改）"""
+
+    room_id: str
+    is_on: bool
+    status: str
+    current_temp: float
+    target_temp: float
+    fan_speed: str
+    mode: str
+    energy_consumed: float
+    cost: float
+    service_duration: Optional[float] = None  # 仅服务中房间
+    wait_start_time: Optional[datetime] = None  # 仅等待中房间
+    wait_duration: Optional[float] = None
+    restore_start: Optional[float] = None  # 仅回温中房间（此时 current_temp 为回温起点）
+    initial_temp: Optional[float] = None
+
+    @classmethod
+    def default(cls, room_id: str) -> "RoomSnapshot":
+        """未初始化房间的缺省状态"""
+        return cls(room_id, False, "off", INITIAL_ROOM_TEMP, DEFAULT_TEMP, "medium", "cooling", 0, 0)
+
+    def as_dict(self) -> dict:
+        """转换为 get_room_state 的返回格式（剩余等待时间、回温温度在读取时计算）"""
+        current_temp = self.current_temp
+        if self.restore_start is not None:
+            current_temp = round(
+                restored_temp(
+                    current_temp, self.initial_temp, time.monotonic() - self.restore_start
+                ),
+                1,
+            )
+        data = {
+            "room_id": self.room_id,
+            "is_on": self.is_on,
+            "status": self.status,
+            "current_temp": current_temp,
+            "target_temp": self.target_temp,
+            "fan_speed": self.fan_speed,
+            "mode": self.mode,
+            "energy_consumed": self.energy_consumed,
+            "cost": self.cost,
+        }
+        if self.service_duration is not None:
+            data["service_duration"] = self.service_duration
+        if self.wait_start_time is not None:
+            elapsed = (datetime.now() - self.wait_start_time).total_seconds() * TIME_SCALE
+            data["remaining_wait"] = max(0, self.wait_duration - elapsed)
+        return data
+
+
+class StateSnapshot(NamedTuple):
+    """
+    调度器状态快照
+
+    调度器每次修改内存状态后整体替换，读取方只需一次引用读取即可拿到一致的全部房间状态，
+    无需加锁，也不会读到修改了一半的对象
+    """
+
+    version: int
+    room_ids: Tuple[str, ...]  # 按房间号排序
+    index: Mapping[str, RoomSnapshot]
+
+    @property
+    def rooms(self) -> Tuple[RoomSnapshot, ...]:
+        return tuple(self.index[room_id] for room_id in self.room_ids)
+
+    def get(self, room_id: str) -> RoomSnapshot:
+        record = self.index.get(room_id)
+        return record if record is not None else RoomSnapshot.default(room_id)
+
+    def get_state(self, room_id: str) -> dict:
+        return self.get(room_id).as_dict()
+
+    def all_states(self) -> List[dict]:
+        index = self.index
+        return [index[room_id].as_dict() for room_id in self.room_ids]
+
+
+EMPTY_SNAPSHOT = StateSnapshot(0, (), MappingProxyType({}))
+
+
+class RoomExport(NamedTuple):
+    """移出调度器的房间（分片迁移 / 分片模式退房）"""
+
+    state: dict  # 移出前的状态（get_room_state 格式）
+    record: RoomRecord  # 房间记录，仍关联未结束的详单
+    pending: Tuple[dict, ...]  # 尚未处理的防抖请求
+
+
+class WarmStartData(NamedTuple):
+    """热启动使用的数据库记录（三次批量查询的结果，可发送给调度进程）"""
+
+    orders: Dict[str, int]  # 房间号 -> 入住中的订单号
+    states: Dict[str, dict]  # 房间号 -> ACState 字段
+    open_records: List[dict]  # 未结束的详单（按开始时间排序）
+
+    def subset(self, room_ids) -> "WarmStartData":
+        """只包含指定房间的部分（分片模式按调度进程拆分）"""
+        room_ids = set(room_ids)
+        return WarmStartData(
+            {r: o for r, o in self.orders.items() if r in room_ids},
+            {r: s for r, s in self.states.items() if r in room_ids},
+            [row for row in self.open_records if row["room_id"] in room_ids],
+        )
+
+
+def load_warm_start_data() -> WarmStartData:
+    """读取热启动需要的数据：入住中的订单、空调状态、未结束的详单，各一次批量查询"""
+    orders = dict(
+        AccommodationOrder.objects.filter(status="active").values_list("room_id", "order_id")
+    )
+    states = {
+        row["room_id"]: row
+        for row in ACState.objects.values("room_id", *AC_STATE_COLUMNS, "last_update_time")
+    }
+    open_records = list(
+        ACDetailRecord.objects.filter(end_time__isnull=True)
+        .order_by("start_time", "record_id")
+        .values("record_id", "room_id", "start_time", "start_temp")
+    )
+    return WarmStartData(orders, states, open_records)
+
+
+class DetailRecordBatch:
+    """
+    一次主循环内的详单写入，主循环结束时在一个事务中批量写入
+
+    新建的详单在写入前使用临时详单号（负数），同一主循环内结束时直接修改待写入的详单
+    """
+
+    __slots__ = ("creates", "updates", "_next_key")
+
+    def __init__(self):
+        self.creates: Dict[int, Tuple[RoomRecord, ACDetailRecord]] = {}  # 临时详单号 -> (房间记录, 详单)
+        self.updates: Dict[int, dict] = {}  # 详单号 -> 结束字段
+        self._next_key = 0
+
+    def add(self, service_obj: RoomRecord, record: ACDetailRecord) -> int:
+        """加入新建的详单，返回临时详单号"""
+        self._next_key -= 1
+        self.creates[self._next_key] = (service_obj, record)
+        return self._next_key
+
+
 # ============================================================
 # ACServiceManager（服务对象）- 负责温控、计费、详单记录
 # ============================================================
@@ -122,62 +581,125 @@ class ACServiceManager:
     """
 
     def __init__(self):
-        self.room_states: Dict[str, dict] = {}  # 所有房间状态
-
-    def init_room(self, room_id: str):
-        """初始化房间空调状态（入住时调用）"""
-        self.room_states[room_id] = {
-            "current_temp": INITIAL_ROOM_TEMP,
-            "initial_temp":INITIAL_ROOM_TEMP,
-            "target_temp": DEFAULT_TEMP,
-            "is_on": False,
-            "status": "off",
-            "fan_speed": "medium",
-            "mode": "cooling",
-            "energy_consumed": 0,
-            "cost": 0,
-        }
+        self.room_states: Dict[str, RoomRecord] = {}  # 所有房间记录
+        # 待机房间的重启时刻：堆中为 (时刻, 房间号)，_restart_at 记录每个房间当前有效的时刻
+        self._restart_heap: List[Tuple[float, str]] = []
+        self._restart_at: Dict[str, float] = {}
+        # 所有回温中房间回到初始温度的最晚时刻，此前温度读数仍在变化
+        self.restore_until = 0.0
+        # 上次发布快照后状态发生变化的房间
+        self._dirty: Set[str] = set()
+        # 调度线程在主循环中收集的详单写入（见 batch_detail_records）
+        self._batch: Optional[DetailRecordBatch] = None
+        self._batch_thread: Optional[int] = None
+        # 写入收集的详单、结束详单时持有：其他线程结束临时详单号的详单时，
+        # 要么在写入前修改待写入的详单，要么等写入完成后按数据库分配的详单号更新
+        self._record_lock = threading.RLock()
+
+    def init_room(self, room_id: str, order_id: Optional[int] = None):
+        """初始化房间空调状态（入住时调用，order_id 为入住订单号）"""
+        record = self.room_states[room_id] = RoomRecord(room_id)
+        record.order_id = order_id
+        self._restart_at.pop(room_id, None)
         logger.info(f"[ServiceManager] Room {room_id} AC initialized")
 
+    def restore_room(
+        self,
+        room_id: str,
+        order_id: int,
+        state: Optional[dict],
+        open_record: Optional[dict],
+        now: datetime,
+    ) -> RoomRecord:
+        """
+        按数据库记录重建房间记录（热启动），状态为关机或待机，由调度器重新准入需要服务的房间
+
+        温度取 ACState 和未结束详单中较晚写入的一个，并计入停机期间的回温；
+        累计费用和能耗取 ACState（计费以详单为准，不受影响）
+        """
+        record = self.room_states[room_id] = RoomRecord(room_id)
+        record.order_id = order_id
+        self._restart_at.pop(room_id, None)
+        self._dirty.add(room_id)
+        if state is None:
+            return record
+
+        record.target_temp = state["target_temp"]
+        record.fan_speed = state["fan_speed"]
+        record.mode = state["mode"]
+        record.energy_consumed = state["total_energy"]
+        record.cost = state["total_cost"]
+        temp, since = state["current_temp"], state["last_update_time"]
+        if open_record is not None and open_record["start_time"] > since:
+            temp, since = open_record["start_temp"], open_record["start_time"]
+        record.restore_from(temp, (now - since).total_seconds())
+        if state["is_on"] and state["status"] == "standby":
+            record.status = "standby"
+            record.is_on = True
+            self.schedule_restart(room_id)
+        return record
+
+    def end_stale_records(self, rows: List[dict]):
+        """结束重启前遗留、不再属于任何房间记录的详单（没有入住订单，或同一房间有更晚的详单）"""
+        now = timezone.now()
+        for row in rows:
+            self._close_detail_record(row["record_id"], {"end_time": now, "end_temp": row["start_temp"]})
+            logger.info(f"[ServiceManager] Ended stale detail record {row['record_id']} for room {row['room_id']}")
+
+    def get_record(self, room_id: str) -> RoomRecord:
+        """获取房间记录，不存在时创建"""
+        record = self.room_states.get(room_id)
+        if record is None:
+            record = self.room_states[room_id] = RoomRecord(room_id)
+        return record
+
     def clear_room(self, room_id: str) -> dict:
         """清理房间状态（退房时调用）"""
         state = self.get_room_state(room_id)
         if room_id in self.room_states:
             del self.room_states[room_id]
+        self._restart_at.pop(room_id, None)
         logger.info(
             f"[ServiceManager] Room {room_id} cleared, AC cost: {state.get('cost', 0)}"
         )
         return state
 
+    def detach_room(self, room_id: str) -> Optional[RoomRecord]:
+        """移除房间记录并返回（不写数据库，详单由调用方处理）"""
+        self._restart_at.pop(room_id, None)
+        return self.room_states.pop(room_id, None)
+
     def update_room_status(self, room_id: str, status: str, **kwargs):
         """更新房间状态"""
-        if room_id not in self.room_states:
-            self.room_states[room_id] = {
-                "current_temp": INITIAL_ROOM_TEMP,
-                "is_on": False,
-                "status": "off",
-            }
-
-        self.room_states[room_id]["status"] = status
-        self.room_states[room_id]["is_on"] = status in ("on", "waiting", "standby")
+        record = self.get_record(room_id)
+        record.status = status
+        record.is_on = status in ("on", "waiting", "standby")
+        self._dirty.add(room_id)
 
         for key, value in kwargs.items():
-            self.room_states[room_id][key] = value
+            setattr(record, key, value)
+
+        if status in RESTORING_STATUSES:
+            record.begin_restore()
+            self.restore_until = max(self.restore_until, record.settle_time())
+        else:
+            record.end_restore()
+        self.schedule_restart(room_id)
 
     def get_room_state(self, room_id: str) -> dict:
         """获取房间基本状态"""
         if room_id in self.room_states:
-            state = self.room_states[room_id]
+            record = self.room_states[room_id]
             return {
                 "room_id": room_id,
-                "is_on": state.get("is_on", False),
-                "status": state.get("status", "off"),
-                "current_temp": round(state.get("current_temp", INITIAL_ROOM_TEMP), 1),
-                "target_temp": state.get("target_temp", DEFAULT_TEMP),
-                "fan_speed": state.get("fan_speed", "medium"),
-                "mode": state.get("mode", "cooling"),
-                "energy_consumed": state.get("energy_consumed", 0),
-                "cost": state.get("cost", 0),
+                "is_on": record.is_on,
+                "status": record.status,
+                "current_temp": round(record.current_temp, 1),
+                "target_temp": record.target_temp,
+                "fan_speed": record.fan_speed,
+                "mode": record.mode,
+                "energy_consumed": record.energy_consumed,
+                "cost": float(record.cost),
             }
         else:
             return {
@@ -192,7 +714,7 @@ class ACServiceManager:
                 "cost": 0,
             }
 
-    def update_service_temperature(self, service_obj: ServiceObject):
+    def update_service_temperature(self, service_obj: RoomRecord):
         """
         更新服务中房间的温度和费用
 
@@ -207,64 +729,89 @@ class ACServiceManager:
             if service_obj.current_temp > service_obj.target_temp:
                 service_obj.current_temp -= rate
                 service_obj.energy_consumed += power
-                service_obj.cost += Decimal(str(power * PRICE_PER_DEGREE))
+                service_obj.cost += Decimal(str(power * config.PRICE_PER_DEGREE))
         else:  # heating
             if service_obj.current_temp < service_obj.target_temp:
                 service_obj.current_temp += rate
                 service_obj.energy_consumed += power
-                service_obj.cost += Decimal(str(power * PRICE_PER_DEGREE))
-
-        # 同步更新房间状态
-        room_id = service_obj.room_id
-        if room_id in self.room_states:
-            self.room_states[room_id]["current_temp"] = service_obj.current_temp
-            self.room_states[room_id]["energy_consumed"] = service_obj.energy_consumed
-            self.room_states[room_id]["cost"] = float(service_obj.cost)
+                service_obj.cost += Decimal(str(power * config.PRICE_PER_DEGREE))
 
-    def update_waiting_state(self, wait_obj: WaitingObject):
+    def update_waiting_state(self, wait_obj: RoomRecord):
         """更新等待中房间的状态（回温，不计费）"""
-        room_id = wait_obj.room_id
-        if room_id in self.room_states:
-        
-            # print(f"Updating waiting room {room_id} temperature...")
-            self.room_states[room_id]["energy_consumed"] = wait_obj.energy_consumed
-            self.room_states[room_id]["cost"] = float(wait_obj.cost)
-
-            state = self.room_states[room_id]
-            rate = config.TEMP_RESTORE_RATE / 60 * TIME_SCALE
-            current = state.get("current_temp", INITIAL_ROOM_TEMP)
-            initial = state.get("initial_temp", INITIAL_ROOM_TEMP)
-            # print(f"Room {room_id} current temp: {current}, initial temp: {initial}")
-
-            if current < initial:
-                self.room_states[room_id]["current_temp"] = min(current + rate, initial)
-                wait_obj.current_temp = self.room_states[room_id]["current_temp"]
-            elif current > initial:
-                self.room_states[room_id]["current_temp"] = max(current - rate, initial)
-                wait_obj.current_temp = self.room_states[room_id]["current_temp"]
-
-    def update_off_room_temperature(self, room_id: str):
-        """更新关机或待机房间的温度（回温）"""
-        if room_id not in self.room_states:
-            return
-
-        state = self.room_states[room_id]
-        status = state.get("status")
-        # 关机和待机状态的房间都会回温
-        if status not in ("off", "standby"):
-            return
-
         rate = config.TEMP_RESTORE_RATE / 60 * TIME_SCALE
-        current = state.get("current_temp", INITIAL_ROOM_TEMP)
-        initial = state.get("initial_temp", INITIAL_ROOM_TEMP)
-        # print(f"Room {room_id} current temp: {current}, initial temp: {initial}")
+        current = wait_obj.current_temp
+        initial = wait_obj.initial_temp
 
         if current < initial:
-            self.room_states[room_id]["current_temp"] = min(current + rate, initial)
+            wait_obj.current_temp = min(current + rate, initial)
         elif current > initial:
-            self.room_states[room_id]["current_temp"] = max(current - rate, initial)
+            wait_obj.current_temp = max(current - rate, initial)
+
+    def take_dirty(self) -> Set[str]:
+        """取出并清空上次发布后状态变化的房间"""
+        dirty, self._dirty = self._dirty, set()
+        return set(dirty)  # 复制一份，避免遍历时其他线程仍向旧集合添加
+
+    def is_restoring(self) -> bool:
+        """是否还有房间在回温（温度读数随时间变化）"""
+        return time.monotonic() < self.restore_until
+
+    def recompute_restore_until(self):
+        """重新计算回温结束时刻（房间离开回温状态后，旧的最晚时刻可能偏大）"""
+        self.restore_until = max(
+            (r.settle_time() for r in self.room_states.values() if r.restore_start is not None),
+            default=0.0,
+        )
+
+    def rebase_restore(self):
+        """回温速率修改前调用：回温中的房间以当前温度为起点重新开始回温（已回温的部分按原速率）"""
+        for record in self.room_states.values():
+            if record.restore_start is not None:
+                record.begin_restore()
+
+    def reschedule_restarts(self):
+        """回温速率修改后调用：重新计算回温结束时刻和待机房间的重启时刻"""
+        self.recompute_restore_until()
+        for room_id, record in self.room_states.items():
+            if record.status == "standby":
+                self.schedule_restart(room_id)
 
-    def check_target_reached(self, service_obj: ServiceObject) -> bool:
+    def schedule_restart(self, room_id: str, not_before: float = 0.0):
+        """
+        为待机房间计算温度偏离阈值的时刻并加入重启时刻堆
+
+        待机房间的目标温度、模式或温度被修改后需重新调用；非待机房间取消计划
+        """
+        record = self.room_states.get(room_id)
+        due = record.restart_time() if record and record.status == "standby" else None
+        if due is None:
+            self._restart_at.pop(room_id, None)
+            return
+        due = max(due, not_before)
+        self._restart_at[room_id] = due
+        heapq.heappush(self._restart_heap, (due, room_id))
+
+    def pop_due_restarts(self) -> List[str]:
+        """取出已到重启时刻且确实需要重启的待机房间"""
+        now = time.monotonic()
+        rooms = []
+        while self._restart_heap and self._restart_heap[0][0] <= now:
+            due, room_id = heapq.heappop(self._restart_heap)
+            if self._restart_at.get(room_id) != due:
+                continue  # 已被重新计划或取消
+            del self._restart_at[room_id]
+            if self.check_need_restart(room_id):
+                rooms.append(room_id)
+            else:
+                # 浮点误差等原因尚未越过阈值，下一次主循环再检查
+                self.schedule_restart(room_id, not_before=now + 0.5)
+        return rooms
+
+    def next_restart_time(self) -> Optional[float]:
+        """最早的重启时刻（可能是已失效的旧时刻，只会早不会晚）"""
+        return self._restart_heap[0][0] if self._restart_heap else None
+
+    def check_target_reached(self, service_obj: RoomRecord) -> bool:
         """检查是否达到目标温度"""
         if service_obj.mode == "cooling":
             return service_obj.current_temp <= service_obj.target_temp
@@ -273,38 +820,114 @@ class ACServiceManager:
 
     def check_need_restart(self, room_id: str) -> bool:
         """检查待机房间是否需要重新启动"""
-        if room_id not in self.room_states:
-            return False
-
-        state = self.room_states[room_id]
-        if state.get("status") != "standby":
+        record = self.room_states.get(room_id)
+        if record is None or record.status != "standby":
             return False
 
-        current_temp = state.get("current_temp", DEFAULT_TEMP)
-        target_temp = state.get("target_temp", DEFAULT_TEMP)
-        mode = state.get("mode", "cooling")
+        current_temp = record.current_temp
+        target_temp = record.target_temp
 
-        if mode == "cooling":
+        if record.mode == "cooling":
             return current_temp > target_temp + TEMP_THRESHOLD
         else:
             return current_temp < target_temp - TEMP_THRESHOLD
 
-    # ========== 详单记录管理 ==========
+    # ========== 订单与详单记录管理 ==========
 
-    def create_detail_record(self, service_obj: ServiceObject):
-        """创建详单记录"""
+    def count_power_on(self, room_id: str):
+        """入住订单的开机次数加一（房费按开机次数计算）"""
         try:
             order = AccommodationOrder.objects.filter(
-                room_id=service_obj.room_id, status="active"
+                room__room_id=room_id, status="active"
             ).first()
+            if order:
+                order.power_on_count += 1
+                order.save(update_fields=["power_on_count"])
+                logger.info(f"[ServiceManager] Room {room_id} power on count: {order.power_on_count}")
+        except Exception as e:
+            logger.error(f"[ServiceManager] Failed to update power on count for room {room_id}: {e}")
+
+    @contextmanager
+    def batch_detail_records(self):
+        """
+        with 块内调度线程的详单写入先收集起来，退出时在一个事务中写入（新建的详单用 bulk_create）
+
+        SQLite 自动提交时每条语句各提交一次（一次 fsync），一次主循环的多次换入换出只提交一次。
+        其他线程（接口请求）的详单写入仍立即执行；DETAIL_RECORD_BATCH 为 False 或已在批量写入中时不生效
+        """
+        if not DETAIL_RECORD_BATCH or self._batch is not None:
+            yield
+            return
+        self._batch = DetailRecordBatch()
+        self._batch_thread = threading.get_ident()
+        try:
+            yield
+        finally:
+            # 写入完成、临时详单号替换为数据库分配的详单号之后才移除批次
+            with self._record_lock:
+                try:
+                    self._flush_detail_records(self._batch)
+                finally:
+                    self._batch = None
+                    self._batch_thread = None
+
+    def _batching(self) -> bool:
+        return self._batch is not None and self._batch_thread == threading.get_ident()
+
+    def _flush_detail_records(self, batch: DetailRecordBatch):
+        """写入一次主循环收集的详单，并把临时详单号替换为数据库分配的详单号"""
+        if not batch.creates and not batch.updates:
+            return
+        try:
+            with transaction.atomic():
+                created = [record for _, record in batch.creates.values()]
+                if connection.features.can_return_rows_from_bulk_insert:
+                    ACDetailRecord.objects.bulk_create(created)
+                else:
+                    # 数据库不返回批量插入的主键时逐条插入（仍在同一事务中）
+                    for record in created:
+                        record.save(force_insert=True)
+                # 每轮结束的详单只有几条，逐条 UPDATE 比 bulk_update 的 CASE 表达式便宜，同样只提交一次
+                for record_id, values in batch.updates.items():
+                    ACDetailRecord.objects.filter(record_id=record_id).update(**values)
+        except Exception as e:
+            logger.error(f"[ServiceManager] Failed to write detail records: {e}")
+            for key, (service_obj, _) in batch.creates.items():
+                if service_obj.record_id == key:
+                    service_obj.record_id = None
+            return
+
+        for key, (service_obj, record) in batch.creates.items():
+            if service_obj.record_id == key:
+                service_obj.record_id = record.record_id
+        # bulk_create 和 update() 不发送 post_save 信号
+        bump_data_version()
+        logger.info(
+            f"[ServiceManager] Wrote detail records in one transaction: "
+            f"{len(batch.creates)} created, {len(batch.updates)} ended"
+        )
+
+    def _order_id(self, record: RoomRecord) -> Optional[int]:
+        """房间的入住订单号：入住时写入房间记录，未知时（如调度器重启后）查询一次并记住"""
+        if record.order_id is None:
+            order_id = (
+                AccommodationOrder.objects.filter(room_id=record.room_id, status="active")
+                .values_list("order_id", flat=True)
+                .first()
+            )
+            record.order_id = order_id or _NO_ORDER
+        return record.order_id or None
 
+    def create_detail_record(self, service_obj: RoomRecord):
+        """创建详单记录（主循环中在主循环结束时写入）"""
+        try:
             # 记录本次服务开始时的累计费用和能耗，用于计算增量
             service_obj.record_start_cost = service_obj.cost
             service_obj.record_start_energy = service_obj.energy_consumed
 
-            record = ACDetailRecord.objects.create(
+            record = ACDetailRecord(
                 room_id=service_obj.room_id,
-                order=order,
+                order_id=self._order_id(service_obj),
                 start_time=timezone.now(),
                 start_temp=service_obj.current_temp,
                 target_temp=service_obj.target_temp,
@@ -313,6 +936,10 @@ class ACServiceManager:
                 energy_consumed=0,
                 cost=0,
             )
+            if self._batching():
+                service_obj.record_id = self._batch.add(service_obj, record)
+                return
+            record.save(force_insert=True)
             service_obj.record_id = record.record_id
             logger.info(
                 f"[ServiceManager] Created detail record {record.record_id} for room {service_obj.room_id}"
@@ -320,44 +947,94 @@ class ACServiceManager:
         except Exception as e:
             logger.error(f"[ServiceManager] Failed to create detail record: {e}")
 
-    def end_detail_record(self, service_obj: ServiceObject):
-        """结束详单记录"""
+    def _close_detail_record(self, record_id: int, values: dict):
+        """写入详单的结束字段：尚未写入的详单直接修改，主循环中合并到批量更新，否则一条 UPDATE"""
+        batch = self._batch
+        if record_id < 0:
+            pending = batch.creates.get(record_id) if batch is not None else None
+            if pending is not None:
+                for field, value in values.items():
+                    setattr(pending[1], field, value)
+            return
+        if self._batching():
+            batch.updates[record_id] = values
+            return
+        ACDetailRecord.objects.filter(record_id=record_id).update(**values)
+        bump_data_version()
+
+    def end_detail_record(self, service_obj: RoomRecord):
+        """结束详单记录（结束后解除与该详单的关联）"""
+        with self._record_lock:
+            self._end_detail_record(service_obj)
+
+    def _end_detail_record(self, service_obj: RoomRecord):
         if not service_obj.record_id:
             return
 
         try:
-            record = ACDetailRecord.objects.get(record_id=service_obj.record_id)
-            record.end_time = timezone.now()
-            record.end_temp = service_obj.current_temp
-            
             # 计算本次服务产生的增量费用和能耗
-            start_cost = getattr(service_obj, 'record_start_cost', Decimal("0.00"))
-            start_energy = getattr(service_obj, 'record_start_energy', 0.0)
-            record.energy_consumed = service_obj.energy_consumed - start_energy
-            record.cost = service_obj.cost - start_cost
-            
-            record.save()
+            self._close_detail_record(
+                service_obj.record_id,
+                {
+                    "end_time": timezone.now(),
+                    "end_temp": service_obj.current_temp,
+                    "energy_consumed": service_obj.energy_consumed - service_obj.record_start_energy,
+                    "cost": self.detail_record_cost(service_obj),
+                },
+            )
             logger.info(
-                f"[ServiceManager] Ended detail record {record.record_id} for room {service_obj.room_id}, "
-                f"cost={record.cost:.2f}, energy={record.energy_consumed:.2f}"
+                f"[ServiceManager] Ended detail record {service_obj.record_id} for room {service_obj.room_id}"
             )
         except Exception as e:
             logger.error(f"[ServiceManager] Failed to end detail record: {e}")
+        finally:
+            service_obj.record_id = None
+
+    @staticmethod
+    def detail_record_cost(record: RoomRecord, waiting: bool = False) -> Decimal:
+        """结束详单时写入的费用：服务中为本次服务的增量费用，等待中为房间记录的费用"""
+        if waiting:
+            return record.cost
+        return record.cost - record.record_start_cost
 
-    def end_waiting_detail_record(self, wait_obj: WaitingObject):
+    def persist_state(self, room_id: str, state: dict, action: Optional[str] = None):
+        """
+        将房间状态写入 ACState
+
+        只写入 action 可能改变的字段，一条 UPDATE 完成，不先读取记录
+        """
+        fields = REQUEST_AC_STATE_FIELDS.get(action, AC_STATE_COLUMNS)
+        values = {}
+        for field in fields:
+            key, default = AC_STATE_COLUMNS[field]
+            values[field] = state.get(key, default)
+        if "total_cost" in values:
+            values["total_cost"] = Decimal(str(values["total_cost"]))
+        # update() 不会自动更新 auto_now 字段
+        values["last_update_time"] = timezone.now()
+        ACState.objects.filter(room_id=room_id).update(**values)
+
+    def end_waiting_detail_record(self, wait_obj: RoomRecord):
         """结束等待对象的详单记录"""
+        with self._record_lock:
+            self._end_waiting_detail_record(wait_obj)
+
+    def _end_waiting_detail_record(self, wait_obj: RoomRecord):
         if not wait_obj.record_id:
             return
 
         try:
-            record = ACDetailRecord.objects.get(record_id=wait_obj.record_id)
-            record.end_time = timezone.now()
-            record.end_temp = wait_obj.current_temp
-            record.energy_consumed = wait_obj.energy_consumed
-            record.cost = wait_obj.cost
-            record.save()
+            self._close_detail_record(
+                wait_obj.record_id,
+                {
+                    "end_time": timezone.now(),
+                    "end_temp": wait_obj.current_temp,
+                    "energy_consumed": wait_obj.energy_consumed,
+                    "cost": self.detail_record_cost(wait_obj, waiting=True),
+                },
+            )
             logger.info(
-                f"[ServiceManager] Ended detail record {record.record_id} for waiting room {wait_obj.room_id}"
+                f"[ServiceManager] Ended detail record {wait_obj.record_id} for waiting room {wait_obj.room_id}"
             )
         except Exception as e:
             logger.error(f"[ServiceManager] Failed to end waiting detail record: {e}")
@@ -368,16 +1045,41 @@ class ACServiceManager:
 # ============================================================
 
 
+class ConfigRequest:
+    """待生效的运行时参数修改：主循环应用后设置 done，应用失败时 error 为失败原因"""
+
+    __slots__ = ("values", "change_id", "done", "error")
+
+    def __init__(self, values: dict, change_id: Optional[int] = None):
+        self.values = values
+        self.change_id = change_id
+        self.done = threading.Event()
+        self.error: Optional[str] = None
+
+
+def locked(method):
+    """调度器方法在状态锁内执行：修改队列 / 房间记录和发布快照不会与主循环或其他请求线程交错"""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class ACScheduler:
     """
     调度对象 - 只负责调度决策，管理队列
 
     职责：
-    1. 管理服务队列和等待队列
+    1. 管理各服务池的服务队列和等待队列
     2. 执行优先级调度（抢占调度）
     3. 执行时间片调度（轮转调度）
     4. 处理请求防抖
 
+    抢占谁、轮转给谁、等待队列的分配顺序由调度策略（self.policy）决定，默认为优先级抢占 + 时间片轮转
+
     不负责：
     - 温度计算（由 ServiceManager 处理）
     - 费用计算（由 ServiceManager 处理）
@@ -400,83 +1102,556 @@ class ACScheduler:
             return
 
         self._initialized = True
-        self.service_queue: Dict[str, ServiceObject] = {}  # 服务队列
-        self.wait_queue: Dict[str, WaitingObject] = {}  # 等待队列
-        self.max_service_num = MAX_SERVICE_NUM
+        # 服务池：各自的服务队列和等待队列中的对象就是 room_states 中的房间记录
+        self.pools: Dict[str, Pool] = {DEFAULT_SERVICE_POOL: Pool(DEFAULT_SERVICE_POOL)}
+        self.room_pools: Dict[str, str] = {}  # 房间号 -> 服务池名，未列出的房间属于默认服务池
+        self._default_pool_from_config = True  # 默认服务池没有数据库配置，使用 config 中的参数
         self.wait_time_slice = config.WAIT_TIME_SLICE // TIME_SCALE  # 调整时间片长度
+        # 调度策略：抢占、轮转和等待队列分配的决策（ac_system.policies）
+        self.policy = get_policy(config.SCHEDULING_POLICY)
         self.running = False
         self.scheduler_thread = None
-        self._request_timestamps: Dict[str, float] = {}  # 记录请求时间戳，用于防抖
-        self._pending_requests: Dict[str, dict] = {}  # 待处理的请求
+        self.tick_interval = 1.0  # 主循环间隔（秒）
+        self.last_tick_at: Optional[float] = None  # 上一次主循环结束的时刻（time.monotonic()）
+
+        # 请求防抖（待处理请求按截止时间排列）
+        self.debouncer = Debouncer()
+        # 连续调温合并：窗口内只保留最后一次目标温度
+        self.temp_debouncer = Debouncer(config.TEMP_COALESCE_SECONDS, name="temp_debounce")
+        # 唤醒主循环：有新的防抖截止时间或调度器停止时设置
+        self._wakeup = threading.Event()
 
         # 服务对象实例（负责实际操作）
         self.service_manager = ACServiceManager()
 
+        # 主循环性能分析（按需开启）
+        self.tick_profiler = TickProfiler()
+
+        # 调度事件日志（监控用）
+        self.event_log = EventLog()
+
+        # 请求轨迹（可选）：记录外部请求，供离线比较调度策略
+        self.request_trace: Optional[RequestTrace] = None
+        if config.REQUEST_TRACE_FILE:
+            self.request_trace = RequestTrace(config.REQUEST_TRACE_FILE)
+
+        # 状态版本号（内存状态变化时递增，用于 ETag）
+        self.state_version = VersionCounter()
+
+        # 待生效的运行时参数修改（下一次主循环开始时生效）
+        self._pending_config: List[ConfigRequest] = []
+        self._config_lock = threading.Lock()
+
+        # 状态锁：主循环、接口请求线程修改队列和房间记录以及发布快照都在锁内进行（可重入），
+        # 读取已发布的快照不需要加锁
+        self._state_lock = threading.RLock()
+        # 已发布的只读状态快照（监控、查询接口读取）
+        self._snapshot = EMPTY_SNAPSHOT
+        # 共享内存状态表（可选）：发布快照时同步写入，供其他进程读取
+        self.state_table: Optional[StateTable] = None
+        self._was_restoring = False
+
         logger.info(
             f"[Scheduler] ACScheduler initialized: max_service={self.max_service_num}, wait_slice={self.wait_time_slice}s"
         )
 
+    # ========== 服务池 ==========
+
+    @property
+    def service_queue(self) -> Dict[str, RoomRecord]:
+        """所有服务池的服务队列（只读合并视图；修改队列请使用 pool_of(room_id)）"""
+        return {k: v for pool in self.pools.values() for k, v in pool.service_queue.items()}
+
+    @property
+    def wait_queue(self) -> Dict[str, RoomRecord]:
+        """所有服务池的等待队列（只读合并视图）"""
+        return {k: v for pool in self.pools.values() for k, v in pool.wait_queue.items()}
+
+    @property
+    def max_service_num(self) -> int:
+        """默认服务池的同时服务上限"""
+        return self.pools[DEFAULT_SERVICE_POOL].capacity
+
+    @max_service_num.setter
+    def max_service_num(self, value: int):
+        self.pools[DEFAULT_SERVICE_POOL].capacity = value
+
+    def pool_of(self, room_id: str) -> Pool:
+        """房间所属的服务池"""
+        pool = self.pools.get(self.room_pools.get(room_id, DEFAULT_SERVICE_POOL))
+        return pool if pool is not None else self.pools[DEFAULT_SERVICE_POOL]
+
+    def _active_rooms(self) -> Set[str]:
+        """所有服务池中服务 / 等待队列里的房间"""
+        active = set()
+        for pool in self.pools.values():
+            active.update(pool.service_queue)
+            active.update(pool.wait_queue)
+        return active
+
+    @locked
+    def load_pools(self):
+        """
+        从数据库加载服务池配置和房间归属
+
+        默认服务池没有数据库配置时使用 MAX_SERVICE_NUM / WAIT_TIME_SLICE / POWER_BUDGET_KW。
+        已在队列中的房间若改换了服务池，离开原服务池后在新服务池中重新调度；
+        容量变化的服务池立即让出或补足服务槽位
+        """
+        configs = list(ServicePoolConfig.objects.all())
+        room_pools = dict(
+            Room.objects.exclude(service_pool=None).values_list("room_id", "service_pool_id")
+        )
+
+        pools: Dict[str, Pool] = {}
+        for cfg in configs:
+            pool = self.pools.get(cfg.name) or Pool(cfg.name)
+            pool.capacity = cfg.capacity
+            pool.wait_time_slice = cfg.wait_time_slice
+            pool.power_budget = cfg.power_budget
+            pools[cfg.name] = pool
+        self._default_pool_from_config = DEFAULT_SERVICE_POOL not in pools
+        if self._default_pool_from_config:
+            pool = self.pools.get(DEFAULT_SERVICE_POOL) or Pool(DEFAULT_SERVICE_POOL)
+            pool.capacity = config.MAX_SERVICE_NUM
+            pool.wait_time_slice = config.WAIT_TIME_SLICE
+            pool.power_budget = config.POWER_BUDGET_KW
+            pools[DEFAULT_SERVICE_POOL] = pool
+
+        # 改换服务池的房间先离开原服务池
+        moved = []
+        for name, pool in self.pools.items():
+            for queue in (pool.service_queue, pool.wait_queue):
+                for room_id in list(queue):
+                    new_name = room_pools.get(room_id, DEFAULT_SERVICE_POOL)
+                    if new_name not in pools:
+                        new_name = DEFAULT_SERVICE_POOL
+                    if new_name == name and pools.get(name) is pool:
+                        continue
+                    record = queue.pop(room_id)
+                    if record.record_id:
+                        self.service_manager.end_detail_record(record)
+                    moved.append(record)
+
+        self.pools = pools
+        self.room_pools = room_pools
+
+        for record in moved:
+            self._enqueue(record.room_id, record.target_temp, record.fan_speed, record.mode)
+            logger.info(
+                f"[Scheduler] Room {record.room_id} moved to pool {self.pool_of(record.room_id).name}"
+            )
+        for pool in pools.values():
+            self._fit_capacity(pool)
+
+        self.publish()
+        logger.info(f"[Scheduler] Loaded {len(pools)} service pools, {len(room_pools)} room mappings")
+
+    def _fit_capacity(self, pool: Pool):
+        """服务数（或功率）超过容量时让出服务（低优先级、服务时间长的先让出），有空闲时从等待队列补足"""
+        while pool.overloaded():
+            for sobj in pool.service_queue.values():
+                sobj.update_service_duration()
+            victim_id, victim = min(
+                pool.service_queue.items(),
+                key=lambda x: (x[1].get_priority(), -x[1].service_duration),
+            )
+            self._move_to_wait_queue(victim_id, victim)
+        self._allocate_from_wait_queue(pool)
+
+    def set_policy(self, name: str):
+        """切换调度策略（未知名称抛出 ValueError），下一次调度决策起生效"""
+        self.policy = get_policy(name)
+        logger.info(f"[Scheduler] Scheduling policy set to {name}")
+
+    @locked
+    def pool_stats(self) -> List[dict]:
+        """各服务池的实时统计：容量、服务数、等待数、利用率、入住房间数"""
+        rooms = {name: 0 for name in self.pools}
+        for room_id in self.service_manager.room_states:
+            rooms[self.pool_of(room_id).name] += 1
+        result = []
+        for name, pool in self.pools.items():
+            stats = pool.stats()
+            stats["rooms"] = rooms[name]
+            result.append(stats)
+        return result
+
+    # ========== 运行时参数 ==========
+
+    def load_settings(self):
+        """加载数据库中保存的运行时参数（启动时调用，早于加载服务池）；不合法的取值跳过"""
+        values = runtime_config.stored()
+        if values:
+            self._apply_config(values)
+            logger.info(f"[Scheduler] Loaded runtime settings: {', '.join(values)}")
+
+    def reconfigure(self, values: dict, timeout: float = 5.0, change_id: Optional[int] = None) -> bool:
+        """
+        修改运行时参数（已经过 runtime_config.validate 校验）：在下一次主循环开始时整体生效，
+        不会有一次调度决策看到一半新、一半旧的参数；主循环未运行时立即生效。
+
+        生效后返回 True；等待超时返回 False（修改仍会在之后的主循环中生效）。
+        change_id 为审计日志的修改号：生效时由调度器写入生效时间；应用失败时恢复原取值，
+        数据库中的设置恢复为修改前的取值并记录失败原因，等待中的调用抛出 runtime_config.ApplyError
+        """
+        request = ConfigRequest(values, change_id)
+        if not self.running:
+            with self._state_lock:
+                with self.service_manager.batch_detail_records():
+                    self._run_config_request(request)
+                self.publish()
+        else:
+            with self._config_lock:
+                self._pending_config.append(request)
+            if not request.done.wait(timeout):
+                return False
+        if request.error is not None:
+            raise runtime_config.ApplyError(request.error)
+        return True
+
+    def _apply_pending_config(self):
+        with self._config_lock:
+            pending, self._pending_config = self._pending_config, []
+        for request in pending:
+            self._run_config_request(request)
+
+    def _run_config_request(self, request: ConfigRequest):
+        """应用一次参数修改并在审计日志中记录结果（生效时间或失败原因），完成后唤醒等待的调用"""
+        try:
+            self._apply_config(request.values)
+        except Exception as e:
+            request.error = f"{type(e).__name__}: {e}"
+            logger.error(f"[Scheduler] Failed to apply settings {request.values}: {e}")
+        try:
+            if request.change_id is not None:
+                if request.error is None:
+                    runtime_config.mark_applied(request.change_id)
+                else:
+                    runtime_config.mark_failed(request.change_id, request.error)
+        except Exception as e:
+            logger.error(f"[Scheduler] Failed to record settings change {request.change_id}: {e}")
+        finally:
+            request.done.set()
+
+    def _apply_config(self, values: dict):
+        """应用运行时参数，失败时恢复原取值（config 属性和调度策略）后重新抛出异常"""
+        old = runtime_config.current(values)
+        try:
+            self._apply_config_values(values)
+        except Exception:
+            runtime_config.apply(old)
+            if "SCHEDULING_POLICY" in old:
+                self.set_policy(old["SCHEDULING_POLICY"])
+            raise
+
+    def _apply_config_values(self, values: dict):
+        """
+        应用运行时参数
+
+        - 回温速率：回温中的房间先按原速率固定当前温度，再重新计算回温结束和待机重启时刻
+        - 默认服务池参数（默认服务池没有数据库配置时）：等待中的房间改用新时间片；
+          容量增大时立即从等待队列分配，减小时低优先级、服务时间长的先让出（与修改服务池相同）
+        - 调度策略：下一次调度决策起使用新策略
+        - 耗电速率影响功率预算，所有服务池都重新检查容量
+        """
+        restore_changed = "TEMP_RESTORE_RATE" in values
+        if restore_changed:
+            self.service_manager.rebase_restore()
+        runtime_config.apply(values)
+        if restore_changed:
+            self.service_manager.reschedule_restarts()
+
+        if "SCHEDULING_POLICY" in values:
+            self.set_policy(values["SCHEDULING_POLICY"])
+
+        if self._default_pool_from_config and any(
+            name in values for name in runtime_config.POOL_PARAMETERS
+        ):
+            pool = self.pools[DEFAULT_SERVICE_POOL]
+            pool.capacity = config.MAX_SERVICE_NUM
+            pool.wait_time_slice = config.WAIT_TIME_SLICE
+            pool.power_budget = config.POWER_BUDGET_KW
+            for wobj in pool.wait_queue.values():
+                wobj.wait_duration = pool.wait_time_slice
+
+        for pool in self.pools.values():
+            self._fit_capacity(pool)
+        logger.info(f"[Scheduler] Runtime settings applied: {values}")
+
+    # ========== 热启动 ==========
+
+    @locked
+    def warm_start(self, data: Optional[WarmStartData] = None) -> int:
+        """
+        重启后按数据库恢复入住房间的状态和队列，返回恢复的房间数（data 为 None 时读取数据库）
+
+        - 关机 / 待机的房间从上次写入的温度继续回温（计入停机期间），待机房间重新计算重启时刻
+        - 重启前开机（服务中 / 等待中，或有未结束详单）的房间按风速优先级从高到低重新准入：
+          有未结束详单且服务池放得下的继续原详单，否则结束原详单后作为新请求参与调度；
+          原详单在重启前已累计的费用只在结束时写入，无法恢复
+        - 已在调度器中的房间（启动前入住）不受影响；没有入住订单的房间遗留的详单直接结束
+        """
+        if data is None:
+            data = load_warm_start_data()
+        now = timezone.now()
+        open_records: Dict[str, dict] = {}
+        stale = []
+        for row in data.open_records:  # 同一房间只保留最晚的详单
+            if row["room_id"] in open_records:
+                stale.append(open_records[row["room_id"]])
+            open_records[row["room_id"]] = row
+
+        restored = 0
+        candidates = []
+        with self.service_manager.batch_detail_records():
+            for room_id, order_id in data.orders.items():
+                if room_id in self.service_manager.room_states:
+                    continue
+                state = data.states.get(room_id)
+                open_record = open_records.pop(room_id, None)
+                record = self.service_manager.restore_room(room_id, order_id, state, open_record, now)
+                restored += 1
+                was_on = state is not None and state["is_on"] and state["status"] in ("on", "waiting")
+                if open_record is not None or was_on:
+                    candidates.append((record, open_record))
+            stale.extend(row for room_id, row in open_records.items()
+                         if room_id not in self.service_manager.room_states)
+            self.service_manager.end_stale_records(stale)
+
+            # 高优先级先准入，同优先级中重启前正在服务的先准入
+            candidates.sort(key=lambda c: (-c[0].get_priority(), c[1] is None))
+            for record, open_record in candidates:
+                self._readmit(record, open_record)
+
+        self.publish()
+        logger.info(
+            f"[Scheduler] Warm start: {restored} rooms restored, {len(candidates)} readmitted, "
+            f"{len(stale)} stale records ended"
+        )
+        return restored
+
+    def _readmit(self, record: RoomRecord, open_record: Optional[dict]):
+        """热启动：重新准入重启前开机的房间"""
+        room_id = record.room_id
+        pool = self.pool_of(room_id)
+        if open_record is not None:
+            record.record_id = open_record["record_id"]
+            record.record_start_cost = record.cost
+            record.record_start_energy = record.energy_consumed
+            if pool.can_admit(record.fan_speed):
+                # 继续原详单
+                self.service_manager.update_room_status(room_id, "on")
+                record.start_service()
+                pool.service_queue[room_id] = record
+                return
+            self.service_manager.end_detail_record(record)
+        self._enqueue(room_id, record.target_temp, record.fan_speed, record.mode)
+
     def start(self):
         """启动调度器"""
         if not self.running:
+            try:
+                self.load_settings()
+            except Exception as e:
+                logger.error(f"[Scheduler] Failed to load runtime settings: {e}")
+            try:
+                self.load_pools()
+            except Exception as e:
+                # 数据库尚未迁移等情况：所有房间使用默认服务池
+                logger.error(f"[Scheduler] Failed to load service pools: {e}")
+            from ac_system.shard_worker import SHARD_WORKER_ENV
+
+            # 调度进程由分片路由按房间归属分别热启动
+            if config.WARM_START and not os.environ.get(SHARD_WORKER_ENV):
+                try:
+                    self.warm_start()
+                except Exception as e:
+                    logger.error(f"[Scheduler] Warm start failed: {e}")
+            if config.STATE_TABLE_NAME and self.state_table is None:
+                self.create_state_table(config.STATE_TABLE_NAME)
             self.running = True
+            self.last_tick_at = time.monotonic()
             self.scheduler_thread = threading.Thread(
                 target=self._scheduler_loop, daemon=True
             )
             self.scheduler_thread.start()
             logger.info("[Scheduler] ACScheduler started")
 
-    def stop(self):
+    def stop(self, timeout: float = 2.0):
         """停止调度器"""
         self.running = False
+        self._wakeup.set()
         if self.scheduler_thread:
-            self.scheduler_thread.join(timeout=2)
+            self.scheduler_thread.join(timeout=timeout)
+        if self.state_table is not None:
+            with self._state_lock:
+                self.state_table.close()
+                self.state_table = None
         logger.info("[Scheduler] ACScheduler stopped")
 
+    def shutdown(self, timeout: float = 10.0):
+        """
+        优雅停止：等待当前主循环结束后停止调度器，结束服务中房间的详单（写入已累计的费用和能耗），
+        并写入全部房间的空调状态，重启后热启动从这里继续（服务中 / 等待中的房间重新参与调度）
+        """
+        self.stop(timeout)
+        if self.scheduler_thread is not None and self.scheduler_thread.is_alive():
+            logger.error("[Scheduler] Scheduler thread did not stop, detail records not flushed")
+            return
+        with self._state_lock, transaction.atomic():
+            rooms = list(self.service_manager.room_states.values())
+            with self.service_manager.batch_detail_records():
+                for record in rooms:
+                    self.service_manager.end_detail_record(record)
+            for record in rooms:
+                self.persist_state(record.room_id)
+        logger.info(f"[Scheduler] Shutdown: flushed {len(rooms)} rooms")
+
+    def health(self) -> dict:
+        """调度线程是否存活、距上一次主循环结束的时间和主循环延迟（超出主循环间隔的部分，秒）"""
+        alive = self.running and self.scheduler_thread is not None and self.scheduler_thread.is_alive()
+        since = None if self.last_tick_at is None else time.monotonic() - self.last_tick_at
+        return {
+            "alive": alive,
+            "seconds_since_tick": since,
+            "tick_lag": None if since is None else max(0.0, since - self.tick_interval),
+            "rooms": len(self.service_manager.room_states),
+        }
+
+    def create_state_table(self, name: str, capacity: int = config.STATE_TABLE_CAPACITY):
+        """创建共享内存状态表并写入全部房间，此后每次发布快照同步更新"""
+        self.state_table = StateTable.create(name, capacity)
+        self.publish()
+        logger.info(f"[Scheduler] State table {name} created, capacity={capacity}")
+
     def _scheduler_loop(self):
         """调度器主循环"""
 
         time.sleep(0.1)  # 等待0.1秒，确保所有房间都初始化完成
 
+        next_tick = time.monotonic()
         while self.running:
             try:
-                # 1. 处理待处理的请求（防抖）
-                self._process_pending_requests()
+                if time.monotonic() >= next_tick:
+                    self.tick_profiler.begin_tick()
+                    try:
+                        self._tick()
+                    finally:
+                        self.tick_profiler.end_tick()
+                        self.last_tick_at = time.monotonic()
+                        next_tick = self.last_tick_at + self.tick_interval  # 每秒执行一次
+
+                    print("进行了一次调度器主循环…")
+                else:
+                    # 两次主循环之间到期的防抖请求，到期即处理
+                    with self._state_lock:
+                        with self.service_manager.batch_detail_records():
+                            processed = self._process_pending_requests()
+                        if processed:
+                            self.publish(processed)
+            except Exception as e:
+                logger.error(f"[Scheduler] Scheduler loop error: {e}")
 
+            # 等待到下一次主循环或最早的防抖截止时间
+            self._wakeup.clear()
+            wake_at = next_tick
+            for debouncer in (self.debouncer, self.temp_debouncer):
+                deadline = debouncer.next_deadline()
+                if deadline is not None and deadline < wake_at:
+                    wake_at = deadline
+            timeout = wake_at - time.monotonic()
+            if timeout > 0:
+                self._wakeup.wait(timeout)
+
+    @locked
+    def _tick(self):
+        """执行一次调度主循环"""
+        active = self._active_rooms()
+
+        # 本轮所有详单的新建和结束在主循环结束时一次提交
+        with self.service_manager.batch_detail_records():
+            # 0. 运行时参数修改在主循环边界整体生效
+            if self._pending_config:
+                self._apply_pending_config()
+
+            # 1. 处理待处理的请求（防抖）
+            processed = self._process_pending_requests()
+
+            # 各服务池独立调度，互不影响
+            for pool in list(self.pools.values()):
                 # 2. 委托 ServiceManager 更新温度和费用
-                self._update_all_temperatures()
+                self._update_all_temperatures(pool)
 
                 # 3. 执行时间片调度
-                self._check_wait_queue()
+                self._check_wait_queue(pool)
 
                 # 4. 检查是否达到目标温度
-                self._check_target_reached()
-
-                print("进行了一次调度器主循环…")
-                time.sleep(1)  # 每秒执行一次
-            except Exception as e:
-                logger.error(f"[Scheduler] Scheduler loop error: {e}")
-
-    def _process_pending_requests(self):
-        """处理待处理的请求（防抖处理）"""
-        current_time = time.time()
-        to_process = []
+                self._check_target_reached(pool)
+
+                # 5. 房间迁出后空出的槽位分配给等待队列
+                self._allocate_from_wait_queue(pool)
+
+            # 6. 待机房间温度偏离后重新请求服务
+            self._restart_due_rooms()
+
+        # 本轮只有服务 / 等待队列中的房间和处理了请求的房间被修改，只需重建这些房间的快照
+        active |= self._active_rooms()
+        active.update(processed)
+        restoring = self.service_manager.is_restoring()
+        if active:
+            self.publish(active)
+        elif restoring or self._was_restoring:
+            # 回温温度在读取时计算，快照不变，只需让 ETag 失效
+            # （回温结束后的下一轮也要递增一次，覆盖最后一段温度变化）
+            self.state_version.bump()
+        self._was_restoring = restoring
+
+    def profile_ticks(self, ticks: int, kind: str = "cpu"):
+        """对接下来 ticks 次主循环进行性能分析（cpu: cProfile, mem: tracemalloc）"""
+        self.tick_profiler.arm(ticks, kind)
+        logger.info(f"[Scheduler] Profiling next {ticks} ticks ({kind})")
+
+    def _emit(self, event_type: str, room_id: str, **extra):
+        """记录调度事件（房间当前状态随事件一并记录）"""
+        state = self.service_manager.room_states.get(room_id, {})
+        fan_speed = state.get("fan_speed")
+        counters.incr(f"pool.{self.pool_of(room_id).name}.{event_type}")
+        fields = {
+            "status": state.get("status", "off"),
+            "fan_speed": fan_speed,
+            "priority": FAN_SPEED_PRIORITY.get(fan_speed, 0),
+            "current_temp": round(state.get("current_temp", INITIAL_ROOM_TEMP), 2),
+            "target_temp": state.get("target_temp"),
+        }
+        fields.update(extra)  # extra 可覆盖房间当前状态（如开机事件记录请求的风速和目标温度）
+        self.event_log.emit(event_type, room_id, **fields)
 
-        for room_id, timestamp in list(self._request_timestamps.items()):
-            if current_time - timestamp >= 1.0:  # 超过1秒，处理请求
-                if room_id in self._pending_requests:
-                    to_process.append((room_id, self._pending_requests[room_id]))
-                    del self._pending_requests[room_id]
-                del self._request_timestamps[room_id]
+    def _process_pending_requests(self) -> List[str]:
+        """处理已到截止时间的防抖请求，返回处理了请求的房间"""
+        # 两个防抖队列按截止时间合并：同一房间先到期的请求先处理（同时到期时开关机 / 调风速在前）
+        due = self.debouncer.pop_due_entries() + self.temp_debouncer.pop_due_entries()
+        due.sort(key=lambda entry: entry[0])
+        to_process = [(room_id, request) for _, room_id, request in due]
 
         for room_id, request in to_process:
             self._handle_request(room_id, request)
+        # 防抖请求的结果由调度器写入数据库（提交时未写入）
+        for room_id, request in to_process:
+            try:
+                self.persist_state(room_id, request.get("action"))
+            except Exception as e:
+                logger.error(f"[Scheduler] Failed to persist state for room {room_id}: {e}")
+        return [room_id for room_id, _ in to_process]
 
     def _handle_request(self, room_id: str, request: dict):
         """实际处理请求 - 调度决策"""
         action = request.get("action")
 
         if action == "power_on":
+            # 防抖窗口内先关机后开机：合并为一次开机请求，先完成关机
+            if request.get(POWER_OFF_FIRST) and self.service_manager.get_record(room_id).is_on:
+                self._power_off(room_id)
             self._power_on(room_id, request)
         elif action == "power_off":
             self._power_off(room_id)
@@ -487,26 +1662,49 @@ class ACScheduler:
 
     def submit_request(self, room_id: str, request: dict):
         """提交请求（带防抖）"""
-        current_time = time.time()
-
-        # 如果是调温请求，不算新请求，直接处理
+        if self.request_trace is not None:
+            self.request_trace.record(room_id, request)
+        return self._resubmit(room_id, request)
+
+    @locked
+    def _resubmit(self, room_id: str, request: dict):
+        """调度器内部发起的请求（待机房间重启等）：与外部请求相同处理，不记入请求轨迹"""
+        result = self._submit_request(room_id, request)
+        # 受影响的其他房间（被抢占、被分配服务等）都经过 update_room_status，已记为变化
+        self.publish([room_id])
+        return result
+
+    def _submit_request(self, room_id: str, request: dict):
+        # 调温请求不算新请求，不参与开关机 / 调风速的防抖（尚未处理的开机请求同步使用新的目标温度）
         if request.get("action") == "change_temp":
+            self.debouncer.amend(room_id, request)
+            if self.temp_debouncer.submit(room_id, request):
+                # 连续调温：只保留最后一次目标温度，窗口结束后处理
+                self._wakeup.set()
+                return {"status": "pending", "message": "温度调节请求已合并，等待处理"}
             self._handle_request(room_id, request)
             return {"status": "success", "message": "温度调节请求已处理"}
 
         # 其他请求需要防抖处理
-        last_time = self._request_timestamps.get(room_id, 0)
-
-        if current_time - last_time < 1.0:
-            # 间隔小于1秒，覆盖之前的请求
-            self._pending_requests[room_id] = request
-            self._request_timestamps[room_id] = current_time
+        if self.debouncer.submit(room_id, request):
+            # 间隔小于防抖间隔，与之前的请求合并，最后一次请求后到期处理
+            self._wakeup.set()
             return {"status": "pending", "message": "请求已更新，等待处理"}
-        else:
-            # 间隔大于1秒，直接处理
-            self._request_timestamps[room_id] = current_time
-            self._handle_request(room_id, request)
-            return {"status": "success", "message": "请求已处理"}
+
+        # 间隔大于防抖间隔，直接处理
+        self._handle_request(room_id, request)
+        return {"status": "success", "message": "请求已处理"}
+
+    def submit_batch(self, requests: List[Tuple[str, dict]]) -> List[dict]:
+        """批量提交请求，按顺序逐个处理，单个房间失败不影响其他房间"""
+        results = []
+        for room_id, request in requests:
+            try:
+                results.append(self.submit_request(room_id, request))
+            except Exception as e:
+                logger.error(f"[Scheduler] Batch request failed for room {room_id}: {e}")
+                results.append({"status": "error", "message": str(e)})
+        return results
 
     # ========== 调度决策方法 ==========
 
@@ -517,42 +1715,51 @@ class ACScheduler:
         mode = request.get("mode", "cooling")
 
         # 验证温度范围
-        if mode == "cooling":
-            target_temp = max(COOLING_MIN_TEMP, min(COOLING_MAX_TEMP, target_temp))
-        else:
-            target_temp = max(HEATING_MIN_TEMP, min(HEATING_MAX_TEMP, target_temp))
+        target_temp = clamp_target_temp(target_temp, mode)
+
+        # 房间记录保留当前温度和累计费用/能耗，第二次开机时继续累加
+        record = self.service_manager.get_record(room_id)
+        current_status = record.status
 
-        # 获取当前温度和累计费用/能耗
-        room_state = self.service_manager.room_states.get(room_id, {})
-        current_temp = room_state.get("current_temp", INITIAL_ROOM_TEMP)
-        current_status = room_state.get("status", "off")
-        # 获取之前累计的费用和能耗，第二次开机时继续累加
-        accumulated_cost = Decimal(str(room_state.get("cost", 0)))
-        accumulated_energy = room_state.get("energy_consumed", 0)
+        # 已在队列中的房间重新开机：先离开原队列，再作为新请求参与调度
+        pool = self.pool_of(room_id)
+        if room_id in pool.service_queue:
+            self.service_manager.end_detail_record(record)
+            del pool.service_queue[room_id]
+        pool.wait_queue.pop(room_id, None)
 
         # 只有从 "off" 状态开机才增加计数（standby 自动重启不计数）
         if current_status == "off":
-            try:
-                order = AccommodationOrder.objects.filter(
-                    room__room_id=room_id, status="active"
-                ).first()
-                if order:
-                    order.power_on_count += 1
-                    order.save(update_fields=["power_on_count"])
-                    logger.info(f"[Scheduler] Room {room_id} power on count: {order.power_on_count}")
-            except Exception as e:
-                logger.error(f"[Scheduler] Failed to update power on count for room {room_id}: {e}")
+            self.service_manager.count_power_on(room_id)
+
+        # 先记录开机事件，再记录调度产生的 preempt / wait 事件；
+        # 此时房间尚未更新，事件中记录本次请求的风速和目标温度
+        self._emit(
+            "restart" if current_status == "standby" else "power_on",
+            room_id,
+            fan_speed=fan_speed,
+            priority=FAN_SPEED_PRIORITY.get(fan_speed, 0),
+            target_temp=target_temp,
+        )
 
-        # 调度决策：检查服务队列是否已满
-        if len(self.service_queue) < self.max_service_num:
+        self._enqueue(room_id, target_temp, fan_speed, mode)
+
+    def _enqueue(self, room_id: str, target_temp: float, fan_speed: str, mode: str):
+        """在房间所属服务池中分配服务或参与调度"""
+        record = self.service_manager.get_record(room_id)
+        record.target_temp = target_temp
+        record.fan_speed = fan_speed
+        record.mode = mode
+        # 调度决策：服务池放得下时直接服务，否则由调度策略决定抢占哪些服务对象
+        victims = self.policy.admit(self.pool_of(room_id), record)
+        if victims == []:
             # 直接分配服务
-            self._allocate_service(room_id, target_temp, fan_speed, mode, current_temp, 
-                                   accumulated_cost, accumulated_energy)
+            self._allocate_service(room_id, target_temp, fan_speed, mode)
             logger.info(f"[Scheduler] Room {room_id} started service directly")
         else:
             # 需要调度决策
-            self._schedule_request(room_id, target_temp, fan_speed, mode, current_temp,
-                                   accumulated_cost, accumulated_energy)
+            self._schedule_request(room_id, target_temp, fan_speed, mode, victims)
+            self._defer_preemption(self.pool_of(room_id), record)
 
     def _schedule_request(
         self,
@@ -560,42 +1767,25 @@ class ACScheduler:
         target_temp: float,
         fan_speed: str,
         mode: str,
-        current_temp: float,
-        accumulated_cost: Decimal = Decimal("0.00"),
-        accumulated_energy: float = 0.0,
+        victims: Optional[List[Tuple[str, RoomRecord]]],
     ):
-        """调度新请求 - 优先级调度决策"""
-        new_priority = FAN_SPEED_PRIORITY.get(fan_speed, 0)
-
-        # 查找可以被抢占的服务对象
-        preemptable = []
-        for sid, sobj in self.service_queue.items():
-            if sobj.get_priority() < new_priority:
-                preemptable.append((sid, sobj))
-
-        if preemptable:
-            # 优先级调度：抢占低优先级的服务
-            if len(preemptable) == 1:
-                victim_id, victim = preemptable[0]
-            else:
-                # 多个可抢占，选择风速最低的；如果风速相同，选择服务时长最长的
-                preemptable.sort(
-                    key=lambda x: (x[1].get_priority(), -x[1].service_duration)
-                )
-                victim_id, victim = preemptable[0]
-
-            # 将被抢占的房间放入等待队列
-            self._move_to_wait_queue(victim_id, victim)
+        """调度新请求 - 抢占调度策略选出的服务对象（默认为优先级调度），没有可抢占的则进入等待队列"""
+        if victims:
+            # 抢占（功率预算模式下可能需要抢占多个）
+            for victim_id, victim in victims:
+                # 将被抢占的房间放入等待队列
+                self._move_to_wait_queue(victim_id, victim)
 
             # 新请求获得服务
-            self._allocate_service(room_id, target_temp, fan_speed, mode, current_temp,
-                                   accumulated_cost, accumulated_energy)
-            logger.info(f"[Scheduler] Room {room_id} preempted room {victim_id}")
+            self._allocate_service(room_id, target_temp, fan_speed, mode)
+            for victim_id, _ in victims:
+                logger.info(f"[Scheduler] Room {room_id} preempted room {victim_id}")
+                self._emit("preempt", room_id, victim=victim_id)
         else:
             # 时间片调度：加入等待队列
-            self._add_to_wait_queue(room_id, target_temp, fan_speed, mode, current_temp,
-                                    accumulated_cost, accumulated_energy)
+            self._add_to_wait_queue(room_id, target_temp, fan_speed, mode)
             logger.info(f"[Scheduler] Room {room_id} added to wait queue")
+            self._emit("wait", room_id)
 
     def _allocate_service(
         self,
@@ -603,25 +1793,12 @@ class ACScheduler:
         target_temp: float,
         fan_speed: str,
         mode: str,
-        current_temp: float,
-        cost: Decimal = Decimal("0.00"),
-        energy_consumed: float = 0,
     ):
-        """分配服务 - 创建服务对象"""
-        service_obj = ServiceObject(room_id, target_temp, fan_speed, mode)
-        service_obj.current_temp = current_temp
-        service_obj.cost = cost if isinstance(cost, Decimal) else Decimal(str(cost))
-        service_obj.energy_consumed = energy_consumed
-        self.service_queue[room_id] = service_obj
-
-
-        # 委托 ServiceManager 创建详单记录
-        self.service_manager.create_detail_record(service_obj)
-
-        # 更新房间状态
+        """分配服务 - 房间记录进入服务队列"""
         self.service_manager.update_room_status(
             room_id, "on", target_temp=target_temp, fan_speed=fan_speed, mode=mode
         )
+        self._start_service(self.service_manager.room_states[room_id])
 
     def _add_to_wait_queue(
         self,
@@ -629,38 +1806,33 @@ class ACScheduler:
         target_temp: float,
         fan_speed: str,
         mode: str,
-        current_temp: float,
-        cost: Decimal = Decimal("0.00"),
-        energy_consumed: float = 0,
     ):
         """加入等待队列"""
-        wait_obj = WaitingObject(room_id, target_temp, fan_speed, mode)
-        wait_obj.current_temp = current_temp
-        wait_obj.cost = cost if isinstance(cost, Decimal) else Decimal(str(cost))
-        wait_obj.energy_consumed = energy_consumed
-        self.wait_queue[room_id] = wait_obj
-
-        # 更新房间状态
         self.service_manager.update_room_status(
             room_id, "waiting", target_temp=target_temp, fan_speed=fan_speed, mode=mode
         )
+        record = self.service_manager.room_states[room_id]
+        pool = self.pool_of(room_id)
+        record.start_waiting(pool.wait_time_slice)
+        pool.wait_queue[room_id] = record
 
-    def _move_to_wait_queue(self, room_id: str, service_obj: ServiceObject):
+    def _start_service(self, record: RoomRecord):
+        """房间记录进入服务队列并创建详单记录（调用方负责更新房间状态）"""
+        record.start_service()
+        self.pool_of(record.room_id).service_queue[record.room_id] = record
+
+        # 委托 ServiceManager 创建详单记录
+        self.service_manager.create_detail_record(record)
+
+    def _move_to_wait_queue(self, room_id: str, service_obj: RoomRecord):
         """将服务对象移动到等待队列"""
-        # 委托 ServiceManager 结束详单记录
+        # 委托 ServiceManager 结束详单记录（等待期间不关联详单）
         self.service_manager.end_detail_record(service_obj)
 
-        # 创建等待对象
-        wait_obj = WaitingObject(
-            room_id, service_obj.target_temp, service_obj.fan_speed, service_obj.mode
-        )
-        wait_obj.current_temp = service_obj.current_temp
-        wait_obj.energy_consumed = service_obj.energy_consumed
-        wait_obj.cost = service_obj.cost
-        wait_obj.record_id = None  # 等待期间不关联详单
-
-        self.wait_queue[room_id] = wait_obj
-        del self.service_queue[room_id]
+        pool = self.pool_of(room_id)
+        service_obj.start_waiting(pool.wait_time_slice)
+        pool.wait_queue[room_id] = service_obj
+        del pool.service_queue[room_id]
 
         # 更新房间状态
         self.service_manager.update_room_status(room_id, "waiting")
@@ -668,25 +1840,28 @@ class ACScheduler:
 
     def _power_off(self, room_id: str):
         """关机请求 - 调度决策"""
+        pool = self.pool_of(room_id)
+
         # 从服务队列移除
-        if room_id in self.service_queue:
+        if room_id in pool.service_queue:
             # 委托 ServiceManager 结束详单记录
-            self.service_manager.end_detail_record(self.service_queue[room_id])
-            del self.service_queue[room_id]
+            self.service_manager.end_detail_record(pool.service_queue[room_id])
+            del pool.service_queue[room_id]
             logger.info(f"[Scheduler] Room {room_id} removed from service queue")
             # 检查等待队列，分配空闲槽位
-            self._allocate_from_wait_queue()
+            self._allocate_from_wait_queue(pool)
 
         # 从等待队列移除
-        if room_id in self.wait_queue:
-            wobj = self.wait_queue[room_id]
+        if room_id in pool.wait_queue:
+            wobj = pool.wait_queue[room_id]
             if wobj.record_id:
                 self.service_manager.end_waiting_detail_record(wobj)
-            del self.wait_queue[room_id]
+            del pool.wait_queue[room_id]
             logger.info(f"[Scheduler] Room {room_id} removed from wait queue")
 
         # 更新房间状态
         self.service_manager.update_room_status(room_id, "off")
+        self._emit("power_off", room_id)
 
     def _change_temp(self, room_id: str, request: dict):
         """调温请求（不算新请求，不触发调度）"""
@@ -694,18 +1869,16 @@ class ACScheduler:
         mode = request.get("mode", "cooling")
 
         # 验证温度范围
-        if mode == "cooling":
-            target_temp = max(COOLING_MIN_TEMP, min(COOLING_MAX_TEMP, target_temp))
-        else:
-            target_temp = max(HEATING_MIN_TEMP, min(HEATING_MAX_TEMP, target_temp))
+        target_temp = clamp_target_temp(target_temp, mode)
+        pool = self.pool_of(room_id)
 
-        if room_id in self.service_queue:
-            self.service_queue[room_id].target_temp = target_temp
-            self.service_queue[room_id].mode = mode
+        if room_id in pool.service_queue:
+            pool.service_queue[room_id].target_temp = target_temp
+            pool.service_queue[room_id].mode = mode
 
-        elif room_id in self.wait_queue:
-            self.wait_queue[room_id].target_temp = target_temp
-            self.wait_queue[room_id].mode = mode
+        elif room_id in pool.wait_queue:
+            pool.wait_queue[room_id].target_temp = target_temp
+            pool.wait_queue[room_id].mode = mode
 
         else:
             # 房间可能处于 standby 状态，检查是否需要立即重新请求服务
@@ -727,7 +1900,7 @@ class ACScheduler:
                     self.service_manager.room_states[room_id]["mode"] = mode
                     
                     # 重新发送开机请求参与调度
-                    self.submit_request(room_id, {
+                    self._resubmit(room_id, {
                         "action": "power_on",
                         "target_temp": target_temp,
                         "fan_speed": state.get("fan_speed", "medium"),
@@ -740,56 +1913,57 @@ class ACScheduler:
         if room_id in self.service_manager.room_states:
             self.service_manager.room_states[room_id]["target_temp"] = target_temp
             self.service_manager.room_states[room_id]["mode"] = mode
+            # 待机房间的重启时刻随目标温度变化
+            self.service_manager.schedule_restart(room_id)
 
         logger.info(f"[Scheduler] Room {room_id} temperature changed to {target_temp}")
 
     def _change_speed(self, room_id: str, request: dict):
         """调风请求（算新请求，可能触发调度）"""
         new_speed = request.get("fan_speed", "medium")
+        pool = self.pool_of(room_id)
 
-        if room_id in self.service_queue:
-            old_speed = self.service_queue[room_id].fan_speed
+        if room_id in pool.service_queue:
+            old_speed = pool.service_queue[room_id].fan_speed
 
             # 委托 ServiceManager 结束旧记录
-            self.service_manager.end_detail_record(self.service_queue[room_id])
+            self.service_manager.end_detail_record(pool.service_queue[room_id])
 
-            self.service_queue[room_id].fan_speed = new_speed
-            self.service_queue[room_id].service_start_time = datetime.now()
-            self.service_queue[room_id].service_duration = 0
+            pool.service_queue[room_id].fan_speed = new_speed
+            pool.service_queue[room_id].start_service()
 
             # 委托 ServiceManager 创建新记录
-            self.service_manager.create_detail_record(self.service_queue[room_id])
+            self.service_manager.create_detail_record(pool.service_queue[room_id])
 
             logger.info(
                 f"[Scheduler] Room {room_id} speed changed from {old_speed} to {new_speed}"
             )
-
-        elif room_id in self.wait_queue:
-            self.wait_queue[room_id].fan_speed = new_speed
-            # 检查是否可以抢占
-            new_priority = FAN_SPEED_PRIORITY.get(new_speed, 0)
-            for sid, sobj in list(self.service_queue.items()):
-                if sobj.get_priority() < new_priority:
-                    # 可以抢占
-                    wait_obj = self.wait_queue[room_id]
+            if pool.power_budget > 0:
+                # 调高风速可能超出功率预算，调低后可能有余量分配给等待中的房间
+                self._fit_capacity(pool)
+
+        elif room_id in pool.wait_queue:
+            pool.wait_queue[room_id].fan_speed = new_speed
+            # 检查是否可以抢占（与新请求相同，由调度策略决定）
+            victims = self.policy.admit(pool, pool.wait_queue[room_id])
+            if victims is not None:
+                # 可以抢占
+                wait_obj = pool.wait_queue.pop(room_id)
+                for sid, sobj in victims:
                     self._move_to_wait_queue(sid, sobj)
 
-                    # 分配服务
-                    self._allocate_service(
-                        room_id,
-                        wait_obj.target_temp,
-                        new_speed,
-                        wait_obj.mode,
-                        wait_obj.current_temp,
-                        wait_obj.cost,
-                        wait_obj.energy_consumed,
-                    )
-                    del self.wait_queue[room_id]
+                # 分配服务
+                self._allocate_service(
+                    room_id, wait_obj.target_temp, new_speed, wait_obj.mode
+                )
 
+                for sid, _ in victims:
                     logger.info(
                         f"[Scheduler] Room {room_id} preempted room {sid} after speed change"
                     )
-                    break
+                    self._emit("preempt", room_id, victim=sid)
+            else:
+                self._defer_preemption(pool, pool.wait_queue[room_id])
 
         # 更新房间状态
         if room_id in self.service_manager.room_states:
@@ -797,86 +1971,110 @@ class ACScheduler:
 
     # ========== 温度更新（委托给 ServiceManager）==========
 
-    def _update_all_temperatures(self):
-        """更新所有房间温度 - 委托给 ServiceManager"""
+    def _update_all_temperatures(self, pool: Pool):
+        """
+        更新服务池中服务和等待中房间的温度 - 委托给 ServiceManager
+
+        关机 / 待机房间的回温在读取时计算，不在这里逐个更新
+        """
         # 更新服务中的房间
-        for room_id, sobj in self.service_queue.items():
+        for room_id, sobj in pool.service_queue.items():
             self.service_manager.update_service_temperature(sobj)
 
         # 更新等待中的房间
-        for room_id, wobj in self.wait_queue.items():
+        for room_id, wobj in pool.wait_queue.items():
             self.service_manager.update_waiting_state(wobj)
 
-        # 更新关机房间（回温）
-        all_active = set(self.service_queue.keys()) | set(self.wait_queue.keys())
-        for room_id in self.service_manager.room_states:
-            if room_id not in all_active:
-                self.service_manager.update_off_room_temperature(room_id)
 
     # ========== 时间片调度 ==========
 
-    def _check_wait_queue(self):
-        """检查等待队列，执行时间片调度"""
-        if not self.wait_queue:
+    def _defer_preemption(self, pool: Pool, record: RoomRecord):
+        """请求进入等待队列只是因为可抢占的服务对象还在最小服务时长内：记下来，保护期过后再抢占"""
+        if record.room_id in pool.wait_queue and self.policy.held_back(pool, record, preempt=True):
+            pool.deferred.add(record.room_id)
+
+    def _retry_preemption(self, pool: Pool):
+        """暂缓抢占的等待房间重新尝试抢占（按调度策略的分配顺序）"""
+        if not pool.deferred:
+            return
+        for room_id, wobj in self.policy.pick_next(pool):
+            if room_id not in pool.deferred:
+                continue
+            victims = self.policy.pick_victim(pool, wobj, preempt=True)
+            if victims is None:
+                if not self.policy.held_back(pool, wobj, preempt=True):
+                    pool.deferred.discard(room_id)  # 保护期过后也不能抢占，按时间片调度
+                continue
+            pool.deferred.discard(room_id)
+            self._swap_in(pool, room_id, wobj, victims, "preempt")
+        # 已离开等待队列（分配服务、关机、迁出）的房间
+        pool.deferred.intersection_update(pool.wait_queue)
+
+    def _swap_in(self, pool: Pool, room_id: str, wobj: RoomRecord, victims, event_type: str):
+        """等待中的房间换出 victims 后开始服务（房间记录保留等待期间的能耗和费用）"""
+        for victim_id, victim in victims:
+            self._move_to_wait_queue(victim_id, victim)
+
+        del pool.wait_queue[room_id]
+        self._start_service(wobj)
+
+        # 更新房间状态
+        self.service_manager.update_room_status(room_id, "on")
+        for victim_id, _ in victims:
+            if event_type == "swap":
+                logger.info(f"[Scheduler] Time slice: Room {room_id} replaced room {victim_id}")
+            else:
+                logger.info(
+                    f"[Scheduler] Room {room_id} preempted room {victim_id} after service quantum"
+                )
+            self._emit(event_type, room_id, victim=victim_id)
+        if not victims:
+            self._emit("resume", room_id)
+
+    def _check_wait_queue(self, pool: Pool):
+        """检查服务池的等待队列，执行时间片调度"""
+        if not pool.wait_queue:
             return
 
+        # 最小服务时长已过的服务对象可以被暂缓的抢占换出
+        self._retry_preemption(pool)
+
         # 检查是否有等待时间到期的请求
         expired = []
-        for room_id, wobj in self.wait_queue.items():
+        for room_id, wobj in pool.wait_queue.items():
             if wobj.is_wait_expired():
                 expired.append((room_id, wobj))
                 wobj.waited_full_slice = True
 
-        if expired and len(self.service_queue) >= self.max_service_num:
-            # 按优先级排序（高优先级优先），同优先级按等待开始时间排序（先等待的优先）
-            expired.sort(
-                key=lambda x: (-x[1].get_priority(), x[1].wait_start_time),
-            )
+        # 服务池能直接容纳的房间在主循环第 5 步分配，这里只处理需要换出服务对象的房间
+        expired = [
+            (room_id, wobj) for room_id, wobj in expired if not pool.can_admit(wobj.fan_speed)
+        ]
+
+        if expired:
+            # 处理顺序由调度策略决定（默认高优先级优先，同优先级先等待的优先）
+            expired = self.policy.on_slice_expired(pool, expired)
 
             # 记录本轮成功替换的房间
             swapped_rooms = []
 
             for room_id, wobj in expired:
                 # 如果该房间已经不在等待队列中（可能已被处理），跳过
-                if room_id not in self.wait_queue:
+                if room_id not in pool.wait_queue:
                     continue
                     
-                # 找到服务时长最长的同优先级或低优先级服务对象
-                candidates = [
-                    (sid, sobj)
-                    for sid, sobj in self.service_queue.items()
-                    if sobj.get_priority() <= wobj.get_priority()
-                ]
-
-                if candidates:
-                    candidates.sort(key=lambda x: -x[1].service_duration)
-                    victim_id, victim = candidates[0]
-
-                    # 交换
-                    self._move_to_wait_queue(victim_id, victim)
-
-                    # 分配服务（继承等待期间的能耗和费用）
-                    service_obj = ServiceObject(
-                        room_id, wobj.target_temp, wobj.fan_speed, wobj.mode
-                    )
-                    service_obj.current_temp = wobj.current_temp
-                    service_obj.energy_consumed = wobj.energy_consumed
-                    service_obj.cost = wobj.cost
-                    self.service_queue[room_id] = service_obj
-                    del self.wait_queue[room_id]
-
-                    # 创建新的详单记录
-                    self.service_manager.create_detail_record(service_obj)
+                # 由调度策略选择换出的服务对象（默认为服务时长最长的同优先级或低优先级服务对象）
+                victims = self.policy.pick_victim(pool, wobj)
 
-                    # 更新房间状态
-                    self.service_manager.update_room_status(room_id, "on")
-                    logger.info(
-                        f"[Scheduler] Time slice: Room {room_id} replaced room {victim_id}"
-                    )
-                    
+                if victims is not None:
+                    # 交换（功率预算模式下可能换出多个，也可能前面的交换已腾出足够功率）
+                    self._swap_in(pool, room_id, wobj, victims, "swap")
                     swapped_rooms.append(room_id)
                     
                     # 继续尝试下一个到期的房间，不要break
+                elif self.policy.held_back(pool, wobj):
+                    # 服务对象还在最小服务时长 / 轮转滞后期内，保留到期状态，下一轮再试
+                    continue
                 else:
                     # 没有可替换的候选者，重置该房间的等待时间
                     wobj.wait_start_time = datetime.now()
@@ -885,9 +2083,9 @@ class ACScheduler:
                         f"[Scheduler] No candidate to replace, reset wait time for room {room_id}"
                     )
 
-    def _check_target_reached(self):
-        """检查是否达到目标温度"""
-        for room_id, sobj in list(self.service_queue.items()):
+    def _check_target_reached(self, pool: Pool):
+        """检查服务池中的房间是否达到目标温度"""
+        for room_id, sobj in list(pool.service_queue.items()):
             if self.service_manager.check_target_reached(sobj):
                 # 达到目标温度，进入待机状态
                 self.service_manager.update_room_status(room_id, "standby")
@@ -896,120 +2094,345 @@ class ACScheduler:
                 self.service_manager.end_detail_record(sobj)
 
                 # 从服务队列移除，释放槽位
-                del self.service_queue[room_id]
+                del pool.service_queue[room_id]
                 logger.info(
                     f"[Scheduler] Room {room_id} reached target temperature, standby"
                 )
+                self._emit("standby", room_id)
 
                 # 分配给等待队列
-                self._allocate_from_wait_queue()
-
-        # 检查待机房间是否需要重新启动
-        for room_id in list(self.service_manager.room_states.keys()):
-            if self.service_manager.check_need_restart(room_id):
-                state = self.service_manager.room_states[room_id]
-                self.submit_request(
-                    room_id,
-                    {
-                        "action": "power_on",
-                        "target_temp": state.get("target_temp", DEFAULT_TEMP),
-                        "fan_speed": state.get("fan_speed", "medium"),
-                        "mode": state.get("mode", "cooling"),
-                    },
-                )
-                logger.info(
-                    f"[Scheduler] Room {room_id} restarted due to temperature deviation"
-                )
-
-    def _allocate_from_wait_queue(self):
-        """从等待队列分配服务"""
-        while len(self.service_queue) < self.max_service_num and self.wait_queue:
-            # 按优先级和等待时间选择
-            candidates = list(self.wait_queue.items())
-            candidates.sort(
-                key=lambda x: (
-                    -x[1].get_priority(),
-                    x[1].waited_full_slice,
-                    x[1].wait_start_time,
-                )
+                self._allocate_from_wait_queue(pool)
+
+    def _restart_due_rooms(self):
+        """检查待机房间是否需要重新启动（只检查已到重启时刻的房间）"""
+        for room_id in self.service_manager.pop_due_restarts():
+            state = self.service_manager.room_states[room_id]
+            self._resubmit(
+                room_id,
+                {
+                    "action": "power_on",
+                    "target_temp": state.get("target_temp", DEFAULT_TEMP),
+                    "fan_speed": state.get("fan_speed", "medium"),
+                    "mode": state.get("mode", "cooling"),
+                },
+            )
+            logger.info(
+                f"[Scheduler] Room {room_id} restarted due to temperature deviation"
             )
 
-            room_id, wobj = candidates[0]
+    def _allocate_from_wait_queue(self, pool: Pool):
+        """
+        从服务池的等待队列分配服务
 
-            # 分配服务（继承等待期间的能耗和费用）
-            service_obj = ServiceObject(
-                room_id, wobj.target_temp, wobj.fan_speed, wobj.mode
-            )
-            service_obj.current_temp = wobj.current_temp
-            service_obj.energy_consumed = wobj.energy_consumed
-            service_obj.cost = wobj.cost
-            self.service_queue[room_id] = service_obj
-            del self.wait_queue[room_id]
+        按调度策略给出的顺序依次分配；功率预算模式下放不下的房间跳过，剩余功率分配给后面风速较低的房间
+        """
+        if pool.is_full() or not pool.wait_queue:
+            return
+
+        # 分配顺序由调度策略决定（默认按优先级和等待时间）
+        candidates = self.policy.pick_next(pool)
+
+        for room_id, wobj in candidates:
+            if pool.is_full():
+                break
+            if not pool.can_admit(wobj.fan_speed):
+                continue
 
-            # 创建新的详单记录
-            self.service_manager.create_detail_record(service_obj)
+            # 分配服务（房间记录保留等待期间的能耗和费用）
+            del pool.wait_queue[room_id]
+            self._start_service(wobj)
 
             # 更新房间状态
             self.service_manager.update_room_status(room_id, "on")
             logger.info(f"[Scheduler] Room {room_id} allocated from wait queue")
+            self._emit("resume", room_id)
 
     # ========== 对外接口 ==========
 
     def get_room_state(self, room_id: str) -> dict:
-        """获取房间状态"""
-        if room_id in self.service_queue:
-            sobj = self.service_queue[room_id]
-            return {
-                "room_id": room_id,
-                "is_on": True,
-                "status": "on",
-                "current_temp": round(sobj.current_temp, 1),
-                "target_temp": sobj.target_temp,
-                "fan_speed": sobj.fan_speed,
-                "mode": sobj.mode,
-                "energy_consumed": round(sobj.energy_consumed, 2),
-                "cost": float(sobj.cost),
-                "service_duration": sobj.service_duration * TIME_SCALE,  # 转换为系统时间
-            }
-        elif room_id in self.wait_queue:
-            wobj = self.wait_queue[room_id]
-            return {
-                "room_id": room_id,
-                "is_on": True,
-                "status": "waiting",
-                "current_temp": round(wobj.current_temp, 1),
-                "target_temp": wobj.target_temp,
-                "fan_speed": wobj.fan_speed,
-                "mode": wobj.mode,
-                "energy_consumed": round(wobj.energy_consumed, 2),
-                "cost": float(wobj.cost),
-                "remaining_wait": wobj.get_remaining_wait_time()
-            }
-        else:
-            return self.service_manager.get_room_state(room_id)
+        """获取房间状态（读取已发布的快照）"""
+        return self._snapshot.get_state(room_id)
 
     def get_all_states(self) -> List[dict]:
-        """获取所有房间状态（用于监控）"""
-        all_rooms = (
-            set(self.service_manager.room_states.keys())
-            | set(self.service_queue.keys())
-            | set(self.wait_queue.keys())
+        """获取所有房间状态（用于监控，读取已发布的快照）"""
+        return self._snapshot.all_states()
+
+    def snapshot(self) -> StateSnapshot:
+        """获取当前已发布的状态快照"""
+        return self._snapshot
+
+    def requested_state(self, room_id: str, snapshot: Optional[StateSnapshot] = None) -> dict:
+        """
+        房间状态，尚未处理的合并调温请求的目标温度和模式覆盖快照中的值
+
+        连续调温期间响应立即反映客人设置的目标温度
+        """
+        state = (snapshot or self._snapshot).get_state(room_id)
+        return self._apply_pending_temp(room_id, state)
+
+    def _pending_temp(self, room_id: str) -> Optional[Tuple[float, str]]:
+        """尚未处理的合并调温请求的 (目标温度, 模式)"""
+        pending = self.temp_debouncer.pending(room_id)
+        if pending is None:
+            return None
+        mode = pending.get("mode", "cooling")
+        return clamp_target_temp(pending.get("target_temp"), mode), mode
+
+    def _apply_pending_temp(self, room_id: str, state: dict) -> dict:
+        pending = self._pending_temp(room_id)
+        if pending is not None:
+            state["target_temp"], state["mode"] = pending
+        return state
+
+    def live_state(self, room_id: str) -> dict:
+        """
+        房间实时状态（含尚未处理的调温目标）
+
+        读取内存队列而非快照：主循环中处理防抖请求后、发布快照前也可调用
+        """
+        return self._apply_pending_temp(room_id, self._read_room_state(room_id).as_dict())
+
+    def persist_state(self, room_id: str, action: Optional[str] = None):
+        """将房间实时状态写入数据库，只写 action 可能改变的字段"""
+        self.service_manager.persist_state(room_id, self.live_state(room_id), action)
+
+    def publish(self, room_ids=None):
+        """
+        根据当前内存状态生成新快照并发布，同时递增状态版本
+
+        修改队列或房间状态后调用。先替换快照再递增版本，
+        保证带新版本号 ETag 的响应一定是新快照的内容。
+        指定 room_ids 时增量发布：只重建这些房间和状态发生过变化的房间，
+        其余房间沿用上一份快照；有房间加入或移除时必须全量发布（不传 room_ids）
+        """
+        with self._state_lock:
+            previous = self._snapshot
+            changed = self.service_manager.take_dirty()
+            if room_ids is not None:
+                changed.update(room_ids)
+            incremental = room_ids is not None and all(r in previous.index for r in changed)
+            if incremental:
+                index = previous.index.copy()
+                for room_id in changed:
+                    index[room_id] = self._read_room_state(room_id)
+                all_ids = previous.room_ids
+            else:
+                all_ids = tuple(
+                    sorted(
+                        set(self.service_manager.room_states) | self._active_rooms()
+                    )
+                )
+                index = {room_id: self._read_room_state(room_id) for room_id in all_ids}
+                self.service_manager.recompute_restore_until()
+            version = self.state_version.value + 1
+            self._snapshot = StateSnapshot(version, all_ids, MappingProxyType(index))
+            table = self.state_table
+            if table is not None:
+                if incremental:
+                    for room_id in changed:
+                        table.write(index[room_id], version, self._pending_temp(room_id))
+                else:
+                    table.sync(index.values(), version, self._pending_temp)
+            self.state_version.bump()
+
+    def _read_room_state(self, room_id: str) -> RoomSnapshot:
+        """从内存队列读取房间的实时状态（调度器内部使用）"""
+        pool = self.pool_of(room_id)
+        sobj = pool.service_queue.get(room_id)
+        if sobj is not None:
+            return RoomSnapshot(
+                room_id,
+                True,
+                "on",
+                round(sobj.current_temp, 1),
+                sobj.target_temp,
+                sobj.fan_speed,
+                sobj.mode,
+                round(sobj.energy_consumed, 2),
+                float(sobj.cost),
+                service_duration=sobj.service_duration * TIME_SCALE,  # 转换为系统时间
+            )
+        wobj = pool.wait_queue.get(room_id)
+        if wobj is not None:
+            return RoomSnapshot(
+                room_id,
+                True,
+                "waiting",
+                round(wobj.current_temp, 1),
+                wobj.target_temp,
+                wobj.fan_speed,
+                wobj.mode,
+                round(wobj.energy_consumed, 2),
+                float(wobj.cost),
+                wait_start_time=wobj.wait_start_time,
+                wait_duration=wobj.wait_duration,
+            )
+        record = self.service_manager.room_states.get(room_id)
+        if record is None:
+            return RoomSnapshot.default(room_id)
+        if record.restore_start is not None:
+            # 回温中：记录回温起点，读取时计算当前温度，快照无需随时间重建
+            return RoomSnapshot(
+                room_id,
+                record.is_on,
+                record.status,
+                record._current_temp,
+                record.target_temp,
+                record.fan_speed,
+                record.mode,
+                record.energy_consumed,
+                float(record.cost),
+                restore_start=record.restore_start,
+                initial_temp=record.initial_temp,
+            )
+        return RoomSnapshot(
+            room_id,
+            record.is_on,
+            record.status,
+            round(record.current_temp, 1),
+            record.target_temp,
+            record.fan_speed,
+            record.mode,
+            record.energy_consumed,
+            float(record.cost),
         )
-        return [self.get_room_state(room_id) for room_id in all_rooms]
 
-    def init_room(self, room_id: str):
-        """初始化房间空调状态（入住时调用）"""
-        self.service_manager.init_room(room_id)
+    @locked
+    def init_room(self, room_id: str, order_id: Optional[int] = None):
+        """初始化房间空调状态（入住时调用，order_id 为入住订单号，详单据此关联订单）"""
+        self.service_manager.init_room(room_id, order_id)
+        self.publish()
+
+    @locked
+    def init_rooms(self, room_ids: List[str], order_ids: Optional[Dict[str, int]] = None):
+        """批量初始化房间空调状态（团体入住时调用，order_ids 为 房间号 -> 入住订单号）"""
+        order_ids = order_ids or {}
+        for room_id in room_ids:
+            self.service_manager.init_room(room_id, order_ids.get(room_id))
+        self.publish()
+
+    @locked
+    def set_room_temperature(self, room_id: str, temp: float, mode: str):
+        """设置房间当前温度和模式（测试用初始化），待机房间重新计算重启时刻"""
+        record = self.service_manager.room_states.get(room_id)
+        if record is None:
+            return
+        record["current_temp"] = float(temp)
+        record["initial_temp"] = float(temp)
+        record["mode"] = mode
+        if self.request_trace is not None:
+            self.request_trace.record_temperature(room_id, float(temp), mode)
+        self.service_manager.schedule_restart(room_id)
+        self.publish()
+
+    @locked
+    def remove_room(self, room_id: str):
+        """直接移除房间（测试用清理），不结束详单"""
+        self.debouncer.clear(room_id)
+        self.temp_debouncer.clear(room_id)
+        pool = self.pool_of(room_id)
+        pool.service_queue.pop(room_id, None)
+        pool.wait_queue.pop(room_id, None)
+        self.service_manager.detach_room(room_id)
+        self.publish()
+
+    @locked
+    def export_rooms(self, room_ids: List[str]) -> Dict[str, RoomExport]:
+        """
+        将房间移出本调度器（分片迁移、分片模式退房），返回 房间号 -> RoomExport
+
+        不写数据库：房间记录保留与未结束详单的关联，由调用方继续或结束；
+        空出的服务槽位在下一次主循环中分配给等待队列
+        """
+        exports = {}
+        for room_id in room_ids:
+            pending = tuple(
+                request
+                for request in (
+                    self.debouncer.pending(room_id),
+                    self.temp_debouncer.pending(room_id),
+                )
+                if request is not None
+            )
+            state = self._read_room_state(room_id).as_dict()
+            self.debouncer.clear(room_id)
+            self.temp_debouncer.clear(room_id)
+            pool = self.pool_of(room_id)
+            pool.service_queue.pop(room_id, None)
+            pool.wait_queue.pop(room_id, None)
+            record = self.service_manager.detach_room(room_id)
+            if record is not None:
+                exports[room_id] = RoomExport(state, record, pending)
+        if exports:
+            self.publish()
+        return exports
+
+    @locked
+    def import_room(self, export: RoomExport):
+        """
+        接收其他调度器移出的房间
+
+        服务中的房间有空闲槽位时继续原详单，否则结束原详单后重新参与调度；
+        尚未处理的防抖请求重新提交
+        """
+        record = export.record
+        room_id = record.room_id
+        self.service_manager.room_states[room_id] = record
+        if record.status in ("on", "waiting"):
+            pool = self.pool_of(room_id)
+            if record.status == "on" and record.record_id and pool.can_admit(record.fan_speed):
+                pool.service_queue[room_id] = record
+            else:
+                self.service_manager.end_detail_record(record)
+                self._enqueue(room_id, record.target_temp, record.fan_speed, record.mode)
+        elif record.status == "standby":
+            self.service_manager.schedule_restart(room_id)
+        for request in export.pending:
+            self._resubmit(room_id, request)
+        self.publish()
+
+    def checkout_rooms(self, room_ids: List[str]) -> Dict[str, dict]:
+        """批量退房，返回 房间号 -> 退房前的空调使用信息"""
+        states = {}
+        for room_id in room_ids:
+            try:
+                states[room_id] = self.checkout_room(room_id)
+            except Exception as e:
+                logger.error(f"[Scheduler] Checkout failed for room {room_id}: {e}")
+        return states
+
+    @locked
+    def open_record_costs(self, room_ids: List[str]) -> Dict[str, Decimal]:
+        """
+        退房时各房间未结束的详单将写入的费用（只读取，不修改调度器状态）
 
+        与 checkout_room 中 _power_off 结束详单的方式相同：服务中、等待中且有详单的房间才有
+        """
+        costs = {}
+        for room_id in room_ids:
+            record = self.service_manager.room_states.get(room_id)
+            if record is None or not record.record_id:
+                continue
+            pool = self.pool_of(room_id)
+            if room_id in pool.service_queue:
+                costs[room_id] = self.service_manager.detail_record_cost(record)
+            elif room_id in pool.wait_queue:
+                costs[room_id] = self.service_manager.detail_record_cost(record, waiting=True)
+        return costs
+
+    @locked
     def checkout_room(self, room_id: str) -> dict:
         """退房时获取空调使用信息并清理"""
-        state = self.get_room_state(room_id)
+        state = self._read_room_state(room_id).as_dict()
 
-        # 关闭空调
+        # 关闭空调（尚未处理的防抖请求一并丢弃）
+        self.debouncer.clear(room_id)
+        self.temp_debouncer.clear(room_id)
         self._power_off(room_id)
 
         # 委托 ServiceManager 清理状态
         self.service_manager.clear_room(room_id)
+        self.publish()
 
         logger.info(
             f"[Scheduler] Room {room_id} checked out, AC cost: {state.get('cost', 0)}"
@@ -1017,5 +2440,16 @@ class ACScheduler:
         return state
 
 
+def _create_scheduler():
+    """配置了调度器分片时，Web 进程使用分片路由；调度进程和未分片时使用 ACScheduler"""
+    from ac_system.shard_worker import SHARD_WORKER_ENV
+
+    if config.SCHEDULER_SHARDS > 0 and not os.environ.get(SHARD_WORKER_ENV):
+        from ac_system.sharding import ShardedScheduler
+
+        return ShardedScheduler(config.SCHEDULER_SHARDS)
+    return ACScheduler()
+
+
 # 全局调度器实例
-scheduler = ACScheduler()
+scheduler = _create_scheduler()
@@ -2,6 +2,10 @@
 序列化器
 """
 
+from decimal import Decimal
+from typing import Callable, List, Optional, Tuple
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import (
     Room,
@@ -95,10 +99,23 @@ class CheckOutRequestSerializer(serializers.Serializer):
     room_id = serializers.CharField(max_length=10)
 
 
-class ACControlRequestSerializer(serializers.Serializer):
-    """空调控制请求序列化器"""
+class GroupCheckInRequestSerializer(serializers.Serializer):
+    """团体入住请求序列化器"""
+
+    guests = CheckInRequestSerializer(many=True, allow_empty=False)
+
+
+class GroupCheckOutRequestSerializer(serializers.Serializer):
+    """团体退房请求序列化器"""
+
+    room_ids = serializers.ListField(
+        child=serializers.CharField(max_length=10), allow_empty=False
+    )
+
+
+class ACCommandSerializer(serializers.Serializer):
+    """空调控制指令序列化器（不含房间号）"""
 
-    room_id = serializers.CharField(max_length=10)
     action = serializers.ChoiceField(
         choices=["power_on", "power_off", "change_temp", "change_speed"]
     )
@@ -109,6 +126,46 @@ class ACControlRequestSerializer(serializers.Serializer):
     mode = serializers.ChoiceField(choices=["cooling", "heating"], required=False)
 
 
+class ACControlRequestSerializer(ACCommandSerializer):
+    """空调控制请求序列化器"""
+
+    room_id = serializers.CharField(max_length=10)
+
+
+class RoomSelectorSerializer(serializers.Serializer):
+    """房间选择器：按楼层、房型、房间状态筛选"""
+
+    floor = serializers.CharField(max_length=8, required=False)
+    room_type = serializers.ChoiceField(
+        choices=[c[0] for c in Room.ROOM_TYPE_CHOICES], required=False
+    )
+    status = serializers.ChoiceField(
+        choices=[c[0] for c in Room.STATUS_CHOICES], required=False
+    )
+
+
+class ACBatchControlRequestSerializer(serializers.Serializer):
+    """批量空调控制请求序列化器
+
+    二选一：
+    - commands: 每个房间一条控制指令
+    - selector + command: 对选中的所有房间执行同一条指令
+    """
+
+    commands = ACControlRequestSerializer(many=True, required=False)
+    selector = RoomSelectorSerializer(required=False)
+    command = ACCommandSerializer(required=False)
+
+    def validate(self, attrs):
+        has_commands = bool(attrs.get("commands"))
+        has_selector = "selector" in attrs or "command" in attrs
+        if has_commands == has_selector:
+            raise serializers.ValidationError("commands 与 selector+command 必须二选一")
+        if has_selector and ("selector" not in attrs or "command" not in attrs):
+            raise serializers.ValidationError("selector 与 command 需同时提供")
+        return attrs
+
+
 class ReservationRequestSerializer(serializers.Serializer):
     """预定请求序列化器"""
 
@@ -128,3 +185,165 @@ class MealOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = MealOrder
         fields = "__all__"
+
+
+class SchedulerProfileRequestSerializer(serializers.Serializer):
+    """调度器性能分析请求序列化器"""
+
+    ticks = serializers.IntegerField(min_value=1, max_value=3600, default=10)
+    kind = serializers.ChoiceField(choices=["cpu", "mem"], default="cpu")
+
+
+class ServicePoolRequestSerializer(serializers.Serializer):
+    """服务池配置请求序列化器"""
+
+    name = serializers.CharField(max_length=50)
+    capacity = serializers.IntegerField(min_value=1, max_value=1000)
+    wait_time_slice = serializers.IntegerField(min_value=1, default=120)
+    power_budget = serializers.FloatField(min_value=0, default=0)
+    description = serializers.CharField(
+        max_length=200, required=False, allow_blank=True, default=""
+    )
+    room_ids = serializers.ListField(
+        child=serializers.CharField(max_length=10), required=False
+    )
+
+    def validate_power_budget(self, value):
+        # 预算小于单台最高风速的功率时，高风房间永远无法得到服务
+        from .scheduler import fan_power_kw
+
+        highest = max(fan_power_kw(fan) for fan in ("low", "medium", "high"))
+        if 0 < value < highest:
+            raise serializers.ValidationError(f"功率预算不能小于单台高风功率 {highest:g} kW")
+        return value
+
+
+class SchedulerConfigRequestSerializer(serializers.Serializer):
+    """运行时调度参数修改请求序列化器（参数取值由 runtime_config.validate 校验）"""
+
+    changes = serializers.DictField(required=False, default=dict)
+    reset = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False, default=list
+    )
+    operator = serializers.CharField(
+        max_length=50, required=False, allow_blank=True, default=""
+    )
+    reason = serializers.CharField(
+        max_length=200, required=False, allow_blank=True, default=""
+    )
+
+    def validate(self, attrs):
+        if not attrs["changes"] and not attrs["reset"]:
+            raise serializers.ValidationError("changes 和 reset 不能都为空")
+        return attrs
+
+
+# ==================== 轻量只读列表序列化器 ====================
+# 基于 QuerySet.values() 直接转换字典，跳过 ModelSerializer 的字段构建和模型实例化，
+# 输出与对应 ModelSerializer（fields="__all__"）完全一致
+
+
+def _decimal_to_str(decimal_places: int):
+    quantum = Decimal(1).scaleb(-decimal_places)
+
+    def convert(value):
+        return "{:f}".format(value.quantize(quantum))
+
+    return convert
+
+
+def _datetime_to_str(value):
+    # 与 DRF DateTimeField 相同：转换到当前时区，UTC 以 Z 结尾
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _choice_display(choices):
+    mapping = dict(choices)
+
+    def convert(value):
+        return mapping.get(value, value)
+
+    return convert
+
+
+class ValuesSerializer:
+    """
+    基于 values() 的只读序列化器
+
+    fields 为 (输出字段, values 查找路径, 转换函数) 列表，顺序即输出顺序；
+    转换函数为 None 时原样输出，值为 None 时不转换
+    """
+
+    fields: Tuple[Tuple[str, str, Optional[Callable]], ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.field_names = tuple(name for name, _, _ in cls.fields)
+        cls._specs = {name: (name, lookup, conv) for name, lookup, conv in cls.fields}
+        cls._plans = {}
+
+    @classmethod
+    def unknown_fields(cls, names: List[str]) -> List[str]:
+        return [name for name in names if name not in cls._specs]
+
+    @classmethod
+    def plan(cls, names: Optional[List[str]] = None):
+        """返回 (values 查找路径列表, 字段定义列表)，按字段组合缓存"""
+        key = tuple(dict.fromkeys(names)) if names else cls.field_names
+        plan = cls._plans.get(key)
+        if plan is None:
+            specs = tuple(cls._specs[name] for name in key)
+            lookups = list(dict.fromkeys(lookup for _, lookup, _ in specs))
+            plan = cls._plans[key] = (lookups, specs)
+        return plan
+
+    @staticmethod
+    def to_representation(rows, specs) -> List[dict]:
+        return [
+            {
+                name: conv(row[lookup])
+                if conv is not None and row[lookup] is not None
+                else row[lookup]
+                for name, lookup, conv in specs
+            }
+            for row in rows
+        ]
+
+
+class RoomListSerializer(ValuesSerializer):
+    """与 RoomSerializer 输出相同"""
+
+    fields = (
+        ("room_id", "room_id", None),
+        ("room_type_display", "room_type", _choice_display(Room.ROOM_TYPE_CHOICES)),
+        ("room_type", "room_type", None),
+        ("status", "status", None),
+        ("price_per_day", "price_per_day", _decimal_to_str(2)),
+        ("service_pool", "service_pool_id", None),
+    )
+
+
+class OrderListSerializer(ValuesSerializer):
+    """与 AccommodationOrderSerializer 输出相同"""
+
+    fields = (
+        ("order_id", "order_id", None),
+        ("customer_name", "customer__name", None),
+        (
+            "room_type",
+            "room__room_type",
+            _choice_display(Room.ROOM_TYPE_CHOICES),
+        ),
+        ("check_in_time", "check_in_time", _datetime_to_str),
+        ("check_out_time", "check_out_time", _datetime_to_str),
+        ("status", "status", None),
+        ("room_fee", "room_fee", _decimal_to_str(2)),
+        ("deposit_amount", "deposit_amount", _decimal_to_str(2)),
+        ("deposit_paid", "deposit_paid", None),
+        ("power_on_count", "power_on_count", None),
+        ("customer", "customer_id", None),
+        ("room", "room_id", None),
+    )
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
 from typing import Optional, Tuple, List
 import json
 
@@ -20,13 +21,20 @@ from .models import (
     StatisticsReport,
     Reservation,
     MealOrder,
+    ServicePool,
+    SchedulerConfigChange,
+    SchedulerSetting,
+    room_floor,
 )
+from . import runtime_config
+from .metrics import counters
 from .scheduler import scheduler
+from .versioning import bump_data_version
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import ROOM_PRICE, DEFAULT_TEMP
+from config import ROOM_PRICE, DEFAULT_TEMP, DEFAULT_SERVICE_POOL, TIME_SCALE, WAIT_TIME_SLICE
 
 
 class CheckInService:
@@ -86,6 +94,34 @@ class CheckInService:
         deposit_amount: Decimal = Decimal("0"),
     ) -> AccommodationOrder:
         """创建入住订单"""
+        # 创建订单
+        order = CheckInService._build_order(
+            customer, room, check_in_date, check_out_date, deposit_amount
+        )
+        order.save()
+
+        # 更新房间状态
+        room.set_occupied()
+
+        # 初始化空调状态
+        ACState.objects.update_or_create(
+            room=room, defaults=CheckInService._initial_ac_state()
+        )
+
+        # 在调度器中初始化房间（详单按房间记录中的订单号关联订单）
+        scheduler.init_room(room.room_id, order.order_id)
+
+        return order
+
+    @staticmethod
+    def _build_order(
+        customer: Customer,
+        room: Room,
+        check_in_date: datetime = None,
+        check_out_date: datetime = None,
+        deposit_amount: Decimal = Decimal("0"),
+    ) -> AccommodationOrder:
+        """构造入住订单（未保存）"""
         if check_in_date is None:
             check_in_date = timezone.now()
 
@@ -95,8 +131,7 @@ class CheckInService:
             days = max(1, (check_out_date - check_in_date).days)
         room_fee = room.price_per_day * days
 
-        # 创建订单
-        order = AccommodationOrder.objects.create(
+        return AccommodationOrder(
             customer=customer,
             room=room,
             check_in_time=check_in_date,
@@ -106,29 +141,164 @@ class CheckInService:
             deposit_paid=(deposit_amount or Decimal("0")) > 0,
         )
 
-        # 更新房间状态
-        room.set_occupied()
+    @staticmethod
+    def _initial_ac_state() -> dict:
+        """入住时的空调初始状态"""
+        return {
+            "is_on": False,
+            "status": "off",
+            "mode": "cooling",
+            "current_temp": 28.0,
+            "target_temp": DEFAULT_TEMP,
+            "fan_speed": "medium",
+            "total_cost": 0,
+            "total_energy": 0,
+            "service_start_time": None,
+        }
 
-        # 初始化空调状态
-        ACState.objects.update_or_create(
-            room=room,
-            defaults={
-                "is_on": False,
-                "status": "off",
-                "mode": "cooling",
-                "current_temp": 28.0,
-                "target_temp": DEFAULT_TEMP,
-                "fan_speed": "medium",
-                "total_cost": 0,
-                "total_energy": 0,
-                "service_start_time": None,
-            },
+    @staticmethod
+    @transaction.atomic
+    def create_group_orders(guests: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """
+        团体入住：在一个事务内为多个房间批量办理入住
+
+        guests: 每项包含 name / phone / id_card / room_id，可选 check_in_date /
+        check_out_date / deposit_amount（与单房间入住一致）
+        返回 (成功列表, 失败列表)；校验不通过的房间记入失败列表，不影响其他房间
+        """
+        failed = []
+
+        def reject(guest: dict, message: str):
+            failed.append(
+                {"room_id": guest.get("room_id"), "name": guest.get("name"), "message": message}
+            )
+
+        room_ids = [g.get("room_id") for g in guests]
+        id_cards = [g.get("id_card") for g in guests]
+        rooms = Room.objects.in_bulk(room_ids)
+        checked_in = dict(
+            AccommodationOrder.objects.filter(
+                customer__id_card__in=id_cards, status="active"
+            ).values_list("customer__id_card", "room_id")
         )
+        reservations = {
+            r.room_id: r
+            for r in Reservation.objects.filter(room_id__in=room_ids, is_active=True)
+        }
 
-        # 在调度器中初始化房间
-        scheduler.init_room(room.room_id)
+        accepted = []
+        used_reservations = []
+        seen_rooms, seen_cards = set(), set()
+        for guest in guests:
+            room_id, id_card = guest.get("room_id"), guest.get("id_card")
+            room = rooms.get(room_id)
+            if not guest.get("name") or not id_card or not guest.get("phone"):
+                reject(guest, "顾客信息不完整")
+            elif room_id in seen_rooms:
+                reject(guest, "同一房间在本次团体入住中重复")
+            elif id_card in seen_cards:
+                reject(guest, "同一顾客在本次团体入住中重复")
+            elif id_card in checked_in:
+                reject(guest, f"该顾客已入住房间 {checked_in[id_card]}")
+            elif room is None:
+                reject(guest, "房间不存在")
+            elif room.status == "occupied":
+                reject(guest, "房间已被入住")
+            elif room.status == "reserved" and room_id not in reservations:
+                reject(guest, "房间处于预定状态，暂不可办理入住")
+            elif room.status == "reserved" and (
+                reservations[room_id].name != guest["name"]
+                or reservations[room_id].phone != guest["phone"]
+            ):
+                reject(guest, "该房间已被其他客户预定")
+            else:
+                if room.status == "reserved":
+                    used_reservations.append(reservations[room_id])
+                seen_rooms.add(room_id)
+                seen_cards.add(id_card)
+                accepted.append(guest)
+
+        if not accepted:
+            return [], failed
+
+        # 顾客：已存在的更新姓名和手机号，不存在的批量创建
+        customers = {}
+        for customer in Customer.objects.filter(id_card__in=seen_cards).order_by(
+            "customer_id"
+        ):
+            customers.setdefault(customer.id_card, customer)
+        to_update, to_create = [], []
+        for guest in accepted:
+            customer = customers.get(guest["id_card"])
+            if customer is None:
+                customer = Customer(
+                    name=guest["name"], id_card=guest["id_card"], phone=guest["phone"]
+                )
+                customers[guest["id_card"]] = customer
+                to_create.append(customer)
+            else:
+                customer.name = guest["name"]
+                customer.phone = guest["phone"]
+                to_update.append(customer)
+        Customer.objects.bulk_create(to_create)
+        Customer.objects.bulk_update(to_update, ["name", "phone"])
+
+        # 订单
+        orders = [
+            CheckInService._build_order(
+                customers[guest["id_card"]],
+                rooms[guest["room_id"]],
+                guest.get("check_in_date"),
+                guest.get("check_out_date"),
+                guest.get("deposit_amount") or 0,
+            )
+            for guest in accepted
+        ]
+        AccommodationOrder.objects.bulk_create(orders)
+
+        # 房间状态与预定记录
+        occupied_rooms = [rooms[room_id] for room_id in seen_rooms]
+        for room in occupied_rooms:
+            room.status = "occupied"
+        Room.objects.bulk_update(occupied_rooms, ["status"])
+        for reserv in used_reservations:
+            reserv.is_active = False
+        Reservation.objects.bulk_update(used_reservations, ["is_active"])
+
+        # 空调状态：已有记录统一重置，缺失的批量创建
+        initial = CheckInService._initial_ac_state()
+        existing = set(
+            ACState.objects.filter(room_id__in=seen_rooms).values_list(
+                "room_id", flat=True
+            )
+        )
+        ACState.objects.filter(room_id__in=existing).update(
+            last_update_time=timezone.now(), **initial
+        )
+        ACState.objects.bulk_create(
+            [ACState(room=room, **initial) for room in occupied_rooms if room.room_id not in existing]
+        )
 
-        return order
+        # 在调度器中批量初始化房间
+        scheduler.init_rooms(
+            [order.room_id for order in orders], {order.room_id: order.order_id for order in orders}
+        )
+
+        # 批量写入不触发模型信号，手动递增数据版本
+        bump_data_version()
+
+        succeeded = [
+            {
+                "order_id": order.order_id,
+                "room_id": order.room_id,
+                "customer_name": order.customer.name,
+                "check_in_time": order.check_in_time.strftime("%Y-%m-%d %H:%M"),
+                "room_type": order.room.get_room_type_display(),
+                "room_fee": float(order.room_fee),
+            }
+            for order in orders
+        ]
+        return succeeded, failed
 
 
 class CheckOutService:
@@ -145,6 +315,19 @@ class CheckOutService:
         except AccommodationOrder.DoesNotExist:
             return False, "该房间没有入住记录", None
 
+    @staticmethod
+    async def aget_active_order(
+        room_id: str,
+    ) -> Tuple[bool, str, Optional[AccommodationOrder]]:
+        """获取房间的活跃订单（异步 ORM；同时取出客人和房间，计算房费时不再查询）"""
+        try:
+            order = await AccommodationOrder.objects.select_related("customer", "room").aget(
+                room_id=room_id, status="active"
+            )
+            return True, "找到订单", order
+        except AccommodationOrder.DoesNotExist:
+            return False, "该房间没有入住记录", None
+
     @staticmethod
     def calculate_room_fee(order: AccommodationOrder) -> Decimal:
         """根据空调开机次数计算房费（每次开机算一天）"""
@@ -244,33 +427,138 @@ class CheckOutService:
             return False, "账单不存在"
         
     
-    # 强制清空所有房间的入住状态（仅管理员使用）
     @staticmethod
     @transaction.atomic
-    def admin_force_checkout_all():
-        orders = AccommodationOrder.objects.filter(status="active")
-        for order in orders:
-            room_id = order.room_id
-            # 创建账单
-            CheckOutService.create_bill(order)
-
-            # 更新订单状态
-            order.check_out_time = timezone.now()
+    def checkout_group(room_ids: List[str]) -> Tuple[List[dict], List[dict]]:
+        """
+        团体退房：在一个事务内为多个房间批量结账
+
+        事务内只读取调度器：空调费为已结束详单的费用加上未结束详单退房时将写入的费用。
+        事务提交后才关闭空调、结束详单并移出调度器，任何一步写入失败时数据库回滚，调度器中的房间保持不变。
+        读取费用到提交之间主循环仍可能计费一次，该部分记入详单但不计入本次账单
+
+        返回 (成功列表, 失败列表)，没有入住记录的房间记入失败列表
+        """
+        orders = {
+            order.room_id: order
+            for order in AccommodationOrder.objects.select_related(
+                "room", "customer"
+            ).filter(room_id__in=room_ids, status="active")
+        }
+        failed = [
+            {"room_id": room_id, "message": "该房间没有入住记录"}
+            for room_id in dict.fromkeys(room_ids)
+            if room_id not in orders
+        ]
+        if not orders:
+            return [], failed
+
+        order_list = list(orders.values())
+        room_fees = {
+            order.order_id: CheckOutService.calculate_room_fee(order)
+            for order in order_list
+        }
+
+        # 未结束的详单在数据库中费用为 0，其费用从调度器读取（不修改调度器状态）
+        open_costs = scheduler.open_record_costs(list(orders.keys()))
+        ac_fees = dict(
+            ACDetailRecord.objects.filter(order__in=order_list)
+            .values("order_id")
+            .annotate(total=Sum("cost"))
+            .values_list("order_id", "total")
+        )
+        meal_fees = dict(
+            MealOrder.objects.filter(order__in=order_list)
+            .values("order_id")
+            .annotate(total=Sum("fee"))
+            .values_list("order_id", "total")
+        )
+
+        ac_bills, bills = [], []
+        for order in order_list:
+            room_fee = room_fees[order.order_id]
+            ac_fee = (ac_fees.get(order.order_id) or Decimal("0")) + open_costs.get(
+                order.room_id, Decimal("0")
+            )
+            meal_fee = meal_fees.get(order.order_id) or Decimal("0")
+            deposit_amount = order.deposit_amount or Decimal("0")
+            ac_bills.append(
+                ACBill(
+                    order=order,
+                    room_id=order.room_id,
+                    total_energy=0,
+                    total_cost=ac_fee,
+                )
+            )
+            bills.append(
+                AccommodationBill(
+                    order=order,
+                    room_fee=room_fee,
+                    ac_fee=ac_fee,
+                    meal_fee=meal_fee,
+                    deposit_amount=deposit_amount,
+                    total_fee=room_fee + ac_fee + meal_fee - deposit_amount,
+                )
+            )
+        ACBill.objects.bulk_create(ac_bills)
+        AccommodationBill.objects.bulk_create(bills)
+
+        now = timezone.now()
+        for order in order_list:
+            order.check_out_time = now
             order.status = "completed"
-            order.save()
+        AccommodationOrder.objects.bulk_update(order_list, ["check_out_time", "status"])
+        Room.objects.filter(room_id__in=orders.keys()).update(status="available")
+        bump_data_version()
 
-            # 更新房间状态
-            order.room.set_available()
+        # 提交后关闭空调、结束详单并移出调度器；回滚时不执行
+        checked_out = list(orders.keys())
+        transaction.on_commit(lambda: scheduler.checkout_rooms(checked_out), robust=True)
 
-            try:
-                scheduler.checkout_room(room_id)
-            except Exception:
-                pass
+        succeeded = [
+            {
+                "bill_id": bill.bill_id,
+                "room_id": order.room_id,
+                "customer_name": order.customer.name,
+                "check_in_time": order.check_in_time.strftime("%Y-%m-%d %H:%M"),
+                "check_out_time": order.check_out_time.strftime("%Y-%m-%d %H:%M"),
+                "room_fee": round(float(bill.room_fee), 2),
+                "ac_fee": round(float(bill.ac_fee), 2),
+                "total_fee": round(float(bill.total_fee), 2),
+            }
+            for order, bill in zip(order_list, bills)
+        ]
+        return succeeded, failed
+
+    # 强制清空所有房间的入住状态（仅管理员使用）
+    @staticmethod
+    def admin_force_checkout_all():
+        room_ids = list(
+            AccommodationOrder.objects.filter(status="active").values_list(
+                "room_id", flat=True
+            )
+        )
+        return CheckOutService.checkout_group(room_ids)
 
 
 class ACService:
     """空调服务"""
 
+    # 空调状态可投影的字段
+    STATE_FIELDS = (
+        "room_id",
+        "is_on",
+        "status",
+        "current_temp",
+        "target_temp",
+        "fan_speed",
+        "mode",
+        "energy_consumed",
+        "cost",
+        "service_duration",
+        "remaining_wait",
+    )
+
     @staticmethod
     def power_on(room_id: str, target_temp: float, fan_speed: str, mode: str) -> dict:
         """开机"""
@@ -285,7 +573,7 @@ class ACService:
         )
 
         # 更新数据库状态
-        ACService._update_db_state(room_id)
+        ACService._update_db_state(room_id, result)
 
         try:
             order = AccommodationOrder.objects.get(room_id=room_id, status="active")
@@ -303,7 +591,7 @@ class ACService:
         result = scheduler.submit_request(room_id, {"action": "power_off"})
 
         # 更新数据库状态
-        ACService._update_db_state(room_id)
+        ACService._update_db_state(room_id, result)
 
         try:
             order = AccommodationOrder.objects.get(room_id=room_id, status="active")
@@ -322,7 +610,7 @@ class ACService:
             room_id, {"action": "change_temp", "target_temp": target_temp, "mode": mode}
         )
 
-        ACService._update_db_state(room_id)
+        ACService._update_db_state(room_id, result, "change_temp")
         return result
 
     @staticmethod
@@ -332,13 +620,98 @@ class ACService:
             room_id, {"action": "change_speed", "fan_speed": fan_speed}
         )
 
-        ACService._update_db_state(room_id)
+        ACService._update_db_state(room_id, result, "change_speed")
         return result
 
+    @staticmethod
+    def build_request(command: dict) -> dict:
+        """将控制指令转换为调度请求（缺省值与单房间控制接口一致）"""
+        action = command["action"]
+        if action == "power_on":
+            return {
+                "action": "power_on",
+                "target_temp": command.get("target_temp", 25),
+                "fan_speed": command.get("fan_speed", "medium"),
+                "mode": command.get("mode", "cooling"),
+            }
+        if action == "change_temp":
+            return {
+                "action": "change_temp",
+                "target_temp": command.get("target_temp", 25),
+                "mode": command.get("mode", "cooling"),
+            }
+        if action == "change_speed":
+            return {"action": "change_speed", "fan_speed": command.get("fan_speed", "medium")}
+        return {"action": "power_off"}
+
+    @staticmethod
+    def select_rooms(
+        floor: Optional[str] = None,
+        room_type: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[str]:
+        """按楼层、房型、房间状态选择房间，返回房间号列表"""
+        rooms = Room.objects.all()
+        if room_type:
+            rooms = rooms.filter(room_type=room_type)
+        if status:
+            rooms = rooms.filter(status=status)
+        if floor:
+            rooms = rooms.filter(room_id__startswith=floor)
+        room_ids = rooms.order_by("room_id").values_list("room_id", flat=True)
+        return [r for r in room_ids if not floor or room_floor(r) == floor]
+
+    @staticmethod
+    def batch_control(commands: List[Tuple[str, dict]]) -> List[dict]:
+        """
+        批量空调控制
+
+        所有指令在调度器中一次处理完，随后在同一个事务中批量更新空调状态和房费
+        """
+        requests = [(room_id, ACService.build_request(cmd)) for room_id, cmd in commands]
+        results = scheduler.submit_batch(requests)
+
+        # 开关机每次计一天房费（与单房间控制一致）
+        fee_counts = {}
+        for (room_id, request), result in zip(requests, results):
+            if result["status"] != "error" and request["action"] in ("power_on", "power_off"):
+                fee_counts[room_id] = fee_counts.get(room_id, 0) + 1
+
+        room_ids = list(dict.fromkeys(room_id for room_id, _ in requests))
+        snapshot = scheduler.snapshot()
+        states = {room_id: scheduler.requested_state(room_id, snapshot) for room_id in room_ids}
+
+        with transaction.atomic():
+            ACService._update_db_states(states)
+            if fee_counts:
+                orders = list(
+                    AccommodationOrder.objects.select_related("room").filter(
+                        room_id__in=fee_counts.keys(), status="active"
+                    )
+                )
+                for order in orders:
+                    order.room_fee = (order.room_fee or Decimal("0")) + (
+                        order.room.price_per_day * fee_counts[order.room_id]
+                    )
+                AccommodationOrder.objects.bulk_update(orders, ["room_fee"])
+                bump_data_version()
+
+        return [
+            {
+                "room_id": room_id,
+                "action": request["action"],
+                "success": result["status"] != "error",
+                "status": result["status"],
+                "message": result.get("message", ""),
+                "state": states[room_id],
+            }
+            for (room_id, request), result in zip(requests, results)
+        ]
+
     @staticmethod
     def get_state(room_id: str) -> dict:
-        """获取空调状态"""
-        return scheduler.get_room_state(room_id)
+        """获取空调状态（连续调温期间目标温度为最后一次设置的值）"""
+        return scheduler.requested_state(room_id)
 
     @staticmethod
     def get_all_states() -> List[dict]:
@@ -346,11 +719,75 @@ class ACService:
         return scheduler.get_all_states()
 
     @staticmethod
-    def _update_db_state(room_id: str):
-        """更新数据库中的空调状态"""
-        state = scheduler.get_room_state(room_id)
-        try:
-            ac_state = ACState.objects.get(room_id=room_id)
+    def query_states(
+        room_ids: Optional[List[str]] = None,
+        status: Optional[str] = None,
+        mode: Optional[str] = None,
+        floor: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        按房间列表和筛选条件查询空调状态
+
+        指定 room_ids 时按给定顺序返回这些房间，否则返回调度器中的全部房间（按房间号排序）
+        """
+        # 所有房间取自同一份快照，结果互相一致
+        snapshot = scheduler.snapshot()
+        if room_ids:
+            states = [snapshot.get_state(r) for r in dict.fromkeys(room_ids)]
+        else:
+            states = snapshot.all_states()
+        return [
+            state
+            for state in states
+            if (not status or state["status"] == status)
+            and (not mode or state["mode"] == mode)
+            and (not floor or room_floor(state["room_id"]) == floor)
+        ]
+
+    @staticmethod
+    def project_states(
+        states: List[dict],
+        fields: Optional[List[str]] = None,
+        layout: str = "objects",
+    ):
+        """
+        字段投影
+
+        layout="objects" 返回字典列表；layout="rows" 返回 {"columns": [...], "rows": [[...], ...]}
+        room_id 始终包含在结果中
+        """
+        if fields:
+            columns = ["room_id"] + [f for f in dict.fromkeys(fields) if f != "room_id"]
+        else:
+            columns = list(ACService.STATE_FIELDS)
+
+        if layout == "rows":
+            return {
+                "columns": columns,
+                "rows": [[state.get(f) for f in columns] for state in states],
+            }
+        if not fields:
+            return states
+        return [{f: state.get(f) for f in columns} for state in states]
+
+    @staticmethod
+    def _update_db_state(room_id: str, result: dict, action: Optional[str] = None):
+        """
+        更新数据库中的空调状态（一条 UPDATE，只写该请求可能改变的字段）
+
+        请求进入防抖等待时不写入，到期处理后由调度器写入最终状态
+        """
+        if result.get("status") == "pending":
+            return
+        scheduler.persist_state(room_id, action)
+
+    @staticmethod
+    def _update_db_states(states: dict):
+        """批量更新数据库中的空调状态（states: 房间号 -> 调度器状态）"""
+        ac_states = list(ACState.objects.filter(room_id__in=states.keys()))
+        now = timezone.now()
+        for ac_state in ac_states:
+            state = states[ac_state.room_id]
             ac_state.is_on = state.get("is_on", False)
             ac_state.status = state.get("status", "off")
             ac_state.mode = state.get("mode", "cooling")
@@ -359,9 +796,183 @@ class ACService:
             ac_state.fan_speed = state.get("fan_speed", "medium")
             ac_state.total_cost = Decimal(str(state.get("cost", 0)))
             ac_state.total_energy = state.get("energy_consumed", 0)
-            ac_state.save()
-        except ACState.DoesNotExist:
-            pass
+            ac_state.last_update_time = now
+        ACState.objects.bulk_update(
+            ac_states,
+            [
+                "is_on",
+                "status",
+                "mode",
+                "current_temp",
+                "target_temp",
+                "fan_speed",
+                "total_cost",
+                "total_energy",
+                "last_update_time",
+            ],
+        )
+
+
+class ServicePoolService:
+    """服务池配置服务"""
+
+    @staticmethod
+    def list_pools() -> List[dict]:
+        """各服务池的配置、实时统计和所属房间（未分配的房间属于默认服务池）"""
+        descriptions = dict(ServicePool.objects.values_list("name", "description"))
+        room_ids = {}
+        for room_id, pool in Room.objects.order_by("room_id").values_list(
+            "room_id", "service_pool_id"
+        ):
+            room_ids.setdefault(pool or DEFAULT_SERVICE_POOL, []).append(room_id)
+
+        pools = scheduler.pool_stats()
+        for pool in pools:
+            pool["description"] = descriptions.get(pool["name"], "")
+            pool["room_ids"] = room_ids.get(pool["name"], [])
+        return pools
+
+    @staticmethod
+    def save_pool(
+        name: str,
+        capacity: int,
+        wait_time_slice: int,
+        description: str = "",
+        room_ids: Optional[List[str]] = None,
+        power_budget: float = 0,
+    ) -> Tuple[bool, str]:
+        """
+        创建或修改服务池，room_ids 中的房间归入该服务池；保存后调度器立即按新配置调度
+
+        power_budget 大于 0 时该服务池按功率预算（kW）调度
+        """
+        if room_ids:
+            existing = set(
+                Room.objects.filter(room_id__in=room_ids).values_list("room_id", flat=True)
+            )
+            missing = [r for r in room_ids if r not in existing]
+            if missing:
+                return False, f"房间不存在: {', '.join(missing)}"
+
+        with transaction.atomic():
+            ServicePool.objects.update_or_create(
+                name=name,
+                defaults={
+                    "capacity": capacity,
+                    "wait_time_slice": wait_time_slice,
+                    "power_budget": power_budget,
+                    "description": description,
+                },
+            )
+            if room_ids:
+                Room.objects.filter(room_id__in=room_ids).update(service_pool_id=name)
+                bump_data_version()
+
+        scheduler.load_pools()
+        return True, "服务池已保存"
+
+    @staticmethod
+    def delete_pool(name: str) -> Tuple[bool, str]:
+        """删除服务池，其中的房间回到默认服务池"""
+        with transaction.atomic():
+            deleted, _ = ServicePool.objects.filter(name=name).delete()
+            if not deleted:
+                return False, "服务池不存在"
+            bump_data_version()
+
+        scheduler.load_pools()
+        return True, "服务池已删除"
+
+
+class SchedulerConfigService:
+    """运行时调度参数服务：修改保存到数据库并记入审计日志，由调度器在主循环边界生效"""
+
+    HISTORY_LIMIT = 50  # 查询时返回的最近修改记录数
+
+    @staticmethod
+    def change_to_dict(change: SchedulerConfigChange) -> dict:
+        return {
+            "change_id": change.change_id,
+            "changes": change.changes,
+            "operator": change.operator,
+            "reason": change.reason,
+            "created_at": change.created_at,
+            "applied_at": change.applied_at,
+            "error": change.error,
+        }
+
+    @staticmethod
+    def get_config() -> dict:
+        """所有运行时参数的当前值、默认值，以及最近的修改记录"""
+        history = SchedulerConfigChange.objects.all()[: SchedulerConfigService.HISTORY_LIMIT]
+        return {
+            "parameters": runtime_config.describe(),
+            "restart_only": list(runtime_config.RESTART_ONLY),
+            "history": [SchedulerConfigService.change_to_dict(c) for c in history],
+        }
+
+    @staticmethod
+    def update_config(
+        changes: dict,
+        reset: Optional[List[str]] = None,
+        operator: str = "",
+        reason: str = "",
+    ) -> Tuple[bool, str, Optional[dict]]:
+        """
+        修改运行时参数：校验、保存到数据库并写入审计日志后交给调度器，下一次主循环开始时整体生效
+
+        reset 中的参数恢复 config.py 中的取值（删除数据库中的设置）。生效时间由调度器在修改实际生效时写入；
+        调度器应用失败时恢复修改前的取值和设置，审计日志记录失败原因，返回失败。
+        返回 (是否成功, 消息, 修改记录)；参数都没有变化时不写审计日志，修改记录为 None
+        """
+        reset = list(reset or [])
+        both = [name for name in reset if name in changes]
+        if both:
+            return False, f"参数不能同时修改和恢复默认: {', '.join(both)}", None
+        unknown = [name for name in reset if name not in runtime_config.PARAMETERS]
+        if unknown:
+            return False, f"未知参数: {', '.join(unknown)}", None
+        try:
+            values = runtime_config.validate(changes)
+            values.update({name: runtime_config.DEFAULTS[name] for name in reset})
+            if reset:
+                runtime_config.validate(values)  # 恢复默认后功率预算等组合仍需合法
+        except ValueError as e:
+            return False, str(e), None
+
+        old = runtime_config.current(values)
+        diff = {
+            name: {"old": old[name], "new": value}
+            for name, value in values.items()
+            if value != old[name]
+        }
+        if not diff:
+            return True, "参数没有变化", None
+
+        with transaction.atomic():
+            for name in diff:
+                if name in reset:
+                    SchedulerSetting.objects.filter(name=name).delete()
+                else:
+                    SchedulerSetting.objects.update_or_create(
+                        name=name, defaults={"value": values[name]}
+                    )
+            change = SchedulerConfigChange.objects.create(
+                changes=diff, operator=operator, reason=reason
+            )
+
+        try:
+            applied = scheduler.reconfigure(
+                {name: values[name] for name in diff}, change_id=change.change_id
+            )
+        except Exception as e:
+            return False, f"参数应用失败，已恢复修改前的取值: {e}", None
+        change.refresh_from_db()
+        if applied:
+            message = "参数已生效"
+        else:
+            message = "参数已保存，将在调度器下一次主循环开始时生效（生效时间见修改记录）"
+        return True, message, SchedulerConfigService.change_to_dict(change)
 
 
 class ReportService:
@@ -459,6 +1070,47 @@ class ReportService:
         }
 
 
+    @staticmethod
+    def get_churn_stats() -> dict:
+        """
+        调度抖动统计
+
+        - 抢占、时间片轮转次数及每小时次数（按模拟时间，计数器创建或重置以来）
+        - 已结束的详单数、涉及的入住数、每次入住平均详单数，以及时长不足一个等待时间片的详单数
+        """
+        snapshot = counters.snapshot()
+
+        def total(event: str) -> float:
+            return sum(
+                v for k, v in snapshot.items() if k.startswith("pool.") and k.endswith(f".{event}")
+            )
+
+        hours = counters.elapsed() * TIME_SCALE / 3600
+        preempts, swaps = total("preempt"), total("swap")
+
+        records = ACDetailRecord.objects.filter(order__isnull=False, end_time__isnull=False)
+        totals = records.aggregate(
+            records=Count("record_id"), stays=Count("order_id", distinct=True)
+        )
+        # 详单时间为真实时间，等待时间片为模拟时间
+        short = records.annotate(
+            duration=ExpressionWrapper(F("end_time") - F("start_time"), output_field=DurationField())
+        ).filter(duration__lt=timedelta(seconds=WAIT_TIME_SLICE / TIME_SCALE))
+
+        return {
+            "preempts": preempts,
+            "swaps": swaps,
+            "preempts_per_hour": round(preempts / hours, 2) if hours else 0.0,
+            "swaps_per_hour": round(swaps / hours, 2) if hours else 0.0,
+            "records": totals["records"],
+            "stays": totals["stays"],
+            "records_per_stay": (
+                round(totals["records"] / totals["stays"], 2) if totals["stays"] else 0.0
+            ),
+            "short_records": short.count(),
+        }
+
+
 class ReservationService:
     """预定服务"""
 
@@ -0,0 +1,151 @@
+"""
+调度进程（分片）入口
+
+由 ac_system.sharding.ShardedScheduler 以 spawn 方式启动：初始化 Django 后在本进程中运行一个
+ACScheduler，通过管道接收路由转发的调用 (序号, 方法名, 参数) 并回复 (序号, 是否成功, 结果)。
+调度器的状态版本号直接保存在共享内存中；数据库变更计数在每次回复前以及空闲轮询时写入共享内存。
+Web 进程据此计算 ETag、判断合并快照是否过期。
+发布的房间状态写入本进程的共享内存状态表（ac_system.state_table），Web 进程直接读取
+
+本模块在 Django 初始化之前导入，顶层不能引入模型
+"""
+
+import logging
+import os
+import threading
+import time
+
+# 调度进程中设置此环境变量，scheduler 模块据此创建 ACScheduler 而不是分片路由
+SHARD_WORKER_ENV = "HOTEL_AC_SHARD_WORKER"
+
+# 路由可以直接调用的 ACScheduler 方法
+WORKER_METHODS = frozenset(
+    {
+        "submit_request",
+        "submit_batch",
+        "init_room",
+        "init_rooms",
+        "get_room_state",
+        "requested_state",
+        "live_state",
+        "set_room_temperature",
+        "remove_room",
+        "export_rooms",
+        "open_record_costs",
+        "import_room",
+        "load_pools",
+        "reconfigure",
+        "warm_start",
+        "shutdown",
+        "health",
+        "pool_stats",
+        "profile_ticks",
+    }
+)
+
+POLL_INTERVAL = 0.2  # 空闲时同步数据库变更计数的间隔（秒）
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVersionCounter:
+    """保存在共享内存中的版本号（只有本进程写入，Web 进程只读）"""
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._shared.value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._shared.value += 1
+            return self._shared.value
+
+
+def _dispatch(scheduler, method: str, args: tuple):
+    if method == "snapshot":
+        # MappingProxyType 不能序列化，只返回房间快照列表，由路由合并
+        return scheduler.snapshot().rooms
+    if method == "profiler_status":
+        return scheduler.tick_profiler.status()
+    if method == "run_ticks":
+        # 基准测试：连续执行若干次主循环，返回 (墙钟耗时, CPU 耗时)（秒）
+        (ticks,) = args
+        started, cpu_started = time.perf_counter(), time.process_time()
+        for _ in range(ticks):
+            scheduler._tick()
+        return time.perf_counter() - started, time.process_time() - cpu_started
+    if method not in WORKER_METHODS:
+        raise ValueError(f"不支持的调用: {method}")
+    return getattr(scheduler, method)(*args)
+
+
+def run(
+    shard_id: int,
+    conn,
+    state_version,
+    data_version,
+    db_name: str,
+    autostart: bool,
+    table_name: str,
+):
+    """调度进程主函数"""
+    os.environ[SHARD_WORKER_ENV] = str(shard_id)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_ac.settings")
+
+    import django
+
+    django.setup()
+
+    from django.db import connections
+
+    # 与 Web 进程使用同一个数据库（测试时 Web 进程可能已切换到测试库）
+    connections["default"].settings_dict["NAME"] = db_name
+
+    from ac_system.scheduler import scheduler
+    from ac_system.versioning import data_version as local_data_version
+
+    scheduler.state_version = SharedVersionCounter(state_version)
+    # 房间状态同时写入共享内存状态表，路由读取单个房间时不经过管道
+    scheduler.create_state_table(table_name)
+    if autostart:
+        scheduler.start()
+    else:
+        try:
+            scheduler.load_settings()
+            scheduler.load_pools()
+        except Exception as e:
+            logger.error(f"[Shard {shard_id}] Failed to load service pools: {e}")
+    logger.info(f"[Shard {shard_id}] Scheduler process {os.getpid()} ready")
+
+    def sync_versions():
+        data_version.value = local_data_version.value
+
+    while True:
+        sync_versions()
+        try:
+            if not conn.poll(POLL_INTERVAL):
+                continue
+            seq, method, args = conn.recv()
+        except (EOFError, OSError):
+            break  # 路由进程已退出
+
+        if method == "stop":
+            scheduler.stop()
+            sync_versions()
+            conn.send((seq, True, None))
+            break
+
+        try:
+            reply = (seq, True, _dispatch(scheduler, method, args))
+        except Exception as e:
+            logger.exception(f"[Shard {shard_id}] {method} failed")
+            reply = (seq, False, f"{type(e).__name__}: {e}")
+        sync_versions()
+        conn.send(reply)
+
+    conn.close()
+    logger.info(f"[Shard {shard_id}] Scheduler process stopped")
@@ -0,0 +1,742 @@
+"""
+调度器分片 - 多个调度进程各自负责一部分房间
+
+- HashRing：一致性哈希环（每个分片若干虚拟节点），按分片键把房间映射到分片，
+  增加 / 移除分片时只有落在变化区间内的房间需要迁移
+- ShardedScheduler：Web 进程中的路由，接口与 ACScheduler 相同。
+  请求转发给房间所在的调度进程（ac_system.shard_worker）；单个房间的读取直接读该进程的
+  共享内存状态表（ac_system.state_table），状态表不可用时才经过管道；全量读取合并各分片的快照
+
+分片键：属于非默认服务池的房间使用服务池名（同一服务池的房间在同一分片，池内抢占和轮转不受影响），
+其余房间使用房间号；每个调度进程各有一个默认服务池，容量为配置值
+
+数据库写入：SQLite 同一时刻只允许一个写事务。Web 进程在事务中调用调度器（入住、退房、批量控制）时，
+调度进程若同步写库会与 Web 进程互相等待，因此退房结束详单、写入 ACState 都在 Web 进程中完成，
+调度进程只在自己的主循环和请求处理中写库
+"""
+
+import bisect
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import connection
+
+from ac_system import runtime_config
+from ac_system.events import EventLog
+from ac_system.models import Room
+from ac_system.scheduler import (
+    ACServiceManager,
+    RoomExport,
+    RoomSnapshot,
+    StateSnapshot,
+    WarmStartData,
+    load_warm_start_data,
+)
+from ac_system.shard_worker import SHARD_WORKER_ENV
+from ac_system.state_table import StateTable, TableRow
+from ac_system.versioning import data_version
+
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from config import (
+    DEFAULT_SERVICE_POOL,
+    SHARD_CALL_TIMEOUT,
+    SHARD_VIRTUAL_NODES,
+    STATE_TABLE_NAME,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ShardError(Exception):
+    """调度进程调用失败（进程退出、超时或方法抛出异常）"""
+
+
+# ============================================================
+# 一致性哈希环
+# ============================================================
+
+
+class HashRing:
+    """一致性哈希环：每个节点在环上放置 replicas 个虚拟节点，键归属顺时针方向的第一个虚拟节点"""
+
+    def __init__(self, nodes=(), replicas: int = SHARD_VIRTUAL_NODES):
+        self.replicas = replicas
+        self._points: List[int] = []  # 虚拟节点位置（有序）
+        self._owners: List[int] = []  # 与 _points 对应的节点
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def add(self, node: int):
+        for i in range(self.replicas):
+            point = self._hash(f"shard-{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: int):
+        pairs = [(p, n) for p, n in zip(self._points, self._owners) if n != node]
+        self._points = [p for p, _ in pairs]
+        self._owners = [n for _, n in pairs]
+
+    def owner(self, key: str) -> int:
+        if not self._points:
+            raise ShardError("没有可用的调度进程")
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[index]
+
+    @property
+    def nodes(self) -> List[int]:
+        return sorted(set(self._owners))
+
+
+# ============================================================
+# 调度进程句柄与版本号
+# ============================================================
+
+
+class _Shard:
+    """一个调度进程：一条管道，同一时刻只有一个调用在途"""
+
+    def __init__(
+        self, shard_id: int, process, conn, state_version, data_version, table_name: str
+    ):
+        self.shard_id = shard_id
+        self.process = process
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.state_version = state_version  # 共享内存中的 int64，由调度进程写入
+        self.data_version = data_version
+        self.table_name = table_name
+        self.table: Optional[StateTable] = None
+        self._seq = itertools.count(1)
+
+    def state_table(self) -> Optional[StateTable]:
+        """调度进程的状态表（调度进程尚未创建时返回 None）"""
+        if self.table is None:
+            try:
+                # 调度进程由本进程启动，共用资源跟踪器，保留登记
+                self.table = StateTable.attach(self.table_name, untrack=False)
+            except (FileNotFoundError, ValueError):
+                return None
+        return self.table
+
+    def send(self, method: str, args: tuple) -> int:
+        seq = next(self._seq)
+        try:
+            self.conn.send((seq, method, args))
+        except OSError as e:
+            raise ShardError(f"调度进程 {self.shard_id} 已退出: {e}")
+        return seq
+
+    def receive(self, seq: int):
+        """等待序号为 seq 的回复（丢弃之前超时调用迟到的回复）"""
+        while True:
+            try:
+                if not self.conn.poll(SHARD_CALL_TIMEOUT):
+                    raise ShardError(f"调度进程 {self.shard_id} 响应超时")
+                reply_seq, ok, result = self.conn.recv()
+            except (EOFError, OSError) as e:
+                raise ShardError(f"调度进程 {self.shard_id} 已退出: {e}")
+            if reply_seq != seq:
+                continue
+            if not ok:
+                raise ShardError(f"调度进程 {self.shard_id}: {result}")
+            return result
+
+    def call(self, method: str, *args):
+        with self.lock:
+            return self.receive(self.send(method, args))
+
+
+class ShardVersion:
+    """
+    各调度进程版本号之和（单调递增）
+
+    移除分片时把它最后的版本号并入基数，总和不会回退
+    """
+
+    def __init__(self, attr: str):
+        self.attr = attr  # _Shard 上的共享计数属性名
+        self._shards: Dict[int, _Shard] = {}
+        self._base = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._base + sum(
+            getattr(shard, self.attr).value for shard in list(self._shards.values())
+        )
+
+    def bump(self) -> int:
+        with self._lock:
+            self._base += 1
+        return self.value
+
+    def attach(self, shard: _Shard):
+        self._shards[shard.shard_id] = shard
+
+    def detach(self, shard: _Shard):
+        with self._lock:
+            self._base += getattr(shard, self.attr).value
+            self._shards.pop(shard.shard_id, None)
+
+    def parts(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple(
+            (shard_id, getattr(shard, self.attr).value)
+            for shard_id, shard in sorted(self._shards.items())
+        )
+
+
+class _RoutingLock:
+    """读写锁：转发调用持读锁可并发进行，迁移房间（增减分片、服务池变化）持写锁"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writing = True
+
+    def release_write(self):
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+
+class _ShardProfiler:
+    """主循环性能分析状态（各调度进程分别分析）"""
+
+    def __init__(self, router: "ShardedScheduler"):
+        self.router = router
+
+    def status(self) -> dict:
+        return {"shards": self.router._call_all("profiler_status")}
+
+
+# ============================================================
+# 分片路由
+# ============================================================
+
+
+class ShardedScheduler:
+    """
+    分片调度路由（SCHEDULER_SHARDS > 0 时替代 Web 进程中的 ACScheduler）
+
+    对外接口与 ACScheduler 相同；调度事件日志只记录在各调度进程中，
+    Web 进程的 event_log 为空
+    """
+
+    def __init__(self, shards: int, autostart: bool = True):
+        self.shard_count = shards
+        self.autostart = autostart  # 调度进程是否启动主循环（基准测试中手动执行主循环）
+        self.running = False
+        self.ring = HashRing()
+        self.shards: Dict[int, _Shard] = {}
+        self.room_pools: Dict[str, str] = {}  # 房间号 -> 非默认服务池名
+        self.owners: Dict[str, int] = {}  # 已路由过的房间 -> 所在分片
+        self._owners_lock = threading.Lock()
+        self._routing = _RoutingLock()
+        self._context = multiprocessing.get_context("spawn")
+        self._merged: Optional[Tuple[tuple, StateSnapshot]] = None
+
+        # 结束详单、写入 ACState 在 Web 进程中完成
+        self.service_manager = ACServiceManager()
+        self.state_version = ShardVersion("state_version")
+        self.data_versions = ShardVersion("data_version")
+        data_version.add_source(lambda: self.data_versions.value)
+        self.event_log = EventLog()
+        self.tick_profiler = _ShardProfiler(self)
+
+    # ========== 进程管理 ==========
+
+    def start(self):
+        """启动全部调度进程"""
+        if self.running:
+            return
+        try:
+            # Web 进程也使用运行时参数（报表等）；各调度进程启动时自行加载
+            runtime_config.apply(runtime_config.stored())
+        except Exception as e:
+            logger.error(f"[ShardRouter] Failed to load runtime settings: {e}")
+        try:
+            self._load_room_pools()
+        except Exception as e:
+            logger.error(f"[ShardRouter] Failed to load service pools: {e}")
+        for shard_id in range(self.shard_count):
+            self._spawn(shard_id)
+        self.running = True
+        logger.info(f"[ShardRouter] Started {self.shard_count} scheduler processes")
+        if config.WARM_START:
+            try:
+                self.warm_start()
+            except Exception as e:
+                logger.error(f"[ShardRouter] Warm start failed: {e}")
+
+    def warm_start(self, data: Optional[WarmStartData] = None) -> int:
+        """由路由读取一次数据库，按房间归属拆分后各调度进程并行热启动，返回恢复的房间数"""
+        if data is None:
+            data = load_warm_start_data()
+        self._routing.acquire_read()
+        try:
+            groups = self._group(data.orders)
+            # 没有入住订单的房间只结束遗留详单，不记录归属
+            for row in data.open_records:
+                if row["room_id"] not in data.orders:
+                    shard_id = self.ring.owner(self._shard_key(row["room_id"]))
+                    groups.setdefault(shard_id, []).append(row["room_id"])
+            results = self._call_many(
+                {shard_id: ("warm_start", (data.subset(rooms),)) for shard_id, rooms in groups.items()}
+            )
+        finally:
+            self._routing.release_read()
+        return sum(results.values())
+
+    def shutdown(self, timeout: float = 10.0):
+        """优雅停止：各调度进程并行结束服务中的详单、写入空调状态后停止"""
+        if self.shards:
+            try:
+                self._call_all("shutdown", timeout)
+            except ShardError as e:
+                logger.error(f"[ShardRouter] Shutdown failed: {e}")
+        self.stop()
+
+    def health(self) -> dict:
+        """汇总各调度进程的健康状态：全部存活才算存活，主循环延迟取最大值"""
+        try:
+            shards = self._call_all("health") if self.running else {}
+        except ShardError as e:
+            return {"alive": False, "seconds_since_tick": None, "tick_lag": None, "rooms": 0, "error": str(e)}
+        ticks = [h["seconds_since_tick"] for h in shards.values() if h["seconds_since_tick"] is not None]
+        lags = [h["tick_lag"] for h in shards.values() if h["tick_lag"] is not None]
+        return {
+            "alive": bool(shards) and all(h["alive"] for h in shards.values()),
+            "seconds_since_tick": max(ticks, default=None),
+            "tick_lag": max(lags, default=None),
+            "rooms": sum(h["rooms"] for h in shards.values()),
+            "shards": shards,
+        }
+
+    def stop(self):
+        """停止全部调度进程"""
+        for shard in list(self.shards.values()):
+            self._stop_shard(shard)
+        self.shards.clear()
+        self.ring = HashRing()
+        self.owners.clear()
+        self._merged = None
+        self.running = False
+        logger.info("[ShardRouter] Stopped")
+
+    def _spawn(self, shard_id: int) -> _Shard:
+        parent_conn, child_conn = self._context.Pipe()
+        state_version = self._context.Value("q", 0, lock=False)
+        shard_data_version = self._context.Value("q", 0, lock=False)
+        # 配置了状态表名时名称固定（其他进程可按名称读取），否则按进程号区分
+        prefix = STATE_TABLE_NAME or f"hotel_ac_{os.getpid()}"
+        table_name = f"{prefix}_{shard_id}"
+        from ac_system.shard_worker import run
+
+        process = self._context.Process(
+            target=run,
+            args=(
+                shard_id,
+                child_conn,
+                state_version,
+                shard_data_version,
+                str(connection.settings_dict["NAME"]),
+                self.autostart,
+                table_name,
+            ),
+            name=f"ac-scheduler-{shard_id}",
+            daemon=True,
+        )
+        # 子进程启动时继承环境变量，据此创建 ACScheduler 而不是再次创建路由
+        os.environ[SHARD_WORKER_ENV] = str(shard_id)
+        try:
+            process.start()
+        finally:
+            os.environ.pop(SHARD_WORKER_ENV, None)
+        child_conn.close()
+
+        shard = _Shard(
+            shard_id, process, parent_conn, state_version, shard_data_version, table_name
+        )
+        self.shards[shard_id] = shard
+        self.state_version.attach(shard)
+        self.data_versions.attach(shard)
+        self.ring.add(shard_id)
+        return shard
+
+    def _stop_shard(self, shard: _Shard):
+        try:
+            shard.call("stop")
+        except ShardError as e:
+            logger.error(f"[ShardRouter] {e}")
+        shard.process.join(timeout=5)
+        if shard.process.is_alive():
+            shard.process.terminate()
+        shard.conn.close()
+        if shard.table is not None:
+            shard.table.close()
+        # 调度进程异常退出时未删除的状态表
+        StateTable.unlink(shard.table_name)
+        self.state_version.detach(shard)
+        self.data_versions.detach(shard)
+
+    def add_shard(self) -> int:
+        """增加一个调度进程，迁移哈希环上归属变化的房间，返回迁移的房间数"""
+        self._routing.acquire_write()
+        try:
+            self._spawn(max(self.shards, default=-1) + 1)
+            self.shard_count = len(self.shards)
+            return self._rebalance()
+        finally:
+            self._routing.release_write()
+
+    def remove_shard(self, shard_id: int) -> int:
+        """移除一个调度进程，其房间迁移到哈希环上的后继分片，返回迁移的房间数"""
+        self._routing.acquire_write()
+        try:
+            if shard_id not in self.shards or len(self.shards) == 1:
+                raise ShardError(f"不能移除调度进程 {shard_id}")
+            self.ring.remove(shard_id)
+            moved = self._rebalance()
+            shard = self.shards.pop(shard_id)
+            self._stop_shard(shard)
+            self.shard_count = len(self.shards)
+            return moved
+        finally:
+            self._routing.release_write()
+
+    # ========== 路由 ==========
+
+    def _shard_key(self, room_id: str) -> str:
+        return self.room_pools.get(room_id) or room_id
+
+    def _owner(self, room_id: str) -> int:
+        """房间所在分片（首次路由时按哈希环确定并记录）"""
+        shard_id = self.owners.get(room_id)
+        if shard_id is None:
+            shard_id = self.ring.owner(self._shard_key(room_id))
+            with self._owners_lock:
+                shard_id = self.owners.setdefault(room_id, shard_id)
+        return shard_id
+
+    def _call(self, room_id: str, method: str, *args):
+        """把调用转发给房间所在的调度进程"""
+        self._routing.acquire_read()
+        try:
+            return self.shards[self._owner(room_id)].call(method, *args)
+        finally:
+            self._routing.release_read()
+
+    def _call_many(self, calls: Dict[int, Tuple[str, tuple]]) -> Dict[int, Any]:
+        """同时向多个调度进程发出调用，各进程并行处理，全部回复后返回"""
+        shards = [self.shards[shard_id] for shard_id in sorted(calls)]
+        for shard in shards:
+            shard.lock.acquire()
+        try:
+            seqs = {shard.shard_id: shard.send(*calls[shard.shard_id]) for shard in shards}
+            results, error = {}, None
+            for shard in shards:
+                try:
+                    results[shard.shard_id] = shard.receive(seqs[shard.shard_id])
+                except ShardError as e:
+                    error = error or e
+            if error is not None:
+                raise error
+            return results
+        finally:
+            for shard in shards:
+                shard.lock.release()
+
+    def _call_all(self, method: str, *args) -> Dict[int, Any]:
+        return self._call_many({shard_id: (method, args) for shard_id in self.shards})
+
+    def _group(self, room_ids) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for room_id in room_ids:
+            groups.setdefault(self._owner(room_id), []).append(room_id)
+        return groups
+
+    def _rebalance(self) -> int:
+        """把归属变化的房间迁移到新的分片（调用方持有写锁）"""
+        moves: Dict[int, Dict[int, List[str]]] = {}
+        for room_id, shard_id in list(self.owners.items()):
+            target = self.ring.owner(self._shard_key(room_id))
+            if target != shard_id:
+                moves.setdefault(shard_id, {}).setdefault(target, []).append(room_id)
+        moved = 0
+        for source, targets in moves.items():
+            for target, room_ids in targets.items():
+                exports = self.shards[source].call("export_rooms", room_ids)
+                for room_id in room_ids:
+                    export = exports.get(room_id)
+                    if export is not None:
+                        self.shards[target].call("import_room", export)
+                        moved += 1
+                    self.owners[room_id] = target
+        if moved:
+            logger.info(f"[ShardRouter] Rebalanced {moved} rooms across {len(self.shards)} shards")
+        return moved
+
+    # ========== 服务池 ==========
+
+    def _load_room_pools(self):
+        self.room_pools = dict(
+            Room.objects.exclude(service_pool__isnull=True)
+            .exclude(service_pool_id=DEFAULT_SERVICE_POOL)
+            .values_list("room_id", "service_pool_id")
+        )
+
+    def load_pools(self):
+        """重新加载服务池配置：各调度进程更新服务池，服务池归属变化的房间迁移分片"""
+        self._routing.acquire_write()
+        try:
+            self._load_room_pools()
+            self._call_all("load_pools")
+            self._rebalance()
+        finally:
+            self._routing.release_write()
+
+    def reconfigure(self, values: dict, timeout: float = 5.0, change_id: Optional[int] = None) -> bool:
+        """
+        修改运行时参数：Web 进程立即修改，各调度进程在各自的下一次主循环开始时生效
+
+        有调度进程应用失败时（该进程已恢复原取值并记录到审计日志），Web 进程和其他调度进程也恢复原取值
+        """
+        old = runtime_config.current(values)
+        runtime_config.apply(values)
+        try:
+            return all(self._call_all("reconfigure", values, timeout, change_id).values())
+        except ShardError as e:
+            runtime_config.apply(old)
+            try:
+                self._call_all("reconfigure", old, timeout)
+            except ShardError as restore_error:
+                logger.error(f"[Sharding] Failed to restore settings: {restore_error}")
+            raise runtime_config.ApplyError(str(e)) from e
+
+    def pool_stats(self) -> List[dict]:
+        """各服务池统计；默认服务池每个调度进程一个，其余服务池只在所在分片统计"""
+        result = []
+        for shard_id, stats in sorted(self._call_all("pool_stats").items()):
+            for pool in stats:
+                if pool["name"] != DEFAULT_SERVICE_POOL and self.ring.owner(pool["name"]) != shard_id:
+                    continue
+                pool["shard"] = shard_id
+                result.append(pool)
+        return result
+
+    def profile_ticks(self, ticks: int, kind: str = "cpu"):
+        """各调度进程分别对接下来 ticks 次主循环进行性能分析"""
+        self._call_all("profile_ticks", ticks, kind)
+
+    # ========== 请求 ==========
+
+    def submit_request(self, room_id: str, request: dict):
+        return self._call(room_id, "submit_request", room_id, request)
+
+    def submit_batch(self, requests: List[Tuple[str, dict]]) -> List[dict]:
+        """批量请求按分片分组，各调度进程并行处理，结果按原顺序返回"""
+        self._routing.acquire_read()
+        try:
+            groups: Dict[int, List[int]] = {}
+            for i, (room_id, _) in enumerate(requests):
+                groups.setdefault(self._owner(room_id), []).append(i)
+            replies = self._call_many(
+                {
+                    shard_id: ("submit_batch", ([requests[i] for i in indexes],))
+                    for shard_id, indexes in groups.items()
+                }
+            )
+        finally:
+            self._routing.release_read()
+        results: List[Optional[dict]] = [None] * len(requests)
+        for shard_id, indexes in groups.items():
+            for i, result in zip(indexes, replies[shard_id]):
+                results[i] = result
+        return results
+
+    # ========== 状态读取 ==========
+
+    def snapshot(self) -> StateSnapshot:
+        """
+        合并各分片已发布的快照
+
+        以各分片的状态版本为键缓存合并结果，版本都未变化时不再跨进程读取
+        """
+        parts = self.state_version.parts()
+        merged = self._merged
+        if merged is not None and merged[0] == parts:
+            return merged[1]
+        self._routing.acquire_read()
+        try:
+            replies = self._call_all("snapshot")
+        finally:
+            self._routing.release_read()
+        index = {}
+        for rooms in replies.values():
+            for room in rooms:
+                index[room.room_id] = room
+        snapshot = StateSnapshot(
+            self.state_version.value, tuple(sorted(index)), MappingProxyType(index)
+        )
+        self._merged = (parts, snapshot)
+        return snapshot
+
+    def _read_row(self, room_id: str) -> Optional[TableRow]:
+        """从房间所在调度进程的状态表读取（状态表不可用或持续写冲突时返回 None）"""
+        self._routing.acquire_read()
+        try:
+            table = self.shards[self._owner(room_id)].state_table()
+            if table is None:
+                return None
+            row = table.read(room_id)
+            if row is None and not table.overflowed():
+                # 调度进程中没有该房间：与快照一样返回缺省状态
+                return TableRow(0, RoomSnapshot.default(room_id), None, None)
+            return row
+        finally:
+            self._routing.release_read()
+
+    def get_room_state(self, room_id: str) -> dict:
+        row = self._read_row(room_id)
+        if row is None:
+            return self._call(room_id, "get_room_state", room_id)
+        return RoomSnapshot(*row.fields).as_dict()
+
+    def get_all_states(self) -> List[dict]:
+        return self.snapshot().all_states()
+
+    def requested_state(self, room_id: str, snapshot: Optional[StateSnapshot] = None) -> dict:
+        """房间状态（含尚未处理的调温目标；读取调度进程的状态表，忽略 snapshot）"""
+        row = self._read_row(room_id)
+        if row is None:
+            return self._call(room_id, "requested_state", room_id)
+        state = RoomSnapshot(*row.fields).as_dict()
+        if row.pending_target is not None:
+            state["target_temp"] = row.pending_target
+            state["mode"] = row.pending_mode
+        return state
+
+    def persist_state(self, room_id: str, action: Optional[str] = None):
+        """从调度进程读取实时状态，在本进程中写入 ACState"""
+        state = self._call(room_id, "live_state", room_id)
+        self.service_manager.persist_state(room_id, state, action)
+
+    # ========== 房间生命周期 ==========
+
+    def init_room(self, room_id: str, order_id: Optional[int] = None):
+        self.init_rooms([room_id], {room_id: order_id} if order_id else None)
+
+    def init_rooms(self, room_ids: List[str], order_ids: Optional[Dict[str, int]] = None):
+        order_ids = order_ids or {}
+        self._routing.acquire_read()
+        try:
+            # 重新入住的房间按当前哈希环重新分配
+            with self._owners_lock:
+                for room_id in room_ids:
+                    self.owners.pop(room_id, None)
+            groups = self._group(room_ids)
+            self._call_many(
+                {
+                    shard_id: ("init_rooms", (rooms, {r: order_ids[r] for r in rooms if r in order_ids}))
+                    for shard_id, rooms in groups.items()
+                }
+            )
+        finally:
+            self._routing.release_read()
+
+    def set_room_temperature(self, room_id: str, temp: float, mode: str):
+        self._call(room_id, "set_room_temperature", room_id, temp, mode)
+
+    def remove_room(self, room_id: str):
+        self._call(room_id, "remove_room", room_id)
+        with self._owners_lock:
+            self.owners.pop(room_id, None)
+
+    def open_record_costs(self, room_ids: List[str]) -> Dict[str, Decimal]:
+        """各调度进程并行读取房间未结束详单退房时将写入的费用（不修改调度器状态）"""
+        self._routing.acquire_read()
+        try:
+            groups = self._group(room_ids)
+            replies = self._call_many(
+                {shard_id: ("open_record_costs", (rooms,)) for shard_id, rooms in groups.items()}
+            )
+        finally:
+            self._routing.release_read()
+        costs = {}
+        for reply in replies.values():
+            costs.update(reply)
+        return costs
+
+    def checkout_rooms(self, room_ids: List[str]) -> Dict[str, dict]:
+        """
+        批量退房：各调度进程移出房间，本进程结束详单
+
+        详单在调用方的事务中结束；空出的服务槽位由调度进程在下一次主循环中分配
+        """
+        self._routing.acquire_read()
+        try:
+            groups = self._group(room_ids)
+            replies = self._call_many(
+                {shard_id: ("export_rooms", (rooms,)) for shard_id, rooms in groups.items()}
+            )
+            with self._owners_lock:
+                for room_id in room_ids:
+                    self.owners.pop(room_id, None)
+        finally:
+            self._routing.release_read()
+
+        states = {}
+        for exports in replies.values():
+            for room_id, export in exports.items():
+                states[room_id] = self._finish_checkout(export)
+        for room_id in room_ids:
+            states.setdefault(room_id, RoomSnapshot.default(room_id).as_dict())
+        return states
+
+    def checkout_room(self, room_id: str) -> dict:
+        return self.checkout_rooms([room_id])[room_id]
+
+    def _finish_checkout(self, export: RoomExport) -> dict:
+        record = export.record
+        if record.status == "on":
+            self.service_manager.end_detail_record(record)
+        elif record.status == "waiting" and record.record_id:
+            self.service_manager.end_waiting_detail_record(record)
+        logger.info(
+            f"[ShardRouter] Room {record.room_id} checked out, AC cost: {export.state.get('cost', 0)}"
+        )
+        return export.state
@@ -0,0 +1,154 @@
+"""
+调度模拟
+
+在虚拟时钟上运行真实的调度逻辑（ACScheduler 的调度决策、温控和计费），供基准测试和容量规划使用：
+- VirtualClock / virtual_clock()：调度器和防抖模块改用虚拟时钟，模拟不必按真实时间等待
+- SimulatedScheduler：不读写数据库、不发布快照，详单和调度事件只计数，
+  多个实例可以同时存在（不是单例），适合在进程池中大量运行
+"""
+
+import time
+import types
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from typing import Optional
+
+from ac_system.scheduler import ACScheduler, ACServiceManager, RoomRecord
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DEFAULT_SERVICE_POOL
+
+
+class VirtualClock:
+    """虚拟时钟：monotonic() 从 0 开始，只在 advance() 时前进"""
+
+    def __init__(self, start: datetime = datetime(2026, 7, 1, 8, 0)):
+        self.start = start
+        self.seconds = 0.0
+
+    def monotonic(self) -> float:
+        return self.seconds
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.seconds)
+
+    def advance(self, seconds: float):
+        self.seconds += seconds
+
+
+@contextmanager
+def virtual_clock():
+    """
+    调度器和防抖模块改用虚拟时钟（time.monotonic / datetime.now），退出时恢复
+
+    用法：with virtual_clock() as clock: 每次 scheduler._tick() 后 clock.advance(1)。
+    房间记录要在进入虚拟时钟后创建，回温起点才是虚拟时间
+    """
+    from ac_system import debounce
+    from ac_system import scheduler as scheduler_module
+
+    clock = VirtualClock()
+
+    class VirtualDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock.now()
+
+    virtual_time = types.SimpleNamespace(
+        **{name: getattr(time, name) for name in dir(time) if not name.startswith("_")}
+    )
+    virtual_time.monotonic = clock.monotonic
+
+    saved = (scheduler_module.time, scheduler_module.datetime, debounce.time)
+    scheduler_module.time = virtual_time
+    scheduler_module.datetime = VirtualDatetime
+    debounce.time = virtual_time
+    try:
+        yield clock
+    finally:
+        scheduler_module.time, scheduler_module.datetime, debounce.time = saved
+
+
+class SimulatedServiceManager(ACServiceManager):
+    """不写数据库的服务对象：详单只计数，订单开机次数和 ACState 不写入"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = 0  # 创建的详单数
+
+    def create_detail_record(self, service_obj: RoomRecord):
+        service_obj.record_start_cost = service_obj.cost
+        service_obj.record_start_energy = service_obj.energy_consumed
+        self.records += 1
+        service_obj.record_id = self.records
+
+    def end_detail_record(self, service_obj: RoomRecord):
+        service_obj.record_id = None
+
+    def batch_detail_records(self):
+        return nullcontext()
+
+    def end_waiting_detail_record(self, wait_obj: RoomRecord):
+        pass
+
+    def count_power_on(self, room_id: str):
+        pass
+
+    def persist_state(self, room_id: str, state: dict, action: Optional[str] = None):
+        pass
+
+
+class SimulatedScheduler(ACScheduler):
+    """
+    模拟用调度器：调度决策、温控、计费与 ACScheduler 相同
+
+    只使用默认服务池（容量、时间片、功率预算由参数指定），调度事件计入 self.events，不发布快照
+    """
+
+    def __new__(cls, *args, **kwargs):
+        # 不使用 ACScheduler 的单例
+        instance = object.__new__(cls)
+        instance._initialized = False
+        return instance
+
+    def __init__(
+        self,
+        capacity: int,
+        wait_time_slice: float,
+        policy: Optional[str] = None,
+        power_budget: float = 0,
+    ):
+        super().__init__()
+        if self.request_trace is not None:
+            self.request_trace.close()
+            self.request_trace = None
+        self.service_manager = SimulatedServiceManager()
+        pool = self.pools[DEFAULT_SERVICE_POOL]
+        pool.capacity = capacity
+        pool.wait_time_slice = wait_time_slice
+        pool.power_budget = power_budget
+        if policy:
+            self.set_policy(policy)
+        self.events: Counter = Counter()
+
+    def _emit(self, event_type: str, room_id: str, **extra):
+        self.events[event_type] += 1
+
+    def publish(self, room_ids=None):
+        self.service_manager.take_dirty()
+
+    def idle(self) -> bool:
+        """没有服务中 / 等待中的房间，也没有待处理的请求：下一个请求或重启时刻之前主循环不会改变状态"""
+        return (
+            not self._active_rooms()
+            and self.debouncer.next_deadline() is None
+            and self.temp_debouncer.next_deadline() is None
+        )
+
+    def next_wakeup(self) -> Optional[float]:
+        """空闲时下一次需要执行主循环的时刻（monotonic 秒）：最早的待机重启时刻"""
+        return self.service_manager.next_restart_time()
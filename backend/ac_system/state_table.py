@@ -0,0 +1,328 @@
+"""
+共享内存房间状态表
+
+调度器发布快照时把每个房间的状态写入固定布局的共享内存表（multiprocessing.shared_memory），
+其他进程按名称映射同一块内存后直接读取，不经过管道、不做序列化，没有写冲突时读取不需要系统调用。
+
+布局：64 字节表头 + capacity 行定长记录（ROW）。
+每行以序号（seqlock）开头：写入方先把序号加一（奇数表示正在写），写完所有字段后再加一；
+读取方读到偶数序号后复制整行，再次读取序号，前后一致才采用，否则重试。
+写入方从不等待读取方，读取方也不会拿到写了一半的行。
+
+每张表只有一个写入方（一个调度器）。房间到行号的映射保存在写入方；
+读取方扫描各行的房间号建立映射，表头的布局版本变化（分配 / 释放行）后重新扫描，
+读到的行房间号不符时同样重新扫描
+"""
+
+import struct
+import threading
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import STATE_TABLE_CAPACITY
+
+MAGIC = b"ACSTATE1"
+
+# 表头：魔数、行数上限、布局版本、已使用行数、是否有房间因表满未写入
+HEADER = struct.Struct("<8sQQQQ")
+HEADER_SIZE = 64
+_LAYOUT_OFFSET = 16
+_SEQ = struct.Struct("<Q")
+
+# 行：序号、状态版本、房间号、状态 / 风速 / 模式 / 标志位 / 待处理调温的模式，
+# 当前温度、目标温度、能耗、费用、服务时长、等待开始时间（时间戳）、等待时长、
+# 回温起点（monotonic）、初始温度、待处理调温的目标温度
+ROW = struct.Struct("<QQ16sBBBBB3x10d")
+ROOM_ID_SIZE = 16
+
+STATUS_CODES = ("off", "on", "waiting", "standby")
+FAN_CODES = ("low", "medium", "high")
+MODE_CODES = ("cooling", "heating")
+_STATUS_INDEX = {name: i for i, name in enumerate(STATUS_CODES)}
+_FAN_INDEX = {name: i for i, name in enumerate(FAN_CODES)}
+_MODE_INDEX = {name: i for i, name in enumerate(MODE_CODES)}
+
+# 标志位
+IS_ON = 1
+HAS_SERVICE = 2  # service_duration 有效
+HAS_WAIT = 4  # wait_start_time / wait_duration 有效
+RESTORING = 8  # restore_start / initial_temp 有效
+HAS_PENDING = 16  # 有尚未处理的合并调温请求
+
+READ_RETRIES = 100
+SPIN_RETRIES = 3  # 之后每次重试前让出 CPU
+
+
+class TableRow(NamedTuple):
+    """读取结果：fields 与 RoomSnapshot 的字段顺序相同"""
+
+    version: int  # 写入该行时的状态版本
+    fields: tuple
+    pending_target: Optional[float]
+    pending_mode: Optional[str]
+
+
+class StateTable:
+    """共享内存状态表（create 创建并写入，attach 只读映射）"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.name = shm.name
+        self.owner = owner  # 创建方负责写入和删除共享内存
+        self.buf = shm.buf
+        _, self.capacity, _, _, _ = HEADER.unpack_from(self.buf, 0)
+        # 写入方：房间号 -> 行号、空闲行
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._used = 0
+        self._write_lock = threading.Lock()
+        # 读取方：房间号 -> 行号的缓存及其对应的布局版本
+        self._read_layout = -1
+        self._read_rows: Dict[str, int] = {}
+
+    @classmethod
+    def create(cls, name: str, capacity: int = STATE_TABLE_CAPACITY) -> "StateTable":
+        size = HEADER_SIZE + ROW.size * capacity
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # 上次异常退出遗留的同名共享内存
+            cls.unlink(name)
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, capacity, 0, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, untrack: bool = True) -> "StateTable":
+        """
+        映射已存在的状态表（不存在时抛出 FileNotFoundError）
+
+        映射时共享内存会登记到本进程的资源跟踪器，跟踪器退出时将其删除。
+        与写入方无关的进程应取消登记（untrack=True）；写入方由本进程以 multiprocessing 启动时
+        两者共用同一个跟踪器，不能取消（untrack=False），否则写入方的登记也被一并取消
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        if bytes(shm.buf[:8]) != MAGIC:
+            shm.close()
+            raise ValueError(f"{name} 不是空调状态表")
+        return cls(shm, owner=False)
+
+    @staticmethod
+    def unlink(name: str):
+        """删除共享内存（写入方异常退出后清理）"""
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    # ---------- 写入（调度器） ----------
+
+    def write(self, snapshot: tuple, version: int, pending: Optional[Tuple[float, str]] = None):
+        """
+        写入一个房间的快照（RoomSnapshot）
+
+        version 为快照的状态版本，pending 为 (目标温度, 模式) 的待处理调温
+        """
+        with self._write_lock:
+            row = self._rows.get(snapshot[0])
+            if row is None:
+                row = self._allocate(snapshot[0])
+                if row is None:
+                    return
+            self._write_row(row, snapshot, version, pending)
+
+    def sync(self, snapshots, version: int, pending_of):
+        """全量写入：写入所有房间并释放不在其中的房间（pending_of(room_id) 返回待处理调温）"""
+        with self._write_lock:
+            present = set()
+            for snapshot in snapshots:
+                room_id = snapshot[0]
+                present.add(room_id)
+                row = self._rows.get(room_id)
+                if row is None:
+                    row = self._allocate(room_id)
+                    if row is None:
+                        continue
+                self._write_row(row, snapshot, version, pending_of(room_id))
+            for room_id in [r for r in self._rows if r not in present]:
+                self._release(room_id)
+
+    def _allocate(self, room_id: str) -> Optional[int]:
+        if self._free:
+            row = self._free.pop()
+        elif self._used < self.capacity:
+            row = self._used
+            self._used += 1
+        else:
+            self._set_header(overflow=1)
+            return None
+        self._rows[room_id] = row
+        self._set_header(layout=True)
+        return row
+
+    def _release(self, room_id: str):
+        row = self._rows.pop(room_id)
+        offset = HEADER_SIZE + row * ROW.size
+        seq = _SEQ.unpack_from(self.buf, offset)[0]
+        _SEQ.pack_into(self.buf, offset, seq + 1)
+        self.buf[offset + 8 : offset + ROW.size] = bytes(ROW.size - 8)
+        _SEQ.pack_into(self.buf, offset, seq + 2)
+        self._free.append(row)
+        self._set_header(layout=True)
+
+    def _set_header(self, layout: bool = False, overflow: Optional[int] = None):
+        _, capacity, version, _, current_overflow = HEADER.unpack_from(self.buf, 0)
+        HEADER.pack_into(
+            self.buf,
+            0,
+            MAGIC,
+            capacity,
+            version + 1 if layout else version,
+            self._used,
+            current_overflow if overflow is None else overflow,
+        )
+
+    def _write_row(
+        self, row: int, s: tuple, version: int, pending: Optional[Tuple[float, str]]
+    ):
+        (
+            room_id, is_on, status, current_temp, target_temp, fan_speed, mode,
+            energy, cost, service_duration, wait_start_time, wait_duration,
+            restore_start, initial_temp,
+        ) = s
+        flags = IS_ON if is_on else 0
+        if service_duration is not None:
+            flags |= HAS_SERVICE
+        if wait_start_time is not None:
+            flags |= HAS_WAIT
+        if restore_start is not None:
+            flags |= RESTORING
+        pending_target, pending_mode = 0.0, 0
+        if pending is not None:
+            flags |= HAS_PENDING
+            pending_target, pending_mode = pending[0], _MODE_INDEX.get(pending[1], 0)
+
+        offset = HEADER_SIZE + row * ROW.size
+        buf = self.buf
+        seq = _SEQ.unpack_from(buf, offset)[0]
+        _SEQ.pack_into(buf, offset, seq + 1)  # 奇数：正在写入
+        ROW.pack_into(
+            buf,
+            offset,
+            seq + 1,
+            version,
+            room_id.encode()[:ROOM_ID_SIZE],
+            _STATUS_INDEX.get(status, 0),
+            _FAN_INDEX.get(fan_speed, 1),
+            _MODE_INDEX.get(mode, 0),
+            flags,
+            pending_mode,
+            current_temp,
+            target_temp,
+            energy,
+            cost,
+            service_duration or 0.0,
+            wait_start_time.timestamp() if wait_start_time is not None else 0.0,
+            wait_duration or 0.0,
+            restore_start or 0.0,
+            initial_temp or 0.0,
+            pending_target,
+        )
+        _SEQ.pack_into(buf, offset, seq + 2)
+
+    # ---------- 读取（任意进程） ----------
+
+    def layout_version(self) -> int:
+        return _SEQ.unpack_from(self.buf, _LAYOUT_OFFSET)[0]
+
+    def overflowed(self) -> bool:
+        return bool(HEADER.unpack_from(self.buf, 0)[4])
+
+    def _scan(self):
+        """按各行的房间号重建映射（布局版本变化后调用）"""
+        layout = self.layout_version()
+        used = HEADER.unpack_from(self.buf, 0)[3]
+        rows = {}
+        for row in range(used):
+            offset = HEADER_SIZE + row * ROW.size + 16
+            room_id = bytes(self.buf[offset : offset + ROOM_ID_SIZE]).rstrip(b"\0")
+            if room_id:
+                rows[room_id.decode()] = row
+        self._read_rows = rows
+        self._read_layout = layout
+
+    def read(self, room_id: str) -> Optional[TableRow]:
+        """
+        读取房间状态；表中没有该房间时返回 None
+
+        与写入冲突时先自旋重试，之后每次重试前让出 CPU；
+        持续冲突（READ_RETRIES 次）时也返回 None，调用方改用其他方式读取
+        """
+        buf = self.buf
+        for attempt in range(READ_RETRIES):
+            if attempt >= SPIN_RETRIES:
+                # 写入方可能在写到一半时被切换出去，让出 CPU 等它写完
+                os.sched_yield()
+            if self.layout_version() != self._read_layout:
+                self._scan()
+            row = self._read_rows.get(room_id)
+            if row is None:
+                return None
+            offset = HEADER_SIZE + row * ROW.size
+            values = ROW.unpack_from(buf, offset)
+            seq = values[0]
+            if seq & 1 or _SEQ.unpack_from(buf, offset)[0] != seq:
+                continue  # 正在写入或读取期间被改写
+            if values[2].rstrip(b"\0").decode() != room_id:
+                self._read_layout = -1  # 行已分配给其他房间
+                continue
+            return _decode(room_id, values)
+        return None
+
+
+def _decode(room_id: str, values: tuple) -> TableRow:
+    (
+        _, version, _, status, fan, mode, flags, pending_mode,
+        current_temp, target_temp, energy, cost, service_duration,
+        wait_start, wait_duration, restore_start, initial_temp, pending_target,
+    ) = values
+    has_wait = flags & HAS_WAIT
+    restoring = flags & RESTORING
+    fields = (
+        room_id,
+        bool(flags & IS_ON),
+        STATUS_CODES[status],
+        current_temp,
+        target_temp,
+        FAN_CODES[fan],
+        MODE_CODES[mode],
+        energy,
+        cost,
+        service_duration if flags & HAS_SERVICE else None,
+        datetime.fromtimestamp(wait_start) if has_wait else None,
+        wait_duration if has_wait else None,
+        restore_start if restoring else None,
+        initial_temp if restoring else None,
+    )
+    if flags & HAS_PENDING:
+        return TableRow(version, fields, pending_target, MODE_CODES[pending_mode])
+    return TableRow(version, fields, None, None)
@@ -0,0 +1,94 @@
+"""
+请求轨迹记录与读取
+
+配置 REQUEST_TRACE_FILE 后，调度器把外部提交的每个请求（防抖之前）追加到该文件（JSON Lines），
+离线比较调度策略时按原来的时间间隔重放（tests/bench_policies.py）。调度器内部发起的请求
+（待机房间自动重启等）不记录，重放时会重新产生。
+
+每行一条记录，t 为 Unix 时间戳（秒），多个调度进程可以追加到同一文件：
+- {"t": ..., "room_id": "301", "request": {"action": "power_on", ...}}：提交的请求
+- {"t": ..., "room_id": "301", "temp": 30.0, "mode": "cooling"}：设置房间初始温度
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """请求轨迹记录器（线程安全，每条记录立即写入文件）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, room_id: str, request: dict):
+        self._write({"room_id": room_id, "request": request})
+
+    def record_temperature(self, room_id: str, temp: float, mode: str):
+        self._write({"room_id": room_id, "temp": temp, "mode": mode})
+
+    def _write(self, entry: dict):
+        line = json.dumps({"t": round(time.time(), 3), **entry}, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            # 每行一次写入（追加模式），多个进程写同一文件时行不会交错
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def load_trace(path: str) -> List[dict]:
+    """读取轨迹文件，按时间排序（跳过无法解析的行）"""
+    entries = []
+    skipped = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if "t" in entry and "room_id" in entry:
+                entries.append(entry)
+    if skipped:
+        logger.warning(f"[Trace] Skipped {skipped} malformed lines in {path}")
+    entries.sort(key=lambda e: e["t"])
+    return entries
+
+
+def trace_to_ticks(
+    entries: List[dict], tick_interval: float = 1.0
+) -> Tuple[Dict[str, Tuple[float, str]], Dict[int, List[Tuple[str, dict]]]]:
+    """
+    把轨迹换算成重放用的数据：(各房间初始温度和模式, {主循环序号: [(房间号, 请求)]})
+
+    主循环序号按距第一条记录的时间除以主循环间隔计算；初始温度取每个房间第一次请求之前最后一次设置的温度
+    """
+    temps: Dict[str, Tuple[float, str]] = {}
+    events: Dict[int, List[Tuple[str, dict]]] = {}
+    if not entries:
+        return temps, events
+    start = entries[0]["t"]
+    requested = set()
+    for entry in entries:
+        room_id = entry["room_id"]
+        if "request" in entry:
+            requested.add(room_id)
+            tick = int((entry["t"] - start) / tick_interval)
+            events.setdefault(tick, []).append((room_id, entry["request"]))
+        elif "temp" in entry and room_id not in requested:
+            temps[room_id] = (float(entry["temp"]), entry.get("mode", "cooling"))
+    return temps, events
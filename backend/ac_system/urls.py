@@ -3,7 +3,7 @@ URL配置
 """
 
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # 房间相关
@@ -15,7 +15,11 @@ urlpatterns = [
     ),
     # 入住/结账相关
     path("checkin/", views.CheckInView.as_view(), name="check-in"),
+    path("checkin/group/", views.GroupCheckInView.as_view(), name="group-check-in"),
     path("checkout/", views.CheckOutView.as_view(), name="check-out"),
+    path(
+        "checkout/group/", views.GroupCheckOutView.as_view(), name="group-check-out"
+    ),
     path("bill/<str:room_id>/", views.BillDetailView.as_view(), name="bill-detail"),
     path("pay/", views.PayBillView.as_view(), name="pay-bill"),
     path("meal/order/", views.MealOrderView.as_view(), name="meal-order"),
@@ -27,16 +31,45 @@ urlpatterns = [
     path("reserve/", views.ReservationView.as_view(), name="reserve-room"),
     # 空调控制相关
     path("ac/control/", views.ACControlView.as_view(), name="ac-control"),
+    path(
+        "ac/control/batch/",
+        views.ACBatchControlView.as_view(),
+        name="ac-control-batch",
+    ),
+    path("ac/state/", views.ACStateQueryView.as_view(), name="ac-state-query"),
     path("ac/state/<str:room_id>/", views.ACStateView.as_view(), name="ac-state"),
     path("ac/monitor/", views.ACMonitorView.as_view(), name="ac-monitor"),
     path(
         "ac/details/<str:room_id>/", views.ACDetailListView.as_view(), name="ac-details"
     ),
+    # 异步只读接口（ASGI；长轮询 ?wait=秒数，stream/ 为 text/event-stream 推送）
+    path(
+        "async/ac/state/<str:room_id>/",
+        async_views.ACStateAsyncView.as_view(),
+        name="ac-state-async",
+    ),
+    path(
+        "async/ac/state/<str:room_id>/stream/",
+        async_views.ACStateStreamView.as_view(),
+        name="ac-state-stream",
+    ),
+    path("async/ac/monitor/", async_views.ACMonitorAsyncView.as_view(), name="ac-monitor-async"),
+    path(
+        "async/ac/monitor/stream/",
+        async_views.ACMonitorStreamView.as_view(),
+        name="ac-monitor-stream",
+    ),
+    path(
+        "async/bill/<str:room_id>/",
+        async_views.BillDetailAsyncView.as_view(),
+        name="bill-detail-async",
+    ),
     # 订单和报表
     path("orders/", views.OrderListView.as_view(), name="order-list"),
     path("report/", views.ReportView.as_view(), name="report"),
     path("manager-report/", views.ManagerReportView.as_view(), name="manager-report"),
-    # 测试日志
+    # 调度事件与测试日志
+    path("events/", views.EventListView.as_view(), name="event-list"),
     path("test/log/", views.TestLogView.as_view(), name="test-log"),
     path(
         "admin/room/<str:room_id>/init/",
@@ -48,4 +81,23 @@ urlpatterns = [
         views.AdminClearView.as_view(),
         name="admin-clear",
     ),
+    # 服务池
+    path("admin/pools/", views.ServicePoolView.as_view(), name="admin-pools"),
+    path(
+        "admin/pools/<str:name>/",
+        views.ServicePoolDetailView.as_view(),
+        name="admin-pool-detail",
+    ),
+    # 运行时调度参数
+    path("admin/config/", views.SchedulerConfigView.as_view(), name="admin-config"),
+    # 健康检查
+    path("health/", views.HealthView.as_view(), name="health"),
+    path("ready/", views.ReadinessView.as_view(), name="ready"),
+    # 运行指标与性能分析
+    path("admin/metrics/", views.MetricsView.as_view(), name="admin-metrics"),
+    path(
+        "admin/profile/scheduler/",
+        views.SchedulerProfileView.as_view(),
+        name="admin-profile-scheduler",
+    ),
 ]
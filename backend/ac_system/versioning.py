@@ -0,0 +1,204 @@
+"""
+内容版本号 - 用于 ETag / 条件 GET
+
+- 调度器状态版本：scheduler.state_version，调度器内存状态变化时递增
+- 数据库变更计数：订单、账单、预定等写入（事务提交）后递增
+
+轮询接口先根据版本号计算 ETag，命中 If-None-Match 时直接返回 304，
+不再执行查询和序列化
+"""
+
+import asyncio
+import threading
+import uuid
+import weakref
+from functools import wraps
+from typing import Callable, List
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+# 进程启动标识：避免重启后版本号从 0 开始与旧 ETag 冲突
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class VersionCounter:
+    """线程安全的单调递增计数器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+        # 其他进程中的计数（如分片调度进程的数据库写入），读取时一并计入
+        self._sources: List[Callable[[], int]] = []
+
+    @property
+    def value(self) -> int:
+        if not self._sources:
+            return self._value
+        return self._value + sum(source() for source in self._sources)
+
+    def add_source(self, source: Callable[[], int]):
+        """登记一个外部计数来源（返回单调递增的整数）"""
+        self._sources.append(source)
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+data_version = VersionCounter()
+
+
+def bump_data_version():
+    """数据库变更后递增版本（在事务提交后生效；批量写入不触发信号，需手动调用）"""
+    transaction.on_commit(data_version.bump)
+
+
+def _on_model_change(sender, **kwargs):
+    bump_data_version()
+
+
+def connect_signals():
+    """为参与 ETag 计算的模型注册变更信号"""
+    from .models import (
+        AccommodationBill,
+        AccommodationOrder,
+        ACDetailRecord,
+        Customer,
+        MealOrder,
+        Reservation,
+        Room,
+    )
+
+    for model in (
+        Room,
+        Customer,
+        AccommodationOrder,
+        AccommodationBill,
+        ACDetailRecord,
+        MealOrder,
+        Reservation,
+    ):
+        uid = f"data_version_{model.__name__}"
+        post_save.connect(_on_model_change, sender=model, dispatch_uid=uid + "_save")
+        post_delete.connect(
+            _on_model_change, sender=model, dispatch_uid=uid + "_delete"
+        )
+
+
+def make_etag(*parts) -> str:
+    return quote_etag("-".join([BOOT_ID] + [str(p) for p in parts]))
+
+
+def etag_matches(request, etag: str) -> bool:
+    """请求的 If-None-Match 是否与 etag 匹配（弱比较：gzip 压缩后的响应使用 W/ 前缀的 ETag）"""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if not if_none_match:
+        return False
+    etags = [e[2:] if e.startswith("W/") else e for e in parse_etags(if_none_match)]
+    return "*" in etags or etag in etags
+
+
+def conditional_get(version_func):
+    """
+    条件 GET 装饰器（用于 APIView.get）
+
+    version_func(request, *args, **kwargs) 返回版本号（可为元组），
+    与 If-None-Match 匹配时直接返回 304，否则执行视图并附带 ETag
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            version = version_func(request, *args, **kwargs)
+            parts = version if isinstance(version, tuple) else (version,)
+            etag = make_etag(*parts)
+
+            if etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response["ETag"] = etag
+                return response
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response["ETag"] = etag
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class _WatchState:
+    """一个事件循环中的等待状态"""
+
+    __slots__ = ("event", "waiters", "task")
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.waiters = 0
+        self.task = None
+
+
+class VersionWatcher:
+    """
+    在事件循环中等待版本号变化（长轮询、流式推送用）
+
+    每个事件循环只有一个检查任务，每隔 interval 秒读取一次版本号，变化时唤醒全部等待者；
+    等待中的连接只是一个挂起的协程，检查开销与连接数无关。没有等待者时检查任务退出
+    """
+
+    def __init__(self, version_func: Callable[[], int], interval: float):
+        self._version = version_func
+        self.interval = interval
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _WatchState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def version(self) -> int:
+        return self._version()
+
+    async def wait(self, version: int, timeout: float) -> int:
+        """等待版本号不再等于 version，返回当前版本号（超时时可能仍等于 version）"""
+        current = self._version()
+        if current != version or timeout <= 0:
+            return current
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _WatchState()
+        state.waiters += 1
+        if state.task is None:
+            state.task = loop.create_task(self._poll(state, current))
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return self._version()
+                try:
+                    await asyncio.wait_for(state.event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return self._version()
+                current = self._version()
+                if current != version:
+                    return current
+        finally:
+            state.waiters -= 1
+
+    async def _poll(self, state: _WatchState, last: int):
+        try:
+            while state.waiters:
+                await asyncio.sleep(self.interval)
+                current = self._version()
+                if current != last:
+                    last = current
+                    # 先换上新的 Event，被唤醒的等待者再次等待时不会立即返回
+                    event, state.event = state.event, asyncio.Event()
+                    event.set()
+        finally:
+            state.task = None
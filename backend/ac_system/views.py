@@ -23,15 +23,21 @@ from .models import (
     MealOrder,
 )
 from .serializers import (
-    RoomSerializer,
-    AccommodationOrderSerializer,
     ACStateSerializer,
     AccommodationBillSerializer,
     CheckInRequestSerializer,
     CheckOutRequestSerializer,
+    GroupCheckInRequestSerializer,
+    GroupCheckOutRequestSerializer,
     ACControlRequestSerializer,
+    ACBatchControlRequestSerializer,
     ReservationRequestSerializer,
     MealOrderRequestSerializer,
+    SchedulerProfileRequestSerializer,
+    SchedulerConfigRequestSerializer,
+    ServicePoolRequestSerializer,
+    RoomListSerializer,
+    OrderListSerializer,
 )
 from .services import (
     CheckInService,
@@ -40,13 +46,32 @@ from .services import (
     ReportService,
     ReservationService,
     MealService,
+    ServicePoolService,
+    SchedulerConfigService,
 )
 from .scheduler import scheduler  # 确保这一行存在
+from .lifecycle import lifecycle
+from .profiling import is_profiling_allowed
+from .events import EVENT_TYPES, format_event
+from .versioning import conditional_get, data_version, bump_data_version
+from .metrics import latency_stats, counters
+from .pagination import PaginationError, paginate_values, parse_limit
+
+
+def _data_version(request, *args, **kwargs):
+    """数据库变更计数（订单、账单、预定等）"""
+    return data_version.value
+
+
+def _scheduler_version(request, *args, **kwargs):
+    """调度器状态版本"""
+    return scheduler.state_version.value
 
 
 class RoomListView(APIView):
     """房间列表（包含入住信息）"""
 
+    @conditional_get(_data_version)
     def get(self, request):
         rooms = Room.objects.all()
         data = []
@@ -83,15 +108,56 @@ class RoomListView(APIView):
         return Response({"code": 200, "data": data, "message": "success"})
 
 
+def _values_list_response(request, queryset, serializer_class, ordering, default_limit):
+    """
+    列表接口的公共处理：字段选择（?fields=）+ 游标分页（?limit=&cursor=）
+
+    data 仍为对象列表，下一页游标放在响应顶层的 next_cursor 中
+    """
+    params = request.query_params
+    fields = [f.strip() for f in params.get("fields", "").split(",") if f.strip()]
+    unknown = serializer_class.unknown_fields(fields)
+    if unknown:
+        return Response(
+            {"code": 400, "data": None, "message": f"未知字段: {','.join(unknown)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        limit = parse_limit(params.get("limit"), default_limit, config.LIST_MAX_PAGE_SIZE)
+        lookups, specs = serializer_class.plan(fields)
+        rows, next_cursor = paginate_values(
+            queryset, lookups, ordering, params.get("cursor") or None, limit
+        )
+    except PaginationError as e:
+        return Response(
+            {"code": 400, "data": None, "message": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return Response(
+        {
+            "code": 200,
+            "data": serializer_class.to_representation(rows, specs),
+            "next_cursor": next_cursor,
+            "message": "success",
+        }
+    )
+
+
 class AvailableRoomListView(APIView):
-    """可用房间列表"""
+    """
+    可用房间列表
+
+    ?fields=room_id,price_per_day 选择字段；?limit=&cursor= 分页（默认返回全部）
+    """
 
     def get(self, request):
         # 仅返回完全空闲的房间，已预定和已入住的房间都不在此列表中
         rooms = Room.objects.filter(status="available")
-        print(f"Available rooms count: {rooms.count()}")  # Debug log
-        serializer = RoomSerializer(rooms, many=True)
-        return Response({"code": 200, "data": serializer.data, "message": "success"})
+        return _values_list_response(
+            request, rooms, RoomListSerializer, ["room_id"], default_limit=None
+        )
 
 
 class CheckInView(APIView):
@@ -208,6 +274,72 @@ class CheckOutView(APIView):
             )
 
 
+class GroupCheckInView(APIView):
+    """团体入住（单事务批量办理）"""
+
+    def post(self, request):
+        serializer = GroupCheckInRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "data": None, "message": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            succeeded, failed = CheckInService.create_group_orders(
+                serializer.validated_data["guests"]
+            )
+        except Exception as e:
+            import traceback
+
+            traceback.print_exc()
+            return Response(
+                {"code": 500, "data": None, "message": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        return Response(
+            {
+                "code": 200,
+                "data": {"succeeded": succeeded, "failed": failed},
+                "message": f"入住成功 {len(succeeded)} 间，失败 {len(failed)} 间",
+            }
+        )
+
+
+class GroupCheckOutView(APIView):
+    """团体退房（单事务批量结账）"""
+
+    def post(self, request):
+        serializer = GroupCheckOutRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "data": None, "message": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            succeeded, failed = CheckOutService.checkout_group(
+                serializer.validated_data["room_ids"]
+            )
+        except Exception as e:
+            import traceback
+
+            traceback.print_exc()
+            return Response(
+                {"code": 500, "data": None, "message": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        return Response(
+            {
+                "code": 200,
+                "data": {"succeeded": succeeded, "failed": failed},
+                "message": f"结账成功 {len(succeeded)} 间，失败 {len(failed)} 间",
+            }
+        )
+
+
 class PayBillView(APIView):
     """支付账单"""
 
@@ -233,6 +365,7 @@ class PayBillView(APIView):
 class BillDetailView(APIView):
     """获取账单详情"""
 
+    @conditional_get(_data_version)
     def get(self, request, room_id):
         success, msg, order = CheckOutService.get_active_order(room_id)
         if not success:
@@ -357,17 +490,100 @@ class ACControlView(APIView):
             )
 
 
+class ACBatchControlView(APIView):
+    """批量空调控制：按房间列表或房间选择器对多个房间下发指令"""
+
+    def post(self, request):
+        serializer = ACBatchControlRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "data": None, "message": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = serializer.validated_data
+        if data.get("commands"):
+            commands = [(cmd["room_id"], cmd) for cmd in data["commands"]]
+        else:
+            room_ids = ACService.select_rooms(**data["selector"])
+            commands = [(room_id, data["command"]) for room_id in room_ids]
+
+        try:
+            results = ACService.batch_control(commands)
+        except Exception as e:
+            return Response(
+                {"code": 500, "data": None, "message": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        failed = sum(1 for r in results if not r["success"])
+        return Response(
+            {
+                "code": 200,
+                "data": {
+                    "total": len(results),
+                    "failed": failed,
+                    "results": results,
+                },
+                "message": "success" if not failed else f"{failed} 个房间处理失败",
+            }
+        )
+
+
 class ACStateView(APIView):
     """获取空调状态"""
 
+    @conditional_get(_scheduler_version)
     def get(self, request, room_id):
         state = ACService.get_state(room_id)
         return Response({"code": 200, "data": state, "message": "success"})
 
 
+class ACStateQueryView(APIView):
+    """
+    批量查询空调状态
+
+    ?rooms=301,302&status=waiting&mode=cooling&floor=3
+    &fields=current_temp,status&layout=rows
+    """
+
+    @conditional_get(_scheduler_version)
+    def get(self, request):
+        params = request.query_params
+
+        def split(name):
+            value = params.get(name, "")
+            return [v.strip() for v in value.split(",") if v.strip()]
+
+        fields = split("fields")
+        unknown = [f for f in fields if f not in ACService.STATE_FIELDS]
+        if unknown:
+            return Response(
+                {"code": 400, "data": None, "message": f"未知字段: {','.join(unknown)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # 不使用 format 参数名：它被 DRF 用于选择渲染器
+        layout = params.get("layout", "objects")
+        if layout not in ("objects", "rows"):
+            return Response(
+                {"code": 400, "data": None, "message": "layout 仅支持 objects 或 rows"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        states = ACService.query_states(
+            room_ids=split("rooms"),
+            status=params.get("status") or None,
+            mode=params.get("mode") or None,
+            floor=params.get("floor") or None,
+        )
+        data = ACService.project_states(states, fields, layout)
+        return Response({"code": 200, "data": data, "message": "success"})
+
+
 class ACMonitorView(APIView):
     """空调监控（管理员用）"""
 
+    @conditional_get(_scheduler_version)
     def get(self, request):
         states = ACService.get_all_states()
         return Response({"code": 200, "data": states, "message": "success"})
@@ -440,17 +656,27 @@ class ACDetailListView(APIView):
 
 
 class OrderListView(APIView):
-    """订单列表"""
+    """
+    订单列表（按入住时间倒序）
+
+    ?status= 筛选；?fields= 选择字段；?limit=&cursor= 分页，
+    默认每页 config.ORDER_LIST_PAGE_SIZE 条，下一页游标见 next_cursor
+    """
 
     def get(self, request):
         status_filter = request.query_params.get("status", None)
 
-        orders = AccommodationOrder.objects.all().order_by("-check_in_time")
+        orders = AccommodationOrder.objects.all()
         if status_filter:
             orders = orders.filter(status=status_filter)
 
-        serializer = AccommodationOrderSerializer(orders, many=True)
-        return Response({"code": 200, "data": serializer.data, "message": "success"})
+        return _values_list_response(
+            request,
+            orders,
+            OrderListSerializer,
+            ["-check_in_time", "-order_id"],
+            default_limit=config.ORDER_LIST_PAGE_SIZE,
+        )
 
 
 class ReportView(APIView):
@@ -477,35 +703,47 @@ class ReportView(APIView):
 
 
 class TestLogView(APIView):
-    """读取测试脚本输出日志"""
+    """测试日志：最近的调度事件（按行格式化）"""
 
     def get(self, request):
-        import os
+        lines = [format_event(e) for e in scheduler.event_log.tail(500)]
+        return Response(
+            {
+                "code": 200,
+                "data": {"lines": lines, "last_seq": scheduler.event_log.last_seq},
+                "message": "success",
+            }
+        )
+
 
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        log_path = os.path.join(base_dir, "..", "monitor_output.log")
-        lines = []
+class EventListView(APIView):
+    """调度事件增量查询：?since=<seq>&room=<id>&type=<t>"""
+
+    def get(self, request):
         try:
-            if os.path.exists(log_path):
-                with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                    # 限制最大返回长度
-                    if len(content) > 100000:
-                        content = content[-100000:]
-                    lines = content.splitlines()[-500:]
+            since = int(request.query_params.get("since", 0))
+            limit = min(int(request.query_params.get("limit", 500)), 2000)
+        except ValueError:
             return Response(
-                {
-                    "code": 200,
-                    "data": {"lines": lines, "path": log_path},
-                    "message": "success",
-                }
+                {"code": 400, "data": None, "message": "since/limit 必须为整数"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        except Exception as e:
+
+        event_type = request.query_params.get("type") or None
+        if event_type is not None and event_type not in EVENT_TYPES:
             return Response(
-                {"code": 500, "data": {"lines": []}, "message": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                {"code": 400, "data": None, "message": f"未知事件类型: {event_type}"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        data = scheduler.event_log.query(
+            since=since,
+            room_id=request.query_params.get("room") or None,
+            event_type=event_type,
+            limit=limit,
+        )
+        return Response({"code": 200, "data": data, "message": "success"})
+
 
 class ReservationView(APIView):
     """房间预定"""
@@ -565,10 +803,7 @@ class AdminInitView(APIView):
         # 更新调度器状态
         from .scheduler import scheduler
 
-        if room_id in scheduler.service_manager.room_states:
-            scheduler.service_manager.room_states[room_id]["current_temp"] = float(temp)
-            scheduler.service_manager.room_states[room_id]["initial_temp"] = float(temp)
-            scheduler.service_manager.room_states[room_id]["mode"] = mode
+        scheduler.set_room_temperature(room_id, temp, mode)
 
         # 更新数据库
         from .models import ACState
@@ -624,12 +859,8 @@ class AdminClearView(APIView):
                 Room.objects.filter(room_id=room_id).update(status="available")
 
                 # 5. 清理调度器状态
-                if room_id in scheduler.service_queue:
-                    del scheduler.service_queue[room_id]
-                if room_id in scheduler.wait_queue:
-                    del scheduler.wait_queue[room_id]
-                if room_id in scheduler.service_manager.room_states:
-                    del scheduler.service_manager.room_states[room_id]
+                scheduler.remove_room(room_id)
+                bump_data_version()
 
             return Response({"code": 200, "data": None, "message": "清除成功"})
 
@@ -661,3 +892,173 @@ class ManagerReportView(APIView):
 
         report = ReportService.generate_manager_report(range_type, date)
         return Response({"code": 200, "data": report, "message": "success"})
+
+
+class SchedulerProfileView(APIView):
+    """调度器主循环性能分析（DEBUG 或管理员令牌）"""
+
+    def get(self, request):
+        if not is_profiling_allowed(request):
+            return Response(
+                {"code": 403, "data": None, "message": "无权进行性能分析"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        return Response(
+            {
+                "code": 200,
+                "data": scheduler.tick_profiler.status(),
+                "message": "success",
+            }
+        )
+
+    def post(self, request):
+        if not is_profiling_allowed(request):
+            return Response(
+                {"code": 403, "data": None, "message": "无权进行性能分析"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        serializer = SchedulerProfileRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "data": None, "message": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = serializer.validated_data
+        scheduler.profile_ticks(data["ticks"], data["kind"])
+        return Response(
+            {
+                "code": 200,
+                "data": scheduler.tick_profiler.status(),
+                "message": f"将分析接下来 {data['ticks']} 次调度循环",
+            }
+        )
+
+
+class ServicePoolView(APIView):
+    """服务池：查看配置与实时统计，创建 / 修改服务池并分配房间"""
+
+    def get(self, request):
+        return Response(
+            {"code": 200, "data": ServicePoolService.list_pools(), "message": "success"}
+        )
+
+    def post(self, request):
+        serializer = ServicePoolRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "data": None, "message": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = serializer.validated_data
+        success, message = ServicePoolService.save_pool(
+            data["name"],
+            data["capacity"],
+            data["wait_time_slice"],
+            data["description"],
+            data.get("room_ids"),
+            data["power_budget"],
+        )
+        if not success:
+            return Response(
+                {"code": 400, "data": None, "message": message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {"code": 200, "data": ServicePoolService.list_pools(), "message": message}
+        )
+
+
+class ServicePoolDetailView(APIView):
+    """删除服务池（其中的房间回到默认服务池）"""
+
+    def delete(self, request, name):
+        success, message = ServicePoolService.delete_pool(name)
+        if not success:
+            return Response(
+                {"code": 404, "data": None, "message": message},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response({"code": 200, "data": None, "message": message})
+
+
+class SchedulerConfigView(APIView):
+    """运行时调度参数：查看当前值与修改记录，修改参数（下一次调度主循环开始时生效）"""
+
+    def get(self, request):
+        return Response(
+            {"code": 200, "data": SchedulerConfigService.get_config(), "message": "success"}
+        )
+
+    def post(self, request):
+        serializer = SchedulerConfigRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"code": 400, "data": None, "message": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = serializer.validated_data
+        success, message, change = SchedulerConfigService.update_config(
+            data["changes"], data["reset"], data["operator"], data["reason"]
+        )
+        if not success:
+            return Response(
+                {"code": 400, "data": None, "message": message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"code": 200, "data": change, "message": message})
+
+
+class MetricsView(APIView):
+    """运行指标：接口延迟、304 节省量、计数器、调度抖动和内容版本号"""
+
+    def get(self, request):
+        return Response(
+            {
+                "code": 200,
+                "data": {
+                    "latency": latency_stats.snapshot(),
+                    "counters": counters.snapshot(),
+                    "pools": scheduler.pool_stats(),
+                    "churn": ReportService.get_churn_stats(),
+                    "versions": {
+                        "scheduler": scheduler.state_version.value,
+                        "data": data_version.value,
+                    },
+                },
+                "message": "success",
+            }
+        )
+
+    def delete(self, request):
+        latency_stats.reset()
+        counters.reset()
+        return Response({"code": 200, "data": None, "message": "指标已重置"})
+
+
+class HealthView(APIView):
+    """存活检查：备用进程，或调度线程存活且主循环延迟不超过 HEALTH_MAX_TICK_LAG（否则 503，应重启进程）"""
+
+    def get(self, request):
+        state = lifecycle.status()
+        if not state["live"]:
+            return Response(
+                {"code": 503, "data": state, "message": "调度器未运行或主循环延迟过大"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return Response({"code": 200, "data": state, "message": "success"})
+
+
+class ReadinessView(APIView):
+    """就绪检查：本进程运行调度器、主循环正常且数据库可用时才接收流量（备用进程返回 503）"""
+
+    def get(self, request):
+        state = lifecycle.status()
+        if not state["ready"]:
+            return Response(
+                {"code": 503, "data": state, "message": "未就绪"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return Response({"code": 200, "data": state, "message": "success"})
@@ -4,6 +4,14 @@
 TOTAL_ROOMS = 5  # 酒店总房间数 x
 MAX_SERVICE_NUM = 3  # 同时服务上限 y
 WAIT_TIME_SLICE = 120  # 等待时间片 s秒
+DEFAULT_SERVICE_POOL = "default"  # 未分配服务池的房间所属的服务池（容量和时间片取上面两项）
+POWER_BUDGET_KW = 0  # 默认服务池的压缩机功率预算（kW），大于 0 时按功率而不是同时服务数调度
+SCHEDULING_POLICY = "priority"  # 调度策略：priority / fair_share / srdf / aging（见 ac_system/policies.py）
+REQUEST_TRACE_FILE = ""  # 请求轨迹文件（JSON Lines），不为空时记录外部请求，供离线比较调度策略
+MIN_SERVICE_QUANTUM = 0  # 最小服务时长（与 WAIT_TIME_SLICE 单位相同），刚开始服务的房间在此之前不会被抢占或轮转换出
+SWAP_HYSTERESIS = 0  # 轮转滞后：服务满多少个时间片后才能被时间片轮转换出（如 1.0），0 为课程要求的原始行为
+DETAIL_RECORD_BATCH = True  # 一次主循环内的详单新建 / 结束合并为一个事务批量写入（False 为逐条自动提交）
+WARM_START = True  # 调度器启动时从 ACState、入住订单和未结束详单恢复房间状态和队列（False 为所有房间从关机开始）
 
 # 温度配置
 DEFAULT_TEMP = 25  # 缺省温度
@@ -22,6 +30,7 @@ FAN_SPEED_POWER = {
     "medium": 0.5,  # 中风：1度/2分钟
     "high": 1.0,  # 高风：1度/1分钟
 }
+# 功率预算调度时按上表折算压缩机功率：kW = 度/分钟 × 60（低 / 中 / 高风 20 / 30 / 60 kW）
 
 # 温度变化率 (度/分钟)
 TEMP_CHANGE_RATE = {
@@ -49,4 +58,35 @@ ROOM_PRICE = {
 }
 
 # 时间缩放比例
-TIME_SCALE = 6
\ No newline at end of file
+TIME_SCALE = 6
+
+# 调度事件日志容量（环形缓冲区条数）
+EVENT_LOG_CAPACITY = 5000
+
+# 列表接口分页
+ORDER_LIST_PAGE_SIZE = 100  # 订单列表默认每页条数
+LIST_MAX_PAGE_SIZE = 1000  # 列表接口 limit 上限
+
+# 请求防抖
+REQUEST_DEBOUNCE_SECONDS = 1.0  # 同一房间连续请求合并后，最后一次请求之后多久处理
+TEMP_COALESCE_SECONDS = 0.5  # 连续调温合并窗口，只保留最后一次目标温度
+
+# 调度器分片（0 表示在 Web 进程内运行单个调度器）
+SCHEDULER_SHARDS = 0  # 调度进程数，房间按一致性哈希分配到各进程
+SHARD_VIRTUAL_NODES = 256  # 每个调度进程在哈希环上的虚拟节点数
+SHARD_CALL_TIMEOUT = 30  # 等待调度进程回复的最长时间（秒）
+
+# 共享内存房间状态表（其他进程直接读取调度器发布的房间状态）
+STATE_TABLE_NAME = ""  # 单进程调度器写入的共享内存名，为空时不创建（分片模式下各调度进程自动创建）
+STATE_TABLE_CAPACITY = 4096  # 每张表最多容纳的房间数
+
+# 生产环境（hotel_ac/app.py 应用工厂，见 ac_system/lifecycle.py）
+SCHEDULER_LOCK_FILE = ""  # 调度器选主文件锁，为空时使用数据库文件所在目录下的 scheduler.lock
+LEADER_RETRY_SECONDS = 5  # 备用进程重试获取文件锁的间隔（秒）
+SHUTDOWN_TIMEOUT = 10  # 优雅停止时等待当前主循环结束的最长时间（秒）
+HEALTH_MAX_TICK_LAG = 5  # 主循环延迟超过该值（秒）时健康检查失败
+
+# 异步只读接口（ASGI，见 ac_system/async_views.py）
+LONG_POLL_MAX_SECONDS = 60  # 长轮询最长挂起时间（秒）
+LONG_POLL_INTERVAL = 0.1  # 等待中检查版本号变化的间隔（秒），每个事件循环一个检查任务，与连接数无关
+STREAM_HEARTBEAT_SECONDS = 15  # 流式推送空闲时发送心跳注释的间隔（秒）
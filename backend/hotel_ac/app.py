@@ -0,0 +1,40 @@
+"""
+生产环境应用工厂
+
+在 WSGI / ASGI 服务器中运行时使用（runserver 仍由 AppConfig.ready() 启动调度器）：
+    gunicorn "hotel_ac.app:create_wsgi_app()" --workers 1 --threads 8
+    uvicorn hotel_ac.app:create_asgi_app --factory
+
+创建应用后参与调度器选主（ac_system/lifecycle.py）：拿到文件锁的进程运行调度器，其余进程作为备用
+"""
+
+import os
+
+
+def _setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_ac.settings")
+
+
+def _start_lifecycle():
+    from ac_system.lifecycle import lifecycle
+
+    lifecycle.start()
+
+
+def create_wsgi_app():
+    """WSGI 应用（gunicorn 等）"""
+    _setup()
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    _start_lifecycle()
+    return application
+
+
+def create_asgi_app():
+    """ASGI 应用（uvicorn、daphne 等）"""
+    _setup()
+    from hotel_ac.asgi import application
+
+    _start_lifecycle()
+    return application
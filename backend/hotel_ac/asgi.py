@@ -0,0 +1,40 @@
+"""
+ASGI config for hotel_ac project.
+
+生产环境使用 hotel_ac.app:create_asgi_app（同时参与调度器选主）
+"""
+
+import os
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_ac.settings")
+
+# 异步只读接口（ac_system/async_views.py）的路径前缀
+ASYNC_READ_PREFIX = "/api/async/"
+
+
+class AsyncReadASGIHandler(ASGIHandler):
+    """
+    异步只读接口的请求不进入单独的 ThreadSensitiveContext
+
+    Django 为每个 ASGI 请求创建一个 ThreadSensitiveContext：请求中第一次执行同步代码（request_started 信号）时
+    创建一个专用线程，直到请求结束才退出，挂起的长轮询 / 流式连接各占一个空闲线程。
+    异步只读接口中的同步代码只有信号处理和异步 ORM，改为在 asgiref 的共享线程中执行，挂起的连接不占用线程；
+    其余接口（同步 DRF 视图）不变
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(ASYNC_READ_PREFIX):
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+
+def get_application() -> AsyncReadASGIHandler:
+    django.setup(set_prefix=False)
+    return AsyncReadASGIHandler()
+
+
+application = get_application()
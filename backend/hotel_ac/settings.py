@@ -2,6 +2,7 @@
 Django settings for hotel_ac project.
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "ac_system.middleware.LatencyMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -34,6 +36,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "ac_system.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "hotel_ac.urls"
@@ -100,6 +103,15 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "ac_system.renderers.FastJSONRenderer",
     ],
 }
+
+# JSON 渲染：安装 orjson 时自动启用；响应体超过该字节数且客户端支持时 gzip 压缩（None 关闭）
+FAST_JSON_GZIP_MIN_BYTES = 16 * 1024
+FAST_JSON_GZIP_LEVEL = 5
+
+# 性能分析配置（?__profile=cpu|mem）
+# 配置了令牌时需通过 X-Profile-Token 请求头提供；未配置时仅 DEBUG 模式可用
+PROFILE_TOKEN = os.environ.get("HOTEL_AC_PROFILE_TOKEN", "")
+PROFILE_DIR = BASE_DIR / "profiles"
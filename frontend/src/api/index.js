@@ -68,11 +68,24 @@ export default {
   getTestLog() {
     return api.get('/test/log/')
   },
+  getEvents(since = 0, filters = {}) {
+    return api.get('/events/', { params: { since, ...filters } })
+  },
   
   // 订单和报表
-  getOrders(status = null) {
-    const params = status ? { status } : {}
-    return api.get('/orders/', { params })
+  // 订单列表按游标分页：跟随 next_cursor 取回全部订单，data 为完整列表
+  async getOrders(status = null) {
+    const params = { limit: 1000 }
+    if (status) params.status = status
+    const orders = []
+    let res
+    do {
+      res = await api.get('/orders/', { params })
+      if (res.code !== 200) return res
+      orders.push(...res.data)
+      params.cursor = res.next_cursor
+    } while (res.next_cursor)
+    return { ...res, data: orders, next_cursor: null }
   },
   getReport(type = 'daily', date = null) {
     const params = { type }
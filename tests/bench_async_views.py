@@ -0,0 +1,305 @@
+"""
+异步长轮询与每请求一个线程的连接容量基准
+
+每个房间一个空调面板连接（共 N 个），等待状态变化，然后修改其中少数房间的状态：
+- 异步长轮询（ASGI）：直接调用 hotel_ac.asgi 的 ASGI 应用，GET /api/async/ac/state/<房间>/?wait=60，
+  N 个连接在同一个事件循环中挂起
+- 每连接一个线程：同步视图 /api/ac/state/<房间>/ 经 WSGIHandler 处理，每个连接占用一个线程等待版本号变化
+  （与异步版本相同，每 LONG_POLL_INTERVAL 秒检查一次），变化后重新请求并与开始时的内容比较，相同则继续等待
+统计：建立全部连接的耗时、内存增量、线程数、空闲 2 秒的 CPU 耗时、状态变化到对应连接收到响应的延迟，
+以及内容未变化却被唤醒并重新执行视图的次数。另测同步视图短轮询（每个面板每秒一次）的单次耗时作为参照
+
+运行：python tests/bench_async_views.py [连接数，默认 2000] [修改的房间数，默认 20]
+"""
+
+import asyncio
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms
+
+IDLE_SECONDS = 2.0
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def power_on(scheduler, room_ids):
+    for room_id in room_ids:
+        scheduler.submit_request(
+            room_id, {"action": "power_on", "target_temp": 22, "fan_speed": "high", "mode": "cooling"}
+        )
+
+
+def latency_row(label, connections, setup_s, memory_mb, threads, idle_cpu_s, latencies, wakeups):
+    latencies = sorted(latencies)
+    return {
+        "label": label,
+        "connections": connections,
+        "setup_s": setup_s,
+        "kb_per_conn": memory_mb * 1024 / connections,
+        "threads": threads,
+        "idle_cpu_s": idle_cpu_s,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "max_ms": latencies[-1] * 1000 if latencies else float("nan"),
+        "wakeups": wakeups,
+    }
+
+
+# ---------- 异步长轮询（ASGI） ----------
+
+
+async def asgi_long_poll(app, room_id, etag, disconnect, done):
+    """一个长轮询连接：返回 (状态码, 响应完成时刻)"""
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done[room_id] = (status, time.perf_counter())
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/api/async/ac/state/{room_id}/",
+        "raw_path": f"/api/async/ac/state/{room_id}/".encode(),
+        "query_string": b"wait=60",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"if-none-match", etag.encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    await app(scope, receive, send)
+
+
+async def run_async(room_ids, changed, etag) -> dict:
+    from ac_system.async_views import state_watcher
+    from ac_system.scheduler import scheduler
+    from hotel_ac.asgi import application as app
+    loop = asyncio.get_running_loop()
+    disconnect = asyncio.Event()
+    done = {}
+    memory, threads = rss_mb(), threading.active_count()
+
+    started = time.perf_counter()
+    tasks = [loop.create_task(asgi_long_poll(app, r, etag, disconnect, done)) for r in room_ids]
+    while state_watcher._states.get(loop) is None or state_watcher._states[loop].waiters < len(room_ids):
+        await asyncio.sleep(0.01)
+    setup_s = time.perf_counter() - started
+    memory, threads = rss_mb() - memory, threading.active_count()
+
+    cpu = time.process_time()
+    await asyncio.sleep(IDLE_SECONDS)
+    idle_cpu = time.process_time() - cpu
+
+    changed_at = time.perf_counter()
+    await asyncio.to_thread(power_on, scheduler, changed)
+    while any(r not in done for r in changed):
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.5)  # 给未变化房间的连接被误唤醒的机会
+    latencies = [done[r][1] - changed_at for r in changed]
+    wakeups = len(done) - len(changed)
+
+    disconnect.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return latency_row("异步长轮询（ASGI）", len(room_ids), setup_s, memory, threads, idle_cpu, latencies, wakeups)
+
+
+# ---------- 每连接一个线程（同步视图） ----------
+
+
+class WSGIClient:
+    """直接调用 WSGIHandler 的最小客户端"""
+
+    def __init__(self):
+        from django.core.wsgi import get_wsgi_application
+
+        self.app = get_wsgi_application()
+
+    def get(self, path: str, etag: str = ""):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "localhost",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+        }
+        if etag:
+            environ["HTTP_IF_NONE_MATCH"] = etag
+        result = {}
+
+        def start_response(status, headers):
+            result["status"] = int(status.split()[0])
+            result["headers"] = dict(headers)
+
+        body = b"".join(self.app(environ, start_response))
+        return result["status"], result["headers"].get("ETag", ""), body
+
+
+def run_threads(room_ids, changed, etag) -> dict:
+    import json
+
+    import config
+    from ac_system.scheduler import scheduler
+
+    client = WSGIClient()
+    condition = threading.Condition()
+    stop = threading.Event()
+    waiting = [0]
+    wakeups = [0]
+    done = {}
+
+    def watch():
+        """与 VersionWatcher 相同：每 LONG_POLL_INTERVAL 秒检查一次版本号，变化时唤醒全部线程"""
+        last = scheduler.state_version.value
+        while not stop.wait(config.LONG_POLL_INTERVAL):
+            current = scheduler.state_version.value
+            if current != last:
+                last = current
+                with condition:
+                    condition.notify_all()
+
+    def connection(room_id):
+        path = f"/api/ac/state/{room_id}/"
+        _, _, body = client.get(path)
+        baseline = json.loads(body)["data"]
+        version = scheduler.state_version.value
+        with condition:
+            waiting[0] += 1
+        while not stop.is_set():
+            with condition:
+                condition.wait_for(lambda: stop.is_set() or scheduler.state_version.value != version)
+            if stop.is_set():
+                return
+            version = scheduler.state_version.value
+            _, _, body = client.get(path)
+            if json.loads(body)["data"] != baseline:
+                done[room_id] = time.perf_counter()
+                return
+            with condition:
+                wakeups[0] += 1
+
+    memory, threads = rss_mb(), threading.active_count()
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    started = time.perf_counter()
+    workers = [threading.Thread(target=connection, args=(r,), daemon=True) for r in room_ids]
+    for worker in workers:
+        worker.start()
+    while waiting[0] < len(room_ids):
+        time.sleep(0.01)
+    setup_s = time.perf_counter() - started
+    memory, threads = rss_mb() - memory, threading.active_count()
+
+    cpu = time.process_time()
+    time.sleep(IDLE_SECONDS)
+    idle_cpu = time.process_time() - cpu
+
+    changed_at = time.perf_counter()
+    power_on(scheduler, changed)
+    while any(r not in done for r in changed):
+        time.sleep(0.005)
+    time.sleep(0.5)
+    latencies = [done[r] - changed_at for r in changed]
+
+    stop.set()
+    with condition:
+        condition.notify_all()
+    for worker in workers:
+        worker.join()
+    return latency_row(
+        "每连接一个线程（同步视图）", len(room_ids), setup_s, memory, threads, idle_cpu, latencies, wakeups[0]
+    )
+
+
+def short_poll_cost(room_ids, etag) -> dict:
+    """同步视图短轮询：单次请求耗时（304 / 200），N 个面板每秒各轮询一次需要的 CPU 秒数"""
+    client = WSGIClient()
+    sample = room_ids[:500]
+    costs = {}
+    for label, header in (("304", etag), ("200", "")):
+        started = time.perf_counter()
+        for room_id in sample:
+            client.get(f"/api/ac/state/{room_id}/", header)
+        costs[label] = (time.perf_counter() - started) / len(sample)
+    return costs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    path = os.path.join(tempfile.mkdtemp(), "bench_async.db")
+    old_name = setup_test_db(path)
+    try:
+        from ac_system.scheduler import scheduler
+        from ac_system.versioning import make_etag
+
+        # 两种方式各用一半房间：上一轮开机的房间（等待中）剩余等待时间随读取时间变化，不作为未变化的房间
+        all_rooms = create_rooms(count * 2)
+        scheduler.init_rooms(all_rooms)
+        step = max(1, count // changes)
+
+        rows = []
+        for run, room_ids in (("async", all_rooms[:count]), ("threads", all_rooms[count:])):
+            changed = room_ids[::step][:changes]
+            etag = make_etag(scheduler.state_version.value)
+            if run == "async":
+                rows.append(asyncio.run(run_async(room_ids, changed, etag)))
+            else:
+                rows.append(run_threads(room_ids, changed, etag))
+        costs = short_poll_cost(all_rooms[count:], make_etag(scheduler.state_version.value))
+    finally:
+        teardown_test_db(old_name)
+
+    print(f"\n空调面板连接容量（{count} 个连接，修改其中 {changes} 个房间的状态）")
+    print("-" * 118)
+    print(
+        f"{'方式':<26}{'建立连接(s)':>12}{'内存(KB/连接)':>15}{'线程数':>8}"
+        f"{'空闲CPU(s/2s)':>15}{'响应延迟P50(ms)':>17}{'最大(ms)':>10}{'误唤醒(次)':>12}"
+    )
+    for row in rows:
+        print(
+            f"{row['label']:<26}{row['setup_s']:>12.2f}{row['kb_per_conn']:>15.1f}{row['threads']:>8}"
+            f"{row['idle_cpu_s']:>15.3f}{row['p50_ms']:>17.1f}{row['max_ms']:>10.1f}{row['wakeups']:>12}"
+        )
+    print("-" * 118)
+    print(
+        f"同步视图短轮询：304 {costs['304'] * 1000:.2f} ms/次，200 {costs['200'] * 1000:.2f} ms/次；"
+        f"{count} 个面板每秒各轮询一次约需 {count * costs['304']:.2f} CPU 秒/秒（状态未变化时），"
+        f"平均 0.5 秒后才看到变化"
+    )
+    print("误唤醒：内容未变化的连接被唤醒并重新执行视图的次数（异步版本在事件循环中比较快照，不重新执行视图）")
+
+
+if __name__ == "__main__":
+    main()
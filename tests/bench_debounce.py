@@ -0,0 +1,138 @@
+"""
+请求防抖基准测试（虚拟时钟）
+
+对比原实现（每秒主循环扫描全部请求时间戳）与截止时间最小堆 Debouncer：
+- 防抖请求从最后一次更新到被处理的延迟（原实现为 1-2 秒，取决于与主循环的相位）
+- 每次取出到期请求的耗时（原实现与近期提交过请求的房间数成正比）
+
+原实现按改造前的代码复制在本文件中，仅用于对比
+
+运行：python tests/bench_debounce.py [房间数，默认 10000]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+import bench_env  # noqa: F401  初始化 Django
+
+from ac_system.debounce import Debouncer
+
+INTERVAL = 1.0
+DURATION = 60  # 模拟秒数
+STEP = 0.01  # 主循环 / Debouncer 的检查粒度（秒）
+
+
+class LegacyDebouncer:
+    """原 _request_timestamps / _pending_requests 实现"""
+
+    def __init__(self):
+        self._request_timestamps = {}
+        self._pending_requests = {}
+
+    def submit(self, room_id, request, now):
+        last_time = self._request_timestamps.get(room_id, 0)
+        self._request_timestamps[room_id] = now
+        if now - last_time < INTERVAL:
+            self._pending_requests[room_id] = request
+            return True
+        return False
+
+    def pop_due(self, now):
+        to_process = []
+        for room_id, timestamp in list(self._request_timestamps.items()):
+            if now - timestamp >= INTERVAL:
+                if room_id in self._pending_requests:
+                    to_process.append((room_id, self._pending_requests[room_id]))
+                    del self._pending_requests[room_id]
+                del self._request_timestamps[room_id]
+        return to_process
+
+
+def make_workload(count, seed=1):
+    """每个房间在随机时刻连续点击 2-5 次（间隔 0.1-0.6 秒），返回按时间排序的 (时刻, 房间)"""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        room_id = f"r{i:06d}"
+        t = rng.uniform(0, DURATION - 10)
+        for _ in range(rng.randint(2, 5)):
+            events.append((round(t, 2), room_id))
+            t += rng.uniform(0.1, 0.6)
+    events.sort()
+    return events
+
+
+def run(events, submit, pop_due, poll):
+    """
+    按虚拟时钟回放请求；poll(t) 决定时刻 t 是否检查到期请求
+    返回 (各请求的处理延迟列表, 检查次数, 检查总耗时秒)
+    """
+    last_update = {}
+    delays = []
+    checks = 0
+    check_time = 0.0
+    i = 0
+    steps = int(DURATION / STEP) + 1
+    for step in range(steps):
+        now = round(step * STEP, 2)
+        while i < len(events) and events[i][0] <= now:
+            t, room_id = events[i]
+            if submit(room_id, {"action": "change_speed"}, t):
+                last_update[room_id] = t
+            i += 1
+        if poll(now):
+            started = time.perf_counter()
+            due = pop_due(now)
+            check_time += time.perf_counter() - started
+            checks += 1
+            for room_id, _ in due:
+                delays.append(now - last_update.pop(room_id))
+    return delays, checks, check_time
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    events = make_workload(count)
+
+    legacy = LegacyDebouncer()
+    legacy_result = run(
+        events, legacy.submit, legacy.pop_due, lambda now: now == int(now)
+    )
+
+    debouncer = Debouncer(INTERVAL)
+
+    def heap_submit(room_id, request, now):
+        return debouncer.submit(room_id, request, now=now)
+
+    def heap_poll(now):
+        # 主循环只在下一次截止时间到达时唤醒
+        deadline = debouncer.next_deadline()
+        return deadline is not None and deadline <= now + 1e-9
+
+    heap_result = run(
+        events,
+        heap_submit,
+        lambda now: debouncer.pop_due(now + 1e-9),
+        heap_poll,
+    )
+
+    print(f"\n请求防抖基准（{count} 个房间，{len(events)} 次请求，模拟 {DURATION} 秒）")
+    print("-" * 84)
+    print(
+        f"{'实现':<20}{'防抖请求':>10}{'平均延迟s':>12}{'最大延迟s':>12}"
+        f"{'检查次数':>10}{'每次检查us':>12}"
+    )
+    for label, (delays, checks, check_time) in (
+        ("原实现（每秒扫描）", legacy_result),
+        ("Debouncer（最小堆）", heap_result),
+    ):
+        print(
+            f"{label:<20}{len(delays):>10}{statistics.mean(delays):>12.3f}"
+            f"{max(delays):>12.3f}{checks:>10}{check_time * 1e6 / max(checks, 1):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+性能基准脚本公共环境
+
+- 初始化 Django，并在独立的测试数据库（SQLite 内存库）上运行，不影响 hotel.db
+- 提供计时与 SQL 计数工具
+- 提供虚拟时钟，调度模拟不必按真实时间等待
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# 设置 Django 环境 (从 tests 目录向上一级到项目根目录，再进入 backend)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, "backend"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hotel_ac.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def setup_test_db(path=None):
+    """
+    创建并迁移测试数据库，返回原数据库名（用于 teardown_test_db）
+
+    默认使用内存库；其他进程（如调度进程）也要访问时指定数据库文件路径 path
+    """
+    old_name = connection.settings_dict["NAME"]
+    if path:
+        connection.settings_dict["TEST"]["NAME"] = path
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    return old_name
+
+
+def teardown_test_db(old_name):
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def create_rooms(count: int, prefix_floor: int = 3, price: int = 100):
+    """批量创建房间：房间号按 楼层+两位序号 编排（如 301, 302 ... 401）"""
+    from ac_system.models import Room
+
+    rooms = []
+    for i in range(count):
+        floor = prefix_floor + i // 99
+        rooms.append(
+            Room(
+                room_id=f"{floor}{i % 99 + 1:02d}",
+                room_type="standard",
+                price_per_day=price,
+            )
+        )
+    Room.objects.bulk_create(rooms, ignore_conflicts=True)
+    return [r.room_id for r in rooms]
+
+
+@contextmanager
+def measure(label: str, results: dict):
+    """记录代码块耗时（毫秒）和 SQL 语句数"""
+    # 查询日志有长度上限（9000 条），写满后计数失真，每次测量前清空
+    connection.queries_log.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        yield
+        elapsed = (time.perf_counter() - started) * 1000
+    results[label] = {"ms": round(elapsed, 2), "queries": len(ctx.captured_queries)}
+
+
+def print_table(title: str, results: dict):
+    print(f"\n{title}")
+    print("-" * 60)
+    print(f"{'场景':<30}{'耗时(ms)':>14}{'SQL数':>12}")
+    for label, row in results.items():
+        print(f"{label:<30}{row['ms']:>14}{row.get('queries', '-'):>12}")
+
+
+def virtual_clock():
+    """调度器和防抖模块改用虚拟时钟（见 ac_system.simulation.virtual_clock）"""
+    from ac_system.simulation import virtual_clock as clock
+
+    return clock()
@@ -0,0 +1,72 @@
+"""
+团体入住 / 退房基准测试
+
+对比逐房间办理（CheckInService.create_order / CheckOutService.checkout）
+与团体接口（create_group_orders / checkout_group）的耗时和 SQL 数
+
+运行：python tests/bench_group_checkin.py [房间数，默认 40]
+"""
+
+import sys
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, measure, print_table
+
+
+def make_guests(room_ids, tag):
+    return [
+        {
+            "name": f"团员{tag}{i}",
+            "phone": f"138{i:08d}",
+            "id_card": f"{tag}{i:016d}",
+            "room_id": room_id,
+        }
+        for i, room_id in enumerate(room_ids)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    old_name = setup_test_db()
+    try:
+        from ac_system.services import CheckInService, CheckOutService
+
+        single_rooms = create_rooms(count, prefix_floor=3)
+        group_rooms = create_rooms(count, prefix_floor=50)
+        results = {}
+
+        with measure(f"逐房间入住 x{count}", results):
+            for guest in make_guests(single_rooms, "1"):
+                ok, msg, customer = CheckInService.validate_customer(
+                    guest["name"], guest["id_card"], guest["phone"]
+                )
+                ok, msg, room = CheckInService.validate_room(guest["room_id"])
+                CheckInService.create_order(customer, room)
+
+        with measure(f"团体入住 x{count}", results):
+            succeeded, failed = CheckInService.create_group_orders(
+                make_guests(group_rooms, "2")
+            )
+        assert len(succeeded) == count and not failed, failed
+
+        with measure(f"逐房间退房 x{count}", results):
+            for room_id in single_rooms:
+                CheckOutService.checkout(room_id)
+
+        with measure(f"团体退房 x{count}", results):
+            succeeded, failed = CheckOutService.checkout_group(group_rooms)
+        assert len(succeeded) == count and not failed, failed
+
+        print_table(f"团体入住/退房基准（{count} 间）", results)
+        for kind in ("入住", "退房"):
+            single = results[f"逐房间{kind} x{count}"]
+            group = results[f"团体{kind} x{count}"]
+            print(
+                f"{kind}：耗时 {single['ms'] / max(group['ms'], 0.01):.1f}x，"
+                f"SQL {single['queries']} -> {group['queries']}"
+            )
+    finally:
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+列表接口序列化基准测试
+
+对比 ModelSerializer（原 OrderListView / AvailableRoomListView 实现）
+与基于 values() 的轻量序列化器的耗时和 SQL 数，并校验输出一致
+
+运行：python tests/bench_list_serializers.py [订单数，默认 2000]
+"""
+
+import json
+import sys
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, measure, print_table
+
+
+def create_orders(count: int, room_ids):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from ac_system.models import AccommodationOrder, Customer
+
+    customers = Customer.objects.bulk_create(
+        Customer(name=f"顾客{i}", id_card=f"{i:018d}", phone=f"138{i:08d}")
+        for i in range(count)
+    )
+    now = timezone.now()
+    AccommodationOrder.objects.bulk_create(
+        AccommodationOrder(
+            customer=customer,
+            room_id=room_ids[i % len(room_ids)],
+            check_in_time=now - timedelta(minutes=i),
+            check_out_time=now if i % 3 else None,
+            status="completed" if i % 3 else "active",
+            room_fee=100 + i % 7,
+            deposit_amount=200,
+            deposit_paid=True,
+        )
+        for i, customer in enumerate(customers)
+    )
+
+
+def same_output(old, new) -> bool:
+    return json.loads(json.dumps(old)) == json.loads(json.dumps(new))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    old_name = setup_test_db()
+    try:
+        from ac_system.models import AccommodationOrder, Room
+        from ac_system.pagination import paginate_values
+        from ac_system.serializers import (
+            AccommodationOrderSerializer,
+            OrderListSerializer,
+            RoomListSerializer,
+            RoomSerializer,
+        )
+
+        room_ids = create_rooms(min(count, 900))
+        create_orders(count, room_ids)
+        ordering = ["-check_in_time", "-order_id"]
+        results = {}
+
+        def values_list(serializer_class, queryset, order, limit=None, fields=None):
+            lookups, specs = serializer_class.plan(fields)
+            rows, _ = paginate_values(queryset, lookups, order, None, limit)
+            return serializer_class.to_representation(rows, specs)
+
+        with measure(f"订单 ModelSerializer x{count}", results):
+            old_orders = AccommodationOrderSerializer(
+                AccommodationOrder.objects.order_by(*ordering), many=True
+            ).data
+        with measure(f"订单 values() x{count}", results):
+            new_orders = values_list(
+                OrderListSerializer, AccommodationOrder.objects.all(), ordering
+            )
+        with measure("订单 values() 分页 100", results):
+            values_list(
+                OrderListSerializer, AccommodationOrder.objects.all(), ordering, 100
+            )
+        with measure("订单 values() 2 个字段", results):
+            values_list(
+                OrderListSerializer,
+                AccommodationOrder.objects.all(),
+                ordering,
+                fields=["order_id", "status"],
+            )
+
+        rooms = Room.objects.filter(status="available")
+        with measure(f"房间 ModelSerializer x{len(room_ids)}", results):
+            old_rooms = RoomSerializer(rooms.order_by("room_id"), many=True).data
+        with measure(f"房间 values() x{len(room_ids)}", results):
+            new_rooms = values_list(RoomListSerializer, rooms, ["room_id"])
+
+        print_table(f"列表序列化基准（订单 {count} 条）", results)
+        old = results[f"订单 ModelSerializer x{count}"]
+        new = results[f"订单 values() x{count}"]
+        print(
+            f"订单：耗时 {old['ms'] / max(new['ms'], 0.01):.1f}x，"
+            f"SQL {old['queries']} -> {new['queries']}，"
+            f"输出一致：{same_output(old_orders, new_orders)}"
+        )
+        old = results[f"房间 ModelSerializer x{len(room_ids)}"]
+        new = results[f"房间 values() x{len(room_ids)}"]
+        print(
+            f"房间：耗时 {old['ms'] / max(new['ms'], 0.01):.1f}x，"
+            f"输出一致：{same_output(old_rooms, new_rooms)}"
+        )
+    finally:
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
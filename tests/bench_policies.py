@@ -0,0 +1,149 @@
+"""
+调度策略离线比较
+
+把请求轨迹在虚拟时钟上依次交给各调度策略（ac_system/policies.py）重放，报告：
+- 等待：每次进入等待队列到离开的时长，平均值和 P95（模拟分钟）
+- 舒适度误差：开着空调（服务、等待、待机）的房间距目标温度的温差对时间的积分（°C·分钟）
+- 达标次数、抢占 + 轮转次数、总耗电量（度）
+
+轨迹文件由调度器记录（config.REQUEST_TRACE_FILE，格式见 ac_system/tracing.py），按记录时的时间间隔重放；
+不指定轨迹文件时使用与 bench_power_budget.py 相同的随机轨迹（固定种子）。
+服务池容量取 config.MAX_SERVICE_NUM，每次主循环对应 TIME_SCALE 秒模拟时间
+
+运行：python tests/bench_policies.py [轨迹文件]
+"""
+
+import random
+import sys
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, virtual_clock
+
+SYNTHETIC_ROOMS = 12
+SYNTHETIC_HOURS = 8
+TAIL_TICKS = 600  # 最后一个请求之后继续运行的主循环次数
+
+
+def load_workload(path):
+    """
+    读取轨迹并在测试库中创建房间
+
+    返回 (房间号列表, {房间号: (初始温度, 模式)}, {主循环序号: [(房间号, 请求)]})
+    """
+    from ac_system.models import Room
+    from ac_system.tracing import load_trace, trace_to_ticks
+
+    if path:
+        entries = load_trace(path)
+        temps, events = trace_to_ticks(entries)
+        room_ids = sorted({e["room_id"] for e in entries})
+        Room.objects.bulk_create(
+            [Room(room_id=r, room_type="standard", price_per_day=100) for r in room_ids],
+            ignore_conflicts=True,
+        )
+        return room_ids, temps, events
+
+    from bench_power_budget import SEED, generate_workload
+
+    room_ids = create_rooms(SYNTHETIC_ROOMS)
+    temps, events = generate_workload(room_ids, SYNTHETIC_HOURS, random.Random(SEED))
+    return room_ids, {r: (t, "cooling") for r, t in temps.items()}, events
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def replay(policy: str, room_ids, temps, events, ticks: int) -> dict:
+    from ac_system.metrics import counters
+    from ac_system.policies import remaining_delta
+    from ac_system.scheduler import ACScheduler
+    from config import TIME_SCALE
+
+    minutes_per_tick = TIME_SCALE / 60
+    with virtual_clock() as clock:
+        ACScheduler._instance = None  # 每个策略使用新的调度器
+        scheduler = ACScheduler()
+        scheduler.set_policy(policy)
+        scheduler.init_rooms(room_ids)
+        for room_id, (temp, mode) in temps.items():
+            scheduler.set_room_temperature(room_id, temp, mode)
+        counters.reset()
+
+        records = scheduler.service_manager.room_states
+        waiting_since = {}
+        waits = []
+        comfort = 0.0
+        started = time.perf_counter()
+        for tick in range(ticks):
+            for room_id, request in events.get(tick, ()):
+                scheduler.submit_request(room_id, request)
+            scheduler._tick()
+
+            waiting = scheduler.wait_queue
+            for room_id in waiting:
+                waiting_since.setdefault(room_id, tick)
+            for room_id in [r for r in waiting_since if r not in waiting]:
+                waits.append((tick - waiting_since.pop(room_id)) * minutes_per_tick)
+            for record in records.values():
+                if record.is_on:
+                    comfort += remaining_delta(record) * minutes_per_tick
+            clock.advance(1)
+        elapsed = time.perf_counter() - started
+        waits.extend((ticks - since) * minutes_per_tick for since in waiting_since.values())
+
+    def total(event: str) -> float:
+        return sum(
+            v for k, v in counters.snapshot().items() if k.startswith("pool.") and k.endswith(f".{event}")
+        )
+
+    return {
+        "waits": len(waits),
+        "mean_wait": sum(waits) / len(waits) if waits else 0.0,
+        "p95_wait": percentile(waits, 0.95),
+        "comfort": comfort,
+        "reached": total("standby"),
+        "swaps": total("preempt") + total("swap"),
+        "energy": sum(r.energy_consumed for r in records.values()),
+        "tick_ms": elapsed * 1000 / ticks,
+    }
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    from ac_system.policies import POLICIES
+    from config import MAX_SERVICE_NUM, TIME_SCALE
+
+    old_name = setup_test_db()
+    try:
+        room_ids, temps, events = load_workload(path)
+        ticks = (max(events) + 1 if events else 0) + TAIL_TICKS
+        rows = [(name, replay(name, room_ids, temps, events, ticks)) for name in POLICIES]
+    finally:
+        teardown_test_db(old_name)
+
+    source = path or f"随机轨迹（{SYNTHETIC_ROOMS} 间房，{SYNTHETIC_HOURS} 小时）"
+    requests = sum(len(v) for v in events.values())
+    print(
+        f"\n调度策略比较：{source}，{requests} 个请求，{ticks} 次主循环"
+        f"（模拟 {ticks * TIME_SCALE / 3600:.1f} 小时），同时服务上限 {MAX_SERVICE_NUM}"
+    )
+    print("-" * 118)
+    print(
+        f"{'策略':<24}{'等待次数':>10}{'平均等待(分)':>14}{'P95等待(分)':>14}{'舒适度误差(°C·分)':>20}"
+        f"{'达标次数':>10}{'抢占+轮转':>10}{'耗电(度)':>10}{'主循环(ms)':>12}"
+    )
+    for name, row in rows:
+        label = f"{name} {POLICIES[name].description.split('（')[0]}"
+        print(
+            f"{label:<24}{row['waits']:>10}{row['mean_wait']:>14.2f}{row['p95_wait']:>14.2f}"
+            f"{row['comfort']:>20.0f}{row['reached']:>10.0f}{row['swaps']:>10.0f}"
+            f"{row['energy']:>10.1f}{row['tick_ms']:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
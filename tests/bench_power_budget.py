@@ -0,0 +1,148 @@
+"""
+功率预算调度模拟基准
+
+在虚拟时钟上运行真实的 ACScheduler：若干房间按随机生成（固定种子）的开机 / 调风速 / 关机序列使用空调，
+分别按同时服务数（槽位）和按压缩机功率预算调度，比较：
+- 吞吐：每小时达到目标温度（进入待机）的次数
+- 平均等待：每次服务请求（开机、待机重启）平均在等待队列中的时长（模拟分钟）
+- 能耗：总耗电量（度）、平均 / 峰值压缩机功率，以及功率超过预算的时长占比
+每次主循环对应 TIME_SCALE 秒模拟时间（与实际运行相同）
+
+运行：python tests/bench_power_budget.py [房间数，默认 12] [模拟小时数，默认 8]
+"""
+
+import random
+import sys
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, virtual_clock
+
+SEED = 42
+FAN_WEIGHTS = {"low": 0.4, "medium": 0.4, "high": 0.2}
+
+# (名称, 同时服务上限, 功率预算 kW)：90 kW 相当于 3 台中风，120 kW 相当于 4 台中风
+POLICIES = (
+    ("槽位 3", 3, 0),
+    ("功率预算 90kW", 3, 90),
+    ("槽位 4", 4, 0),
+    ("功率预算 120kW", 4, 120),
+)
+REFERENCE_BUDGET = {3: 90, 4: 120}  # 按槽位调度时用于统计超预算时长的功率
+
+
+def generate_workload(room_ids, hours: float, rng: random.Random):
+    """
+    生成请求序列：每间房间隔一段时间开机（随机风速、目标温度），使用一段时间，期间可能调风速，然后关机
+
+    返回 (各房间初始温度, {主循环序号: [(房间号, 请求)]})
+    """
+    from config import TIME_SCALE
+
+    def tick_of(minute: float) -> int:
+        return int(minute * 60 / TIME_SCALE)
+
+    fans, weights = list(FAN_WEIGHTS), list(FAN_WEIGHTS.values())
+    total = hours * 60
+    temps = {}
+    events = {}
+    for room_id in room_ids:
+        temps[room_id] = round(rng.uniform(29, 33), 1)
+        minute = rng.uniform(0, 30)
+        while minute < total:
+            fan = rng.choices(fans, weights)[0]
+            target = rng.randint(18, 24)
+            events.setdefault(tick_of(minute), []).append(
+                (room_id, {"action": "power_on", "target_temp": target, "fan_speed": fan, "mode": "cooling"})
+            )
+            length = rng.uniform(60, 180)
+            if rng.random() < 0.3:
+                events.setdefault(tick_of(minute + rng.uniform(5, length - 5)), []).append(
+                    (room_id, {"action": "change_speed", "fan_speed": rng.choices(fans, weights)[0]})
+                )
+            minute += length
+            events.setdefault(tick_of(minute), []).append((room_id, {"action": "power_off"}))
+            minute += rng.uniform(20, 90)
+    return temps, events
+
+
+def simulate(capacity: int, budget: float, room_ids, temps, events, ticks: int) -> dict:
+    from ac_system.metrics import counters
+    from ac_system.scheduler import ACScheduler, fan_power_kw
+    from config import DEFAULT_SERVICE_POOL, TIME_SCALE
+
+    with virtual_clock() as clock:
+        ACScheduler._instance = None  # 每种策略使用新的调度器
+        scheduler = ACScheduler()
+        pool = scheduler.pools[DEFAULT_SERVICE_POOL]
+        pool.capacity = capacity
+        pool.power_budget = budget
+        scheduler.init_rooms(room_ids)
+        for room_id, temp in temps.items():
+            scheduler.set_room_temperature(room_id, temp, "cooling")
+        counters.reset()
+
+        limit = budget or REFERENCE_BUDGET.get(capacity, 0)
+        waiting = draw_total = peak = over = 0.0
+        started = time.perf_counter()
+        for tick in range(ticks):
+            for room_id, request in events.get(tick, ()):
+                scheduler.submit_request(room_id, request)
+            scheduler._tick()
+            waiting += len(pool.wait_queue)
+            draw = sum(fan_power_kw(r.fan_speed) for r in pool.service_queue.values())
+            draw_total += draw
+            peak = max(peak, draw)
+            if limit and draw > limit + 1e-9:
+                over += 1
+            clock.advance(1)
+        elapsed = time.perf_counter() - started
+
+    hours = ticks * TIME_SCALE / 3600
+    events_of = lambda name: counters.get(f"pool.{DEFAULT_SERVICE_POOL}.{name}")
+    requests = events_of("power_on") + events_of("restart")
+    return {
+        "throughput": events_of("standby") / hours,
+        "wait_min": waiting * TIME_SCALE / 60 / requests if requests else 0.0,
+        "energy": sum(r.energy_consumed for r in scheduler.service_manager.room_states.values()),
+        "avg_kw": draw_total / ticks,
+        "peak_kw": peak,
+        "over": over / ticks,
+        "swaps": events_of("preempt") + events_of("swap"),
+        "tick_ms": elapsed * 1000 / ticks,
+    }
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 8
+    from config import TIME_SCALE
+
+    ticks = int(hours * 3600 / TIME_SCALE)
+    old_name = setup_test_db()
+    try:
+        room_ids = create_rooms(rooms)
+        temps, events = generate_workload(room_ids, hours, random.Random(SEED))
+        rows = [
+            (label, simulate(capacity, budget, room_ids, temps, events, ticks))
+            for label, capacity, budget in POLICIES
+        ]
+    finally:
+        teardown_test_db(old_name)
+
+    print(f"\n功率预算调度模拟（{rooms} 间房，模拟 {hours:g} 小时 / {ticks} 次主循环，种子 {SEED}）")
+    print("-" * 116)
+    print(
+        f"{'策略':<16}{'达标(次/时)':>12}{'平均等待(分)':>14}{'耗电(度)':>12}{'平均功率(kW)':>14}"
+        f"{'峰值功率(kW)':>14}{'超预算时长':>12}{'抢占+轮转':>10}{'主循环(ms)':>12}"
+    )
+    for label, row in rows:
+        print(
+            f"{label:<16}{row['throughput']:>12.1f}{row['wait_min']:>14.2f}{row['energy']:>12.1f}"
+            f"{row['avg_kw']:>14.1f}{row['peak_kw']:>14.1f}{row['over']:>12.1%}"
+            f"{row['swaps']:>10.0f}{row['tick_ms']:>12.3f}"
+        )
+    print("超预算时长：按槽位调度时以相同台数的中风功率（3 台 90kW / 4 台 120kW）为预算统计")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+最小服务时长与轮转滞后基准
+
+高风请求成批到达时，刚开始服务的房间可能马上被抢占，时间片轮转换进来的房间也可能很快又被换出，
+每次换出都会结束一条详单、开始一条新详单。本基准在虚拟时钟上运行真实的 ACScheduler，
+在 bench_power_budget.py 的随机轨迹（固定种子）上叠加成批的调高风速请求，比较不同
+MIN_SERVICE_QUANTUM / SWAP_HYSTERESIS 配置下：
+- 抢占、轮转次数（按模拟时间每小时）
+- 详单数、每次入住（每个房间入住整个模拟时长）的详单数、不足一个时间片的短详单数
+- 平均等待（模拟分钟）和达标次数
+每次主循环对应 TIME_SCALE 秒模拟时间（与实际运行相同）
+
+运行：python tests/bench_quantum.py [房间数，默认 12] [模拟小时数，默认 8]
+"""
+
+import random
+import sys
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, virtual_clock
+
+SEED = 42
+BURST_INTERVAL_MINUTES = 15  # 平均每隔多少分钟出现一批调高风速请求
+BURST_ROOMS = (3, 5)  # 每批请求的房间数
+BURST_SPREAD_TICKS = 5  # 一批请求在多少次主循环内到达
+BURST_LENGTH_MINUTES = (2, 10)  # 调高风速后多久调回
+
+# (名称, MIN_SERVICE_QUANTUM, SWAP_HYSTERESIS)：时长与 WAIT_TIME_SLICE 单位相同
+CONFIGS = (
+    ("原始", 0, 0),
+    ("最小服务时长 60", 60, 0),
+    ("轮转滞后 1.0", 0, 1.0),
+    ("两者", 60, 1.0),
+)
+
+
+def add_bursts(room_ids, hours: float, events, rng: random.Random):
+    """在请求序列中加入成批的调高风速请求（一段时间后调回中风或低风）"""
+    from config import TIME_SCALE
+
+    def tick_of(minute: float) -> int:
+        return int(minute * 60 / TIME_SCALE)
+
+    minute = rng.expovariate(1 / BURST_INTERVAL_MINUTES)
+    while minute < hours * 60:
+        start = tick_of(minute)
+        for room_id in rng.sample(room_ids, rng.randint(*BURST_ROOMS)):
+            tick = start + rng.randrange(BURST_SPREAD_TICKS)
+            events.setdefault(tick, []).append((room_id, {"action": "change_speed", "fan_speed": "high"}))
+            back = tick + tick_of(rng.uniform(*BURST_LENGTH_MINUTES))
+            fan = rng.choice(("low", "medium"))
+            events.setdefault(back, []).append((room_id, {"action": "change_speed", "fan_speed": fan}))
+        minute += rng.expovariate(1 / BURST_INTERVAL_MINUTES)
+    return events
+
+
+def simulate(quantum: float, hysteresis: float, room_ids, temps, events, ticks: int) -> dict:
+    import config
+    from ac_system.metrics import counters
+    from ac_system.scheduler import ACScheduler
+    from config import DEFAULT_SERVICE_POOL, TIME_SCALE, WAIT_TIME_SLICE
+
+    saved = config.MIN_SERVICE_QUANTUM, config.SWAP_HYSTERESIS
+    config.MIN_SERVICE_QUANTUM, config.SWAP_HYSTERESIS = quantum, hysteresis
+    slice_ticks = WAIT_TIME_SLICE / TIME_SCALE
+    try:
+        with virtual_clock() as clock:
+            ACScheduler._instance = None  # 每种配置使用新的调度器
+            scheduler = ACScheduler()
+            pool = scheduler.pools[DEFAULT_SERVICE_POOL]
+            scheduler.init_rooms(room_ids)
+            for room_id, temp in temps.items():
+                scheduler.set_room_temperature(room_id, temp, "cooling")
+            counters.reset()
+
+            # 详单号 -> 开始的主循环序号（详单时间是真实时间，这里按主循环计算时长）
+            open_records = {}
+            durations = []
+            waiting = 0
+            started = time.perf_counter()
+            for tick in range(ticks):
+                for room_id, request in events.get(tick, ()):
+                    scheduler.submit_request(room_id, request)
+                scheduler._tick()
+                waiting += len(pool.wait_queue)
+
+                current = {r.record_id for r in pool.service_queue.values() if r.record_id}
+                for record_id in current:
+                    open_records.setdefault(record_id, tick)
+                for record_id in [r for r in open_records if r not in current]:
+                    durations.append(tick - open_records.pop(record_id))
+                clock.advance(1)
+            elapsed = time.perf_counter() - started
+            durations.extend(ticks - since for since in open_records.values())
+    finally:
+        config.MIN_SERVICE_QUANTUM, config.SWAP_HYSTERESIS = saved
+
+    hours = ticks * TIME_SCALE / 3600
+    events_of = lambda name: counters.get(f"pool.{DEFAULT_SERVICE_POOL}.{name}")
+    requests = events_of("power_on") + events_of("restart")
+    return {
+        "preempts": events_of("preempt") / hours,
+        "swaps": events_of("swap") / hours,
+        "records": len(durations),
+        "per_stay": len(durations) / len(room_ids),
+        "short": sum(1 for d in durations if d < slice_ticks),
+        "wait_min": waiting * TIME_SCALE / 60 / requests if requests else 0.0,
+        "reached": events_of("standby"),
+        "tick_ms": elapsed * 1000 / ticks,
+    }
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 8
+    from bench_power_budget import generate_workload
+    from config import MAX_SERVICE_NUM, TIME_SCALE, WAIT_TIME_SLICE
+
+    ticks = int(hours * 3600 / TIME_SCALE)
+    old_name = setup_test_db()
+    try:
+        room_ids = create_rooms(rooms)
+        rng = random.Random(SEED)
+        temps, events = generate_workload(room_ids, hours, rng)
+        events = add_bursts(room_ids, hours, events, rng)
+        rows = [
+            (label, simulate(quantum, hysteresis, room_ids, temps, events, ticks))
+            for label, quantum, hysteresis in CONFIGS
+        ]
+    finally:
+        teardown_test_db(old_name)
+
+    print(
+        f"\n最小服务时长与轮转滞后（{rooms} 间房，模拟 {hours:g} 小时 / {ticks} 次主循环，"
+        f"同时服务上限 {MAX_SERVICE_NUM}，时间片 {WAIT_TIME_SLICE}，种子 {SEED}）"
+    )
+    print("-" * 120)
+    print(
+        f"{'配置':<18}{'抢占(次/时)':>12}{'轮转(次/时)':>12}{'详单数':>10}{'详单/入住':>10}"
+        f"{'短详单':>10}{'平均等待(分)':>14}{'达标次数':>10}{'主循环(ms)':>12}"
+    )
+    for label, row in rows:
+        print(
+            f"{label:<18}{row['preempts']:>12.1f}{row['swaps']:>12.1f}{row['records']:>10}"
+            f"{row['per_stay']:>10.1f}{row['short']:>10}{row['wait_min']:>14.2f}"
+            f"{row['reached']:>10.0f}{row['tick_ms']:>12.3f}"
+        )
+    print("短详单：服务不足一个等待时间片就结束的详单（被抢占、轮转换出、调风速或达到目标温度）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+详单批量写入基准
+
+SQLite 自动提交时每条写语句各提交一次（一次 fsync）。本基准在数据库文件（不是内存库）上用虚拟时钟运行真实的
+ACScheduler，请求序列与 bench_quantum.py 相同（随机轨迹叠加成批的调高风速请求，换入换出频繁），
+比较逐条写入详单（DETAIL_RECORD_BATCH = False）与每次主循环一个事务批量写入：
+- 提交次数：有写入的主循环平均 / 最多提交几次（每次提交对应一次 fsync）
+- 详单相关的 SQL 语句数
+- 有写入的主循环平均耗时（毫秒，真实时间，含 fsync）
+
+运行：python tests/bench_record_batching.py [房间数，默认 12] [模拟小时数，默认 2]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, virtual_clock
+
+from django.db import connection
+
+SEED = 42
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+class CommitCounter:
+    """统计提交次数：自动提交模式下的每条写语句，以及事务的提交"""
+
+    def __init__(self):
+        self.commits = 0
+        self.record_statements = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip().upper()
+        if statement.startswith(WRITES) and not connection.in_atomic_block:
+            self.commits += 1
+        if "AC_DETAIL_RECORD" in statement:
+            self.record_statements += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        commit = connection.commit
+
+        def counting_commit():
+            self.commits += 1
+            return commit()
+
+        connection.commit = counting_commit
+        return connection.execute_wrapper(self)
+
+    @staticmethod
+    def uninstall():
+        del connection.commit  # 恢复类上的 commit
+
+
+def simulate(batch: bool, room_ids, temps, events, ticks: int) -> dict:
+    from ac_system import scheduler as scheduler_module
+    from ac_system.models import ACDetailRecord
+    from ac_system.scheduler import ACScheduler
+
+    saved = scheduler_module.DETAIL_RECORD_BATCH
+    scheduler_module.DETAIL_RECORD_BATCH = batch
+    ACDetailRecord.objects.all().delete()
+    counter = CommitCounter()
+    per_tick = []
+    try:
+        with virtual_clock() as clock:
+            ACScheduler._instance = None  # 每种方式使用新的调度器
+            scheduler = ACScheduler()
+            scheduler.init_rooms(room_ids)
+            for room_id, temp in temps.items():
+                scheduler.set_room_temperature(room_id, temp, "cooling")
+
+            with counter.install():
+                try:
+                    for tick in range(ticks):
+                        for room_id, request in events.get(tick, ()):
+                            scheduler.submit_request(room_id, request)
+                        before = counter.record_statements, counter.commits
+                        started = time.perf_counter()
+                        scheduler._tick()
+                        elapsed = time.perf_counter() - started
+                        if counter.record_statements > before[0]:
+                            per_tick.append((counter.commits - before[1], elapsed))
+                        clock.advance(1)
+                finally:
+                    counter.uninstall()
+    finally:
+        scheduler_module.DETAIL_RECORD_BATCH = saved
+
+    commits = [c for c, _ in per_tick]
+    return {
+        "ticks": len(per_tick),
+        "records": ACDetailRecord.objects.count(),
+        "statements": counter.record_statements,
+        "mean_commits": sum(commits) / len(commits) if commits else 0.0,
+        "max_commits": max(commits, default=0),
+        "tick_ms": sum(e for _, e in per_tick) * 1000 / len(per_tick) if per_tick else 0.0,
+    }
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    from bench_power_budget import generate_workload
+    from bench_quantum import add_bursts
+    from config import TIME_SCALE
+
+    ticks = int(hours * 3600 / TIME_SCALE)
+    path = os.path.join(tempfile.mkdtemp(), "bench_records.db")
+    old_name = setup_test_db(path)
+    try:
+        room_ids = create_rooms(rooms)
+        rng = random.Random(SEED)
+        temps, events = generate_workload(room_ids, hours, rng)
+        events = add_bursts(room_ids, hours, events, rng)
+        rows = [
+            ("逐条自动提交", simulate(False, room_ids, temps, events, ticks)),
+            ("每次主循环一个事务", simulate(True, room_ids, temps, events, ticks)),
+        ]
+    finally:
+        teardown_test_db(old_name)
+
+    print(f"\n详单批量写入（{rooms} 间房，模拟 {hours:g} 小时 / {ticks} 次主循环，数据库文件 {path}）")
+    print("-" * 104)
+    print(
+        f"{'方式':<20}{'有写入的主循环':>14}{'详单数':>10}{'详单SQL数':>12}"
+        f"{'平均提交(次/轮)':>16}{'最多提交(次/轮)':>16}{'主循环(ms)':>12}"
+    )
+    for label, row in rows:
+        print(
+            f"{label:<20}{row['ticks']:>14}{row['records']:>10}{row['statements']:>12}"
+            f"{row['mean_commits']:>16.2f}{row['max_commits']:>16}{row['tick_ms']:>12.3f}"
+        )
+    print("只统计有详单写入的主循环；SQLite 每次提交一次 fsync")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+JSON 渲染基准测试
+
+构造 1000 个房间的监控数据（与 /api/ac/monitor/ 相同结构，含 float / Decimal / datetime），
+对比 DRF JSONRenderer、FastJSONRenderer（orjson）和纯 Python 回退实现的渲染耗时与字节数
+
+运行：python tests/bench_render.py [房间数，默认 1000]
+"""
+
+import gzip
+import json
+import sys
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import bench_env  # noqa: F401  初始化 Django
+
+from rest_framework.renderers import JSONRenderer
+
+from ac_system import renderers
+from ac_system.renderers import FastJSONRenderer
+
+ROUNDS = 50
+
+
+def build_payload(count: int) -> dict:
+    statuses = ["on", "waiting", "standby", "off"]
+    speeds = ["low", "medium", "high"]
+    now = datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=dt_timezone.utc)
+    data = []
+    for i in range(count):
+        data.append(
+            {
+                "room_id": f"{3 + i // 99}{i % 99 + 1:02d}",
+                "is_on": i % 4 != 3,
+                "status": statuses[i % 4],
+                "current_temp": round(22 + (i % 70) / 10, 1),
+                "target_temp": 22.0,
+                "fan_speed": speeds[i % 3],
+                "mode": "cooling",
+                "energy_consumed": round(i * 0.37, 2),
+                "cost": Decimal(f"{i * 0.37:.2f}"),
+                "service_duration": i * 6.0,
+                "updated_at": now,
+            }
+        )
+    return {"code": 200, "data": data, "message": "success"}
+
+
+def bench(label, render, payload, results):
+    render(payload)  # 预热
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = render(payload)
+    elapsed = (time.perf_counter() - started) * 1000 / ROUNDS
+    results[label] = {
+        "ms": round(elapsed, 3),
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=5)),
+        "body": body,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    payload = build_payload(count)
+    results = {}
+
+    drf = JSONRenderer()
+    fast = FastJSONRenderer()
+    bench("DRF JSONRenderer", lambda d: drf.render(d), payload, results)
+    if renderers.orjson is not None:
+        bench("FastJSONRenderer (orjson)", lambda d: fast.render(d), payload, results)
+
+    # 纯 Python 回退实现
+    bench("FastJSONRenderer (回退)", renderers.stdlib_dumps, payload, results)
+
+    baseline = results["DRF JSONRenderer"]
+    print(f"\n{count} 个房间监控数据渲染（{ROUNDS} 次平均）")
+    print("-" * 78)
+    print(f"{'渲染器':<28}{'耗时(ms)':>12}{'字节数':>12}{'gzip字节':>12}{'加速比':>10}{'一致':>6}")
+    for label, row in results.items():
+        same = json.loads(row["body"]) == json.loads(baseline["body"])
+        print(
+            f"{label:<28}{row['ms']:>12}{row['bytes']:>12}{row['gzip_bytes']:>12}"
+            f"{baseline['ms'] / max(row['ms'], 1e-6):>9.1f}x{'是' if same else '否':>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+房间记录内存基准测试（tracemalloc）
+
+对比原实现（房间状态字典 + 每次入队新建的 ServiceObject / WaitingObject）
+与 __slots__ 房间记录 RoomRecord：
+- 每个房间占用的内存（全部关机 / 全部在服务或等待队列中）
+- 每次时间片轮转（一个服务房间与一个等待房间交换）新分配的内存
+
+原实现的类按改造前的代码复制在本文件中，仅用于对比
+
+运行：python tests/bench_room_records.py [房间数，默认 10000]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+
+import bench_env  # noqa: F401  初始化 Django
+
+from ac_system.scheduler import RoomRecord
+from config import DEFAULT_TEMP, INITIAL_ROOM_TEMP, WAIT_TIME_SLICE
+
+
+# ==================== 原实现（对比用） ====================
+
+
+class LegacyServiceObject:
+    def __init__(self, room_id, target_temp, fan_speed, mode):
+        self.room_id = room_id
+        self.target_temp = target_temp
+        self.fan_speed = fan_speed
+        self.mode = mode
+        self.service_start_time = datetime.now()
+        self.service_duration = 0
+        self.current_temp = INITIAL_ROOM_TEMP
+        self.energy_consumed = 0.0
+        self.cost = Decimal("0.00")
+        self.record_id = None
+
+
+class LegacyWaitingObject:
+    def __init__(self, room_id, target_temp, fan_speed, mode):
+        self.room_id = room_id
+        self.target_temp = target_temp
+        self.fan_speed = fan_speed
+        self.mode = mode
+        self.wait_start_time = datetime.now()
+        self.wait_duration = WAIT_TIME_SLICE
+        self.current_temp = INITIAL_ROOM_TEMP
+        self.waited_full_slice = False
+        self.energy_consumed = 0.0
+        self.cost = Decimal("0.00")
+        self.record_id = None
+
+
+def legacy_room_state():
+    return {
+        "current_temp": INITIAL_ROOM_TEMP,
+        "initial_temp": INITIAL_ROOM_TEMP,
+        "target_temp": DEFAULT_TEMP,
+        "is_on": False,
+        "status": "off",
+        "fan_speed": "medium",
+        "mode": "cooling",
+        "energy_consumed": 0,
+        "cost": 0,
+    }
+
+
+def legacy_build(room_ids, active):
+    room_states = {room_id: legacy_room_state() for room_id in room_ids}
+    service_queue, wait_queue = {}, {}
+    if active:
+        for i, room_id in enumerate(room_ids):
+            cls, queue = (
+                (LegacyServiceObject, service_queue)
+                if i % 2
+                else (LegacyWaitingObject, wait_queue)
+            )
+            obj = cls(room_id, 22, "medium", "cooling")
+            obj.record_start_cost = obj.cost  # 原实现在创建详单时动态添加
+            obj.record_start_energy = obj.energy_consumed
+            queue[room_id] = obj
+    return room_states, service_queue, wait_queue
+
+
+def legacy_swap(service_queue, wait_queue, victim_id, waiter_id, graveyard):
+    """原 _move_to_wait_queue + _check_wait_queue：两个房间各新建一个对象"""
+    victim = service_queue.pop(victim_id)
+    wobj = wait_queue.pop(waiter_id)
+    graveyard.append((victim, wobj))
+
+    wait_obj = LegacyWaitingObject(
+        victim_id, victim.target_temp, victim.fan_speed, victim.mode
+    )
+    wait_obj.current_temp = victim.current_temp
+    wait_obj.energy_consumed = victim.energy_consumed
+    wait_obj.cost = victim.cost
+    wait_queue[victim_id] = wait_obj
+
+    service_obj = LegacyServiceObject(
+        waiter_id, wobj.target_temp, wobj.fan_speed, wobj.mode
+    )
+    service_obj.current_temp = wobj.current_temp
+    service_obj.energy_consumed = wobj.energy_consumed
+    service_obj.cost = wobj.cost
+    service_obj.record_start_cost = service_obj.cost
+    service_obj.record_start_energy = service_obj.energy_consumed
+    service_queue[waiter_id] = service_obj
+
+
+# ==================== 新实现 ====================
+
+
+def record_build(room_ids, active):
+    room_states = {room_id: RoomRecord(room_id) for room_id in room_ids}
+    service_queue, wait_queue = {}, {}
+    if active:
+        for i, room_id in enumerate(room_ids):
+            record = room_states[room_id]
+            if i % 2:
+                record.start_service()
+                service_queue[room_id] = record
+            else:
+                record.start_waiting()
+                wait_queue[room_id] = record
+    return room_states, service_queue, wait_queue
+
+
+def record_swap(service_queue, wait_queue, victim_id, waiter_id, graveyard):
+    """同一房间记录在两个队列之间移动，只重置计时字段"""
+    victim = service_queue.pop(victim_id)
+    waiter = wait_queue.pop(waiter_id)
+    graveyard.append((victim.wait_start_time, waiter.service_start_time))
+
+    victim.start_waiting()
+    wait_queue[victim_id] = victim
+
+    waiter.start_service()
+    waiter.record_start_cost = waiter.cost
+    waiter.record_start_energy = waiter.energy_consumed
+    service_queue[waiter_id] = waiter
+
+
+# ==================== 测量 ====================
+
+
+def measure_build(build, room_ids, active):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    state = build(room_ids, active)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del state
+    return size / len(room_ids)
+
+
+def measure_swaps(build, swap, room_ids):
+    """
+    每次交换新分配的字节数和内存块数
+
+    被替换的旧对象 / 旧值保存在 graveyard 中不释放，
+    因此前后快照之差即为交换过程中的全部分配
+    """
+    _, service_queue, wait_queue = build(room_ids, True)
+    pairs = list(zip(list(service_queue), list(wait_queue)))
+    graveyard = []
+
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    graveyard_base = sys.getsizeof(graveyard)
+    started = time.perf_counter()
+    for victim_id, waiter_id in pairs:
+        swap(service_queue, wait_queue, victim_id, waiter_id, graveyard)
+    elapsed = time.perf_counter() - started
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    gc.enable()
+
+    stats = after.compare_to(before, "filename")
+    # 扣除 graveyard 列表本身及其中元组的开销
+    overhead = (sys.getsizeof(graveyard) - graveyard_base) + sum(
+        sys.getsizeof(item) for item in graveyard
+    )
+    size = sum(stat.size_diff for stat in stats) - overhead
+    blocks = sum(stat.count_diff for stat in stats) - len(graveyard)
+    count = len(pairs)
+    return size / count, blocks / count, elapsed * 1e6 / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    room_ids = [f"{1 + i // 100}{i % 100:02d}" for i in range(count)]
+
+    rows = []
+    for label, build, swap in (
+        ("原实现（字典 + 服务/等待对象）", legacy_build, legacy_swap),
+        ("RoomRecord（__slots__）", record_build, record_swap),
+    ):
+        idle = measure_build(build, room_ids, active=False)
+        active = measure_build(build, room_ids, active=True)
+        swap_bytes, swap_blocks, swap_us = measure_swaps(build, swap, room_ids)
+        rows.append((label, idle, active, swap_bytes, swap_blocks, swap_us))
+
+    print(f"\n房间记录内存基准（{count} 个房间）")
+    print("-" * 96)
+    print(
+        f"{'实现':<28}{'关机字节/房间':>14}{'运行字节/房间':>14}"
+        f"{'字节/次交换':>12}{'内存块/次交换':>14}{'耗时us/次':>12}"
+    )
+    for label, idle, active, swap_bytes, swap_blocks, swap_us in rows:
+        print(
+            f"{label:<28}{idle:>14.0f}{active:>14.0f}"
+            f"{swap_bytes:>12.0f}{swap_blocks:>14.1f}{swap_us:>12.2f}"
+        )
+    old, new = rows
+    print(
+        f"运行时内存 {old[2] / new[2]:.1f}x，每次交换分配 {old[3]:.0f} -> {new[3]:.0f} 字节"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+调度器分片基准测试
+
+所有房间低风速开机制冷，分别用 1 / 2 / 4 个调度进程（一致性哈希分片）同时执行主循环，
+测量每秒处理的房间·主循环数（吞吐量）以及相对单进程的加速比。
+各调度进程的主循环互不依赖，在多核机器上吞吐量应随进程数近似线性增长；
+进程数超过 CPU 核数后墙钟吞吐不再随核数增长（输出中给出本机核数），
+此时参考“多核预估”：按最慢进程的 CPU 耗时估算每个进程独占一个核时的吞吐
+
+另外测量路由开销：合并全部分片快照（get_all_states）和单个房间状态读取的耗时
+
+运行：python tests/bench_shards.py [房间数，默认 3000]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms
+
+TICKS = 50
+SHARDS = (1, 2, 4)
+READS = 200
+
+
+def run(shards: int, room_ids):
+    from ac_system.sharding import ShardedScheduler
+
+    router = ShardedScheduler(shards, autostart=False)
+    router.start()
+    try:
+        router.init_rooms(room_ids)
+        router.submit_batch(
+            [
+                (
+                    room_id,
+                    {"action": "power_on", "target_temp": 16, "fan_speed": "low", "mode": "cooling"},
+                )
+                for room_id in room_ids
+            ]
+        )
+        per_shard = {}
+        for room_id, shard_id in router.owners.items():
+            per_shard[shard_id] = per_shard.get(shard_id, 0) + 1
+
+        started = time.perf_counter()
+        timings = router._call_all("run_ticks", TICKS)
+        wall = time.perf_counter() - started
+        cpu = [cpu for _, cpu in timings.values()]
+
+        router.get_all_states()  # 预热合并快照
+        started = time.perf_counter()
+        router._merged = None
+        states = router.get_all_states()
+        merge_ms = (time.perf_counter() - started) * 1000
+        assert len(states) == len(room_ids)
+
+        started = time.perf_counter()
+        for room_id in room_ids[:READS]:
+            router.get_room_state(room_id)
+        read_us = (time.perf_counter() - started) * 1e6 / READS
+
+        return {
+            "throughput": len(room_ids) * TICKS / wall,
+            "projected": len(room_ids) * TICKS / max(cpu),
+            "tick_ms": wall * 1000 / TICKS,
+            "cpu_ms": sum(cpu) * 1000 / TICKS,
+            "balance": f"{min(per_shard.values())}-{max(per_shard.values())}",
+            "merge_ms": merge_ms,
+            "read_us": read_us,
+        }
+    finally:
+        router.stop()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_shards.db")
+    old_name = setup_test_db(db_path)
+    try:
+        from ac_system.models import ServicePool
+
+        room_ids = create_rooms(count)
+        # 每个调度进程的默认服务池都能容纳全部房间，所有房间都在服务队列中
+        ServicePool.objects.create(name="default", capacity=count)
+
+        rows = [(shards, run(shards, room_ids)) for shards in SHARDS]
+    finally:
+        teardown_test_db(old_name)
+
+    print(f"\n调度器分片基准（{count} 间房全部服务中，{TICKS} 次主循环，本机 CPU 核数 {os.cpu_count()}）")
+    print("-" * 112)
+    print(
+        f"{'进程数':>6}{'房间/进程':>12}{'主循环(ms)':>12}{'CPU合计(ms)':>12}"
+        f"{'吞吐(房间·次/s)':>16}{'加速比':>8}{'多核预估':>10}{'加速比':>8}"
+        f"{'合并快照(ms)':>14}{'单房间读取(us)':>14}"
+    )
+    base = rows[0][1]
+    for shards, row in rows:
+        print(
+            f"{shards:>6}{row['balance']:>12}{row['tick_ms']:>12.2f}{row['cpu_ms']:>12.2f}"
+            f"{row['throughput']:>16.0f}{row['throughput'] / base['throughput']:>8.2f}"
+            f"{row['projected']:>10.0f}{row['projected'] / base['projected']:>8.2f}"
+            f"{row['merge_ms']:>14.2f}{row['read_us']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+共享内存房间状态表基准测试
+
+1. 单房间状态读取耗时（分片模式，1 个调度进程）：
+   经管道转发给调度进程 / 直接读取调度进程的共享内存状态表 / 单进程调度器读取本进程快照（对照）
+2. seqlock 并发读写：写入进程不停改写各行（一行内所有数值字段写同一个值），
+   主进程同时读取，统计读到不一致行（撕裂）的次数、重试失败次数，
+   以及有无读取方时写入方的速度（写入方不应被读取方阻塞）
+
+运行：python tests/bench_state_table.py [房间数，默认 1000]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms
+
+READS = 2000
+STRESS_SECONDS = 2.0
+
+
+def measure_reads(room_ids):
+    from ac_system.scheduler import ACScheduler
+    from ac_system.sharding import ShardedScheduler
+
+    router = ShardedScheduler(1, autostart=False)
+    router.start()
+    try:
+        router.init_rooms(room_ids)
+        router.submit_batch(
+            [
+                (room_id, {"action": "power_on", "target_temp": 22, "fan_speed": "low", "mode": "cooling"})
+                for room_id in room_ids
+            ]
+        )
+        sample = [room_ids[i % len(room_ids)] for i in range(READS)]
+        results = {}
+
+        started = time.perf_counter()
+        for room_id in sample:
+            router._call(room_id, "requested_state", room_id)
+        results["管道转发给调度进程"] = (time.perf_counter() - started) * 1e6 / READS
+
+        router.requested_state(sample[0])  # 映射状态表
+        started = time.perf_counter()
+        for room_id in sample:
+            router.requested_state(room_id)
+        results["读取共享内存状态表"] = (time.perf_counter() - started) * 1e6 / READS
+
+        local = ACScheduler()
+        local.init_rooms(room_ids)
+        started = time.perf_counter()
+        for room_id in sample:
+            local.requested_state(room_id)
+        results["单进程：读取本进程快照"] = (time.perf_counter() - started) * 1e6 / READS
+        return results
+    finally:
+        router.stop()
+
+
+def _stress_writer(name, rooms, seconds, done, finished):
+    """写入进程：每行的温度、费用等数值字段和版本号写同一个递增值"""
+    from ac_system.state_table import StateTable
+
+    table = StateTable.create(name, rooms)
+    room_ids = [f"r{i:05d}" for i in range(rooms)]
+    for room_id in room_ids:
+        table.write((room_id, True, "on", 0.0, 0.0, "low", "cooling", 0.0, 0.0, 0.0, None, None, None, None), 0)
+    done.put("ready")
+    writes, value = 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        value += 1
+        for room_id in room_ids:
+            v = float(value)
+            table.write((room_id, True, "on", v, v, "low", "cooling", v, v, v, None, None, None, None), value)
+        writes += len(room_ids)
+    done.put(writes / seconds)
+    finished.wait()  # 等待读取方结束后再删除
+    table.close()
+
+
+def stress(rooms, with_reader):
+    from ac_system.state_table import StateTable
+
+    name = f"bench_state_table_{os.getpid()}"
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    finished = context.Event()
+    writer = context.Process(
+        target=_stress_writer, args=(name, rooms, STRESS_SECONDS, queue, finished)
+    )
+    writer.start()
+    queue.get()
+    reads = torn = missed = 0
+    if with_reader:
+        table = StateTable.attach(name, untrack=False)
+        room_ids = [f"r{i:05d}" for i in range(rooms)]
+        deadline = time.perf_counter() + STRESS_SECONDS
+        i = 0
+        while time.perf_counter() < deadline:
+            row = table.read(room_ids[i % rooms])
+            i += 1
+            reads += 1
+            if row is None:
+                missed += 1
+                continue
+            f = row.fields
+            if not (f[3] == f[4] == f[7] == f[8] == f[9] == row.version):
+                torn += 1
+        table.close()
+    write_rate = queue.get()
+    finished.set()
+    writer.join()
+    return write_rate, reads / STRESS_SECONDS, torn, missed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_state_table.db")
+    old_name = setup_test_db(db_path)
+    try:
+        reads = measure_reads(create_rooms(count))
+    finally:
+        teardown_test_db(old_name)
+
+    print(f"\n单房间状态读取（{count} 间房，{READS} 次平均，本机 CPU 核数 {os.cpu_count()}）")
+    print("-" * 60)
+    print(f"{'方式':<30}{'耗时(us/次)':>16}")
+    for label, us in reads.items():
+        print(f"{label:<30}{us:>16.2f}")
+
+    print(f"\nseqlock 并发读写（{count} 行，{STRESS_SECONDS:.0f} 秒）")
+    print("-" * 80)
+    print(f"{'场景':<16}{'写入(行/s)':>14}{'读取(次/s)':>14}{'撕裂行':>10}{'重试失败':>10}")
+    for label, with_reader in (("只有写入方", False), ("同时读取", True)):
+        write_rate, read_rate, torn, missed = stress(count, with_reader)
+        print(f"{label:<16}{write_rate:>14.0f}{read_rate:>14.0f}{torn:>10}{missed:>10}")
+
+
+if __name__ == "__main__":
+    main()
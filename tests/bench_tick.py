@@ -0,0 +1,63 @@
+"""
+调度主循环耗时基准测试
+
+酒店中只有少数房间开着空调、其余房间关机（其中一半仍在回温）时，
+测量不同房间总数下单次主循环（_tick）的耗时，以及全量发布快照的耗时作为对照。
+关机 / 待机房间的回温在读取时计算，主循环耗时应只与活跃房间数相关
+
+运行：python tests/bench_tick.py [活跃房间数，默认 3]
+"""
+
+import sys
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms
+
+TICKS = 50
+SIZES = (100, 1000, 10000, 50000)
+
+
+def main():
+    active = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    old_name = setup_test_db()
+    try:
+        from ac_system.scheduler import scheduler
+
+        active_rooms = create_rooms(active)
+        scheduler.init_rooms(active_rooms)
+        for room_id in active_rooms:
+            scheduler.service_manager.room_states[room_id]["initial_temp"] = 32
+            scheduler.submit_request(
+                room_id,
+                {"action": "power_on", "target_temp": 16, "fan_speed": "low", "mode": "cooling"},
+            )
+
+        print(f"\n调度主循环耗时（活跃房间 {active} 间，{TICKS} 次平均）")
+        print("-" * 60)
+        print(f"{'房间总数':>10}{'主循环(ms)':>16}{'全量发布快照(ms)':>22}")
+        created = 0
+        for size in SIZES:
+            new_rooms = [f"off{i:06d}" for i in range(created, size)]
+            scheduler.init_rooms(new_rooms)
+            for i, room_id in enumerate(new_rooms):
+                if i % 2:
+                    scheduler.service_manager.room_states[room_id]["current_temp"] = 24
+            created = size
+            scheduler.publish()
+
+            started = time.perf_counter()
+            for _ in range(TICKS):
+                scheduler._tick()
+            tick_ms = (time.perf_counter() - started) * 1000 / TICKS
+
+            started = time.perf_counter()
+            scheduler.publish()
+            publish_ms = (time.perf_counter() - started) * 1000
+
+            print(f"{size:>10}{tick_ms:>16.3f}{publish_ms:>22.3f}")
+    finally:
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
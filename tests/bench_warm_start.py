@@ -0,0 +1,119 @@
+"""
+热启动基准测试
+
+模拟调度器进程重启：数据库中有入住中的订单、每个房间的 ACState 和重启前未结束的详单，
+测量 ACScheduler.warm_start() 读取数据（三次批量查询）和重建房间状态、队列的耗时与 SQL 数，
+并校验重启前服务中的房间按优先级重新准入、待机房间重新计算重启时刻
+
+运行：python tests/bench_warm_start.py [房间数，默认 2000] [同时服务上限，默认 100]
+"""
+
+import random
+import sys
+from datetime import timedelta
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, measure, print_table
+
+SEED = 42
+
+
+def create_state(room_ids, rng):
+    """入住订单、ACState 和未结束的详单：约 40% 关机、30% 待机、30% 服务中（有未结束的详单）"""
+    from django.utils import timezone
+
+    from ac_system.models import ACDetailRecord, ACState, AccommodationOrder, Customer
+
+    customers = Customer.objects.bulk_create(
+        Customer(name=f"顾客{i}", id_card=f"{i:018d}", phone=f"138{i:08d}")
+        for i in range(len(room_ids))
+    )
+    orders = AccommodationOrder.objects.bulk_create(
+        AccommodationOrder(customer=customer, room_id=room_id, status="active", room_fee=100)
+        for customer, room_id in zip(customers, room_ids)
+    )
+    now = timezone.now()
+    states, records = [], []
+    for order in orders:
+        kind = rng.random()
+        status = "off" if kind < 0.4 else "standby" if kind < 0.7 else "on"
+        fan_speed = rng.choice(("low", "medium", "high"))
+        states.append(
+            ACState(
+                room_id=order.room_id,
+                is_on=status != "off",
+                status=status,
+                current_temp=round(rng.uniform(22, 30), 1),
+                target_temp=rng.choice((22, 23, 24, 25)),
+                fan_speed=fan_speed,
+                total_cost=round(rng.uniform(0, 50), 2),
+                total_energy=round(rng.uniform(0, 50), 2),
+            )
+        )
+        if status == "on":
+            records.append(
+                ACDetailRecord(
+                    room_id=order.room_id,
+                    order=order,
+                    start_time=now - timedelta(seconds=rng.uniform(10, 600)),
+                    start_temp=round(rng.uniform(22, 30), 1),
+                    target_temp=24,
+                    fan_speed=fan_speed,
+                    mode="cooling",
+                )
+            )
+    ACState.objects.bulk_create(states)
+    ACDetailRecord.objects.bulk_create(records)
+    return len(records)
+
+
+def main():
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    old_name = setup_test_db()
+    try:
+        from ac_system.models import ACDetailRecord
+        from ac_system.scheduler import ACScheduler, load_warm_start_data
+        from config import DEFAULT_SERVICE_POOL
+
+        room_ids = create_rooms(rooms)
+        open_records = create_state(room_ids, random.Random(SEED))
+
+        ACScheduler._instance = None  # 模拟重启后的新调度器
+        scheduler = ACScheduler()
+        pool = scheduler.pools[DEFAULT_SERVICE_POOL]
+        pool.capacity = capacity
+
+        results = {}
+        with measure("读取数据（三次批量查询）", results):
+            data = load_warm_start_data()
+        with measure("重建房间状态和队列", results):
+            restored = scheduler.warm_start(data)
+        total = results["读取数据（三次批量查询）"]["ms"] + results["重建房间状态和队列"]["ms"]
+
+        # 校验：服务队列已满，服务中房间的优先级不低于任何等待中的房间
+        served = pool.service_queue.values()
+        lowest = min((r.get_priority() for r in served), default=0)
+        highest_waiting = max((r.get_priority() for r in pool.wait_queue.values()), default=0)
+        # 未结束的详单恰好是房间记录正在使用的详单（其余已结束）
+        still_open = set(
+            ACDetailRecord.objects.filter(end_time__isnull=True).values_list("record_id", flat=True)
+        )
+        in_use = {r.record_id for r in scheduler.service_manager.room_states.values() if r.record_id}
+        assert restored == rooms
+        assert len(pool.service_queue) == min(capacity, open_records)
+        assert lowest >= highest_waiting
+        assert still_open == in_use
+    finally:
+        teardown_test_db(old_name)
+
+    print_table(f"热启动（{rooms} 间房，同时服务上限 {capacity}）", results)
+    print(f"合计 {total:.1f} ms")
+    print(
+        f"恢复 {restored} 间房：重启前服务中 {open_records} 间 -> 服务中 {len(pool.service_queue)}、"
+        f"等待中 {len(pool.wait_queue)}；待机重启时刻 {len(scheduler.service_manager._restart_at)} 个；"
+        f"未结束详单 {len(still_open)} 条"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+团体退房事务测试
+
+- 账单写入中途失败：数据库回滚（订单仍在入住中、没有账单、详单未结束），
+  调度器中的房间也保持不变（仍在服务、仍关联原详单）
+- 成功时：账单中的空调费等于退房后各房间详单费用之和，房间移出调度器
+"""
+
+from decimal import Decimal
+from unittest import mock
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, virtual_clock
+
+from django.db.models import Sum
+
+from ac_system import services
+from ac_system.models import ACBill, ACDetailRecord, AccommodationBill, AccommodationOrder
+from ac_system.services import CheckInService, CheckOutService
+
+POWER_ON = {"action": "power_on", "target_temp": 18, "fan_speed": "high", "mode": "cooling"}
+
+
+def test_checkout_group_is_all_or_nothing():
+    from ac_system.scheduler import ACScheduler
+
+    old_name = setup_test_db()
+    saved = ACScheduler._instance
+    try:
+        with virtual_clock() as clock:
+            ACScheduler._instance = None  # 不使用全局调度器
+            scheduler = ACScheduler()
+            with mock.patch.object(services, "scheduler", scheduler):
+                room_ids = create_rooms(3)
+                succeeded, failed = CheckInService.create_group_orders(
+                    [
+                        {"name": f"顾客{i}", "phone": f"138{i:08d}", "id_card": f"{i:018d}", "room_id": room_id}
+                        for i, room_id in enumerate(room_ids)
+                    ]
+                )
+                assert len(succeeded) == 3 and not failed, failed
+                for room_id in room_ids:
+                    scheduler._power_on(room_id, POWER_ON)
+                for _ in range(30):
+                    scheduler._tick()
+                    clock.advance(1)
+                manager = scheduler.service_manager
+                before = {
+                    room_id: (manager.get_record(room_id).status, manager.get_record(room_id).record_id)
+                    for room_id in room_ids
+                }
+                assert all(status in ("on", "waiting") for status, _ in before.values())
+
+                # 总账单写入失败：数据库和调度器都不变
+                with mock.patch.object(
+                    AccommodationBill.objects, "bulk_create", side_effect=RuntimeError("disk full")
+                ):
+                    try:
+                        CheckOutService.checkout_group(room_ids)
+                    except RuntimeError:
+                        pass
+                    else:
+                        raise AssertionError("checkout_group should fail")
+                assert AccommodationOrder.objects.filter(room_id__in=room_ids, status="active").count() == 3
+                assert not ACBill.objects.exists() and not AccommodationBill.objects.exists()
+                assert ACDetailRecord.objects.filter(end_time__isnull=True).count() == 3
+                assert {
+                    room_id: (manager.get_record(room_id).status, manager.get_record(room_id).record_id)
+                    for room_id in room_ids
+                } == before
+
+                # 成功：空调费与退房后详单费用一致，房间移出调度器
+                succeeded, failed = CheckOutService.checkout_group(room_ids)
+                assert len(succeeded) == 3 and not failed
+                assert not ACDetailRecord.objects.filter(end_time__isnull=True).exists()
+                for order in AccommodationOrder.objects.filter(room_id__in=room_ids):
+                    assert order.status == "completed"
+                    billed = AccommodationBill.objects.get(order=order).ac_fee
+                    recorded = ACDetailRecord.objects.filter(order=order).aggregate(total=Sum("cost"))["total"]
+                    assert billed == recorded and billed > Decimal("0")
+                assert not any(room_id in manager.room_states for room_id in room_ids)
+    finally:
+        ACScheduler._instance = saved
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    test_checkout_group_is_all_or_nothing()
+    print("Test finished.")
@@ -0,0 +1,112 @@
+"""
+调度器并发测试
+
+主循环与多个接口请求线程（开关机、退房、入住、监控读取）同时修改队列和发布快照，
+不应出现 "dictionary changed size during iteration" 等异常，发布的快照中房间状态与队列一致
+
+在独立的测试数据库文件上运行（多个线程访问），不影响 hotel.db
+"""
+
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms
+
+from django.db import connection
+
+DURATION = 2.0
+
+
+class ErrorCollector(logging.Handler):
+    """收集调度器记录的错误日志（部分异常在调度器内部被捕获后只记录日志）"""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errors = []
+
+    def emit(self, record):
+        self.errors.append(record.getMessage())
+
+
+def test_concurrent_requests_and_ticks():
+    from ac_system.scheduler import ACScheduler, logger
+
+    old_name = setup_test_db(os.path.join(tempfile.mkdtemp(), "test_concurrency.db"))
+    collector = ErrorCollector()
+    logger.addHandler(collector)
+    errors = []
+    stop = threading.Event()
+    saved = ACScheduler._instance
+    try:
+        ACScheduler._instance = None  # 不使用全局调度器
+        scheduler = ACScheduler()
+        room_ids = create_rooms(40)
+        scheduler.init_rooms(room_ids)
+
+        def tick():
+            while not stop.is_set():
+                try:
+                    scheduler._tick()
+                except Exception as e:
+                    errors.append(repr(e))
+
+        def requests(seed):
+            rng = random.Random(seed)
+            try:
+                while not stop.is_set():
+                    room_id = rng.choice(room_ids)
+                    roll = rng.random()
+                    try:
+                        if roll < 0.4:
+                            fan_speed = rng.choice(["low", "medium", "high"])
+                            scheduler.submit_request(
+                                room_id,
+                                {"action": "power_on", "target_temp": 22, "fan_speed": fan_speed, "mode": "cooling"},
+                            )
+                        elif roll < 0.7:
+                            scheduler.submit_request(room_id, {"action": "power_off"})
+                        elif roll < 0.8:
+                            scheduler.checkout_room(room_id)
+                            scheduler.init_room(room_id)
+                        else:
+                            scheduler.get_all_states()
+                    except Exception as e:
+                        errors.append(repr(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=tick)]
+        threads += [threading.Thread(target=requests, args=(seed,)) for seed in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(DURATION)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        errors.extend(collector.errors)
+        print(f"Errors: {len(errors)} {errors[:3]}")
+        assert errors == []
+
+        # 最后一次发布的快照与队列一致
+        scheduler.publish()
+        for state in scheduler.get_all_states():
+            room_id = state["room_id"]
+            pool = scheduler.pool_of(room_id)
+            expected = "on" if room_id in pool.service_queue else "waiting" if room_id in pool.wait_queue else None
+            if expected is not None:
+                assert state["status"] == expected
+    finally:
+        stop.set()
+        logger.removeHandler(collector)
+        ACScheduler._instance = saved
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_and_ticks()
+    print("Test finished.")
@@ -0,0 +1,212 @@
+"""
+请求防抖与合并测试
+
+- Debouncer：间隔内的请求按 COALESCE_RULES 合并，截止时间顺延，到期后恰好处理一次；
+  超过间隔到达的请求立即处理，作废待处理的旧请求；待处理的关机不会被之后的调节请求丢弃
+- 调度器（虚拟时钟）：连续调风速只生效最后一次，连续调温窗口内响应反映最新目标温度，
+  窗口结束后只处理最后一次；关机后调风速仍关机，关机后再开机先关机再开机；
+  两个防抖队列中到期的请求按截止时间先后处理
+"""
+
+from unittest import mock
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, virtual_clock
+
+from ac_system.debounce import POWER_OFF_FIRST, Debouncer, coalesce
+
+POWER_ON = {"action": "power_on", "target_temp": 22, "fan_speed": "medium", "mode": "cooling"}
+
+
+def test_coalesce_rules():
+    # 开机请求尚未处理时调风速 / 调温：并入开机请求
+    merged = coalesce(POWER_ON, {"action": "change_speed", "fan_speed": "high"})
+    assert merged == {**POWER_ON, "fan_speed": "high"}
+    merged = coalesce(merged, {"action": "change_temp", "target_temp": 25})
+    assert merged == {**POWER_ON, "fan_speed": "high", "target_temp": 25}
+    # 关机请求尚未处理时调风速 / 调温：仍然关机
+    power_off = {"action": "power_off"}
+    assert coalesce(power_off, {"action": "change_speed", "fan_speed": "high"}) is power_off
+    assert coalesce(power_off, {"action": "change_temp", "target_temp": 25}) is power_off
+    # 关机请求尚未处理时开机：先关机再开机，之后的调节和再次开机保留这一要求
+    merged = coalesce(power_off, POWER_ON)
+    assert merged == {**POWER_ON, POWER_OFF_FIRST: True}
+    merged = coalesce(merged, {"action": "change_speed", "fan_speed": "low"})
+    assert merged == {**POWER_ON, "fan_speed": "low", POWER_OFF_FIRST: True}
+    assert coalesce(merged, {**POWER_ON, "target_temp": 20})[POWER_OFF_FIRST]
+    assert coalesce(POWER_ON, {**POWER_ON, "target_temp": 20}) == {**POWER_ON, "target_temp": 20}
+    # 其他组合：后到的请求覆盖
+    assert coalesce(merged, power_off) is power_off
+    change_speed = {"action": "change_speed", "fan_speed": "high"}
+    assert coalesce(change_speed, power_off) is power_off
+
+
+def test_debouncer_fires_once_after_last_request():
+    debouncer = Debouncer(interval=1.0, name="test_debounce")
+    assert not debouncer.submit("301", POWER_ON, now=0.0)  # 第一次请求立即处理
+    assert debouncer.submit("301", {"action": "power_off"}, now=0.2)
+    assert debouncer.submit("301", POWER_ON, now=0.4)
+    assert debouncer.submit("301", {"action": "change_speed", "fan_speed": "high"}, now=0.6)
+    assert len(debouncer) == 1
+    assert debouncer.next_deadline() == 1.6  # 最后一次请求 + 防抖间隔
+
+    assert debouncer.pop_due(now=1.5) == []
+    due = debouncer.pop_due(now=1.6)
+    assert due == [("301", {**POWER_ON, "fan_speed": "high", POWER_OFF_FIRST: True})]
+    assert debouncer.pop_due(now=10.0) == []  # 被合并的旧堆元素不会再次触发
+    assert debouncer.next_deadline() is None
+
+
+def test_debouncer_keeps_pending_power_off():
+    debouncer = Debouncer(interval=5.0, name="test_debounce")
+    assert not debouncer.submit("301", {"action": "change_speed", "fan_speed": "low"}, now=0.0)
+    assert debouncer.submit("301", {"action": "power_off"}, now=1.0)
+    assert debouncer.submit("301", {"action": "change_speed", "fan_speed": "high"}, now=2.0)
+    assert debouncer.pop_due(now=7.0) == [("301", {"action": "power_off"})]
+
+
+def test_debouncer_amend_and_supersede():
+    debouncer = Debouncer(interval=1.0, name="test_debounce")
+    debouncer.submit("301", {"action": "power_off"}, now=0.0)
+    debouncer.submit("301", POWER_ON, now=0.5)
+
+    # 立即处理的调温并入待处理的开机请求，不改变截止时间
+    assert debouncer.amend("301", {"action": "change_temp", "target_temp": 26})
+    assert debouncer.pending("301")["target_temp"] == 26
+    assert debouncer.next_deadline() == 1.5
+    # 覆盖规则不适用于 amend：待处理请求保持不变
+    assert not debouncer.amend("301", {"action": "power_off"})
+    assert debouncer.pending("301")["action"] == "power_on"
+
+    # 超过间隔到达的请求立即处理，待处理的旧请求作废
+    assert not debouncer.submit("301", {"action": "power_off"}, now=2.0)
+    assert debouncer.pending("301") is None
+    assert debouncer.pop_due(now=10.0) == []
+
+
+def test_scheduler_debounce():
+    from ac_system.scheduler import ACScheduler
+
+    old_name = setup_test_db()
+    saved = ACScheduler._instance
+    try:
+        with virtual_clock() as clock:
+            ACScheduler._instance = None  # 不使用全局调度器
+            scheduler = ACScheduler()
+            room_id = create_rooms(1)[0]
+            scheduler.init_rooms([room_id])
+            record = scheduler.service_manager.get_record(room_id)
+
+            result = scheduler.submit_request(room_id, POWER_ON)
+            assert result["status"] == "success"
+            assert record.status == "on" and record.fan_speed == "medium"
+
+            # 连续调风速：间隔内合并，最后一次请求后一个防抖间隔处理
+            for speed in ("high", "low", "high"):
+                clock.advance(0.3)
+                assert scheduler.submit_request(room_id, {"action": "change_speed", "fan_speed": speed})[
+                    "status"
+                ] == "pending"
+            clock.advance(0.5)
+            scheduler._tick()
+            assert record.fan_speed == "medium"  # 尚未到期
+            clock.advance(0.5)
+            scheduler._tick()
+            assert record.fan_speed == "high"
+            assert len(scheduler.debouncer) == 0
+
+            # 连续调温：第一次立即处理，窗口内的后续请求只保留最后一次，响应立即反映新目标温度
+            clock.advance(5)
+            change_temp = {"action": "change_temp", "mode": "cooling"}
+            assert scheduler.submit_request(room_id, {**change_temp, "target_temp": 24})["status"] == "success"
+            assert record.target_temp == 24
+            for target in (25, 26):
+                clock.advance(0.1)
+                assert scheduler.submit_request(room_id, {**change_temp, "target_temp": target})[
+                    "status"
+                ] == "pending"
+                assert scheduler.requested_state(room_id)["target_temp"] == target
+            assert record.target_temp == 24
+            clock.advance(0.5)
+            scheduler._tick()
+            assert record.target_temp == 26
+            assert len(scheduler.temp_debouncer) == 0
+
+            # 关机后在窗口内调风速：到期后房间关机
+            clock.advance(5)
+            assert scheduler.submit_request(room_id, {"action": "change_speed", "fan_speed": "low"})[
+                "status"
+            ] == "success"
+            clock.advance(0.3)
+            assert scheduler.submit_request(room_id, {"action": "power_off"})["status"] == "pending"
+            clock.advance(0.3)
+            assert scheduler.submit_request(room_id, {"action": "change_speed", "fan_speed": "high"})[
+                "status"
+            ] == "pending"
+            clock.advance(1)
+            scheduler._tick()
+            assert record.status == "off" and not record.is_on
+
+            # 开机后在窗口内关机再开机：先关机再开机，使用最后一次开机的参数
+            clock.advance(5)
+            scheduler.submit_request(room_id, POWER_ON)
+            assert record.status == "on"
+            since = scheduler.event_log.last_seq
+            clock.advance(0.3)
+            scheduler.submit_request(room_id, {"action": "power_off"})
+            clock.advance(0.3)
+            scheduler.submit_request(room_id, {**POWER_ON, "fan_speed": "low"})
+            clock.advance(1)
+            scheduler._tick()
+            events = [e["type"] for e in scheduler.event_log.query(since=since, room_id=room_id)["events"]]
+            assert events == ["power_off", "power_on"]
+            assert record.status == "on" and record.fan_speed == "low"
+    finally:
+        ACScheduler._instance = saved
+        teardown_test_db(old_name)
+
+
+def test_due_requests_processed_by_deadline():
+    from ac_system.scheduler import ACScheduler
+
+    old_name = setup_test_db()
+    saved = ACScheduler._instance
+    try:
+        with virtual_clock() as clock:
+            ACScheduler._instance = None  # 不使用全局调度器
+            scheduler = ACScheduler()
+            room_id = create_rooms(1)[0]
+            scheduler.init_rooms([room_id])
+            scheduler.submit_request(room_id, POWER_ON)
+
+            change_temp = {"action": "change_temp", "mode": "cooling"}
+            clock.advance(0.2)
+            scheduler.submit_request(room_id, {**change_temp, "target_temp": 24})  # 立即处理
+            clock.advance(0.1)
+            scheduler.submit_request(room_id, {**change_temp, "target_temp": 26})  # 0.8 秒到期
+            clock.advance(0.2)
+            scheduler.submit_request(room_id, {"action": "power_off"})  # 1.5 秒到期
+
+            handled = []
+            handle = scheduler._handle_request
+
+            def record_order(room_id, request):
+                handled.append(request["action"])
+                handle(room_id, request)
+
+            clock.advance(2)
+            with mock.patch.object(scheduler, "_handle_request", record_order):
+                scheduler._tick()
+            assert handled == ["change_temp", "power_off"]
+    finally:
+        ACScheduler._instance = saved
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    test_coalesce_rules()
+    test_debouncer_fires_once_after_last_request()
+    test_debouncer_keeps_pending_power_off()
+    test_debouncer_amend_and_supersede()
+    test_scheduler_debounce()
+    test_due_requests_processed_by_deadline()
+    print("Test finished.")
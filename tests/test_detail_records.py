@@ -0,0 +1,108 @@
+"""
+详单写入测试
+
+- 主循环批量写入详单期间，其他线程（关机、退房请求）结束同一房间的详单，结束字段不能丢失
+- 批量写入和立即结束详单（bulk_create / update() 不发送 post_save 信号）后递增数据库变更计数
+
+在独立的测试数据库文件上运行（多个线程访问），不影响 hotel.db
+"""
+
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms
+
+from django.db import connection
+
+from ac_system.models import ACDetailRecord
+from ac_system.scheduler import ACServiceManager
+from ac_system.versioning import data_version
+
+
+def start_service(manager: ACServiceManager, room_id: str):
+    manager.init_room(room_id)
+    record = manager.get_record(room_id)
+    record.status = "on"
+    manager.create_detail_record(record)
+    return record
+
+
+def test_close_during_flush():
+    old_name = setup_test_db(os.path.join(tempfile.mkdtemp(), "test_records.db"))
+    try:
+        room_id = create_rooms(1)[0]
+        manager = ACServiceManager()
+        flushing = threading.Event()
+        bulk_create = ACDetailRecord.objects.bulk_create
+
+        def slow_bulk_create(records, *args, **kwargs):
+            # 写入前暂停，让另一个线程在写入过程中结束详单
+            flushing.set()
+            time.sleep(0.3)
+            return bulk_create(records, *args, **kwargs)
+
+        def power_off(record):
+            flushing.wait(5)
+            try:
+                manager.end_detail_record(record)
+            finally:
+                connection.close()
+
+        with mock.patch.object(ACDetailRecord.objects, "bulk_create", slow_bulk_create):
+            with manager.batch_detail_records():
+                record = start_service(manager, room_id)
+                assert record.record_id < 0  # 临时详单号
+                record.cost += Decimal("1.50")
+                record.energy_consumed += 1.5
+                request_thread = threading.Thread(target=power_off, args=(record,))
+                request_thread.start()
+            request_thread.join(5)
+
+        row = ACDetailRecord.objects.get(room_id=room_id)
+        print(f"Record {row.record_id}: end_time={row.end_time}, cost={row.cost}")
+        assert row.end_time is not None
+        assert row.cost == Decimal("1.50")
+        assert row.energy_consumed == 1.5
+        assert record.record_id is None
+    finally:
+        teardown_test_db(old_name)
+
+
+def test_record_writes_bump_data_version():
+    old_name = setup_test_db(os.path.join(tempfile.mkdtemp(), "test_records.db"))
+    try:
+        room_ids = create_rooms(2)
+        manager = ACServiceManager()
+
+        # 批量写入：新建详单后递增
+        version = data_version.value
+        with manager.batch_detail_records():
+            batched = start_service(manager, room_ids[0])
+        assert batched.record_id > 0
+        assert data_version.value > version
+
+        # 批量结束详单后递增
+        version = data_version.value
+        with manager.batch_detail_records():
+            manager.end_detail_record(batched)
+        assert data_version.value > version
+        assert ACDetailRecord.objects.get(room_id=room_ids[0]).end_time is not None
+
+        # 主循环之外立即结束详单（UPDATE）后递增
+        record = start_service(manager, room_ids[1])
+        version = data_version.value
+        manager.end_detail_record(record)
+        assert data_version.value > version
+        assert ACDetailRecord.objects.get(room_id=room_ids[1]).end_time is not None
+    finally:
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    test_close_during_flush()
+    test_record_writes_bump_data_version()
+    print("Test finished.")
@@ -0,0 +1,124 @@
+"""
+功率预算调度测试
+
+- Pool：功率预算模式下按风速功率之和判断能否准入，不再限制同时服务数
+- cover()：依次换出直到腾出足够功率，再放回多换出的房间
+- 调度器（虚拟时钟）：高风请求按需抢占多个低风房间；随机请求序列下每次主循环后
+  服务中房间的功率之和都不超过预算
+"""
+
+import random
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms, virtual_clock
+
+from ac_system.policies import LOAD_EPSILON, cover
+from ac_system.scheduler import Pool, RoomRecord, fan_power_kw
+
+BUDGET = 90  # 低 / 中 / 高风 20 / 30 / 60 kW
+
+
+def serving_pool(*fan_speeds, budget=BUDGET, capacity=3):
+    pool = Pool("test", capacity=capacity, power_budget=budget)
+    for i, fan_speed in enumerate(fan_speeds):
+        pool.service_queue[f"r{i}"] = RoomRecord(f"r{i}", fan_speed=fan_speed)
+    return pool
+
+
+def test_pool_admission():
+    pool = serving_pool("low", "low", "low")  # 60 kW，已达到同时服务数上限 3
+    assert pool.load() == 60
+    assert pool.can_admit("medium")  # 90 kW
+    assert not pool.can_admit("high")  # 120 kW
+    assert not pool.is_full()
+    pool.service_queue["r3"] = RoomRecord("r3", fan_speed="medium")
+    assert pool.is_full() and not pool.overloaded()
+    assert pool.stats()["power_draw"] == 90
+    assert pool.stats()["utilization"] == 1.0
+
+    pool.service_queue["r3"].fan_speed = "high"  # 服务中房间调高风速
+    assert pool.overloaded()
+
+    # 功率预算为 0 时按同时服务数调度
+    slots = serving_pool("low", "low", budget=0)
+    assert slots.can_admit("high")
+    slots.service_queue["r2"] = RoomRecord("r2", fan_speed="low")
+    assert not slots.can_admit("low") and slots.is_full()
+
+
+def test_cover():
+    pool = serving_pool("low", "high")  # 80 kW
+    candidates = list(pool.service_queue.items())
+    # 中风需要腾出 20 kW：换出低风即可
+    assert [sid for sid, _ in cover(pool, "medium", candidates)] == ["r0"]
+    # 高风需要腾出 50 kW：依次换出低风、高风后，低风放回
+    assert [sid for sid, _ in cover(pool, "high", candidates)] == ["r1"]
+    # 放得下：不需要换出
+    small = serving_pool("low")
+    assert cover(small, "high", list(small.service_queue.items())) == []
+    # 候选全部换出仍不够
+    assert cover(pool, "high", candidates[:1]) is None
+
+
+def test_scheduler_respects_budget():
+    from ac_system.scheduler import ACScheduler
+    from config import DEFAULT_SERVICE_POOL
+
+    old_name = setup_test_db()
+    saved = ACScheduler._instance
+    try:
+        with virtual_clock() as clock:
+            ACScheduler._instance = None  # 不使用全局调度器
+            scheduler = ACScheduler()
+            pool = scheduler.pools[DEFAULT_SERVICE_POOL]
+            pool.capacity = 3
+            pool.power_budget = BUDGET
+            room_ids = create_rooms(8)
+            scheduler.init_rooms(room_ids)
+            for room_id in room_ids:
+                scheduler.set_room_temperature(room_id, 32, "cooling")
+
+            def power_on(room_id, fan_speed):
+                scheduler._power_on(room_id, {"target_temp": 18, "fan_speed": fan_speed, "mode": "cooling"})
+
+            # 4 间低风（80 kW）同时服务，超过同时服务数上限 3
+            for room_id in room_ids[:4]:
+                power_on(room_id, "low")
+            assert len(pool.service_queue) == 4
+            power_on(room_ids[4], "low")
+            assert room_ids[4] in pool.wait_queue
+
+            # 高风（60 kW）需要腾出 50 kW：抢占 3 间低风
+            power_on(room_ids[5], "high")
+            assert room_ids[5] in pool.service_queue
+            assert len(pool.service_queue) == 2
+            assert pool.load() == 80
+            assert len(pool.wait_queue) == 4
+
+            # 随机请求序列：每次主循环后功率之和不超过预算
+            rng = random.Random(42)
+            for _ in range(600):
+                if rng.random() < 0.1:
+                    room_id = rng.choice(room_ids)
+                    roll = rng.random()
+                    if roll < 0.5:
+                        power_on(room_id, rng.choice(["low", "medium", "high"]))
+                    elif roll < 0.8:
+                        scheduler._handle_request(
+                            room_id, {"action": "change_speed", "fan_speed": rng.choice(["low", "medium", "high"])}
+                        )
+                    else:
+                        scheduler._handle_request(room_id, {"action": "power_off"})
+                scheduler._tick()
+                clock.advance(1)
+                draw = sum(fan_power_kw(r.fan_speed) for r in pool.service_queue.values())
+                assert draw <= BUDGET + LOAD_EPSILON
+    finally:
+        ACScheduler._instance = saved
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    test_pool_admission()
+    test_cover()
+    test_scheduler_respects_budget()
+    print("Test finished.")
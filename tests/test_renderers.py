@@ -0,0 +1,63 @@
+"""
+JSON 渲染器测试
+
+- Accept-Encoding 按 q 值判断是否压缩（gzip;q=0 不压缩）
+- orjson 不支持的数据（超过 64 位的整数）回退到标准库编码，输出与 DRF JSONRenderer 相同
+"""
+
+import gzip
+import json
+
+import bench_env  # noqa: F401  初始化 Django 环境
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from ac_system import renderers
+from ac_system.renderers import accepts_gzip, compress_body
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip")
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("deflate, GZIP;q=0.5")
+    assert accepts_gzip("*")
+    assert accepts_gzip("br, *;q=0.1")
+    assert not accepts_gzip("")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip; q=0.0, deflate")
+    assert not accepts_gzip("*;q=1, gzip;q=0")
+    assert not accepts_gzip("gzipped")
+    assert not accepts_gzip("gzip;q=abc")
+
+
+@override_settings(FAST_JSON_GZIP_MIN_BYTES=10)
+def test_compress_body_respects_q_zero():
+    body = b'{"data":"' + b"x" * 100 + b'"}'
+    factory = RequestFactory()
+
+    response = HttpResponse()
+    request = factory.get("/", HTTP_ACCEPT_ENCODING="gzip;q=0, deflate")
+    assert compress_body(body, request, response) == body
+    assert "Content-Encoding" not in response
+
+    response = HttpResponse()
+    request = factory.get("/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert gzip.decompress(compress_body(body, request, response)) == body
+    assert response["Content-Encoding"] == "gzip"
+
+
+def test_big_int_falls_back_to_stdlib():
+    data = {"big": 2**70, "negative": -(2**65), "small": [1, 2.5, "房间"]}
+    body = renderers.dumps(data)
+    assert json.loads(body) == data
+    assert body == JSONRenderer().render(data)
+
+
+if __name__ == "__main__":
+    test_accepts_gzip()
+    test_compress_body_respects_q_zero()
+    test_big_int_falls_back_to_stdlib()
+    print("Test finished.")
@@ -0,0 +1,133 @@
+"""
+共享内存状态表（seqlock）测试
+
+- 写入后读取方得到相同的快照字段和待处理调温；释放、复用行后读取方重新扫描，不会读到其他房间
+- 表满时不写入并在表头标记
+- 行正在写入（序号为奇数）时读取方重试后放弃，不返回写了一半的行
+- 写入进程不停改写各行时，读取方读到的每一行各字段一致（没有撕裂）
+"""
+
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import bench_env  # noqa: F401  初始化 Django 环境
+from bench_state_table import _stress_writer
+
+from ac_system.state_table import HEADER_SIZE, ROW, StateTable, _SEQ
+
+STRESS_SECONDS = 0.5
+
+
+def snapshot(room_id, temp=25.0, status="on", wait_start=None):
+    return (
+        room_id, status != "off", status, temp, 22.0, "high", "cooling",
+        1.5, 3.0, 12.0 if status == "on" else None,
+        wait_start, 60.0 if wait_start else None, None, None,
+    )
+
+
+def table_name(label):
+    return f"test_state_table_{label}_{os.getpid()}"
+
+
+def test_write_and_read():
+    table = StateTable.create(table_name("rw"), capacity=4)
+    reader = StateTable.attach(table.name, untrack=False)
+    try:
+        wait_start = datetime(2026, 7, 1, 8, 30)
+        table.write(snapshot("301"), version=3)
+        table.write(snapshot("302", status="waiting", wait_start=wait_start), version=4, pending=(24.0, "heating"))
+
+        row = reader.read("301")
+        assert row.version == 3
+        assert row.fields == snapshot("301")
+        assert row.pending_target is None and row.pending_mode is None
+        row = reader.read("302")
+        assert row.fields == snapshot("302", status="waiting", wait_start=wait_start)
+        assert (row.pending_target, row.pending_mode) == (24.0, "heating")
+        assert reader.read("303") is None
+
+        # 全量写入释放 301，空出的行分配给 303：读取方重新扫描，301 不再可读
+        table.sync([snapshot("302"), snapshot("303", temp=27.0)], 5, lambda room_id: None)
+        assert reader.read("301") is None
+        assert reader.read("303").fields == snapshot("303", temp=27.0)
+        assert reader.read("302").version == 5
+    finally:
+        reader.close()
+        table.close()
+
+
+def test_overflow():
+    table = StateTable.create(table_name("overflow"), capacity=2)
+    try:
+        for room_id in ("301", "302", "303"):
+            table.write(snapshot(room_id), version=1)
+        assert table.overflowed()
+        assert table.read("302") is not None
+        assert table.read("303") is None
+    finally:
+        table.close()
+
+
+def test_reader_skips_row_being_written():
+    table = StateTable.create(table_name("odd"), capacity=2)
+    try:
+        table.write(snapshot("301"), version=1)
+        offset = HEADER_SIZE
+        seq = _SEQ.unpack_from(table.buf, offset)[0]
+        # 模拟写入方写到一半：序号为奇数，温度已改写
+        _SEQ.pack_into(table.buf, offset, seq + 1)
+        values = list(ROW.unpack_from(table.buf, offset))
+        values[0] = seq + 1
+        values[8] = 99.0
+        ROW.pack_into(table.buf, offset, *values)
+        assert table.read("301") is None
+        _SEQ.pack_into(table.buf, offset, seq + 2)  # 写入完成
+        assert table.read("301").fields[3] == 99.0
+    finally:
+        table.close()
+
+
+def test_concurrent_reads_are_consistent():
+    rooms = 64
+    name = table_name("stress")
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    finished = context.Event()
+    writer = context.Process(target=_stress_writer, args=(name, rooms, STRESS_SECONDS, queue, finished))
+    writer.start()
+    try:
+        assert queue.get(timeout=30) == "ready"
+        table = StateTable.attach(name, untrack=False)
+        room_ids = [f"r{i:05d}" for i in range(rooms)]
+        reads = torn = missed = 0
+        deadline = time.perf_counter() + STRESS_SECONDS
+        while time.perf_counter() < deadline:
+            row = table.read(room_ids[reads % rooms])
+            reads += 1
+            if row is None:
+                missed += 1
+                continue
+            f = row.fields
+            # 写入方在一行的温度、能耗、费用等字段和版本号写同一个值
+            if not (f[3] == f[4] == f[7] == f[8] == f[9] == row.version):
+                torn += 1
+        table.close()
+        print(f"Reads: {reads}, torn: {torn}, missed: {missed}")
+        assert reads > 0
+        assert torn == 0
+        assert missed < reads
+        queue.get(timeout=30)  # 写入速度
+    finally:
+        finished.set()
+        writer.join(30)
+
+
+if __name__ == "__main__":
+    test_write_and_read()
+    test_overflow()
+    test_reader_skips_row_being_written()
+    test_concurrent_reads_are_consistent()
+    print("Test finished.")
@@ -0,0 +1,110 @@
+"""
+热启动测试
+
+数据库中有入住订单、ACState 和重启前未结束的详单，新调度器 warm_start() 后：
+- 关机 / 待机房间按 ACState 恢复，待机房间重新计算重启时刻
+- 重启前开机的房间按风速优先级重新准入：服务池放得下的继续原详单，
+  放不下的结束原详单后进入等待队列
+- 没有入住订单的房间遗留的详单被结束；数据库中未结束的详单恰好是房间记录正在使用的详单
+- 启动前已在调度器中的房间不受影响
+"""
+
+from datetime import timedelta
+
+from bench_env import setup_test_db, teardown_test_db, create_rooms
+
+from django.utils import timezone
+
+from ac_system.models import ACDetailRecord, ACState, AccommodationOrder, Customer
+
+# 房间下标 -> (ACState 状态, 风速, 是否有未结束的详单)
+ROOMS = {
+    0: ("off", "medium", False),
+    1: ("standby", "medium", False),
+    2: ("on", "high", True),
+    3: ("on", "low", True),
+    4: ("waiting", "medium", False),
+}
+
+
+def create_state(room_ids):
+    """入住订单、ACState 和未结束的详单；最后一个房间没有入住订单，只有遗留的详单"""
+    now = timezone.now()
+    records = {}
+    for i, room_id in enumerate(room_ids):
+        customer = Customer.objects.create(name=f"顾客{i}", id_card=f"{i:018d}", phone=f"138{i:08d}")
+        order = AccommodationOrder.objects.create(
+            customer=customer, room_id=room_id, status="active" if i in ROOMS else "completed", room_fee=100
+        )
+        status, fan_speed, has_record = ROOMS.get(i, ("off", "medium", True))
+        ACState.objects.create(
+            room_id=room_id,
+            is_on=status != "off",
+            status=status,
+            current_temp=26,
+            target_temp=22,
+            fan_speed=fan_speed,
+        )
+        if has_record:
+            records[room_id] = ACDetailRecord.objects.create(
+                room_id=room_id,
+                order=order,
+                start_time=now - timedelta(seconds=60),
+                start_temp=26,
+                target_temp=22,
+                fan_speed=fan_speed,
+                mode="cooling",
+            ).record_id
+    return records
+
+
+def test_warm_start():
+    from ac_system.scheduler import ACScheduler, load_warm_start_data
+    from config import DEFAULT_SERVICE_POOL
+
+    old_name = setup_test_db()
+    saved = ACScheduler._instance
+    try:
+        room_ids = create_rooms(len(ROOMS) + 2)
+        records = create_state(room_ids[: len(ROOMS) + 1])
+        resident = room_ids[-1]
+
+        ACScheduler._instance = None  # 模拟重启后的新调度器
+        scheduler = ACScheduler()
+        pool = scheduler.pools[DEFAULT_SERVICE_POOL]
+        pool.capacity = 2
+        scheduler.init_rooms([resident])  # 启动前入住的房间
+        restored = scheduler.warm_start(load_warm_start_data())
+        manager = scheduler.service_manager
+
+        assert restored == len(ROOMS)
+        off, standby, high, low, waiting = (manager.get_record(room_ids[i]) for i in ROOMS)
+        assert off.status == "off" and not off.is_on
+        assert standby.status == "standby" and standby.room_id in manager._restart_at
+
+        # 高风继续原详单，中风（重启前等待中）分配新详单，低风放不下：结束原详单后等待
+        assert set(pool.service_queue) == {high.room_id, waiting.room_id}
+        assert high.record_id == records[high.room_id]
+        assert waiting.record_id is not None and waiting.record_id not in records.values()
+        assert set(pool.wait_queue) == {low.room_id}
+        assert ACDetailRecord.objects.get(record_id=records[low.room_id]).end_time is not None
+
+        # 没有入住订单的房间：遗留的详单已结束，不在调度器中
+        stale = room_ids[len(ROOMS)]
+        assert stale not in manager.room_states
+        assert ACDetailRecord.objects.get(record_id=records[stale]).end_time is not None
+
+        still_open = set(ACDetailRecord.objects.filter(end_time__isnull=True).values_list("record_id", flat=True))
+        in_use = {r.record_id for r in manager.room_states.values() if r.record_id}
+        assert still_open == in_use
+
+        assert manager.get_record(resident).status == "off"
+        assert scheduler.get_room_state(high.room_id)["status"] == "on"  # 已发布快照
+    finally:
+        ACScheduler._instance = saved
+        teardown_test_db(old_name)
+
+
+if __name__ == "__main__":
+    test_warm_start()
+    print("Test finished.")